@@ -6,8 +6,9 @@ from datetime import datetime
 from decimal import Decimal
 from logged_groups import logged_group
 
-from ..common_neon.environment_data import EVM_LOADER_ID, NEON_PRICE_USD
+from ..common_neon.environment_data import EVM_LOADER_ID, NEON_PRICE_USD, PARALLEL_REQUESTS
 from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.solana_async_interactor import AsyncSolanaInteractor
 from ..indexer.indexer_base import IndexerBase
 from ..indexer.pythnetwork import PythNetworkClient
 from ..indexer.base_db import BaseDB
@@ -24,7 +25,7 @@ class FailedAttempts(BaseDB):
         BaseDB.__init__(self, 'failed_airdrop_attempts')
 
     def airdrop_failed(self, eth_address, reason):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'''
             INSERT INTO {self._table_name} (attempt_time, eth_address, reason)
             VALUES ({datetime.now().timestamp()}, '{eth_address}', '{reason}')
@@ -38,14 +39,14 @@ class AirdropReadySet(BaseDB):
     def register_airdrop(self, eth_address: str, airdrop_info: dict):
         finished = int(datetime.now().timestamp())
         duration = finished - airdrop_info['scheduled']
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'''
             INSERT INTO {self._table_name} (eth_address, scheduled_ts, finished_ts, duration, amount_galans)
             VALUES ('{eth_address}', {airdrop_info['scheduled']}, {finished}, {duration}, {airdrop_info['amount']})
             ''')
 
     def is_airdrop_ready(self, eth_address):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f"SELECT 1 FROM {self._table_name} WHERE eth_address = '{eth_address}'")
             return cur.fetchone() is not None
 
@@ -64,7 +65,7 @@ class Airdropper(IndexerBase):
 
         solana = SolanaInteractor(solana_url)
         last_known_slot = self._constants.get('latest_processed_slot', None)
-        IndexerBase.__init__(self, solana, last_known_slot)
+        IndexerBase.__init__(self, solana, last_known_slot, AsyncSolanaInteractor(solana_url, PARALLEL_REQUESTS))
         self.latest_processed_slot = self.last_slot
 
         # collection of eth-address-to-create-accout-trx mappings
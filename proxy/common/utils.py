@@ -101,23 +101,25 @@ def build_http_pkt(line: List[bytes],
 def build_websocket_handshake_request(
         key: bytes,
         method: bytes = b'GET',
-        url: bytes = b'/') -> bytes:
+        url: bytes = b'/',
+        host: Optional[bytes] = None) -> bytes:
     """
     Build and returns a Websocket handshake request packet.
 
     :param key: Sec-WebSocket-Key header value.
     :param method: HTTP method.
     :param url: Websocket request path.
+    :param host: Host header value, the header is omitted if None.
     """
-    return build_http_request(
-        method, url,
-        headers={
-            b'Connection': b'upgrade',
-            b'Upgrade': b'websocket',
-            b'Sec-WebSocket-Key': key,
-            b'Sec-WebSocket-Version': b'13',
-        }
-    )
+    headers = {
+        b'Connection': b'upgrade',
+        b'Upgrade': b'websocket',
+        b'Sec-WebSocket-Key': key,
+        b'Sec-WebSocket-Version': b'13',
+    }
+    if host is not None:
+        headers = {b'Host': host, **headers}
+    return build_http_request(method, url, headers=headers)
 
 
 def build_websocket_handshake_response(accept: bytes) -> bytes:
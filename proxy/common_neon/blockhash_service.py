@@ -0,0 +1,165 @@
+import ctypes
+import multiprocessing as mp
+import threading
+import time
+import traceback
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from logged_groups import logged_group
+from solana.blockhash import Blockhash
+
+from ..memdb.shared_store import SharedValue
+from .process_local import ProcessLocal
+from .environment_data import BLOCKHASH_REFRESH_SLOT_CNT, BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT
+
+
+@logged_group("neon.Proxy")
+class BlockhashService:
+    """
+    The latest blockhash for all workers.
+
+    Each process has a background thread, but only one of them requests getLatestBlockhash on each refresh:
+    the thread takes the refresh under the shared lock, other threads see the fresh time and skip it.
+    The refresh period is BLOCKHASH_REFRESH_SLOT_CNT slots, the slot time is measured by slots of responses.
+    The state is published in the shared memory with recent blockhashes and their last valid block heights,
+    so workers send transactions without requesting the blockhash and find transactions near expiry.
+    """
+
+    # Solana accepts transactions with the blockhash of one of the last 150 blocks
+    MAX_BLOCKHASH_AGE = 150
+    DEFAULT_SLOT_TIME_SEC = 0.4
+    MIN_REFRESH_SEC = 0.1
+    MAX_REFRESH_SEC = 10
+    # the shared blockhash isn't used, if it isn't refreshed in so many refresh periods
+    STALE_REFRESH_CNT = 4
+    HISTORY_LEN = 64
+
+    # Global state for all workers
+    _state = SharedValue(64 * 1024, None)
+    _last_time = mp.Value(ctypes.c_double, 0)
+    _has_active_request = mp.Value(ctypes.c_bool, False)
+    _request_time = mp.Value(ctypes.c_double, 0)
+
+    def __init__(self, solana):
+        self._solana = solana
+        self._thread = threading.Thread(target=self._run, name='blockhash-service', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _get_refresh_sec(state: Optional[Dict[str, Any]]) -> float:
+        slot_time = state['slot_time'] if state else BlockhashService.DEFAULT_SLOT_TIME_SEC
+        refresh_sec = slot_time * BLOCKHASH_REFRESH_SLOT_CNT
+        return min(max(refresh_sec, BlockhashService.MIN_REFRESH_SEC), BlockhashService.MAX_REFRESH_SEC)
+
+    def _get_fresh_state(self) -> Optional[Dict[str, Any]]:
+        state = self._state.value
+        if not state:
+            return None
+        if time.time() - state['time'] > self._get_refresh_sec(state) * self.STALE_REFRESH_CNT:
+            return None
+        return state
+
+    def get_blockhash(self) -> Optional[Blockhash]:
+        """The latest blockhash, None if the service can't refresh it"""
+        state = self._get_fresh_state()
+        if state is None:
+            return None
+        blockhash, _ = state['blockhash_list'][-1]
+        return Blockhash(blockhash)
+
+    def is_near_expiry(self, blockhash: Optional[str]) -> bool:
+        """True for known blockhashes, which expire in less than BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT blocks"""
+        state = self._get_fresh_state()
+        if (state is None) or (not blockhash):
+            return False
+
+        _, latest_valid_height = state['blockhash_list'][-1]
+        block_height = latest_valid_height - self.MAX_BLOCKHASH_AGE
+        for known_blockhash, last_valid_height in state['blockhash_list']:
+            if known_blockhash == blockhash:
+                return last_valid_height - block_height < BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT
+        return False
+
+    def _has_alive_request(self, now: float) -> bool:
+        # the worker can be killed in the middle of the request
+        return self._has_active_request.value and (now - self._request_time.value < self.MAX_REFRESH_SEC)
+
+    def _start_request(self) -> bool:
+        now = time.time()
+        if now - self._last_time.value < self._get_refresh_sec(self._state.value):
+            return False
+        elif self._has_alive_request(now):
+            return False
+
+        with self._last_time.get_lock():
+            if self._has_alive_request(now):
+                return False
+            self._has_active_request.value = True
+            self._request_time.value = now
+        return True
+
+    def _stop_request(self) -> None:
+        with self._last_time.get_lock():
+            self._has_active_request.value = False
+            self._last_time.value = time.time()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                if self._start_request():
+                    try:
+                        self._refresh()
+                    finally:
+                        self._stop_request()
+            except Exception as err:
+                err_tb = "".join(traceback.format_tb(err.__traceback__))
+                self.warning(f'Fail to refresh the blockhash: {err}: {err_tb}')
+
+            wait_sec = self._last_time.value + self._get_refresh_sec(self._state.value) - time.time()
+            time.sleep(min(max(wait_sec, self.MIN_REFRESH_SEC), self.MAX_REFRESH_SEC))
+
+    def _refresh(self) -> None:
+        response = self._solana.get_latest_blockhash_info()
+        result = response.get('result')
+        if not result:
+            raise RuntimeError(f'failed to get latest blockhash: {response}')
+
+        slot = result['context']['slot']
+        blockhash = result['value']['blockhash']
+        last_valid_height = result['value']['lastValidBlockHeight']
+        self._state.value = self._get_new_state(self._state.value, slot, blockhash, last_valid_height, time.time())
+
+    @classmethod
+    def _get_new_state(cls, state: Optional[Dict[str, Any]], slot: int, blockhash: str, last_valid_height: int,
+                       now: float) -> Dict[str, Any]:
+        blockhash_list: List[Tuple[str, int]] = []
+        slot_time = cls.DEFAULT_SLOT_TIME_SEC
+        if state:
+            blockhash_list = [
+                (known_blockhash, known_height) for known_blockhash, known_height in state['blockhash_list']
+                if (known_blockhash != blockhash) and (known_height > last_valid_height - cls.MAX_BLOCKHASH_AGE)
+            ]
+            slot_time = state['slot_time']
+            if slot > state['slot']:
+                # smooth the measured slot time, because responses come from different nodes
+                measured_slot_time = (now - state['time']) / (slot - state['slot'])
+                slot_time = slot_time * 0.8 + measured_slot_time * 0.2
+
+        blockhash_list.append((blockhash, last_valid_height))
+        return {
+            'blockhash_list': blockhash_list[-cls.HISTORY_LEN:],
+            'slot': slot,
+            'slot_time': slot_time,
+            'time': now
+        }
+
+
+_service: ProcessLocal[BlockhashService] = ProcessLocal(BlockhashService)
+
+
+def get_blockhash_service(solana) -> Optional[BlockhashService]:
+    """The service of the process, None if BLOCKHASH_REFRESH_SLOT_CNT is 0"""
+    if BLOCKHASH_REFRESH_SLOT_CNT == 0:
+        return None
+    return _service.get(solana)
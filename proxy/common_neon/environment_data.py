@@ -4,6 +4,8 @@ from solana.publickey import PublicKey
 
 SOLANA_URL = os.environ.get("SOLANA_URL", "http://localhost:8899")
 PP_SOLANA_URL = os.environ.get("PP_SOLANA_URL", SOLANA_URL)
+# comma-separated list of Solana RPC nodes for requests of the proxy, neon-cli always uses SOLANA_URL
+SOLANA_URL_LIST = [url.strip() for url in os.environ.get("SOLANA_URL_LIST", SOLANA_URL).split(',') if url.strip()]
 EVM_LOADER_ID = os.environ.get("EVM_LOADER")
 neon_cli_timeout = float(os.environ.get("NEON_CLI_TIMEOUT", "0.5"))
 CONFIRMATION_CHECK_DELAY = float(os.environ.get("NEON_CONFIRMATION_CHECK_DELAY", "0.1"))
@@ -58,3 +60,83 @@ FETCH_BLOCK_FROM_NET_IF_NOT_FOUND = os.environ.get("FETCH_BLOCK_FROM_NET_IF_NOT_
 # only track Solana blocks that have NEON transactions in them
 ONLY_TRACK_BLOCKS_WITH_NEON_TRANSACTION = os.environ.get("ONLY_TRACK_BLOCKS_WITH_NEON_TRANSACTION", "NO") == "YES"
 GEN_FAKE_BLOCK_FOR_GET_BY_BLOCK_NUMBER = os.environ.get("GEN_FAKE_BLOCK_FOR_GET_BY_BLOCK_NUMBER", "YES") == "YES"
+# execute JSON-RPC methods in a worker pool instead of the connection event loop
+ASYNC_RPC_DISPATCH = os.environ.get("ASYNC_RPC_DISPATCH", "NO") == "YES"
+RPC_WORKER_POOL_SIZE = max(int(os.environ.get("RPC_WORKER_POOL_SIZE", "16")), 1)
+# comma-separated list of method:limit pairs, methods without a limit share the whole pool
+RPC_METHOD_CONCURRENCY_LIMITS = os.environ.get(
+    "RPC_METHOD_CONCURRENCY_LIMITS",
+    "eth_sendRawTransaction:4,eth_sendTransaction:4,eth_call:8,eth_estimateGas:8"
+)
+# number of entries of a JSON-RPC batch request executed concurrently
+RPC_BATCH_FAN_OUT = max(int(os.environ.get("RPC_BATCH_FAN_OUT", "8")), 1)
+# count of eth_call results cached for the latest slot, 0 disables the cache,
+# the cache is FIFO: the oldest result is evicted on overflow of the count or of the memory limit
+ETH_CALL_CACHE_SIZE = max(int(os.environ.get("ETH_CALL_CACHE_SIZE", "4096")), 0)
+# memory of the FIFO cache of eth_call results
+ETH_CALL_CACHE_MEMORY_LIMIT_MB = max(int(os.environ.get("ETH_CALL_CACHE_MEMORY_LIMIT_MB", "64")), 1)
+# size of shared memory buffers of cross-worker caches in memdb
+MEMDB_STORE_SIZE_MB = max(int(os.environ.get("MEMDB_STORE_SIZE_MB", "16")), 1)
+MEMDB_STORE_ITEM_LIMIT = max(int(os.environ.get("MEMDB_STORE_ITEM_LIMIT", "65536")), 16)
+# write eth_getLogs responses with the chunked encoding, logs are read from the DB by chunks of LOG_STREAM_CHUNK_SIZE
+ETH_GET_LOGS_STREAM = os.environ.get("ETH_GET_LOGS_STREAM", "YES") == "YES"
+LOG_STREAM_CHUNK_SIZE = max(int(os.environ.get("LOG_STREAM_CHUNK_SIZE", "1000")), 1)
+# max count of concurrent requests from one process to one Solana endpoint by the async interactor
+SOLANA_MAX_CONCURRENT_REQUESTS = max(int(os.environ.get("SOLANA_MAX_CONCURRENT_REQUESTS", "16")), 1)
+# exponential backoff with the full jitter between retries of failed Solana requests
+SOLANA_RETRY_BASE_DELAY_SEC = float(os.environ.get("SOLANA_RETRY_BASE_DELAY_SEC", "0.1"))
+SOLANA_RETRY_MAX_DELAY_SEC = float(os.environ.get("SOLANA_RETRY_MAX_DELAY_SEC", "2"))
+SOLANA_REQUEST_TIMEOUT_SEC = float(os.environ.get("SOLANA_REQUEST_TIMEOUT_SEC", "30"))
+# health check period and the max slot lag of a Solana node from SOLANA_URL_LIST to receive requests
+SOLANA_HEALTH_CHECK_SEC = float(os.environ.get("SOLANA_HEALTH_CHECK_SEC", "5"))
+SOLANA_MAX_SLOTS_BEHIND = max(int(os.environ.get("SOLANA_MAX_SLOTS_BEHIND", "20")), 0)
+# repeat a read request on the second node if the first one doesn't answer in max(hedge delay, its p95 latency)
+SOLANA_HEDGE_READS = os.environ.get("SOLANA_HEDGE_READS", "YES") == "YES"
+SOLANA_HEDGE_DELAY_SEC = float(os.environ.get("SOLANA_HEDGE_DELAY_SEC", "0.3"))
+SOLANA_LATENCY_WINDOW = max(int(os.environ.get("SOLANA_LATENCY_WINDOW", "100")), 1)
+# merge identical concurrent Solana reads of one process and fold single-account lookups into getMultipleAccounts
+SOLANA_COALESCE_REQUESTS = os.environ.get("SOLANA_COALESCE_REQUESTS", "YES") == "YES"
+SOLANA_ACCOUNT_BATCH_SIZE = min(max(int(os.environ.get("SOLANA_ACCOUNT_BATCH_SIZE", "100")), 1), 100)
+# decoded Neon accounts are cached for the observed slot, but not longer than the TTL, 0 disables the cache
+NEON_ACCOUNT_CACHE_TTL_SEC = max(float(os.environ.get("NEON_ACCOUNT_CACHE_TTL_SEC", "0.4")), 0)
+NEON_ACCOUNT_CACHE_SIZE = max(int(os.environ.get("NEON_ACCOUNT_CACHE_SIZE", "16384")), 1)
+# memory limit for the cache of contract codes, 0 disables the cache
+NEON_CODE_CACHE_SIZE_MB = max(int(os.environ.get("NEON_CODE_CACHE_SIZE_MB", "64")), 0)
+# websocket (ws://) of a Solana node for notifications about new slots, transactions of the EVM loader and
+# confirmations, empty disables notifications; without the connection the proxy and the indexer poll the RPC node
+SOLANA_WS_URL = os.environ.get("SOLANA_WS_URL", "")
+SOLANA_WS_RECONNECT_SEC = max(float(os.environ.get("SOLANA_WS_RECONNECT_SEC", "1")), 0.1)
+# max wait for a notification before the RPC node is polled anyway
+SOLANA_WS_MAX_WAIT_SEC = max(float(os.environ.get("SOLANA_WS_MAX_WAIT_SEC", "3")), 0.1)
+# batches of Solana requests are split into chunks of at most SOLANA_BATCH_MAX_REQUEST_KB, which are sent
+# concurrently, the item count of chunks adapts to the response time and to HTTP 413/429 of the node
+SOLANA_BATCH_MAX_REQUEST_KB = max(int(os.environ.get("SOLANA_BATCH_MAX_REQUEST_KB", "48")), 1)
+SOLANA_BATCH_TARGET_LATENCY_SEC = max(float(os.environ.get("SOLANA_BATCH_TARGET_LATENCY_SEC", "1")), 0.01)
+SOLANA_BATCH_CONCURRENCY = max(int(os.environ.get("SOLANA_BATCH_CONCURRENCY", "4")), 1)
+# JSON codec of Solana responses, RPC requests and logs: orjson if it is installed, json forces the standard library
+JSON_CODEC = os.environ.get("JSON_CODEC", "orjson")
+# receipts are requested by chunks of signatures, the indexer keeps up to the count of chunks in flight before decoding
+INDEXER_RECEIPT_CHUNK_LEN = max(int(os.environ.get("INDEXER_RECEIPT_CHUNK_LEN", "20")), 1)
+INDEXER_RECEIPT_PREFETCH_COUNT = max(int(os.environ.get("INDEXER_RECEIPT_PREFETCH_COUNT", "20")), 1)
+# the indexer, which is behind the finalized slot more than INDEXER_BACKFILL_MIN_SLOT_CNT slots, gathers signatures
+# of the history by shards in parallel, 0 disables the backfill
+INDEXER_BACKFILL_MIN_SLOT_CNT = max(int(os.environ.get("INDEXER_BACKFILL_MIN_SLOT_CNT", "50000")), 0)
+INDEXER_BACKFILL_SHARD_SLOT_CNT = max(int(os.environ.get("INDEXER_BACKFILL_SHARD_SLOT_CNT", "10000")), 1)
+INDEXER_BACKFILL_CONCURRENCY = max(int(os.environ.get("INDEXER_BACKFILL_CONCURRENCY", "8")), 1)
+# the indexer doesn't decode new receipts until the failed commit of the DB batch is retried successfully,
+# the retry delay is doubled on each error up to INDEXER_COMMIT_RETRY_MAX_SEC
+INDEXER_COMMIT_RETRY_MAX_SEC = max(float(os.environ.get("INDEXER_COMMIT_RETRY_MAX_SEC", "60")), 1)
+# count of Solana transactions of one sender, which are sent and not confirmed yet,
+# the next transactions are sent as soon as the previous ones are confirmed
+SOL_TX_SEND_WINDOW = max(int(os.environ.get("SOL_TX_SEND_WINDOW", "16")), 1)
+# one of workers refreshes the latest blockhash each BLOCKHASH_REFRESH_SLOT_CNT slots and shares it with all workers,
+# 0 disables the sharing and the blockhash is requested on each send
+BLOCKHASH_REFRESH_SLOT_CNT = max(int(os.environ.get("BLOCKHASH_REFRESH_SLOT_CNT", "4")), 0)
+# not sent transactions are signed with the new blockhash, if their blockhash expires in less blocks
+BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT = max(int(os.environ.get("BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT", "30")), 0)
+# max time of waiting for a free operator resource, requests wait in the FIFO order
+OPERATOR_RESOURCE_WAIT_SEC = max(float(os.environ.get("OPERATOR_RESOURCE_WAIT_SEC", "60")), 1)
+# max count of operator resources (signers * PERM_ACCOUNT_LIMIT), states of resources are kept in fixed shared arrays
+OPERATOR_RESOURCE_LIMIT = max(int(os.environ.get("OPERATOR_RESOURCE_LIMIT", "16384")), 1)
+# max count of requests waiting for a free operator resource, next requests fail without waiting
+OPERATOR_RESOURCE_QUEUE_LIMIT = max(int(os.environ.get("OPERATOR_RESOURCE_QUEUE_LIMIT", "4096")), 1)
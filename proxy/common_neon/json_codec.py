@@ -0,0 +1,87 @@
+import json
+import re
+
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .environment_data import JSON_CODEC
+
+
+JsonData = Union[bytes, bytearray, memoryview, str]
+
+
+class StdJsonCodec:
+    name = 'json'
+
+    @staticmethod
+    def loads(data: JsonData) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    @staticmethod
+    def loads_strict(data: JsonData) -> Any:
+        return StdJsonCodec.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    @staticmethod
+    def dumps_str(obj: Any) -> str:
+        return json.dumps(obj)
+
+
+class OrJsonCodec:
+    """
+    orjson parses bytes and memoryview without a copy into str and returns bytes from dumps.
+
+    It parses integers beyond 64 bits as float, which is safe for Solana responses and stored logs,
+    but documents of clients should be parsed by loads_strict(). Integers beyond 64 bits and non-str keys
+    aren't encoded by orjson, such objects are encoded by json.
+    """
+
+    name = 'orjson'
+
+    # a number with 20+ digits, the match inside a string only sends the document to json
+    _long_int_bytes_re = re.compile(rb'[:,\[]\s*-?[0-9]{20}')
+    _long_int_str_re = re.compile(r'[:,\[]\s*-?[0-9]{20}')
+
+    @staticmethod
+    def loads(data: JsonData) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # the error of the invalid document is raised by json too
+            return StdJsonCodec.loads(data)
+
+    @staticmethod
+    def loads_strict(data: JsonData) -> Any:
+        long_int_re = OrJsonCodec._long_int_str_re if isinstance(data, str) else OrJsonCodec._long_int_bytes_re
+        if long_int_re.search(data):
+            return StdJsonCodec.loads(data)
+        return OrJsonCodec.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            return StdJsonCodec.dumps(obj)
+
+    @staticmethod
+    def dumps_str(obj: Any) -> str:
+        return OrJsonCodec.dumps(obj).decode('utf-8')
+
+
+def get_json_codec(name: str = JSON_CODEC) -> Union[StdJsonCodec, OrJsonCodec]:
+    if (name == OrJsonCodec.name) and (orjson is not None):
+        return OrJsonCodec()
+    return StdJsonCodec()
+
+
+json_codec = get_json_codec()
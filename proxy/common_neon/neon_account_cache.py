@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from .environment_data import NEON_ACCOUNT_CACHE_TTL_SEC, NEON_ACCOUNT_CACHE_SIZE, NEON_CODE_CACHE_SIZE_MB
+
+
+class _AccountEntry(NamedTuple):
+    slot: int
+    fetch_time: float
+    info: object
+
+
+class NeonAccountCache:
+    """
+    Decoded Neon accounts of the current slot and contract codes of one process.
+
+    An account entry is valid while no newer slot is observed for its commitment and during the TTL,
+    which bounds the staleness if there are no requests for a while. Accounts written by our transactions
+    are evicted at once; entries fetched before the eviction are not stored.
+
+    The code of a code account doesn't change after the deployment, so codes live until the memory limit,
+    and equal codes of different contracts share one string.
+    """
+
+    def __init__(self, ttl_sec: float = NEON_ACCOUNT_CACHE_TTL_SEC, max_account_cnt: int = NEON_ACCOUNT_CACHE_SIZE,
+                 max_code_size_mb: int = NEON_CODE_CACHE_SIZE_MB):
+        self._ttl_sec = ttl_sec
+        self._max_account_cnt = max_account_cnt
+        self._max_code_size = max_code_size_mb * 1024 * 1024
+
+        self._lock = threading.Lock()
+        # the latest observed slot for each commitment, entries of all commitments are stored here
+        self._slot_dict: Dict[str, int] = {}
+        self._account_dict: 'OrderedDict[Tuple[str, str], _AccountEntry]' = OrderedDict()
+        self._invalidation_dict: Dict[str, float] = {}
+
+        self._code_dict: 'OrderedDict[str, object]' = OrderedDict()
+        self._code_by_hash_dict: Dict[bytes, Tuple[str, int]] = {}
+        self._code_size = 0
+
+    @property
+    def is_enabled(self) -> bool:
+        return self._ttl_sec > 0
+
+    @property
+    def is_code_enabled(self) -> bool:
+        return self._max_code_size > 0
+
+    def get_slot(self, commitment: str) -> int:
+        return self._slot_dict.get(commitment, 0)
+
+    def observe_slot(self, commitment: str, slot: int) -> None:
+        if slot > self._slot_dict.get(commitment, 0):
+            with self._lock:
+                if slot > self._slot_dict.get(commitment, 0):
+                    self._slot_dict[commitment] = slot
+
+    def get_account(self, address: str, commitment: str) -> Tuple[bool, Optional[object]]:
+        """Returns (is_found, info), the info of the nonexistent account is None"""
+        key = (address.lower(), commitment)
+        entry = self._account_dict.get(key)
+        if entry is None:
+            return False, None
+        if (entry.slot < self.get_slot(commitment)) or (time.monotonic() - entry.fetch_time > self._ttl_sec):
+            with self._lock:
+                if self._account_dict.get(key) is entry:
+                    del self._account_dict[key]
+            return False, None
+        return True, entry.info
+
+    def put_account(self, address: str, commitment: str, slot: int, fetch_time: float, info: Optional[object]) -> None:
+        """slot is the slot observed before the fetch, fetch_time is the time of the fetch start"""
+        address = address.lower()
+        with self._lock:
+            if self._invalidation_dict.get(address, 0) >= fetch_time:
+                return
+            self._slot_dict.setdefault(commitment, slot)
+            key = (address, commitment)
+            self._account_dict[key] = _AccountEntry(slot=slot, fetch_time=fetch_time, info=info)
+            self._account_dict.move_to_end(key)
+            while len(self._account_dict) > self._max_account_cnt:
+                self._account_dict.popitem(last=False)
+
+    def invalidate_account_list(self, address_list: Iterable[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for address in address_list:
+                address = address.lower()
+                self._invalidation_dict[address] = now
+                for commitment in list(self._slot_dict.keys()):
+                    self._account_dict.pop((address, commitment), None)
+
+            # the eviction time is required only for fetches, which are started before it
+            min_time = now - max(self._ttl_sec, 60)
+            for address in [a for a, t in self._invalidation_dict.items() if t < min_time]:
+                del self._invalidation_dict[address]
+
+    def get_code(self, code_account: str) -> Optional[object]:
+        code_info = self._code_dict.get(code_account)
+        if code_info is not None:
+            with self._lock:
+                if code_account in self._code_dict:
+                    self._code_dict.move_to_end(code_account)
+        return code_info
+
+    def put_code(self, code_account: str, code_info: object) -> None:
+        code: Optional[str] = getattr(code_info, 'code', None)
+        if (not code) or (not code[2:].strip('0')):
+            # the code isn't written yet, the deployment isn't completed
+            return
+
+        code_hash = hashlib.sha256(code.encode('ascii')).digest()
+        with self._lock:
+            if code_account in self._code_dict:
+                return
+
+            shared_code = self._code_by_hash_dict.get(code_hash)
+            if shared_code is None:
+                self._code_by_hash_dict[code_hash] = (code, 1)
+                self._code_size += len(code)
+            else:
+                code = shared_code[0]
+                self._code_by_hash_dict[code_hash] = (code, shared_code[1] + 1)
+                code_info = code_info._replace(code=code)
+
+            self._code_dict[code_account] = code_info
+            while (self._code_size > self._max_code_size) and (len(self._code_dict) > 1):
+                _, old_code_info = self._code_dict.popitem(last=False)
+                self._release_code(old_code_info.code)
+
+    def _release_code(self, code: str) -> None:
+        code_hash = hashlib.sha256(code.encode('ascii')).digest()
+        code, ref_cnt = self._code_by_hash_dict[code_hash]
+        if ref_cnt > 1:
+            self._code_by_hash_dict[code_hash] = (code, ref_cnt - 1)
+        else:
+            del self._code_by_hash_dict[code_hash]
+            self._code_size -= len(code)
@@ -0,0 +1,53 @@
+import os
+import threading
+import weakref
+
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class ProcessLocal(Generic[T]):
+    """
+    The lazy value of the process, it is created by the factory on the first get() in each process.
+
+    Threads don't exist in the forked process, so objects with threads (services, executors, connection pools)
+    of the parent process are useless there and are created again. Values of parent processes are kept,
+    so they are never collected in the child process, because their sockets belong to the parent.
+    """
+
+    def __init__(self, factory: Callable[..., T]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._pid = 0
+        self._inherited_list: List[Optional[T]] = []
+        _process_local_set.add(self)
+
+    def get(self, *args: Any, **kwargs: Any) -> T:
+        """Arguments are passed to the factory on the creation of the value of the current process"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._value
+
+        with self._lock:
+            if self._pid != pid:
+                if self._pid != 0:
+                    self._inherited_list.append(self._value)
+                self._value = self._factory(*args, **kwargs)
+                self._pid = pid
+            return self._value
+
+
+# the lock can be taken by another thread of the parent process at the moment of fork,
+# that thread doesn't exist in the child process, so the lock would never be released there
+_process_local_set: 'weakref.WeakSet[ProcessLocal]' = weakref.WeakSet()
+
+
+def _reset_lock_list() -> None:
+    for process_local in list(_process_local_set):
+        process_local._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_lock_list)
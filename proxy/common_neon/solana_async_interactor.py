@@ -0,0 +1,258 @@
+import asyncio
+import concurrent.futures
+import ssl
+import threading
+import time
+
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Tuple, TypeVar, cast
+from urllib.parse import urlsplit
+
+from logged_groups import logged_group
+from solana.rpc.types import RPCResponse
+
+from .environment_data import SOLANA_MAX_CONCURRENT_REQUESTS, SOLANA_REQUEST_TIMEOUT_SEC
+from .solana_interactor import SolanaInteractorBase
+from .json_codec import json_codec
+from .process_local import ProcessLocal
+from .solana_rpc_batch import RpcBatch, RpcBatchChunk, HTTP_PAYLOAD_TOO_LARGE, HTTP_TOO_MANY_REQUESTS
+
+
+T = TypeVar('T')
+
+
+class AsyncHttpError(Exception):
+    """Transport error, the request can be repeated"""
+
+    def __init__(self, msg: str, status: int = 0, retry_after: Optional[str] = None):
+        super().__init__(msg)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AsyncHttpConnection:
+    """HTTP/1.1 keep-alive connection on asyncio streams"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self.is_closed = False
+
+    @staticmethod
+    async def open(host: str, port: int, ssl_ctx: Optional[ssl.SSLContext]) -> 'AsyncHttpConnection':
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_ctx)
+        return AsyncHttpConnection(reader, writer)
+
+    async def post(self, host: str, path: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        head = (
+            f'POST {path} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            'Content-Type: application/json\r\n'
+            'Accept-Encoding: identity\r\n'
+            'Connection: keep-alive\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        )
+        self._writer.write(head.encode('ascii') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise AsyncHttpError('connection closed by the server')
+        version, status = status_line.decode('latin-1').split(' ', 2)[:2]
+
+        header_dict: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            header_dict[name.strip().lower()] = value.strip()
+
+        if header_dict.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked_body()
+        elif 'content-length' in header_dict:
+            data = await self._reader.readexactly(int(header_dict['content-length']))
+        else:
+            data = await self._reader.read()
+            self.is_closed = True
+
+        if (version == 'HTTP/1.0') or (header_dict.get('connection', '').lower() == 'close'):
+            self.is_closed = True
+        return int(status), header_dict, data
+
+    async def _read_chunked_body(self) -> bytes:
+        chunk_list: List[bytes] = []
+        while True:
+            size_line = await self._reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # skip trailers
+                while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunk_list)
+            chunk_list.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+    def close(self) -> None:
+        self.is_closed = True
+        self._writer.close()
+
+
+class AsyncHttpConnectionPool:
+    """
+    Keep-alive connections to one endpoint, the count of concurrent requests is limited by max_request_cnt.
+    Should be used from one event loop.
+    """
+
+    def __init__(self, url: str, max_request_cnt: int):
+        parts = urlsplit(url)
+        self._host = parts.hostname
+        self._netloc = parts.netloc.rpartition('@')[2]
+        self._port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self._path = parts.path or '/'
+        if parts.query:
+            self._path += '?' + parts.query
+        self._ssl_ctx = ssl.create_default_context() if parts.scheme == 'https' else None
+
+        self._max_request_cnt = max_request_cnt
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle_list: Deque[AsyncHttpConnection] = deque()
+
+    async def post(self, body: bytes, timeout: float) -> bytes:
+        if self._semaphore is None:
+            # is created in the event loop of the pool
+            self._semaphore = asyncio.Semaphore(self._max_request_cnt)
+
+        async with self._semaphore:
+            conn = self._idle_list.pop() if len(self._idle_list) else None
+            try:
+                if conn is None:
+                    conn = await asyncio.wait_for(AsyncHttpConnection.open(self._host, self._port, self._ssl_ctx),
+                                                  timeout)
+                status, header_dict, data = await asyncio.wait_for(conn.post(self._netloc, self._path, body), timeout)
+            except BaseException as err:
+                # the state of the connection is unknown after errors and cancellation
+                if conn is not None:
+                    conn.close()
+                if isinstance(err, (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError)):
+                    raise AsyncHttpError(f'{type(err).__name__}: {err}')
+                raise
+
+            if conn.is_closed:
+                conn.close()
+            else:
+                self._idle_list.append(conn)
+
+        if status >= 400:
+            raise AsyncHttpError(f'HTTP error {status}: {data[:256]}', status, header_dict.get('retry-after'))
+        return data
+
+    def close(self) -> None:
+        while len(self._idle_list):
+            self._idle_list.pop().close()
+
+
+@logged_group("neon.Proxy")
+class AsyncSolanaInteractor(SolanaInteractorBase):
+    """
+    Asyncio transport for requests of the indexer, which are sent concurrently from one thread.
+
+    Requests go through the pool of keep-alive connections, failed requests are repeated
+    with the exponential backoff and the full jitter. Cancellation of the calling task cancels the request.
+    Requests are built and responses are decoded by SolanaInteractorBase, as in SolanaInteractor.
+    """
+
+    def __init__(self, solana_url: str, max_request_cnt: int = SOLANA_MAX_CONCURRENT_REQUESTS) -> None:
+        SolanaInteractorBase.__init__(self)
+        self._solana_url = solana_url
+        self._pool = AsyncHttpConnectionPool(solana_url, max_request_cnt)
+
+    async def _send_post_request(self, body: bytes, is_limit_error_raised: bool = False) -> Any:
+        retry = 0
+        while True:
+            try:
+                retry += 1
+                data = await self._pool.post(body, SOLANA_REQUEST_TIMEOUT_SEC)
+                return json_codec.loads(data)
+
+            except AsyncHttpError as err:
+                if is_limit_error_raised and (err.status in (HTTP_PAYLOAD_TOO_LARGE, HTTP_TOO_MANY_REQUESTS)):
+                    # the batch sender changes the chunk size
+                    raise
+
+                # Hide the Solana URL
+                str_err = str(err).replace(self._solana_url, 'XXXXX')
+                self._check_retry(err, str_err, retry)
+                await asyncio.sleep(self._get_retry_delay(retry))
+
+    async def _send_rpc_request(self, method: str, *params: Any) -> RPCResponse:
+        request = self._get_rpc_request(method, params)
+        return cast(RPCResponse, await self._send_post_request(json_codec.dumps(request)))
+
+    async def _send_rpc_batch_request(self, method: str, params_list: List[Any]) -> List[RPCResponse]:
+        """Chunks are sized as in SolanaInteractor, all of them are sent concurrently"""
+        batch = RpcBatch(method, params_list, self._request_counter)
+        chunk_list = batch.split(self._batch_sizer.get_limit(method))
+        await asyncio.gather(*[self._send_rpc_chunk(batch, chunk) for chunk in chunk_list])
+        return cast(List[RPCResponse], batch.get_response_list())
+
+    async def _send_rpc_chunk(self, batch: RpcBatch, chunk: RpcBatchChunk) -> None:
+        retry = 0
+        while True:
+            start_time = time.monotonic()
+            try:
+                response_list = await self._send_post_request(chunk.body, is_limit_error_raised=True)
+            except AsyncHttpError as err:
+                retry += 1
+                delay = self._get_chunk_retry_delay(batch, chunk, err.status, err.retry_after, retry,
+                                                    str(err).replace(self._solana_url, 'XXXXX'))
+                if delay is None:
+                    await asyncio.gather(*[self._send_rpc_chunk(batch, part) for part in chunk.split()])
+                    return
+
+                await asyncio.sleep(delay)
+                continue
+
+            self._batch_sizer.on_response(batch.method, len(chunk), time.monotonic() - start_time)
+            batch.add_response_list(chunk, response_list)
+            return
+
+    async def get_multiple_receipts(self, sign_list: [str], commitment='confirmed') -> List[Optional[Dict]]:
+        if not len(sign_list):
+            return []
+        request_list = self._get_receipt_request_list(sign_list, commitment)
+        response_list = await self._send_rpc_batch_request("getTransaction", request_list)
+        return self._decode_receipt_list(response_list)
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class AsyncLoopThread:
+    """Event loop in a daemon thread, which executes coroutines for synchronous code"""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='neon-async-loop', daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable[T]) -> concurrent.futures.Future:
+        """Schedules the coroutine without waiting, the result is received from the future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Waits for the result of the coroutine, the coroutine is cancelled on the timeout"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+
+_async_loop_thread: ProcessLocal[AsyncLoopThread] = ProcessLocal(AsyncLoopThread)
+
+
+def get_async_loop_thread() -> AsyncLoopThread:
+    return _async_loop_thread.get()
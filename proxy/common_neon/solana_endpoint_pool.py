@@ -0,0 +1,244 @@
+import threading
+import time
+import traceback
+import weakref
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from logged_groups import logged_group
+
+from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
+from .utils import get_from_dict
+from .process_local import ProcessLocal
+from .environment_data import SOLANA_HEALTH_CHECK_SEC, SOLANA_MAX_SLOTS_BEHIND, SOLANA_HEDGE_READS, \
+                              SOLANA_HEDGE_DELAY_SEC, SOLANA_LATENCY_WINDOW
+
+
+# requests, which change the state of the network, are never repeated on another endpoint
+_NOT_HEDGED_METHOD_SET = {'sendTransaction', 'requestAirdrop'}
+
+
+def decode_slots_behind(response: Dict[str, Any]) -> Optional[int]:
+    """Decodes the response of getHealth: 0 for the healthy node, None if the lag is unknown"""
+    if response.get('result') == 'ok':
+        return 0
+    slots_behind = get_from_dict(response, 'error', 'data', 'numSlotsBehind')
+    if slots_behind:
+        return int(slots_behind)
+    return None
+
+
+class SolanaEndpoint:
+    """Solana RPC node with the rolling statistics of its requests"""
+
+    def __init__(self, url: str, name: str):
+        self.url = url
+        # the label for logs and metrics, the URL can contain an access token
+        self.name = name
+        self.session = requests.Session()
+
+        self.is_healthy = True
+        self.slots_behind: Optional[int] = 0
+        self.error_cnt = 0
+
+        self._lock = threading.Lock()
+        self._latency_list: Deque[float] = deque(maxlen=SOLANA_LATENCY_WINDOW)
+        self._p95_latency = 0.0
+
+    def on_request(self, latency_sec: float, is_error: bool) -> None:
+        with self._lock:
+            if is_error:
+                self.error_cnt += 1
+                return
+            self.error_cnt = 0
+            self._latency_list.append(latency_sec)
+            latency_list = sorted(self._latency_list)
+        self._p95_latency = latency_list[int(len(latency_list) * 0.95)]
+
+    @property
+    def p95_latency(self) -> float:
+        return self._p95_latency
+
+    def on_health(self, slots_behind: Optional[int]) -> None:
+        self.slots_behind = slots_behind
+        self.is_healthy = (slots_behind is not None) and (slots_behind <= SOLANA_MAX_SLOTS_BEHIND)
+
+
+@logged_group("neon.Proxy")
+class SolanaEndpointPool:
+    """
+    Routes requests to the set of Solana RPC nodes.
+
+    Endpoints are ranked by health (getHealth and the slot lag), by recent errors and by the rolling p95 latency.
+    A read request, which doesn't receive the response from the best endpoint in the hedge delay,
+    is repeated on the next endpoint, and the first response wins.
+    Requests inside `pin()` go to one endpoint, so transactions and their confirmations see the same node.
+    """
+
+    def __init__(self, url_list: Union[str, List[str]]):
+        if isinstance(url_list, str):
+            url_list = [url_list]
+        assert len(url_list) > 0, 'no Solana endpoints'
+
+        self._endpoint_list: List[SolanaEndpoint] = []
+        name_set = set()
+        for idx, url in enumerate(url_list):
+            name = urlsplit(url).netloc.rpartition('@')[2] or url
+            if name in name_set:
+                name = f'{name}#{idx}'
+            name_set.add(name)
+            self._endpoint_list.append(SolanaEndpoint(url, name))
+
+        self._stat_exporter: Optional[StatisticsExporter] = None
+        self._pinned = threading.local()
+
+        self._executor: ProcessLocal[ThreadPoolExecutor] = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=8 * len(self._endpoint_list), thread_name_prefix='solana-hedge')
+        )
+        self._health_thread: ProcessLocal[threading.Thread] = ProcessLocal(self._start_health_thread)
+
+    def set_stat_exporter(self, stat_exporter: StatisticsExporter) -> None:
+        self._stat_exporter = stat_exporter
+
+    @property
+    def endpoint_list(self) -> List[SolanaEndpoint]:
+        return self._endpoint_list
+
+    def get_endpoint_list(self) -> List[SolanaEndpoint]:
+        """Endpoints from the best to the worst one"""
+        if len(self._endpoint_list) == 1:
+            return self._endpoint_list
+        self._health_thread.get()
+        return sorted(self._endpoint_list, key=lambda e: (not e.is_healthy, e.error_cnt > 0, e.p95_latency))
+
+    def is_pinned(self) -> bool:
+        return getattr(self._pinned, 'endpoint', None) is not None
+
+    @contextmanager
+    def pin(self) -> Iterator[SolanaEndpoint]:
+        endpoint = getattr(self._pinned, 'endpoint', None)
+        if endpoint is not None:
+            # nested pinning keeps the outer endpoint
+            yield endpoint
+            return
+
+        endpoint = self.get_endpoint_list()[0]
+        self._pinned.endpoint = endpoint
+        try:
+            yield endpoint
+        finally:
+            self._pinned.endpoint = None
+
+    def post(self, request: Union[Dict[str, Any], List[Dict[str, Any]], bytes],
+             method: Optional[str] = None) -> requests.Response:
+        """
+        Raises requests.exceptions.RequestException on failure, the caller repeats the request.
+        The serialized request should be passed with its method.
+        """
+        endpoint = getattr(self._pinned, 'endpoint', None)
+        if endpoint is not None:
+            return self._post(endpoint, request)
+
+        endpoint_list = self.get_endpoint_list()
+        if (not SOLANA_HEDGE_READS) or (len(endpoint_list) == 1) or (not endpoint_list[1].is_healthy):
+            return self._post(endpoint_list[0], request)
+
+        if method is None:
+            method = (request[0] if isinstance(request, list) and len(request) else request).get('method')
+        if method in _NOT_HEDGED_METHOD_SET:
+            return self._post(endpoint_list[0], request)
+        return self._post_hedged(endpoint_list[0], endpoint_list[1], request)
+
+    def _post(self, endpoint: SolanaEndpoint, request: Any) -> requests.Response:
+        start_time = time.time()
+        try:
+            headers = {"Content-Type": "application/json"}
+            if isinstance(request, bytes):
+                response = endpoint.session.post(endpoint.url, headers=headers, data=request)
+            else:
+                response = endpoint.session.post(endpoint.url, headers=headers, json=request)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            self._commit_request_stat(endpoint, time.time() - start_time, True)
+            raise
+        self._commit_request_stat(endpoint, time.time() - start_time, False)
+        return response
+
+    def _post_hedged(self, endpoint: SolanaEndpoint, hedge_endpoint: SolanaEndpoint, request: Any) -> requests.Response:
+        executor = self._executor.get()
+        future_list: List[Future] = [executor.submit(self._post, endpoint, request)]
+        done_set, _ = wait(future_list, timeout=max(SOLANA_HEDGE_DELAY_SEC, endpoint.p95_latency))
+        if not len(done_set):
+            self.debug(f'Hedge the request to {endpoint.name} by {hedge_endpoint.name}')
+            future_list.append(executor.submit(self._post, hedge_endpoint, request))
+
+        pending_list = future_list
+        while True:
+            done_set, pending_set = wait(pending_list, return_when=FIRST_COMPLETED)
+            for future in done_set:
+                if future.exception() is None:
+                    return future.result()
+            if not len(pending_set):
+                # both requests failed, report the error of the best endpoint
+                return future_list[0].result()
+            pending_list = list(pending_set)
+
+    def _start_health_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=_run_health_check, args=(weakref.ref(self),),
+                                  name='solana-health', daemon=True)
+        thread.start()
+        return thread
+
+    def check_health(self) -> None:
+        for endpoint in self._endpoint_list:
+            request = {"jsonrpc": "2.0", "id": 1, "method": "getHealth", "params": []}
+            try:
+                response = endpoint.session.post(endpoint.url, json=request, timeout=SOLANA_HEALTH_CHECK_SEC)
+                slots_behind = decode_slots_behind(response.json())
+            except (requests.exceptions.RequestException, ValueError) as err:
+                self.debug(f'Fail to check health of Solana endpoint {endpoint.name}: {type(err).__name__}')
+                slots_behind = None
+
+            was_healthy = endpoint.is_healthy
+            endpoint.on_health(slots_behind)
+            if was_healthy != endpoint.is_healthy:
+                self.info(f'Solana endpoint {endpoint.name} is {"healthy" if endpoint.is_healthy else "unhealthy"}, ' +
+                          f'slots behind: {slots_behind}')
+            self._commit_health_stat(endpoint)
+
+    def _commit_request_stat(self, endpoint: SolanaEndpoint, latency_sec: float, is_error: bool) -> None:
+        endpoint.on_request(latency_sec, is_error)
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_solana_endpoint_request(endpoint.name, latency_sec, is_error)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit Solana endpoint statistics: {err}: {err_tb}')
+
+    def _commit_health_stat(self, endpoint: SolanaEndpoint) -> None:
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_solana_endpoint_health(endpoint.name, endpoint.is_healthy,
+                                                                   endpoint.slots_behind)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit Solana endpoint statistics: {err}: {err_tb}')
+
+
+def _run_health_check(pool_ref: 'weakref.ref[SolanaEndpointPool]') -> None:
+    # the weak reference allows the pool to be collected, the thread exits after that
+    while True:
+        pool = pool_ref()
+        if pool is None:
+            return
+        pool.check_health()
+        del pool
+        time.sleep(SOLANA_HEALTH_CHECK_SEC)
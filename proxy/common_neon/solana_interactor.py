@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import base58
 import base64
+import itertools
+import random
 import time
 import traceback
 import requests
@@ -11,23 +13,33 @@ from typing import Optional
 
 from solana.blockhash import Blockhash
 from solana.publickey import PublicKey
-from solana.rpc.api import Client as SolanaClient
 from solana.account import Account as SolanaAccount
 from solana.rpc.types import RPCResponse
 from solana.transaction import Transaction
-from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor
 from logged_groups import logged_group
-from typing import Dict, Union, Any, List, NamedTuple, cast
+from typing import Dict, Union, Any, List, NamedTuple, Tuple, ContextManager, cast
 from base58 import b58decode, b58encode
 
 from .utils import SolanaBlockInfo
+from .solana_endpoint_pool import SolanaEndpointPool, decode_slots_behind
+from .solana_request_coalescer import SingleFlight, AccountInfoBatcher
+from .neon_account_cache import NeonAccountCache
+from .json_codec import json_codec
+from .solana_rpc_batch import RpcBatch, RpcBatchChunk, RpcBatchSizer, HTTP_PAYLOAD_TOO_LARGE, HTTP_TOO_MANY_REQUESTS
+from .solana_subscriber import SignatureWatch, get_solana_subscriber
+from .blockhash_service import get_blockhash_service
+from .process_local import ProcessLocal
 from .environment_data import EVM_LOADER_ID, CONFIRMATION_CHECK_DELAY, RETRY_ON_FAIL, FUZZING_BLOCKHASH, \
-                              CONFIRM_TIMEOUT, FINALIZED
+                              CONFIRM_TIMEOUT, FINALIZED, SOLANA_COALESCE_REQUESTS, SOLANA_ACCOUNT_BATCH_SIZE, \
+                              SOLANA_WS_MAX_WAIT_SEC, SOLANA_BATCH_CONCURRENCY, SOLANA_RETRY_BASE_DELAY_SEC, \
+                              SOLANA_RETRY_MAX_DELAY_SEC
 
 from ..common_neon.layouts import ACCOUNT_INFO_LAYOUT, CODE_ACCOUNT_INFO_LAYOUT, STORAGE_ACCOUNT_INFO_LAYOUT
 from ..common_neon.constants import CONTRACT_ACCOUNT_TAG, ACTIVE_STORAGE_TAG, NEON_ACCOUNT_TAG
 from ..common_neon.address import EthereumAddress, ether2program
 from ..common_neon.utils import get_from_dict
+from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
 
 
 class AccountInfo(NamedTuple):
@@ -147,41 +159,356 @@ class SendResult(NamedTuple):
 
 
 @logged_group("neon.Proxy")
-class SolanaInteractor:
-    def __init__(self, solana_url: str) -> None:
-        self._client = SolanaClient(solana_url)._provider
+class SolanaInteractorBase:
+    """Builds requests to Solana and decodes responses, the transport is implemented by subclasses"""
+
+    def __init__(self) -> None:
+        self._request_counter = itertools.count()
         self._fuzzing_hash_cycle = False
+        self._batch_sizer = RpcBatchSizer()
 
-    def _send_post_request(self, request) -> RPCResponse:
-        """This method is used to make retries to send request to Solana"""
+    def _get_rpc_request(self, method: str, params: Any) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": next(self._request_counter) + 1,
+            "method": method,
+            "params": params
+        }
+
+    @staticmethod
+    def _get_retry_delay(retry: int) -> float:
+        """Exponential backoff with the full jitter, so processes don't repeat their requests at the same moment"""
+        return random.uniform(0, min(SOLANA_RETRY_MAX_DELAY_SEC, SOLANA_RETRY_BASE_DELAY_SEC * (2 ** retry)))
+
+    def _check_retry(self, err: Exception, str_err: str, retry: int) -> None:
+        """Raises the error of the request if there are no more attempts"""
+        if retry <= RETRY_ON_FAIL:
+            self.debug(f'Receive connection error {str_err} on connection to Solana. ' +
+                       f'Attempt {retry + 1} to send the request to Solana node...')
+            return
+
+        err_tb = "".join(traceback.format_tb(err.__traceback__))
+        self.error(f'Connection exception({retry}) on send request to Solana. Retry {retry}' +
+                   f'Type(err): {type(err)}, Error: {str_err}, Traceback: {err_tb}')
+        raise Exception(str_err)
+
+    def _get_chunk_retry_delay(self, batch: RpcBatch, chunk: RpcBatchChunk, status: int,
+                               retry_after: Optional[str], retry: int, str_err: str) -> Optional[float]:
+        """
+        Returns the delay before the next attempt to send the chunk, or None if the chunk should be split.
+        Raises the error if the chunk can't be repeated.
+        """
+        self._batch_sizer.on_limit_error(batch.method, len(chunk))
+        if (status == HTTP_PAYLOAD_TOO_LARGE) and (len(chunk) > 1):
+            self.debug(f'Split the batch of {len(chunk)} requests {batch.method}, it is too large for Solana')
+            return None
+
+        if (status != HTTP_TOO_MANY_REQUESTS) or (retry > RETRY_ON_FAIL):
+            raise Exception(str_err)
+
+        retry_after = retry_after or ''
+        delay = float(retry_after) if retry_after.isdigit() else self._get_retry_delay(retry)
+        self.debug(f'Receive {str_err} on the batch of {len(chunk)} requests {batch.method}. ' +
+                   f'Attempt {retry + 1} after {delay} seconds...')
+        return delay
+
+    @staticmethod
+    def _get_receipt_request_list(sign_list: [str], commitment: str) -> List[Tuple[str, Dict[str, str]]]:
+        opts = {"encoding": "json", "commitment": commitment}
+        return [(sign, opts) for sign in sign_list]
+
+    @staticmethod
+    def _decode_receipt_list(response_list: List[RPCResponse]) -> List[Optional[Dict]]:
+        return [r.get('result') for r in response_list]
+
+    @staticmethod
+    def _get_account_info_opts(length: int, commitment: str) -> Dict[str, Any]:
+        opts = {
+            "encoding": "base64",
+            "commitment": commitment,
+        }
+
+        if length != 0:
+            opts['dataSlice'] = {
+                'offset': 0,
+                'length': length
+            }
+        return opts
+
+    def _decode_account_info(self, pubkey: PublicKey, response: RPCResponse) -> Optional[AccountInfo]:
+        info = response['result']['value']
+        if info is None:
+            self.debug(f"Can't get information about {str(pubkey)}")
+            return None
+
+        data = base64.b64decode(info['data'][0])
+
+        account_tag = data[0]
+        lamports = info['lamports']
+        owner = info['owner']
+
+        return AccountInfo(account_tag, lamports, owner, data)
+
+    def _decode_account_info_list(self, accounts: [PublicKey], response: RPCResponse) -> [AccountInfo]:
+        if response['result']['value'] is None:
+            self.debug(f"Can't get information about {accounts}")
+            return []
+
+        accounts_info = []
+        for pubkey, info in zip(accounts, response['result']['value']):
+            if info is None:
+                accounts_info.append(None)
+            else:
+                data = base64.b64decode(info['data'][0])
+                account = AccountInfo(tag=data[0], lamports=info['lamports'], owner=info['owner'], data=data)
+                accounts_info.append(account)
+
+        return accounts_info
+
+    @staticmethod
+    def _decode_slots_behind(response: RPCResponse) -> Optional[int]:
+        return decode_slots_behind(response)
+
+    @staticmethod
+    def _get_neon_account_sol_list(eth_accounts: List[EthereumAddress]) -> List[PublicKey]:
+        return [ether2program(eth_account)[0] for eth_account in eth_accounts]
+
+    @staticmethod
+    def _decode_neon_account_info(account_sol: PublicKey, info: Optional[AccountInfo]) -> Optional[NeonAccountInfo]:
+        if info is None:
+            return None
+        elif info.tag != NEON_ACCOUNT_TAG:
+            raise RuntimeError(f"Wrong tag {info.tag} for neon account info {str(account_sol)}")
+        elif len(info.data) < ACCOUNT_INFO_LAYOUT.sizeof():
+            raise RuntimeError(f"Wrong data length for account data {account_sol}: " +
+                               f"{len(info.data)} < {ACCOUNT_INFO_LAYOUT.sizeof()}")
+        return NeonAccountInfo.frombytes(PublicKey(account_sol), info.data)
+
+    @staticmethod
+    def _decode_neon_account_info_list(account_sol_list: List[PublicKey],
+                                       info_list: List[Optional[AccountInfo]]) -> List[Optional[NeonAccountInfo]]:
+        accounts_list = []
+        for account_sol, info in zip(account_sol_list, info_list):
+            if info is None or len(info.data) < ACCOUNT_INFO_LAYOUT.sizeof() or info.tag != NEON_ACCOUNT_TAG:
+                accounts_list.append(None)
+                continue
+            accounts_list.append(NeonAccountInfo.frombytes(PublicKey(account_sol), info.data))
+        return accounts_list
+
+    @staticmethod
+    def _get_block_opts(commitment: str) -> Dict[str, Any]:
+        return {
+            "commitment": commitment,
+            "encoding": "json",
+            "transactionDetails": "signatures",
+            "rewards": False
+        }
+
+    @staticmethod
+    def _decode_block_info(slot: int, net_block: Dict[str, Any], commitment: str) -> SolanaBlockInfo:
+        return SolanaBlockInfo(
+            slot=slot,
+            is_finalized=(commitment == FINALIZED),
+            hash='0x' + base58.b58decode(net_block['blockhash']).hex(),
+            parent_hash='0x' + base58.b58decode(net_block['previousBlockhash']).hex(),
+            time=net_block['blockTime'],
+            signs=net_block['signatures']
+        )
+
+    @staticmethod
+    def _get_send_tx_opts(skip_preflight: bool, preflight_commitment: str) -> Dict[str, Any]:
+        return {
+            "skipPreflight": skip_preflight,
+            "encoding": "base64",
+            "preflightCommitment": preflight_commitment
+        }
+
+    @staticmethod
+    def _is_blockhash_required(tx_list: [Transaction]) -> bool:
+        return any(not tx.recent_blockhash for tx in tx_list)
+
+    @staticmethod
+    def _get_send_tx_request_list(signer: SolanaAccount, tx_list: [Transaction], blockhash: Optional[Blockhash],
+                                  opts: Dict[str, Any]) -> List[Any]:
+        request_list = []
+        for tx in tx_list:
+            if not tx.recent_blockhash:
+                tx.recent_blockhash = blockhash
+                tx.signatures.clear()
+            if not tx.signatures:
+                tx.sign(signer)
+            base64_tx = base64.b64encode(tx.serialize()).decode('utf-8')
+            request_list.append((base64_tx, opts))
+        return request_list
+
+    def _is_fuzzing_cycle(self) -> bool:
+        """Make each second transaction list a bad one."""
+        if not FUZZING_BLOCKHASH:
+            return False
 
-        headers = {
-            "Content-Type": "application/json"
+        self._fuzzing_hash_cycle = not self._fuzzing_hash_cycle
+        return self._fuzzing_hash_cycle
+
+    @staticmethod
+    def _get_fuzzing_block_request(slot: int) -> Tuple[int, Dict[str, Any]]:
+        block_opts = {
+            "encoding": "json",
+            "transactionDetails": "none",
+            "rewards": False
         }
-        client = self._client
+        return max(slot - 500, 10), block_opts
+
+    def _sign_fuzzing_transactions(self, signer: SolanaAccount, tx_list, tx_opts, request_list,
+                                   slot: int, block: RPCResponse):
+        fuzzing_blockhash = Blockhash(block['result']['blockhash'])
+        self.debug(f"fuzzing block {fuzzing_blockhash} for slot {slot}")
+
+        # sign half of transactions with a bad blockhash
+        for idx, tx in enumerate(tx_list):
+            if idx % 2 == 1:
+                continue
+            tx.recent_blockhash = fuzzing_blockhash
+            tx.sign(signer)
+            base64_tx = base64.b64encode(tx.serialize()).decode('utf-8')
+            request_list[idx] = (base64_tx, tx_opts)
+        return request_list
+
+    def _decode_send_result_list(self, response_list: List[RPCResponse], tx_list: [Transaction]) -> [SendResult]:
+        result_list = []
+
+        for response, tx in zip(response_list, tx_list):
+            raw_result = response.get('result')
+
+            result = None
+            if isinstance(raw_result, dict):
+                self.debug(f'Got strange result on transaction execution: {json.dumps(raw_result)}')
+            elif isinstance(raw_result, str):
+                result = b58encode(b58decode(raw_result)).decode("utf-8")
+            elif isinstance(raw_result, bytes):
+                result = b58encode(raw_result).decode("utf-8")
+            elif raw_result is not None:
+                self.debug(f'Got strange result on transaction execution: {str(raw_result)}')
+
+            error = response.get('error')
+            if error:
+                if get_from_dict(error, 'data', 'err') == 'AlreadyProcessed':
+                    result = b58encode(tx.signature()).decode("utf-8")
+                    self.debug(f'Transaction is already processed: {str(result)}')
+                    error = None
+                else:
+                    self.debug(f'Got error on transaction execution: {json.dumps(error)}')
+                    result = None
+
+            result_list.append(SendResult(result=result, error=error))
+        return result_list
+
+    @staticmethod
+    def _mix_receipt_list(send_result_list: [SendResult], confirmed_list: List[Optional[Dict]]) -> [{}]:
+        """Mix errors with receipts for good transactions"""
+        receipt_list = []
+        for s in send_result_list:
+            if s.error:
+                receipt_list.append(s.error)
+            else:
+                receipt_list.append(confirmed_list.pop(0))
+        return receipt_list
+
+    @staticmethod
+    def _decode_signature_statuses(response: RPCResponse) -> Tuple[int, bool]:
+        """Returns the slot of the response and True if all transactions are confirmed"""
+        result = response.get('result', None)
+        if not result:
+            return 0, False
+
+        slot = result['context']['slot']
+        for status in result['value']:
+            if not status:
+                return slot, False
+            if status['confirmationStatus'] == 'processed':
+                return slot, False
+        return slot, True
+
+    @staticmethod
+    def _decode_confirmed_sign_list(sign_list: [str], response: RPCResponse) -> Tuple[int, List[str]]:
+        """Returns the slot of the response and confirmed signatures from the list"""
+        result = response.get('result', None)
+        if not result:
+            return 0, []
+
+        confirmed_list = []
+        for sign, status in zip(sign_list, result['value']):
+            if status and (status['confirmationStatus'] != 'processed'):
+                confirmed_list.append(sign)
+        return result['context']['slot'], confirmed_list
+
+
+@logged_group("neon.Proxy")
+class SolanaInteractor(SolanaInteractorBase):
+    def __init__(self, solana_url: Union[str, List[str]]) -> None:
+        """solana_url is one URL or the list of URLs of Solana nodes with the same state"""
+        SolanaInteractorBase.__init__(self)
+        self._endpoint_pool = SolanaEndpointPool(solana_url)
+
+        self._blockhash_flight = SingleFlight('getLatestBlockhash')
+        self._neon_account_flight = SingleFlight('getNeonAccountInfo')
+        self._block_flight = SingleFlight('getBlock', is_copy_result=True)
+        self._account_batcher = AccountInfoBatcher(self._get_account_info_slot_list, SOLANA_ACCOUNT_BATCH_SIZE)
+        self._account_cache = NeonAccountCache()
+
+        self._batch_executor: ProcessLocal[ThreadPoolExecutor] = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=SOLANA_BATCH_CONCURRENCY, thread_name_prefix='solana-batch')
+        )
+        self._stat_exporter: Optional[StatisticsExporter] = None
+
+    @property
+    def stat_exporter(self) -> Optional[StatisticsExporter]:
+        return self._stat_exporter
+
+    def set_stat_exporter(self, stat_exporter: StatisticsExporter) -> None:
+        self._stat_exporter = stat_exporter
+        self._endpoint_pool.set_stat_exporter(stat_exporter)
+        for merger in (self._blockhash_flight, self._neon_account_flight, self._block_flight, self._account_batcher):
+            merger.set_stat_exporter(stat_exporter)
+
+    def pin_endpoint(self) -> ContextManager:
+        """Requests of the thread go to one node inside the context"""
+        return self._endpoint_pool.pin()
+
+    def _is_coalescing(self) -> bool:
+        # requests of a pinned thread should go to its endpoint
+        return SOLANA_COALESCE_REQUESTS and (not self._endpoint_pool.is_pinned())
+
+    def _hide_solana_url(self, err: Exception) -> str:
+        str_err = str(err)
+        for endpoint in self._endpoint_pool.endpoint_list:
+            str_err = str_err.replace(endpoint.url, 'XXXXX')
+        return str_err
+
+    @staticmethod
+    def _get_http_status(err: requests.exceptions.RequestException) -> int:
+        response = getattr(err, 'response', None)
+        return response.status_code if response is not None else 0
+
+    def _send_post_request(self, request, method: Optional[str] = None,
+                           is_limit_error_raised: bool = False) -> RPCResponse:
+        """This method is used to make retries to send request to Solana"""
 
         retry = 0
         while True:
             try:
                 retry += 1
-                raw_response = client.session.post(client.endpoint_uri, headers=headers, json=request)
-                raw_response.raise_for_status()
-                return raw_response
+                return self._endpoint_pool.post(request, method)
 
             except requests.exceptions.RequestException as err:
-                # Hide the Solana URL
-                str_err = str(err).replace(client.endpoint_uri, 'XXXXX')
-
-                if retry <= RETRY_ON_FAIL:
-                    self.debug(f'Receive connection error {str_err} on connection to Solana. ' +
-                               f'Attempt {retry + 1} to send the request to Solana node...')
-                    time.sleep(1)
-                    continue
+                if is_limit_error_raised and \
+                        (self._get_http_status(err) in (HTTP_PAYLOAD_TOO_LARGE, HTTP_TOO_MANY_REQUESTS)):
+                    # the batch sender changes the chunk size
+                    raise
 
-                err_tb = "".join(traceback.format_tb(err.__traceback__))
-                self.error(f'Connection exception({retry}) on send request to Solana. Retry {retry}' +
-                           f'Type(err): {type(err)}, Error: {str_err}, Traceback: {err_tb}')
-                raise Exception(str_err)
+                # Hide the Solana URL
+                str_err = self._hide_solana_url(err)
+                self._check_retry(err, str_err, retry)
+                time.sleep(self._get_retry_delay(retry))
 
             except Exception as err:
                 err_tb = "".join(traceback.format_tb(err.__traceback__))
@@ -190,62 +517,50 @@ class SolanaInteractor:
                 raise
 
     def _send_rpc_request(self, method: str, *params: Any) -> RPCResponse:
-        request_id = next(self._client._request_counter) + 1
-
-        request = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "method": method,
-            "params": params
-        }
-        raw_response = self._send_post_request(request)
-        return cast(RPCResponse, raw_response.json())
+        request = self._get_rpc_request(method, params)
+        raw_response = self._send_post_request(json_codec.dumps(request), method)
+        return cast(RPCResponse, json_codec.loads(raw_response.content))
 
     def _send_rpc_batch_request(self, method: str, params_list: List[Any]) -> List[RPCResponse]:
-        full_request_list = []
-        full_response_list = []
-        request_list = []
-        request_data = ''
-        client = self._client
-
-        for params in params_list:
-            request_id = next(client._request_counter) + 1
-            request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
-            request_list.append(request)
-            request_data += ', ' + json.dumps(request)
-            full_request_list.append(request)
-
-            # Protection from big payload
-            if len(request_data) >= 48 * 1024 or len(full_request_list) == len(params_list):
-                raw_response = self._send_post_request(request_list)
-                response_data = cast(List[RPCResponse], raw_response.json())
-
-                full_response_list += response_data
-                request_list.clear()
-                request_data = ''
-
-        full_response_list.sort(key=lambda r: r["id"])
-
-        for request, response in zip_longest(full_request_list, full_response_list):
-            # self.debug(f'Request: {request}')
-            # self.debug(f'Response: {response}')
-            if request["id"] != response["id"]:
-                raise RuntimeError(f"Invalid RPC response: request {request} response {response}")
+        batch = RpcBatch(method, params_list, self._request_counter)
+        chunk_list = batch.split(self._batch_sizer.get_limit(method))
+        if (len(chunk_list) == 1) or self._endpoint_pool.is_pinned():
+            # the pinned endpoint is known only in the thread of the caller
+            for chunk in chunk_list:
+                self._send_rpc_chunk(batch, chunk)
+        else:
+            for _ in self._batch_executor.get().map(lambda c: self._send_rpc_chunk(batch, c), chunk_list):
+                pass
+        return cast(List[RPCResponse], batch.get_response_list())
+
+    def _send_rpc_chunk(self, batch: RpcBatch, chunk: RpcBatchChunk) -> None:
+        retry = 0
+        while True:
+            start_time = time.monotonic()
+            try:
+                raw_response = self._send_post_request(chunk.body, batch.method, is_limit_error_raised=True)
+            except requests.exceptions.RequestException as err:
+                retry += 1
+                delay = self._get_chunk_retry_delay(batch, chunk, self._get_http_status(err),
+                                                    err.response.headers.get('Retry-After'), retry,
+                                                    self._hide_solana_url(err))
+                if delay is None:
+                    for part in chunk.split():
+                        self._send_rpc_chunk(batch, part)
+                    return
+
+                time.sleep(delay)
+                continue
 
-        return full_response_list
+            self._batch_sizer.on_response(batch.method, len(chunk), time.monotonic() - start_time)
+            batch.add_response_list(chunk, json_codec.loads(raw_response.content))
+            return
 
     def get_cluster_nodes(self) -> [dict]:
         return self._send_rpc_request("getClusterNodes").get('result', [])
 
     def get_slots_behind(self) -> Optional[int]:
-        response = self._send_rpc_request('getHealth')
-        status = response.get('result')
-        if status == 'ok':
-            return 0
-        slots_behind = get_from_dict(response, 'error', 'data', 'numSlotsBehind')
-        if slots_behind:
-            return int(slots_behind)
-        return None
+        return self._decode_slots_behind(self._send_rpc_request('getHealth'))
 
     def is_healthy(self) -> bool:
         status = self._send_rpc_request('getHealth').get('result', 'bad')
@@ -266,63 +581,36 @@ class SolanaInteractor:
         }
         return self._send_rpc_request('getSlot', opts)
 
+    def _observe_context_slot(self, commitment: str, response: RPCResponse) -> int:
+        slot = get_from_dict(response, 'result', 'context', 'slot') or 0
+        self._account_cache.observe_slot(commitment, slot)
+        return slot
+
     def get_account_info(self, pubkey: PublicKey, length=256, commitment='confirmed') -> Optional[AccountInfo]:
-        opts = {
-            "encoding": "base64",
-            "commitment": commitment,
-        }
+        return self._get_account_info_slot(pubkey, length, commitment)[1]
 
-        if length != 0:
-            opts['dataSlice'] = {
-                'offset': 0,
-                'length': length
-            }
+    def _get_account_info_slot(self, pubkey: PublicKey, length: int,
+                               commitment: str) -> Tuple[int, Optional[AccountInfo]]:
+        """Returns the account and the slot of the response"""
+        if self._is_coalescing():
+            return self._account_batcher.get(pubkey, length, commitment)
 
+        opts = self._get_account_info_opts(length, commitment)
         result = self._send_rpc_request('getAccountInfo', str(pubkey), opts)
         # self.debug(f"{json.dumps(result, sort_keys=True)}")
-
-        info = result['result']['value']
-        if info is None:
-            self.debug(f"Can't get information about {str(pubkey)}")
-            return None
-
-        data = base64.b64decode(info['data'][0])
-
-        account_tag = data[0]
-        lamports = info['lamports']
-        owner = info['owner']
-
-        return AccountInfo(account_tag, lamports, owner, data)
+        slot = self._observe_context_slot(commitment, result)
+        return slot, self._decode_account_info(pubkey, result)
 
     def get_account_info_list(self, accounts: [PublicKey], length=256, commitment='confirmed') -> [AccountInfo]:
-        opts = {
-            "encoding": "base64",
-            "commitment": commitment,
-        }
-
-        if length != 0:
-            opts['dataSlice'] = {
-                'offset': 0,
-                'length': length
-            }
+        return [info for _, info in self._get_account_info_slot_list(accounts, length, commitment)]
 
+    def _get_account_info_slot_list(self, accounts: [PublicKey], length: int,
+                                    commitment: str) -> List[Tuple[int, Optional[AccountInfo]]]:
+        opts = self._get_account_info_opts(length, commitment)
         result = self._send_rpc_request("getMultipleAccounts", [str(a) for a in accounts], opts)
         # self.debug(f"{json.dumps(result, sort_keys=True)}")
-
-        if result['result']['value'] is None:
-            self.debug(f"Can't get information about {accounts}")
-            return []
-
-        accounts_info = []
-        for pubkey, info in zip(accounts, result['result']['value']):
-            if info is None:
-                accounts_info.append(None)
-            else:
-                data = base64.b64decode(info['data'][0])
-                account = AccountInfo(tag=data[0], lamports=info['lamports'], owner=info['owner'], data=data)
-                accounts_info.append(account)
-
-        return accounts_info
+        slot = self._observe_context_slot(commitment, result)
+        return [(slot, info) for info in self._decode_account_info_list(accounts, result)]
 
     def get_sol_balance(self, account, commitment='confirmed') -> int:
         opts = {
@@ -374,19 +662,32 @@ class SolanaInteractor:
 
         return balance_list
 
-    def get_neon_account_info(self, eth_account: Union[str, EthereumAddress]) -> Optional[NeonAccountInfo]:
+    def get_neon_account_info(self, eth_account: Union[str, EthereumAddress],
+                              commitment='confirmed') -> Optional[NeonAccountInfo]:
         if isinstance(eth_account, str):
             eth_account = EthereumAddress(eth_account)
+        if self._account_cache.is_enabled:
+            is_found, neon_account_info = self._account_cache.get_account(str(eth_account), commitment)
+            if is_found:
+                return neon_account_info
+
+        if self._is_coalescing():
+            return self._neon_account_flight.do((str(eth_account), commitment),
+                                                lambda: self._get_neon_account_info(eth_account, commitment))
+        return self._get_neon_account_info(eth_account, commitment)
+
+    def _get_neon_account_info(self, eth_account: EthereumAddress, commitment: str) -> Optional[NeonAccountInfo]:
+        fetch_time = time.monotonic()
         account_sol, nonce = ether2program(eth_account)
-        info = self.get_account_info(account_sol)
-        if info is None:
-            return None
-        elif info.tag != NEON_ACCOUNT_TAG:
-            raise RuntimeError(f"Wrong tag {info.tag} for neon account info {str(account_sol)}")
-        elif len(info.data) < ACCOUNT_INFO_LAYOUT.sizeof():
-            raise RuntimeError(f"Wrong data length for account data {account_sol}: " +
-                               f"{len(info.data)} < {ACCOUNT_INFO_LAYOUT.sizeof()}")
-        return NeonAccountInfo.frombytes(PublicKey(account_sol), info.data)
+        slot, info = self._get_account_info_slot(account_sol, 256, commitment)
+        neon_account_info = self._decode_neon_account_info(account_sol, info)
+        if self._account_cache.is_enabled:
+            self._account_cache.put_account(str(eth_account), commitment, slot, fetch_time, neon_account_info)
+        return neon_account_info
+
+    def invalidate_neon_account_list(self, address_list: List[str]) -> None:
+        """Evicts accounts, which are changed by our transactions, from the cache"""
+        self._account_cache.invalidate_account_list(address_list)
 
     def get_neon_code_info(self, account: Union[str, EthereumAddress, NeonAccountInfo, PublicKey, None]) -> Optional[NeonCodeInfo]:
         if isinstance(account, str) or isinstance(account, EthereumAddress):
@@ -396,6 +697,11 @@ class SolanaInteractor:
         if not isinstance(account, PublicKey):
             return None
 
+        if self._account_cache.is_code_enabled:
+            code_info = self._account_cache.get_code(str(account))
+            if code_info is not None:
+                return code_info
+
         info = self.get_account_info(account, length=0)
         if info is None:
             return None
@@ -404,21 +710,37 @@ class SolanaInteractor:
         elif len(info.data) < CODE_ACCOUNT_INFO_LAYOUT.sizeof():
             raise RuntimeError(f"Wrong data length for account data {str(account)}: " +
                                f"{len(info.data)} < {CODE_ACCOUNT_INFO_LAYOUT.sizeof()}")
-        return NeonCodeInfo.frombytes(account, info.data)
-
-    def get_neon_account_info_list(self, eth_accounts: List[EthereumAddress]) -> List[Optional[NeonAccountInfo]]:
-        requests_list = []
-        for eth_account in eth_accounts:
-            account_sol, _nonce = ether2program(eth_account)
-            requests_list.append(account_sol)
-        responses_list = self.get_account_info_list(requests_list)
-        accounts_list = []
-        for account_sol, info in zip(requests_list, responses_list):
-            if info is None or len(info.data) < ACCOUNT_INFO_LAYOUT.sizeof() or info.tag != NEON_ACCOUNT_TAG:
-                accounts_list.append(None)
-                continue
-            accounts_list.append(NeonAccountInfo.frombytes(PublicKey(account_sol), info.data))
-        return accounts_list
+        code_info = NeonCodeInfo.frombytes(account, info.data)
+        if self._account_cache.is_code_enabled:
+            self._account_cache.put_code(str(account), code_info)
+        return code_info
+
+    def get_neon_account_info_list(self, eth_accounts: List[EthereumAddress],
+                                   commitment='confirmed') -> List[Optional[NeonAccountInfo]]:
+        """Requests from Solana only accounts, which aren't found in the cache"""
+        neon_account_info_list: List[Optional[NeonAccountInfo]] = [None] * len(eth_accounts)
+        miss_idx_list = []
+        for idx, eth_account in enumerate(eth_accounts):
+            is_found = False
+            if self._account_cache.is_enabled:
+                is_found, neon_account_info_list[idx] = self._account_cache.get_account(str(eth_account), commitment)
+            if not is_found:
+                miss_idx_list.append(idx)
+
+        if not len(miss_idx_list):
+            return neon_account_info_list
+
+        fetch_time = time.monotonic()
+        miss_account_list = [eth_accounts[idx] for idx in miss_idx_list]
+        requests_list = self._get_neon_account_sol_list(miss_account_list)
+        responses_list = self._get_account_info_slot_list(requests_list, 256, commitment)
+        decoded_list = self._decode_neon_account_info_list(requests_list, [info for _, info in responses_list])
+        for idx, eth_account, (slot, _), neon_account_info in zip(miss_idx_list, miss_account_list,
+                                                                  responses_list, decoded_list):
+            neon_account_info_list[idx] = neon_account_info
+            if self._account_cache.is_enabled:
+                self._account_cache.put_account(str(eth_account), commitment, slot, fetch_time, neon_account_info)
+        return neon_account_info_list
 
     def get_storage_account_info(self, storage_account: PublicKey) -> Optional[StorageAccountInfo]:
         info = self.get_account_info(storage_account, length=0)
@@ -448,39 +770,24 @@ class SolanaInteractor:
         return self._send_rpc_request("getBlocksWithLimit", last_block_slot, limit, opts)['result']
 
     def get_block_info(self, slot: int, commitment='confirmed') -> [SolanaBlockInfo]:
-        opts = {
-            "commitment": commitment,
-            "encoding": "json",
-            "transactionDetails": "signatures",
-            "rewards": False
-        }
+        if self._is_coalescing():
+            return self._block_flight.do((slot, commitment), lambda: self._get_block_info(slot, commitment))
+        return self._get_block_info(slot, commitment)
 
+    def _get_block_info(self, slot: int, commitment: str) -> SolanaBlockInfo:
+        opts = self._get_block_opts(commitment)
         response = self._send_rpc_request('getBlock', slot, opts)
         net_block = response.get('result', None)
         if not net_block:
             return SolanaBlockInfo(slot=slot)
-
-        return SolanaBlockInfo(
-            slot=slot,
-            is_finalized=(commitment == FINALIZED),
-            hash='0x' + base58.b58decode(net_block['blockhash']).hex(),
-            parent_hash='0x' + base58.b58decode(net_block['previousBlockhash']).hex(),
-            time=net_block['blockTime'],
-            signs=net_block['signatures']
-        )
+        return self._decode_block_info(slot, net_block, commitment)
 
     def get_block_info_list(self, block_slot_list: [int], commitment='confirmed') -> [SolanaBlockInfo]:
         block_list = []
         if not len(block_slot_list):
             return block_list
 
-        opts = {
-            "commitment": commitment,
-            "encoding": "json",
-            "transactionDetails": "signatures",
-            "rewards": False
-        }
-
+        opts = self._get_block_opts(commitment)
         request_list = []
         for slot in block_slot_list:
             request_list.append((slot, opts))
@@ -493,23 +800,24 @@ class SolanaInteractor:
                     is_finalized=(commitment == FINALIZED),
                 )
             else:
-                net_block = response['result']
-                block = SolanaBlockInfo(
-                    slot=slot,
-                    is_finalized=(commitment == FINALIZED),
-                    hash='0x' + base58.b58decode(net_block['blockhash']).hex(),
-                    parent_hash='0x' + base58.b58decode(net_block['previousBlockhash']).hex(),
-                    time=net_block['blockTime'],
-                    signs=net_block['signatures']
-                )
+                block = self._decode_block_info(slot, response['result'], commitment)
             block_list.append(block)
         return block_list
 
-    def get_recent_blockslot(self, commitment='confirmed', default: Optional[int] = None) -> int:
+    def _get_latest_blockhash(self, commitment: str) -> RPCResponse:
         opts = {
             'commitment': commitment
         }
-        blockhash_resp = self._send_rpc_request('getLatestBlockhash', opts)
+        if self._is_coalescing():
+            # the response is shared between callers, so it is only read
+            return self._blockhash_flight.do(commitment, lambda: self._send_rpc_request('getLatestBlockhash', opts))
+        return self._send_rpc_request('getLatestBlockhash', opts)
+
+    def get_latest_blockhash_info(self) -> RPCResponse:
+        return self._get_latest_blockhash('confirmed')
+
+    def get_recent_blockslot(self, commitment='confirmed', default: Optional[int] = None) -> int:
+        blockhash_resp = self._get_latest_blockhash(commitment)
         if not blockhash_resp.get("result"):
             if default:
                 return default
@@ -518,119 +826,71 @@ class SolanaInteractor:
         return blockhash_resp['result']['context']['slot']
 
     def get_recent_blockhash(self, commitment='confirmed') -> Blockhash:
-        opts = {
-            'commitment': commitment
-        }
-        blockhash_resp = self._send_rpc_request('getLatestBlockhash', opts)
+        blockhash_resp = self._get_latest_blockhash(commitment)
         if not blockhash_resp.get("result"):
             raise RuntimeError("failed to get recent blockhash")
         blockhash = blockhash_resp["result"]["value"]["blockhash"]
         return Blockhash(blockhash)
 
+    def _get_send_blockhash(self) -> Blockhash:
+        service = get_blockhash_service(self)
+        blockhash = service.get_blockhash() if service is not None else None
+        if blockhash is None:
+            return self.get_recent_blockhash()
+        return blockhash
+
+    def is_blockhash_near_expiry(self, blockhash: Optional[Blockhash]) -> bool:
+        service = get_blockhash_service(self)
+        return (service is not None) and service.is_near_expiry(blockhash)
+
+    def is_blockhash_valid(self, blockhash: Blockhash, commitment='confirmed') -> bool:
+        response = self._send_rpc_request('isBlockhashValid', blockhash, {'commitment': commitment})
+        result = response.get('result')
+        if not result:
+            # transactions with the blockhash can be still processed
+            self.debug(f'Fail to check the blockhash {blockhash}: {response}')
+            return True
+        return result['value']
+
     def _fuzzing_transactions(self, signer: SolanaAccount, tx_list, tx_opts, request_list):
         """
         Make each second transaction a bad one.
         This is used to test a transaction sending on a live cluster (testnet/devnet).
         """
-        if not FUZZING_BLOCKHASH:
-            return request_list
-
-        self._fuzzing_hash_cycle = not self._fuzzing_hash_cycle
-        if not self._fuzzing_hash_cycle:
+        if not self._is_fuzzing_cycle():
             return request_list
 
         # get bad block slot for sent transactions
-        slot = self.get_recent_blockslot()
-        # blockhash = '4NCYB3kRT8sCNodPNuCZo8VUh4xqpBQxsxed2wd9xaD4'
-        block_opts = {
-            "encoding": "json",
-            "transactionDetails": "none",
-            "rewards": False
-        }
-        slot = max(slot - 500, 10)
+        slot, block_opts = self._get_fuzzing_block_request(self.get_recent_blockslot())
         block = self._send_rpc_request("getBlock", slot, block_opts)
-        fuzzing_blockhash = Blockhash(block['result']['blockhash'])
-        self.debug(f"fuzzing block {fuzzing_blockhash} for slot {slot}")
-
-        # sign half of transactions with a bad blockhash
-        for idx, tx in enumerate(tx_list):
-            if idx % 2 == 1:
-                continue
-            tx.recent_blockhash = fuzzing_blockhash
-            tx.sign(signer)
-            base64_tx = base64.b64encode(tx.serialize()).decode('utf-8')
-            request_list[idx] = (base64_tx, tx_opts)
-        return request_list
+        return self._sign_fuzzing_transactions(signer, tx_list, tx_opts, request_list, slot, block)
 
     def _send_multiple_transactions(self, signer: SolanaAccount, tx_list: [Transaction],
                                     skip_preflight: bool, preflight_commitment: str) -> [str]:
-        opts = {
-            "skipPreflight": skip_preflight,
-            "encoding": "base64",
-            "preflightCommitment": preflight_commitment
-        }
-
-        blockhash = None
-        request_list = []
-
-        for tx in tx_list:
-            if not tx.recent_blockhash:
-                if not blockhash:
-                    blockhash = self.get_recent_blockhash()
-                tx.recent_blockhash = blockhash
-                tx.signatures.clear()
-            if not tx.signatures:
-                tx.sign(signer)
-            base64_tx = base64.b64encode(tx.serialize()).decode('utf-8')
-            request_list.append((base64_tx, opts))
+        opts = self._get_send_tx_opts(skip_preflight, preflight_commitment)
+        blockhash = self._get_send_blockhash() if self._is_blockhash_required(tx_list) else None
+        request_list = self._get_send_tx_request_list(signer, tx_list, blockhash, opts)
 
         request_list = self._fuzzing_transactions(signer, tx_list, opts, request_list)
         response_list = self._send_rpc_batch_request('sendTransaction', request_list)
-        result_list = []
+        return self._decode_send_result_list(response_list, tx_list)
 
-        for response, tx in zip(response_list, tx_list):
-            raw_result = response.get('result')
-
-            result = None
-            if isinstance(raw_result, dict):
-                self.debug(f'Got strange result on transaction execution: {json.dumps(raw_result)}')
-            elif isinstance(raw_result, str):
-                result = b58encode(b58decode(raw_result)).decode("utf-8")
-            elif isinstance(raw_result, bytes):
-                result = b58encode(raw_result).decode("utf-8")
-            elif raw_result is not None:
-                self.debug(f'Got strange result on transaction execution: {str(raw_result)}')
-
-            error = response.get('error')
-            if error:
-                if get_from_dict(error, 'data', 'err') == 'AlreadyProcessed':
-                    result = b58encode(tx.signature()).decode("utf-8")
-                    self.debug(f'Transaction is already processed: {str(result)}')
-                    error = None
-                else:
-                    self.debug(f'Got error on transaction execution: {json.dumps(error)}')
-                    result = None
-
-            result_list.append(SendResult(result=result, error=error))
-        return result_list
+    def send_transaction_list(self, signer: SolanaAccount, tx_list: [Transaction],
+                              skip_preflight: bool, preflight_commitment: str) -> [SendResult]:
+        """Sends transactions without waiting for confirmations"""
+        return self._send_multiple_transactions(signer, tx_list, skip_preflight, preflight_commitment)
 
     def send_multiple_transactions(self, signer: SolanaAccount, tx_list: [], waiter,
                                    skip_preflight: bool, preflight_commitment: str) -> [{}]:
-        send_result_list = self._send_multiple_transactions(signer, tx_list, skip_preflight, preflight_commitment)
-        # Filter good transactions and wait the confirmations for them
-        sign_list = [s.result for s in send_result_list if s.result]
-        self._confirm_multiple_transactions(sign_list, waiter)
-        # Get receipts for good transactions
-        confirmed_list = self.get_multiple_receipts(sign_list)
-        # Mix errors with receipts for good transactions
-        receipt_list = []
-        for s in send_result_list:
-            if s.error:
-                receipt_list.append(s.error)
-            else:
-                receipt_list.append(confirmed_list.pop(0))
-
-        return receipt_list
+        # the blockhash, transactions, confirmations and receipts are requested from one node
+        with self._endpoint_pool.pin():
+            send_result_list = self._send_multiple_transactions(signer, tx_list, skip_preflight, preflight_commitment)
+            # Filter good transactions and wait the confirmations for them
+            sign_list = [s.result for s in send_result_list if s.result]
+            self._confirm_multiple_transactions(sign_list, waiter)
+            # Get receipts for good transactions
+            confirmed_list = self.get_multiple_receipts(sign_list)
+        return self._mix_receipt_list(send_result_list, confirmed_list)
 
     def _get_confirmed_slot_for_transactions(self, sign_list: [str]) -> (int, bool):
         opts = {
@@ -642,19 +902,29 @@ class SolanaInteractor:
             (part_sign_list, sign_list) = (sign_list[:100], sign_list[100:])
             response = self._send_rpc_request("getSignatureStatuses", part_sign_list, opts)
 
-            result = response.get('result', None)
-            if not result:
+            part_slot, is_confirmed = self._decode_signature_statuses(response)
+            slot = part_slot or slot
+            if not is_confirmed:
                 return slot, False
 
-            slot = result['context']['slot']
+        return slot, (slot != 0)
 
-            for status in result['value']:
-                if not status:
-                    return slot, False
-                if status['confirmationStatus'] == 'processed':
-                    return slot, False
+    def get_confirmed_sign_list(self, sign_list: [str]) -> Tuple[int, List[str]]:
+        """Returns the slot of the last response and confirmed signatures in the order of the list"""
+        opts = {
+            "searchTransactionHistory": False
+        }
 
-        return slot, (slot != 0)
+        slot = 0
+        confirmed_list = []
+        while len(sign_list):
+            (part_sign_list, sign_list) = (sign_list[:100], sign_list[100:])
+            response = self._send_rpc_request("getSignatureStatuses", part_sign_list, opts)
+
+            part_slot, part_confirmed_list = self._decode_confirmed_sign_list(part_sign_list, response)
+            slot = part_slot or slot
+            confirmed_list += part_confirmed_list
+        return slot, confirmed_list
 
     def _confirm_multiple_transactions(self, sign_list: [str], waiter=None):
         """Confirm a transaction."""
@@ -662,11 +932,22 @@ class SolanaInteractor:
             self.debug('No confirmations, because transaction list is empty')
             return
 
+        subscriber = get_solana_subscriber()
+        if subscriber is None:
+            self._poll_confirmed_transactions(sign_list, None, waiter)
+            return
+
+        # the subscription is done before the first status check to not miss the confirmation between them
+        with subscriber.watch_signature_list(sign_list, 'confirmed') as watch:
+            self._poll_confirmed_transactions(sign_list, watch, waiter)
+
+    def _poll_confirmed_transactions(self, sign_list: [str], watch: Optional[SignatureWatch], waiter) -> None:
         elapsed_time = 0
         while elapsed_time < CONFIRM_TIMEOUT:
             if elapsed_time > 0:
-                time.sleep(CONFIRMATION_CHECK_DELAY)
-            elapsed_time += CONFIRMATION_CHECK_DELAY
+                elapsed_time += self.wait_confirmation(watch, CONFIRM_TIMEOUT - elapsed_time)
+            else:
+                elapsed_time += CONFIRMATION_CHECK_DELAY
 
             slot, is_confirmed = self._get_confirmed_slot_for_transactions(sign_list)
             if waiter:
@@ -678,10 +959,31 @@ class SolanaInteractor:
 
         self.warning(f'No confirmed status for transactions: {sign_list}')
 
+    @staticmethod
+    def wait_confirmation(watch: Optional[SignatureWatch], timeout: float, is_any=False) -> float:
+        """
+        Waits for the notification or for the poll delay, returns the wait time.
+        With is_any the notification about any signature of watches with the shared event is waited for.
+        """
+        if (watch is None) or (not watch.is_active):
+            time.sleep(CONFIRMATION_CHECK_DELAY)
+            return CONFIRMATION_CHECK_DELAY
+
+        # the node of notifications can be ahead of the node of requests, so statuses are requested not too often
+        start_time = time.monotonic()
+        if is_any:
+            watch.wait_any(min(SOLANA_WS_MAX_WAIT_SEC, timeout))
+        else:
+            watch.wait(min(SOLANA_WS_MAX_WAIT_SEC, timeout))
+        wait_time = time.monotonic() - start_time
+        if wait_time < CONFIRMATION_CHECK_DELAY:
+            time.sleep(CONFIRMATION_CHECK_DELAY - wait_time)
+            wait_time = CONFIRMATION_CHECK_DELAY
+        return wait_time
+
     def get_multiple_receipts(self, sign_list: [str], commitment='confirmed') -> List[Optional[Dict]]:
         if not len(sign_list):
             return []
-        opts = {"encoding": "json", "commitment": commitment}
-        request_list = [(sign, opts) for sign in sign_list]
+        request_list = self._get_receipt_request_list(sign_list, commitment)
         response_list = self._send_rpc_batch_request("getTransaction", request_list)
-        return [r.get('result') for r in response_list]
+        return self._decode_receipt_list(response_list)
@@ -0,0 +1,173 @@
+import copy
+import threading
+import traceback
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from logged_groups import logged_group
+from solana.publickey import PublicKey
+
+from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
+
+
+T = TypeVar('T')
+
+
+@logged_group("neon.Proxy")
+class _MergeStat:
+    def __init__(self, method: str):
+        self._method = method
+        self._stat_exporter: Optional[StatisticsExporter] = None
+
+    def set_stat_exporter(self, stat_exporter: StatisticsExporter) -> None:
+        self._stat_exporter = stat_exporter
+
+    def _commit_stat(self, request_cnt: int, sent_cnt: int) -> None:
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_solana_request_merge(self._method, request_cnt, sent_cnt)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit statistics of merged Solana requests: {err}: {err_tb}')
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(_MergeStat):
+    """
+    Merges concurrent calls with the same key into one call, the callers, which come while the call is in flight,
+    receive its result. Results of mutable types should be copied for each caller (is_copy_result=True).
+    """
+
+    def __init__(self, method: str, is_copy_result: bool = False):
+        super().__init__(method)
+        self._is_copy_result = is_copy_result
+        self._lock = threading.Lock()
+        self._flight_dict: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flight_dict.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flight_dict[key] = flight
+
+        if not is_leader:
+            flight.event.wait()
+            self._commit_stat(1, 0)
+            if flight.error is not None:
+                raise flight.error
+            return copy.copy(flight.result) if self._is_copy_result else flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flight_dict[key]
+            flight.event.set()
+
+        self._commit_stat(1, 1)
+        return copy.copy(flight.result) if self._is_copy_result else flight.result
+
+
+class _AccountBatch:
+    def __init__(self):
+        self.pubkey_list: List[PublicKey] = []
+        self.request_cnt = 0
+        self.event = threading.Event()
+        self.info_dict: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+
+
+class _AccountBatchQueue:
+    def __init__(self, lock: threading.Lock):
+        self.cond = threading.Condition(lock)
+        self.in_flight_cnt = 0
+        self.pending_batch: Optional[_AccountBatch] = None
+
+
+class AccountInfoBatcher(_MergeStat):
+    """
+    Folds concurrent single-account lookups into getMultipleAccounts.
+
+    A lookup is sent at once while there are less than MAX_IN_FLIGHT_CNT batches in flight,
+    so the lookup on an idle node doesn't wait for anything. Lookups, which come later, are collected into the
+    pending batch, and the pending batch is sent when one of the batches in flight completes.
+    """
+
+    MAX_IN_FLIGHT_CNT = 2
+
+    def __init__(self, fetch_func: Callable[[List[PublicKey], int, str], List[Any]], max_batch_size: int):
+        super().__init__('getAccountInfo')
+        self._fetch_func = fetch_func
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._queue_dict: Dict[Tuple[int, str], _AccountBatchQueue] = {}
+
+    def get(self, pubkey: PublicKey, length: int, commitment: str) -> Any:
+        with self._lock:
+            queue = self._queue_dict.get((length, commitment))
+            if queue is None:
+                queue = _AccountBatchQueue(self._lock)
+                self._queue_dict[(length, commitment)] = queue
+
+            batch = queue.pending_batch
+            is_full = (batch is not None) and (len(batch.pubkey_list) >= self._max_batch_size)
+            if (batch is not None) and ((not is_full) or (str(pubkey) in batch.info_dict)):
+                # the leader of the pending batch sends it
+                self._add_pubkey(batch, pubkey)
+                is_leader = False
+            else:
+                batch = _AccountBatch()
+                self._add_pubkey(batch, pubkey)
+                is_leader = True
+                if queue.in_flight_cnt >= self.MAX_IN_FLIGHT_CNT:
+                    queue.pending_batch = batch
+                    while queue.in_flight_cnt >= self.MAX_IN_FLIGHT_CNT:
+                        queue.cond.wait()
+                    if queue.pending_batch is batch:
+                        queue.pending_batch = None
+                queue.in_flight_cnt += 1
+
+        if is_leader:
+            self._send(queue, batch, length, commitment)
+        else:
+            batch.event.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.info_dict[str(pubkey)]
+
+    @staticmethod
+    def _add_pubkey(batch: _AccountBatch, pubkey: PublicKey) -> None:
+        batch.request_cnt += 1
+        if str(pubkey) not in batch.info_dict:
+            batch.info_dict[str(pubkey)] = None
+            batch.pubkey_list.append(pubkey)
+
+    def _send(self, queue: _AccountBatchQueue, batch: _AccountBatch, length: int, commitment: str) -> None:
+        try:
+            info_list = self._fetch_func(batch.pubkey_list, length, commitment)
+            if len(info_list) != len(batch.pubkey_list):
+                raise RuntimeError(f'Invalid getMultipleAccounts response: {len(batch.pubkey_list)} accounts, ' +
+                                   f'{len(info_list)} results')
+            batch.info_dict.update(zip([str(pubkey) for pubkey in batch.pubkey_list], info_list))
+        except BaseException as err:
+            batch.error = err
+        finally:
+            with self._lock:
+                queue.in_flight_cnt -= 1
+                queue.cond.notify()
+            batch.event.set()
+
+        self._commit_stat(batch.request_cnt, 1)
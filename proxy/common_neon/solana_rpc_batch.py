@@ -0,0 +1,110 @@
+import threading
+
+from typing import Any, Dict, Iterator, List, Optional
+
+from .json_codec import json_codec
+from .environment_data import SOLANA_BATCH_MAX_REQUEST_KB, SOLANA_BATCH_TARGET_LATENCY_SEC
+
+
+# providers answer with these HTTP statuses on too big batches and on too many requests
+HTTP_PAYLOAD_TOO_LARGE = 413
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+class RpcBatchChunk:
+    def __init__(self, data_list: List[bytes]):
+        self.data_list = data_list
+
+    def __len__(self) -> int:
+        return len(self.data_list)
+
+    @property
+    def body(self) -> bytes:
+        return b'[' + b','.join(self.data_list) + b']'
+
+    def split(self) -> List['RpcBatchChunk']:
+        middle = len(self.data_list) // 2
+        return [RpcBatchChunk(self.data_list[:middle]), RpcBatchChunk(self.data_list[middle:])]
+
+
+class RpcBatch:
+    """
+    Requests of one batch call. Each request is serialized once, chunk bodies are joined from these bytes,
+    and responses are put into the order of requests by their ids.
+    """
+
+    def __init__(self, method: str, params_list: List[Any], request_counter: Iterator[int]):
+        self.method = method
+        self._data_list: List[bytes] = []
+        self._index_dict: Dict[int, int] = {}
+        for idx, params in enumerate(params_list):
+            request_id = next(request_counter) + 1
+            request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            self._data_list.append(json_codec.dumps(request))
+            self._index_dict[request_id] = idx
+        self._response_list: List[Optional[Dict[str, Any]]] = [None] * len(self._data_list)
+
+    def split(self, item_limit: int, max_size: int = SOLANA_BATCH_MAX_REQUEST_KB * 1024) -> List[RpcBatchChunk]:
+        chunk_list: List[RpcBatchChunk] = []
+        data_list: List[bytes] = []
+        size = 0
+        for data in self._data_list:
+            if len(data_list) and ((len(data_list) >= item_limit) or (size + len(data) > max_size)):
+                chunk_list.append(RpcBatchChunk(data_list))
+                data_list = []
+                size = 0
+            data_list.append(data)
+            size += len(data) + 1
+        if len(data_list):
+            chunk_list.append(RpcBatchChunk(data_list))
+        return chunk_list
+
+    def add_response_list(self, chunk: RpcBatchChunk, response_list: Any) -> None:
+        if (not isinstance(response_list, list)) or (len(response_list) != len(chunk)):
+            raise RuntimeError(f'Invalid RPC response on {len(chunk)} requests {self.method}: ' +
+                               f'{str(response_list)[:256]}')
+
+        for response in response_list:
+            idx = self._index_dict.get(response.get('id')) if isinstance(response, dict) else None
+            if idx is None:
+                raise RuntimeError(f'Invalid RPC response on requests {self.method}: {str(response)[:256]}')
+            self._response_list[idx] = response
+
+    def get_response_list(self) -> List[Dict[str, Any]]:
+        for idx, response in enumerate(self._response_list):
+            if response is None:
+                raise RuntimeError(f'No RPC response on request {self._data_list[idx][:256]}')
+        return self._response_list
+
+
+class RpcBatchSizer:
+    """
+    Item limits of batch chunks for each method.
+
+    A limit grows by a quarter after each full chunk, which is answered in the target latency, and falls to a half
+    of the chunk on a slow response or on the provider limit, so chunks follow the bandwidth of the node.
+    """
+
+    START_ITEM_LIMIT = 64
+    MAX_ITEM_LIMIT = 1000
+
+    def __init__(self, target_latency_sec: float = SOLANA_BATCH_TARGET_LATENCY_SEC):
+        self._target_latency_sec = target_latency_sec
+        self._lock = threading.Lock()
+        self._limit_dict: Dict[str, int] = {}
+
+    def get_limit(self, method: str) -> int:
+        return self._limit_dict.get(method, self.START_ITEM_LIMIT)
+
+    def on_response(self, method: str, item_cnt: int, latency_sec: float) -> None:
+        with self._lock:
+            limit = self.get_limit(method)
+            if latency_sec > self._target_latency_sec:
+                limit = min(limit, max(item_cnt // 2, 1))
+            elif item_cnt >= limit:
+                limit = min(limit + max(limit // 4, 1), self.MAX_ITEM_LIMIT)
+            self._limit_dict[method] = limit
+
+    def on_limit_error(self, method: str, item_cnt: int) -> None:
+        with self._lock:
+            self._limit_dict[method] = min(self.get_limit(method), max(item_cnt // 2, 1))
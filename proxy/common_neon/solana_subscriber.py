@@ -0,0 +1,325 @@
+import itertools
+import json
+import threading
+import time
+import traceback
+
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from logged_groups import logged_group
+
+from ..http.websocket import WebsocketClient, WebsocketFrame
+from .process_local import ProcessLocal
+from .environment_data import SOLANA_WS_URL, SOLANA_WS_RECONNECT_SEC, SOLANA_WS_MAX_WAIT_SEC
+
+
+class _SignatureWait:
+    def __init__(self):
+        self.event = threading.Event()
+        self.is_confirmed = False
+        self.slot = 0
+        self.subscription_id: Optional[int] = None
+        self.ref_cnt = 0
+        # shared events of watches, see SolanaSubscriber.watch_signature_list()
+        self.notify_event_list: List[threading.Event] = []
+
+    def set(self) -> None:
+        self.event.set()
+        for notify_event in self.notify_event_list:
+            notify_event.set()
+
+
+class SignatureWatch:
+    """Notifications about confirmations of a signature list, see SolanaSubscriber.watch_signature_list()"""
+
+    def __init__(self, subscriber: 'SolanaSubscriber', wait_list: List[Tuple[str, _SignatureWait]], epoch: int,
+                 notify_event: Optional[threading.Event]):
+        self._subscriber = subscriber
+        self._wait_list = wait_list
+        self._epoch = epoch
+        self._notify_event = notify_event
+
+    @property
+    def is_active(self) -> bool:
+        """The watch is broken by the disconnect, notifications can be lost since that"""
+        return self._subscriber.epoch == self._epoch
+
+    @property
+    def slot(self) -> int:
+        return max([wait.slot for _, wait in self._wait_list], default=0)
+
+    def wait(self, timeout: float) -> bool:
+        """Returns True if all signatures are confirmed, returns False on the timeout and on the disconnect"""
+        deadline = time.monotonic() + timeout
+        for _, wait in self._wait_list:
+            if not wait.event.wait(max(deadline - time.monotonic(), 0)):
+                return False
+        return all(wait.is_confirmed for _, wait in self._wait_list)
+
+    def wait_any(self, timeout: float) -> bool:
+        """
+        Returns True on the notification about any signature of watches with the same notify event,
+        returns False on the timeout. The event is cleared, so the caller should check statuses after the wait.
+        """
+        assert self._notify_event is not None
+        is_set = self._notify_event.wait(timeout)
+        self._notify_event.clear()
+        return is_set
+
+    def __enter__(self) -> 'SignatureWatch':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._subscriber.release_signature_list(self._wait_list, self._notify_event)
+
+
+@logged_group("neon.Proxy")
+class SolanaSubscriber:
+    """
+    Keeps the websocket connection to a Solana node and receives slotSubscribe, logsSubscribe and
+    signatureSubscribe notifications in a background thread.
+
+    Notifications only wake up the callers, which request the state from the RPC node as before: the connection
+    can be lost at any moment, so all waits return on the disconnect, and callers return to the polling
+    until the subscriber reconnects.
+    """
+
+    POLL_SEC = 0.05
+    MAX_RECONNECT_SEC = 30
+
+    def __init__(self, ws_url: str):
+        url = urlparse(ws_url)
+        self._hostname = url.hostname
+        self._port = url.port or 80
+        self._path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        self._name = f'{self._hostname}:{self._port}'
+
+        self._lock = threading.Lock()
+        self._client: Optional[WebsocketClient] = None
+        self._epoch = 0
+        self._request_counter = itertools.count(1)
+        # request id -> (kind, key) of subscribe requests, subscription id -> (kind, key) of active subscriptions
+        self._request_dict: Dict[int, Tuple[str, Any]] = {}
+        self._subscription_dict: Dict[int, Tuple[str, Any]] = {}
+
+        self._logs_param_list: List[Tuple[str, str]] = []
+        self._logs_event = threading.Event()
+        self._signature_dict: Dict[str, _SignatureWait] = {}
+
+        self._root_slot = 0
+        self._slot_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='solana-subscriber', daemon=True)
+        self._thread.start()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None
+
+    @property
+    def epoch(self) -> int:
+        """The number of the connection, it is changed on each connect and disconnect"""
+        return self._epoch
+
+    def get_root_slot(self) -> int:
+        """The latest root slot of the node, 0 if notifications aren't received for a while"""
+        if (not self.is_connected) or (time.monotonic() - self._slot_time > SOLANA_WS_MAX_WAIT_SEC):
+            return 0
+        return self._root_slot
+
+    def subscribe_program_logs(self, program_id: str, commitment: str) -> None:
+        """Logs of the program wake up wait_program_logs(), the subscription is restored after reconnects"""
+        param = (program_id, commitment)
+        with self._lock:
+            if param in self._logs_param_list:
+                return
+            self._logs_param_list.append(param)
+            self._subscribe_logs(param)
+
+    def wait_program_logs(self, timeout: float) -> bool:
+        """Returns True on a transaction of subscribed programs or on the disconnect, False on the timeout"""
+        is_set = self._logs_event.wait(timeout)
+        self._logs_event.clear()
+        return is_set
+
+    def watch_signature_list(self, sign_list: List[str], commitment: str,
+                             notify_event: Optional[threading.Event] = None) -> SignatureWatch:
+        """
+        Subscribes to confirmations of signatures. The caller should check statuses after the subscription,
+        because the node doesn't notify about signatures, which are confirmed before the subscription.
+
+        The notify event is set on the notification about any signature of the list, one event can be shared
+        by several watches to wait for the first confirmation of all of them, see SignatureWatch.wait_any().
+        """
+        wait_list: List[Tuple[str, _SignatureWait]] = []
+        with self._lock:
+            epoch = self._epoch if self._client is not None else -1
+            for sign in sign_list:
+                wait = self._signature_dict.get(sign)
+                if wait is None:
+                    wait = _SignatureWait()
+                    self._signature_dict[sign] = wait
+                    params = [sign, {'commitment': commitment}]
+                    if not self._send_request('signatureSubscribe', params, 'signature', sign):
+                        wait.set()
+                wait.ref_cnt += 1
+                if notify_event is not None:
+                    wait.notify_event_list.append(notify_event)
+                    if wait.event.is_set():
+                        notify_event.set()
+                wait_list.append((sign, wait))
+        return SignatureWatch(self, wait_list, epoch, notify_event)
+
+    def release_signature_list(self, wait_list: List[Tuple[str, _SignatureWait]],
+                               notify_event: Optional[threading.Event] = None) -> None:
+        with self._lock:
+            for sign, wait in wait_list:
+                if notify_event is not None:
+                    wait.notify_event_list.remove(notify_event)
+                wait.ref_cnt -= 1
+                if wait.ref_cnt > 0:
+                    continue
+                del self._signature_dict[sign]
+                # the node removes the subscription after the notification
+                if (not wait.event.is_set()) and (wait.subscription_id is not None):
+                    self._subscription_dict.pop(wait.subscription_id, None)
+                    self._send_request('signatureUnsubscribe', [wait.subscription_id], 'unsubscribe', None)
+
+    def _subscribe_logs(self, param: Tuple[str, str]) -> None:
+        program_id, commitment = param
+        self._send_request('logsSubscribe', [{'mentions': [program_id]}, {'commitment': commitment}], 'logs', param)
+
+    def _send_request(self, method: str, params: List[Any], kind: str, key: Any) -> bool:
+        """Should be called under the lock, the frame is sent by the thread of the subscriber"""
+        if self._client is None:
+            return False
+        request_id = next(self._request_counter)
+        self._request_dict[request_id] = (kind, key)
+        request = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        self._client.send_text(json.dumps(request).encode('utf-8'))
+        return True
+
+    def _run(self) -> None:
+        reconnect_sec = SOLANA_WS_RECONNECT_SEC
+        while True:
+            client: Optional[WebsocketClient] = None
+            try:
+                client = WebsocketClient(self._hostname, self._port, self._path.encode('utf-8'),
+                                         on_message=self._on_message, host=self._name.encode('utf-8'))
+                self._on_connect(client)
+                reconnect_sec = SOLANA_WS_RECONNECT_SEC
+                while not client.closed:
+                    if client.run_once(timeout=self.POLL_SEC):
+                        break
+                self.warning(f'Solana websocket {self._name} is closed by the server')
+            except Exception as err:
+                err_tb = "".join(traceback.format_tb(err.__traceback__))
+                self.warning(f'Fail to receive notifications from Solana websocket {self._name}: {err}: {err_tb}')
+
+            self._on_disconnect(client)
+            time.sleep(reconnect_sec)
+            reconnect_sec = min(reconnect_sec * 2, self.MAX_RECONNECT_SEC)
+
+    def _on_connect(self, client: WebsocketClient) -> None:
+        with self._lock:
+            self._client = client
+            self._epoch += 1
+            self._request_dict.clear()
+            self._subscription_dict.clear()
+            self._send_request('slotSubscribe', [], 'slot', None)
+            for param in self._logs_param_list:
+                self._subscribe_logs(param)
+        self.info(f'Connected to Solana websocket {self._name}')
+
+    def _on_disconnect(self, client: Optional[WebsocketClient]) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._epoch += 1
+            self._client = None
+            # notifications can be lost, all waiters return to the polling of the RPC node
+            for wait in self._signature_dict.values():
+                wait.set()
+            self._logs_event.set()
+
+        if client is not None:
+            try:
+                client.close()
+            except Exception as err:
+                self.debug(f'Fail to close Solana websocket {self._name}: {err}')
+
+    def _on_message(self, frame: WebsocketFrame) -> None:
+        try:
+            msg = json.loads(frame.data)
+        except (TypeError, ValueError) as err:
+            self.warning(f'Fail to decode the message from Solana websocket {self._name}: {err}')
+            return
+
+        if 'id' in msg:
+            self._on_response(msg)
+            return
+
+        method = msg.get('method')
+        params = msg.get('params', {})
+        result = params.get('result', {})
+        if method == 'slotNotification':
+            self._root_slot = max(self._root_slot, result.get('root', 0))
+            self._slot_time = time.monotonic()
+        elif method == 'logsNotification':
+            self._logs_event.set()
+        elif method == 'signatureNotification':
+            self._on_signature_notification(params.get('subscription'), result)
+
+    def _on_response(self, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            kind, key = self._request_dict.pop(msg['id'], (None, None))
+            if kind is None:
+                return
+
+            wait = self._signature_dict.get(key) if kind == 'signature' else None
+            error = msg.get('error')
+            if error is not None:
+                self.warning(f'Fail to subscribe to {kind} on Solana websocket {self._name}: {error}')
+                if wait is not None:
+                    wait.set()
+                return
+
+            subscription_id = msg.get('result')
+            if kind == 'unsubscribe':
+                return
+            elif kind == 'signature':
+                if wait is None:
+                    # the waiter is gone before the response
+                    self._send_request('signatureUnsubscribe', [subscription_id], 'unsubscribe', None)
+                    return
+                wait.subscription_id = subscription_id
+            self._subscription_dict[subscription_id] = (kind, key)
+
+    def _on_signature_notification(self, subscription_id: Optional[int], result: Dict[str, Any]) -> None:
+        with self._lock:
+            kind, sign = self._subscription_dict.pop(subscription_id, (None, None))
+            wait = self._signature_dict.get(sign) if kind == 'signature' else None
+            if wait is None:
+                return
+            wait.slot = result.get('context', {}).get('slot', 0)
+            # the failed transaction is confirmed too, the error is processed by the receipt
+            wait.is_confirmed = True
+            wait.set()
+
+
+@logged_group("neon.Proxy")
+def _create_solana_subscriber(*, logger) -> Optional[SolanaSubscriber]:
+    if urlparse(SOLANA_WS_URL).scheme != 'ws':
+        logger.warning('Solana notifications are disabled, only ws:// is supported for SOLANA_WS_URL')
+        return None
+    return SolanaSubscriber(SOLANA_WS_URL)
+
+
+_subscriber: ProcessLocal[Optional[SolanaSubscriber]] = ProcessLocal(_create_solana_subscriber)
+
+
+def get_solana_subscriber() -> Optional[SolanaSubscriber]:
+    """The subscriber of the process, None if SOLANA_WS_URL isn't set"""
+    if not SOLANA_WS_URL:
+        return None
+    return _subscriber.get()
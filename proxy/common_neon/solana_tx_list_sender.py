@@ -1,27 +1,59 @@
 from __future__ import annotations
 
 from solana.account import Account as SolanaAccount
+import threading
 import time
 
+from collections import deque
 from logged_groups import logged_group
-from typing import Optional
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from solana.blockhash import Blockhash
 from solana.transaction import Transaction
 from base58 import b58encode
 
 from .solana_receipt_parser import SolReceiptParser, SolTxError
+from .solana_subscriber import SignatureWatch, get_solana_subscriber
 from .errors import EthereumError
 
-from .environment_data import SKIP_PREFLIGHT, RETRY_ON_FAIL
+from .environment_data import SKIP_PREFLIGHT, RETRY_ON_FAIL, CONFIRM_TIMEOUT, SOLANA_WS_MAX_WAIT_SEC, \
+                              SOL_TX_SEND_WINDOW, CONFIRMATION_CHECK_DELAY
+
+
+class _SentTx:
+    def __init__(self, tx: Transaction):
+        self.tx = tx
+        # the blockhash of the transaction is checked after the deadline
+        self.deadline = time.monotonic() + CONFIRM_TIMEOUT
+
+
+class _TxWindow:
+    """The state of one SolTxListSender._send_tx_window() call"""
+
+    def __init__(self, tx_list: List[Transaction]):
+        self.tx_queue: Deque[Transaction] = deque(tx_list)
+        self.sent_dict: Dict[str, _SentTx] = {}
+        # confirmed transactions without receipts on the node yet, they are never sent again
+        self.confirmed_dict: Dict[str, _SentTx] = {}
+        self.watch_list: List[Tuple[SignatureWatch, Set[str]]] = []
+        # watches of all sent transactions share one event
+        self.notify_event = threading.Event()
+        self.resend_cnt = 0
+        self.receipt_cnt = 0
+        self.success_sign_list: List[str] = []
+
+    def get_in_flight_cnt(self) -> int:
+        return len(self.sent_dict) + len(self.confirmed_dict)
 
 
 @logged_group("neon.Proxy")
 class SolTxListSender:
     def __init__(self, sender, tx_list: [Transaction], name: str,
-                 skip_preflight=SKIP_PREFLIGHT, preflight_commitment='confirmed'):
+                 skip_preflight=SKIP_PREFLIGHT, preflight_commitment='confirmed', window_size=SOL_TX_SEND_WINDOW):
         self._s = sender
         self._name = name
         self._skip_preflight = skip_preflight
         self._preflight_commitment = preflight_commitment
+        self._window_size = window_size
 
         self._blockhash = None
         self._retry_idx = 0
@@ -52,56 +84,228 @@ class SolTxListSender:
         return [tx for lst in self._all_tx_list for tx in lst]
 
     def send(self, signer: SolanaAccount) -> SolTxListSender:
-        solana = self._s.solana
-        waiter = self._s.waiter
-        skip = self._skip_preflight
-        commitment = self._preflight_commitment
-
         self.debug(f'start transactions sending: {self._name}')
+        start_time = time.monotonic()
+        try:
+            while (self._retry_idx < RETRY_ON_FAIL) and (len(self._tx_list)):
+                self._retry_idx += 1
+                self._slots_behind = 0
+
+                with self._s.solana.pin_endpoint():
+                    receipt_cnt, success_sign_list = self._send_tx_window(signer)
+
+                self.debug(f'retry {self._retry_idx}, ' +
+                           f'total receipts {receipt_cnt}, ' +
+                           f'success receipts {len(self.success_sign_list)}(+{len(success_sign_list)}), ' +
+                           f'node behind {len(self._node_behind_list)}, '
+                           f'bad blocks {len(self._bad_block_list)}, ' +
+                           f'blocked accounts {len(self._blocked_account_list)}, ' +
+                           f'budget exceeded {len(self._budget_exceeded_list)}, ' +
+                           f'not sent {len(self._pending_list)}, ' +
+                           f'unknown error: {len(self._unknown_error_list)}')
 
-        while (self._retry_idx < RETRY_ON_FAIL) and (len(self._tx_list)):
-            self._retry_idx += 1
-            self._slots_behind = 0
-
-            receipt_list = solana.send_multiple_transactions(signer, self._tx_list, waiter, skip, commitment)
-
-            success_sign_list = []
-            for receipt, tx in zip(receipt_list, self._tx_list):
-                receipt_parser = SolReceiptParser(receipt)
-                slots_behind = receipt_parser.get_slots_behind()
-                if slots_behind:
-                    self._slots_behind = slots_behind
-                    self._node_behind_list.append(tx)
-                elif receipt_parser.check_if_blockhash_notfound():
-                    self._bad_block_list.append(tx)
-                elif receipt_parser.check_if_accounts_blocked():
-                    self._blocked_account_list.append(tx)
-                elif receipt_parser.check_if_budget_exceeded():
-                    self._budget_exceeded_list.append(tx)
-                    self._budget_exceeded_receipt = receipt
-                elif receipt_parser.check_if_error():
-                    self._unknown_error_list.append(receipt)
-                else:
-                    success_sign_list.append(b58encode(tx.signature()).decode("utf-8"))
-                    self._retry_idx = 0
-                    self._on_success_send(tx, receipt)
-
-            self.debug(f'retry {self._retry_idx}, ' +
-                       f'total receipts {len(receipt_list)}, ' +
-                       f'success receipts {len(self.success_sign_list)}(+{len(success_sign_list)}), ' +
-                       f'node behind {len(self._node_behind_list)}, '
-                       f'bad blocks {len(self._bad_block_list)}, ' +
-                       f'blocked accounts {len(self._blocked_account_list)}, ' +
-                       f'budget exceeded {len(self._budget_exceeded_list)}, ' +
-                       f'unknown error: {len(self._unknown_error_list)}')
-
-            self.success_sign_list += success_sign_list
-            self._on_post_send()
+                self.success_sign_list += success_sign_list
+                self._on_post_send()
+        finally:
+            stat_exporter = self._s.solana.stat_exporter
+            if stat_exporter is not None:
+                stat_exporter.stat_commit_sol_tx_send_time(time.monotonic() - start_time)
 
         if len(self._tx_list):
             raise EthereumError(message='No more retries to complete transaction!')
         return self
 
+    def _send_tx_window(self, signer: SolanaAccount) -> Tuple[int, List[str]]:
+        """
+        Sends _tx_list through the sliding window of SOL_TX_SEND_WINDOW transactions: the next transactions are
+        sent as soon as the previous ones are confirmed. Transactions without the blockhash on the node and
+        transactions with the expired blockhash are sent again with the new blockhash.
+
+        Transactions aren't sent after errors, which should be processed in _on_post_send(),
+        such transactions are moved to _pending_list.
+        """
+        window = _TxWindow(self._tx_list)
+        start_time = time.monotonic()
+        try:
+            while True:
+                if not self._is_window_open():
+                    self._pending_list.extend(window.tx_queue)
+                    window.tx_queue.clear()
+
+                self._send_window_tx_list(signer, window)
+                if not window.get_in_flight_cnt():
+                    if not len(window.tx_queue):
+                        break
+                    continue
+
+                self._wait_window_confirmation(window, start_time)
+                self._get_window_receipt_list(window)
+                self._resend(window, self._pop_expired_tx_list(window.sent_dict), None)
+                window.watch_list = self._release_watch_list(window.watch_list, window.sent_dict)
+        finally:
+            self._release_watch_list(window.watch_list, {})
+
+        return window.receipt_cnt, window.success_sign_list
+
+    def _resend(self, window: _TxWindow, tx_list: List[Transaction], blockhash: Optional[Blockhash]) -> None:
+        if not len(tx_list):
+            return
+        # the latest blockhash is taken on sending, if it isn't set here
+        self._blockhash = blockhash
+        for tx in reversed(tx_list):
+            self._set_tx_blockhash(tx)
+            if window.resend_cnt < RETRY_ON_FAIL:
+                window.resend_cnt += 1
+                window.tx_queue.appendleft(tx)
+            else:
+                self._bad_block_list.append(tx)
+
+    def _send_window_tx_list(self, signer: SolanaAccount, window: _TxWindow) -> None:
+        """Fills free places of the window from the queue"""
+        solana = self._s.solana
+        send_cnt = min(len(window.tx_queue), self._window_size - window.get_in_flight_cnt())
+        if send_cnt <= 0:
+            return
+
+        send_list = [window.tx_queue.popleft() for _ in range(send_cnt)]
+        self._reset_near_expiry_blockhash(send_list)
+        send_result_list = solana.send_transaction_list(signer, send_list, self._skip_preflight,
+                                                        self._preflight_commitment)
+
+        sign_list = []
+        bad_block_list = []
+        for tx, send_result in zip(send_list, send_result_list):
+            if send_result.result:
+                window.sent_dict[send_result.result] = _SentTx(tx)
+                sign_list.append(send_result.result)
+            elif SolReceiptParser(send_result.error).check_if_blockhash_notfound():
+                # it is also the case of the empty result
+                bad_block_list.append(tx)
+            else:
+                window.receipt_cnt += 1
+                self._add_receipt(tx, send_result.error, window.success_sign_list)
+        if len(bad_block_list):
+            # the node doesn't know the shared blockhash, so it is requested from the node
+            self._resend(window, bad_block_list, solana.get_recent_blockhash())
+
+        subscriber = get_solana_subscriber()
+        if (subscriber is not None) and len(sign_list):
+            # the subscription is done before the first status check
+            watch = subscriber.watch_signature_list(sign_list, 'confirmed', window.notify_event)
+            window.watch_list.append((watch, set(sign_list)))
+        if solana.stat_exporter is not None:
+            solana.stat_exporter.stat_commit_sol_tx_send_window(window.get_in_flight_cnt())
+
+    def _wait_window_confirmation(self, window: _TxWindow, start_time: float) -> None:
+        """Waits for the confirmation of any sent transaction and moves confirmed ones to confirmed_dict"""
+        solana = self._s.solana
+        if not len(window.sent_dict):
+            # only receipts of confirmed transactions are waited for
+            time.sleep(CONFIRMATION_CHECK_DELAY)
+            return
+
+        timeout = max(min(t.deadline for t in window.sent_dict.values()) - time.monotonic(), 0)
+        # all watches share one event, so the wait ends on the first confirmation in the window
+        watch = window.watch_list[-1][0] if len(window.watch_list) else None
+        solana.wait_confirmation(watch, min(timeout, SOLANA_WS_MAX_WAIT_SEC), is_any=True)
+
+        slot, confirmed_list = solana.get_confirmed_sign_list(list(window.sent_dict.keys()))
+        if self._s.waiter:
+            self._s.waiter.on_wait_confirm(time.monotonic() - start_time, slot)
+
+        deadline = time.monotonic() + CONFIRM_TIMEOUT
+        for sign in confirmed_list:
+            sent_tx = window.sent_dict.pop(sign)
+            sent_tx.deadline = deadline
+            window.confirmed_dict[sign] = sent_tx
+
+    def _get_window_receipt_list(self, window: _TxWindow) -> None:
+        """Receipts of confirmed transactions, the request is repeated until the node of receipts has them"""
+        if not len(window.confirmed_dict):
+            return
+
+        sign_list = list(window.confirmed_dict.keys())
+        receipt_list = self._s.solana.get_multiple_receipts(sign_list)
+        now = time.monotonic()
+        for sign, receipt in zip(sign_list, receipt_list):
+            if receipt is not None:
+                window.receipt_cnt += 1
+                self._add_receipt(window.confirmed_dict.pop(sign).tx, receipt, window.success_sign_list)
+            elif window.confirmed_dict[sign].deadline <= now:
+                # the confirmed transaction can't be sent again, it can be executed twice
+                raise EthereumError(message=f'No receipt for the confirmed Solana transaction {sign}')
+
+    def _reset_near_expiry_blockhash(self, tx_list: List[Transaction]) -> None:
+        """Transactions are signed again with the latest blockhash, if their blockhash is near expiry"""
+        solana = self._s.solana
+        if solana.is_blockhash_near_expiry(self._blockhash):
+            self._blockhash = None
+        for tx in tx_list:
+            if tx.recent_blockhash and solana.is_blockhash_near_expiry(tx.recent_blockhash):
+                self.debug(f'Blockhash {tx.recent_blockhash} is near expiry')
+                tx.recent_blockhash = None
+                tx.signatures.clear()
+
+    def _pop_expired_tx_list(self, sent_dict: Dict[str, _SentTx]) -> List[Transaction]:
+        """Not confirmed transactions with the expired blockhash can't be processed by Solana"""
+        now = time.monotonic()
+        blockhash_dict: Dict[str, bool] = {}
+        expired_list: List[Transaction] = []
+        for sign, sent_tx in list(sent_dict.items()):
+            if sent_tx.deadline > now:
+                continue
+
+            blockhash = sent_tx.tx.recent_blockhash
+            is_valid = blockhash_dict.get(blockhash)
+            if is_valid is None:
+                is_valid = self._s.solana.is_blockhash_valid(blockhash)
+                blockhash_dict[blockhash] = is_valid
+
+            if is_valid:
+                sent_tx.deadline = now + CONFIRM_TIMEOUT
+            else:
+                self.debug(f'Blockhash {blockhash} of not confirmed transaction {sign} is expired')
+                expired_list.append(sent_dict.pop(sign).tx)
+        return expired_list
+
+    @staticmethod
+    def _release_watch_list(watch_list: List[Tuple[SignatureWatch, Set[str]]],
+                            sent_dict: Dict[str, _SentTx]) -> List[Tuple[SignatureWatch, Set[str]]]:
+        active_watch_list = []
+        for watch, sign_set in watch_list:
+            if any(sign in sent_dict for sign in sign_set):
+                active_watch_list.append((watch, sign_set))
+            else:
+                watch.__exit__()
+        return active_watch_list
+
+    def _add_receipt(self, tx: Transaction, receipt: dict, success_sign_list: List[str]) -> None:
+        receipt_parser = SolReceiptParser(receipt)
+        slots_behind = receipt_parser.get_slots_behind()
+        if slots_behind:
+            self._slots_behind = slots_behind
+            self._node_behind_list.append(tx)
+        elif receipt_parser.check_if_blockhash_notfound():
+            self._bad_block_list.append(tx)
+        elif receipt_parser.check_if_accounts_blocked():
+            self._blocked_account_list.append(tx)
+        elif receipt_parser.check_if_budget_exceeded():
+            self._budget_exceeded_list.append(tx)
+            self._budget_exceeded_receipt = receipt
+        elif receipt_parser.check_if_error():
+            self._unknown_error_list.append(receipt)
+        else:
+            success_sign_list.append(b58encode(tx.signature()).decode("utf-8"))
+            self._retry_idx = 0
+            self._on_success_send(tx, receipt)
+
+    def _is_window_open(self) -> bool:
+        """Errors stop sending of new transactions until they are processed in _on_post_send()"""
+        return not (len(self._node_behind_list) or
+                    len(self._blocked_account_list) or
+                    len(self._budget_exceeded_list) or
+                    len(self._unknown_error_list))
+
     def _on_success_send(self, tx: Transaction, receipt: {}) -> bool:
         """Store the last successfully blockhash and set it in _set_tx_blockhash"""
         self._blockhash = tx.recent_blockhash
@@ -1,8 +1,7 @@
 from __future__ import annotations
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 
 import json
-import base58
 
 from enum import Enum
 from eth_utils import big_endian_to_int
@@ -15,6 +14,33 @@ from ..environment_data import EVM_LOADER_ID, LOG_FULL_OBJECT_INFO
 from ..eth_proto import Trx as EthTx
 
 
+_BASE58_ALPHABET = b'123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_BASE58_VALUE_DICT = {char: value for value, char in enumerate(_BASE58_ALPHABET)}
+_BASE58_CHUNK_LEN = 10
+_BASE58_CHUNK_BASE_LIST = [58 ** chunk_len for chunk_len in range(_BASE58_CHUNK_LEN + 1)]
+
+
+def decode_base58(data: Union[str, bytes]) -> bytes:
+    """
+    The same result as base58.b58decode(), but digits are accumulated in small ints by chunks,
+    so the long int is multiplied 10 times less, and it is converted to bytes at once.
+    """
+    if isinstance(data, str):
+        data = data.encode('ascii')
+    value_data = data.lstrip(b'1')
+    value = 0
+    try:
+        for pos in range(0, len(value_data), _BASE58_CHUNK_LEN):
+            chunk = value_data[pos:pos + _BASE58_CHUNK_LEN]
+            chunk_value = 0
+            for char in chunk:
+                chunk_value = chunk_value * 58 + _BASE58_VALUE_DICT[char]
+            value = value * _BASE58_CHUNK_BASE_LIST[len(chunk)] + chunk_value
+    except KeyError as err:
+        raise ValueError(f'Invalid character {chr(err.args[0])!r} in base58 data')
+    return bytes(len(data) - len(value_data)) + value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+
 def str_fmt_object(obj) -> str:
     def lookup(obj) -> Optional[Dict]:
         if not hasattr(obj, '__dict__'):
@@ -38,10 +64,10 @@ def str_fmt_object(obj) -> str:
             elif isinstance(value, List):
                 if len(value) > 0:
                     result[f'len({key})'] = len(value)
-            elif isinstance(value, str) or isinstance(value, bytes) or isinstance(value, bytearray):
+            elif isinstance(value, (str, bytes, bytearray, memoryview)):
                 if len(value) == 0:
                     continue
-                if isinstance(value, bytes) or isinstance(value, bytearray):
+                if not isinstance(value, str):
                     value = '0x' + value.hex()
                 if len(value) > 130:
                     value = value[:130] + '...'
@@ -168,7 +194,7 @@ class NeonTxResultInfo:
             ix_idx = inner_ix['index']
             for event in inner_ix['instructions']:
                 if accounts[event['programIdIndex']] == EVM_LOADER_ID:
-                    log = base58.b58decode(event['data'])
+                    log = decode_base58(event['data'])
                     evm_ix = int(log[0])
                     if evm_ix == 7:
                         self._decode_event(neon_sign, log, ix_idx)
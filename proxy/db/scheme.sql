@@ -67,6 +67,56 @@
     CREATE INDEX IF NOT EXISTS neon_transaction_logs_address ON neon_transaction_logs(address);
     CREATE INDEX IF NOT EXISTS neon_transaction_logs_topic ON neon_transaction_logs(topic);
 
+    CREATE TABLE IF NOT EXISTS neon_logs (
+        address CHAR(42),
+        blockHash CHAR(66),
+        blockNumber BIGINT,
+
+        transactionHash CHAR(66),
+        transactionIndex INT,
+        transactionLogIndex INT,
+
+        topic0 CHAR(66),
+        topic1 CHAR(66),
+        topic2 CHAR(66),
+        topic3 CHAR(66),
+
+        json TEXT,
+
+        UNIQUE(blockNumber, transactionHash, transactionLogIndex)
+    );
+    CREATE INDEX IF NOT EXISTS neon_logs_block_number ON neon_logs(blockNumber, transactionIndex, transactionLogIndex);
+    CREATE INDEX IF NOT EXISTS neon_logs_block_hash ON neon_logs(blockHash);
+    CREATE INDEX IF NOT EXISTS neon_logs_address ON neon_logs(address, blockNumber);
+    CREATE INDEX IF NOT EXISTS neon_logs_topic0 ON neon_logs(topic0, blockNumber);
+
+    -- versions of applied data migrations
+    CREATE TABLE IF NOT EXISTS neon_schema_version (
+        version INT UNIQUE
+    );
+
+    -- version 1: neon_transaction_logs has one row per topic, move logs to neon_logs once
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM neon_schema_version WHERE version = 1) THEN
+            INSERT INTO neon_logs(address, blockHash, blockNumber,
+                                  transactionHash, transactionIndex, transactionLogIndex,
+                                  topic0, topic1, topic2, topic3, json)
+            SELECT DISTINCT ON (blockNumber, transactionHash, transactionLogIndex)
+                   address, blockHash, blockNumber,
+                   transactionHash,
+                   ('x' || lpad(substr(json::jsonb->>'transactionIndex', 3), 8, '0'))::bit(32)::int,
+                   transactionLogIndex,
+                   json::jsonb->'topics'->>0, json::jsonb->'topics'->>1,
+                   json::jsonb->'topics'->>2, json::jsonb->'topics'->>3,
+                   json
+              FROM neon_transaction_logs
+            ON CONFLICT DO NOTHING;
+
+            INSERT INTO neon_schema_version(version) VALUES (1) ON CONFLICT DO NOTHING;
+        END IF;
+    END $$;
+
     CREATE TABLE IF NOT EXISTS solana_neon_transactions (
         sol_sign CHAR(88),
         neon_sign CHAR(66),
@@ -70,12 +70,16 @@ class ChunkParser:
         return len(raw) > 0, raw
 
     @staticmethod
-    def to_chunks(raw: bytes, chunk_size: int = DEFAULT_BUFFER_SIZE) -> bytes:
+    def to_chunks(raw: bytes, chunk_size: int = DEFAULT_BUFFER_SIZE, is_last: bool = True) -> bytes:
+        """Encodes raw as chunks, the body can be written by parts with is_last=False for all parts except the last one."""
         chunks: List[bytes] = []
         for i in range(0, len(raw), chunk_size):
             chunk = raw[i: i + chunk_size]
             chunks.append(bytes_('{:x}'.format(len(chunk))))
             chunks.append(chunk)
-        chunks.append(bytes_('{:x}'.format(0)))
-        chunks.append(b'')
+        if is_last:
+            chunks.append(bytes_('{:x}'.format(0)))
+            chunks.append(b'')
+        elif not len(chunks):
+            return b''
         return CRLF.join(chunks) + CRLF
@@ -106,6 +106,12 @@ class HttpProtocolHandlerPlugin(ABC):
     def on_client_connection_close(self) -> None:
         pass  # pragma: no cover
 
+    def has_pending_work(self) -> bool:
+        """Return True while the plugin is preparing a response for the client.
+
+        Such connections are not considered inactive."""
+        return False
+
 
 class HttpProtocolHandler(ThreadlessWork):
     """HTTP, HTTPS, HTTP2, WebSockets protocol handler.
@@ -147,7 +153,7 @@ class HttpProtocolHandler(ThreadlessWork):
     def is_inactive(self) -> bool:
         if not self.client.has_buffer() and \
                 self.connection_inactive_for() > self.flags.timeout:
-            return True
+            return not any(plugin.has_pending_work() for plugin in self.plugins.values())
         return False
 
     def get_events(self) -> Dict[socket.socket, int]:
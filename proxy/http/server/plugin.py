@@ -8,13 +8,16 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import socket
+
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import List, Tuple, Union
 from uuid import UUID
 from ..websocket import WebsocketFrame
 from ..parser import HttpParser
 
 from ...common.flags import Flags
+from ...common.types import HasFileno
 from ...core.connection import TcpClientConnection
 from ...core.event import EventQueue
 
@@ -57,3 +60,28 @@ class HttpWebServerBasePlugin(ABC):
     def on_websocket_close(self) -> None:
         """Called when websocket connection has been closed."""
         raise NotImplementedError()     # pragma: no cover
+
+    def get_descriptors(
+            self) -> Tuple[List[socket.socket], List[socket.socket]]:
+        """Return additional descriptors to watch while the request is served."""
+        return [], []
+
+    def write_to_descriptors(self, w: List[Union[int, HasFileno]]) -> bool:
+        """Called when descriptors from get_descriptors are ready for writes.
+
+        Return True to teardown the connection."""
+        return False
+
+    def read_from_descriptors(self, r: List[Union[int, HasFileno]]) -> bool:
+        """Called when descriptors from get_descriptors are ready for reads.
+
+        Return True to teardown the connection."""
+        return False
+
+    def has_pending_work(self) -> bool:
+        """Return True to keep an idle client connection open."""
+        return False
+
+    def on_client_connection_close(self) -> None:
+        """Called when client connection has been closed."""
+        pass
@@ -167,10 +167,14 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
         return True
 
     def write_to_descriptors(self, w: List[Union[int, HasFileno]]) -> bool:
-        pass
+        if self.route:
+            return self.route.write_to_descriptors(w)
+        return False
 
     def read_from_descriptors(self, r: List[Union[int, HasFileno]]) -> bool:
-        pass
+        if self.route:
+            return self.route.read_from_descriptors(r)
+        return False
 
     def on_client_data(self, raw: memoryview) -> Optional[memoryview]:
         if self.switched_protocol == httpProtocolTypes.WEBSOCKET:
@@ -216,6 +220,8 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
     def on_client_connection_close(self) -> None:
         if self.request.has_upstream_server():
             return
+        if self.route:
+            self.route.on_client_connection_close()
         if self.switched_protocol:
             # Invoke plugin.on_websocket_close
             assert self.route
@@ -233,4 +239,9 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
 
     def get_descriptors(
             self) -> Tuple[List[socket.socket], List[socket.socket]]:
+        if self.route:
+            return self.route.get_descriptors()
         return [], []
+
+    def has_pending_work(self) -> bool:
+        return self.route is not None and self.route.has_pending_work()
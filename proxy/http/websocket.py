@@ -68,6 +68,39 @@ class WebsocketFrame:
         frame.data = data
         return frame.build()
 
+    @classmethod
+    def client_frame(cls: Type[V], opcode: int, data: Optional[bytes]) -> bytes:
+        """Clients must mask all frames sent to the server."""
+        frame = cls()
+        frame.fin = True
+        frame.opcode = opcode
+        frame.masked = True
+        frame.data = data
+        frame.payload_length = len(data) if data else 0
+        return frame.build()
+
+    @staticmethod
+    def frame_size(raw: bytes) -> Optional[int]:
+        """Returns the size of the first frame in raw, or None if the frame isn't received completely."""
+        if len(raw) < 2:
+            return None
+        payload_length = raw[1] & 0b01111111
+        cur = 2
+        if payload_length == 126:
+            if len(raw) < 4:
+                return None
+            payload_length, = struct.unpack('!H', raw[2:4])
+            cur = 4
+        elif payload_length == 127:
+            if len(raw) < 10:
+                return None
+            payload_length, = struct.unpack('!Q', raw[2:10])
+            cur = 10
+        if raw[1] & 0b10000000:
+            cur += 4
+        size = cur + payload_length
+        return size if len(raw) >= size else None
+
     def reset(self) -> None:
         self.fin = False
         self.rsv1 = False
@@ -130,10 +163,11 @@ class WebsocketFrame:
         else:
             raise ValueError(f'Invalid payload_length { self.payload_length },'
                              f'maximum allowed { 1 << 64 }')
-        if self.masked and self.data:
+        if self.masked:
             mask = secrets.token_bytes(4) if self.mask is None else self.mask
             raw.write(mask)
-            raw.write(self.apply_mask(self.data, mask))
+            if self.data:
+                raw.write(self.apply_mask(self.data, mask))
         elif self.data:
             raw.write(self.data)
         return raw.getvalue()
@@ -159,7 +193,7 @@ class WebsocketFrame:
             self.mask = raw[cur: cur + 4]
             cur += 4
 
-        assert self.payload_length
+        assert self.payload_length is not None
         self.data = raw[cur: cur + self.payload_length]
         cur += self.payload_length
         if self.masked:
@@ -188,12 +222,15 @@ class WebsocketClient(TcpConnection):
                  hostname: Union[ipaddress.IPv4Address, ipaddress.IPv6Address],
                  port: int,
                  path: bytes = b'/',
-                 on_message: Optional[Callable[[WebsocketFrame], None]] = None) -> None:
+                 on_message: Optional[Callable[[WebsocketFrame], None]] = None,
+                 host: Optional[bytes] = None) -> None:
         super().__init__(tcpConnectionTypes.CLIENT)
         self.hostname: Union[ipaddress.IPv4Address,
                              ipaddress.IPv6Address] = hostname
         self.port: int = port
         self.path: bytes = path
+        self.host: Optional[bytes] = host
+        self.recv_buffer: bytes = b''
         self.sock: socket.socket = new_socket_connection(
             (str(self.hostname), self.port))
         self.on_message: Optional[Callable[[
@@ -208,28 +245,32 @@ class WebsocketClient(TcpConnection):
 
     def upgrade(self) -> None:
         key = base64.b64encode(secrets.token_bytes(16))
-        self.sock.send(build_websocket_handshake_request(key, url=self.path))
+        self.sock.send(build_websocket_handshake_request(key, url=self.path, host=self.host))
         response = HttpParser(httpParserTypes.RESPONSE_PARSER)
         response.parse(self.sock.recv(DEFAULT_BUFFER_SIZE))
         accept = response.header(b'Sec-Websocket-Accept')
         assert WebsocketFrame.key_to_accept(key) == accept
 
     def ping(self, data: Optional[bytes] = None) -> None:
-        pass
+        self.queue(memoryview(WebsocketFrame.client_frame(websocketOpcodes.PING, data)))
 
     def pong(self, data: Optional[bytes] = None) -> None:
-        pass
+        self.queue(memoryview(WebsocketFrame.client_frame(websocketOpcodes.PONG, data)))
+
+    def send_text(self, data: bytes) -> None:
+        """Queues a text frame, it is sent by run_once."""
+        self.queue(memoryview(WebsocketFrame.client_frame(websocketOpcodes.TEXT_FRAME, data)))
 
     def shutdown(self, _data: Optional[bytes] = None) -> None:
         """Closes connection with the server."""
         super().close()
 
-    def run_once(self) -> bool:
+    def run_once(self, timeout: float = 1) -> bool:
         ev = selectors.EVENT_READ
         if self.has_buffer():
             ev |= selectors.EVENT_WRITE
         self.selector.register(self.sock.fileno(), ev)
-        events = self.selector.select(timeout=1)
+        events = self.selector.select(timeout=timeout)
         self.selector.unregister(self.sock)
         for _, mask in events:
             if mask & selectors.EVENT_READ and self.on_message:
@@ -238,16 +279,34 @@ class WebsocketClient(TcpConnection):
                     self.closed = True
                     logger.debug('Websocket connection closed by server')
                     return True
-                frame = WebsocketFrame()
                 # TODO(abhinavsingh): Remove .tobytes after parser is
                 # memoryview compliant
-                frame.parse(raw.tobytes())
-                self.on_message(frame)
+                self.recv_buffer += raw.tobytes()
+                if self.handle_frames():
+                    return True
             elif mask & selectors.EVENT_WRITE:
                 logger.debug(self.buffer)
                 self.flush()
         return False
 
+    def handle_frames(self) -> bool:
+        """Parses all completely received frames, returns True if the server closes the connection."""
+        while True:
+            size = WebsocketFrame.frame_size(self.recv_buffer)
+            if size is None:
+                return False
+            frame = WebsocketFrame()
+            frame.parse(self.recv_buffer[:size])
+            self.recv_buffer = self.recv_buffer[size:]
+            if frame.opcode == websocketOpcodes.PING:
+                self.pong(frame.data)
+            elif frame.opcode == websocketOpcodes.CONNECTION_CLOSE:
+                self.closed = True
+                logger.debug('Websocket connection closed by server')
+                return True
+            elif self.on_message:
+                self.on_message(frame)
+
     def run(self) -> None:
         logger.debug('running')
         try:
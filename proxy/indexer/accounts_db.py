@@ -27,7 +27,7 @@ class NeonAccountDB(BaseDB):
     def set_acc_indexer(self, neon_account: NeonAccountInfo):
         if not self.fill_neon_address_if_missing(neon_account):
             return
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(f'''
                 INSERT INTO neon_accounts (neon_address, pda_address, code_address, slot,  code, sol_sign)
                 VALUES(%s, %s, %s, %s, %s, %s)
@@ -0,0 +1,180 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from logged_groups import logged_group
+from typing import Any, Deque, Dict, List, MutableMapping, Optional, Tuple
+
+from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.environment_data import FINALIZED, INDEXER_POLL_COUNT, INDEXER_BACKFILL_MIN_SLOT_CNT, \
+                                           INDEXER_BACKFILL_SHARD_SLOT_CNT, INDEXER_BACKFILL_CONCURRENCY
+
+
+class BackfillShard:
+    def __init__(self, start_slot: int, stop_slot: int):
+        self.start_slot = start_slot
+        self.stop_slot = stop_slot
+        # (signature, slot) from the oldest one
+        self.sign_list: List[Tuple[str, int]] = []
+        # count of processed signatures
+        self.pos = 0
+
+    def __str__(self) -> str:
+        return f'shard [{self.start_slot}, {self.stop_slot})'
+
+    @property
+    def key(self) -> str:
+        return f'backfill_shard:{self.start_slot}'
+
+    @property
+    def is_done(self) -> bool:
+        return self.pos >= len(self.sign_list)
+
+
+@logged_group("neon.Indexer")
+class IndexerBackfill:
+    """
+    Catch-up of the slot range [start_slot, stop_slot), which is split into shards.
+
+    Signatures of shards are gathered in parallel, each shard is walked backwards from the first signature
+    of the block at its stop slot. The reorder buffer gives shards to the indexer in the order of slots,
+    and each processed shard is checkpointed in the constants table, so a restart continues from the first
+    unprocessed shard.
+    """
+
+    PLAN_KEY = 'backfill_plan'
+
+    def __init__(self, solana: SolanaInteractor, constants: MutableMapping[str, Any], plan: Dict[str, int],
+                 last_slot: int):
+        self._solana = solana
+        self._constants = constants
+        self.start_slot = plan['start_slot']
+        self.stop_slot = plan['stop_slot']
+        self.max_tx: Optional[str] = None
+        self.completed_shard_cnt = 0
+
+        self._shard_queue: Deque[BackfillShard] = deque()
+        for start_slot in range(self.start_slot, self.stop_slot, plan['shard_slot_cnt']):
+            shard = BackfillShard(start_slot, min(start_slot + plan['shard_slot_cnt'], self.stop_slot))
+            checkpoint = self._constants.get(shard.key)
+            if (checkpoint is not None) and (len(self._shard_queue) == 0) and (shard.stop_slot <= last_slot):
+                self.max_tx = checkpoint['max_tx'] or self.max_tx
+                continue
+            self._shard_queue.append(shard)
+
+        self._fetch_queue: Deque[Tuple[BackfillShard, Future]] = deque()
+        self._ready_queue: Deque[BackfillShard] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=INDEXER_BACKFILL_CONCURRENCY,
+                                            thread_name_prefix='indexer-backfill')
+        self.info(f'backfill of slots [{self.start_slot}, {self.stop_slot}): {len(self._shard_queue)} shards')
+
+    @property
+    def is_done(self) -> bool:
+        return (len(self._shard_queue) + len(self._fetch_queue) + len(self._ready_queue)) == 0
+
+    def get_ready_shard_list(self) -> List[BackfillShard]:
+        """Shards with gathered signatures in the order of slots, it waits for the next shard"""
+        self._fill_fetch_queue()
+        while len(self._fetch_queue) > 0:
+            shard, future = self._fetch_queue[0]
+            if (len(self._ready_queue) > 0) and (not future.done()):
+                break
+
+            try:
+                shard.sign_list = future.result()
+            except BaseException:
+                # failed shards are gathered again for the next call
+                for idx, (shard, future) in enumerate(self._fetch_queue):
+                    if future.done() and (future.exception() is not None):
+                        self._fetch_queue[idx] = (shard, self._executor.submit(self._gather_shard, shard))
+                raise
+
+            self._fetch_queue.popleft()
+            self._ready_queue.append(shard)
+            self.debug(f'{shard}: {len(shard.sign_list)} signatures')
+
+        self._fill_fetch_queue()
+        return list(self._ready_queue)
+
+    def complete_done_shards(self) -> None:
+        while (len(self._ready_queue) > 0) and self._ready_queue[0].is_done:
+            shard = self._ready_queue.popleft()
+            if len(shard.sign_list) > 0:
+                self.max_tx = shard.sign_list[-1][0]
+            self._constants[shard.key] = {
+                'stop_slot': shard.stop_slot,
+                'signature_cnt': len(shard.sign_list),
+                'max_tx': self.max_tx
+            }
+            self.completed_shard_cnt += 1
+
+    def finish(self) -> None:
+        self._executor.shutdown(wait=False)
+        _remove_backfill_plan(self._constants)
+        self.info(f'backfill of slots [{self.start_slot}, {self.stop_slot}) is finished')
+
+    def _fill_fetch_queue(self) -> None:
+        while (len(self._fetch_queue) < INDEXER_BACKFILL_CONCURRENCY * 2) and (len(self._shard_queue) > 0):
+            shard = self._shard_queue.popleft()
+            self._fetch_queue.append((shard, self._executor.submit(self._gather_shard, shard)))
+
+    def _gather_shard(self, shard: BackfillShard) -> List[Tuple[str, int]]:
+        sign_list: List[Tuple[str, int]] = []
+        before = self._get_boundary_signature(shard.stop_slot)
+        while True:
+            response = self._solana.get_signatures_for_address(before, INDEXER_POLL_COUNT, FINALIZED)
+            if response.get('error'):
+                raise RuntimeError(f'Fail to get signatures for {shard}: {response["error"]}')
+
+            result_list = response.get('result') or []
+            for result in result_list:
+                slot = result['slot']
+                if slot >= shard.stop_slot:
+                    continue
+                if slot < shard.start_slot:
+                    return list(reversed(sign_list))
+                sign_list.append((result['signature'], slot))
+
+            if len(result_list) == 0:
+                return list(reversed(sign_list))
+            before = result_list[-1]['signature']
+
+    def _get_boundary_signature(self, slot: int) -> Optional[str]:
+        """Signatures before the first signature of the block at the slot are in previous slots"""
+        block_slot_list = self._solana.get_block_slot_list(slot, 1, FINALIZED)
+        if len(block_slot_list) == 0:
+            return None
+        block = self._solana.get_block_info(block_slot_list[0], FINALIZED)
+        return block.signs[0] if len(block.signs) > 0 else None
+
+
+def _remove_backfill_plan(constants: MutableMapping[str, Any]) -> None:
+    plan = constants.get(IndexerBackfill.PLAN_KEY)
+    if plan is None:
+        return
+
+    for start_slot in range(plan['start_slot'], plan['stop_slot'], plan['shard_slot_cnt']):
+        constants.pop(BackfillShard(start_slot, 0).key, None)
+    del constants[IndexerBackfill.PLAN_KEY]
+
+
+@logged_group("neon.Indexer")
+def create_indexer_backfill(solana: SolanaInteractor, constants: MutableMapping[str, Any],
+                            last_slot: int, *, logger) -> Optional[IndexerBackfill]:
+    """The unfinished backfill from the previous run, or a new one if the indexer is too far behind"""
+    plan = constants.get(IndexerBackfill.PLAN_KEY)
+    if plan is not None:
+        if plan['start_slot'] <= last_slot < plan['stop_slot']:
+            return IndexerBackfill(solana, constants, plan, last_slot)
+        logger.info(f'skip the backfill of slots [{plan["start_slot"]}, {plan["stop_slot"]}) ' +
+                    f'from the last slot {last_slot}')
+        _remove_backfill_plan(constants)
+
+    if INDEXER_BACKFILL_MIN_SLOT_CNT == 0:
+        return None
+
+    latest_slot = solana.get_slot(FINALIZED)['result']
+    if latest_slot - last_slot < INDEXER_BACKFILL_MIN_SLOT_CNT:
+        return None
+
+    plan = {'start_slot': last_slot, 'stop_slot': latest_slot, 'shard_slot_cnt': INDEXER_BACKFILL_SHARD_SLOT_CNT}
+    constants[IndexerBackfill.PLAN_KEY] = plan
+    return IndexerBackfill(solana, constants, plan, last_slot)
@@ -1,11 +1,9 @@
-import multiprocessing
-import psycopg2
-
-from typing import NamedTuple
+from typing import List, NamedTuple, Sequence
 from logged_groups import logged_group
+from psycopg2.extras import execute_values
 
-from .pg_common import POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST
 from .pg_common import encode, decode
+from .pg_pool import get_pg_connection_pool
 
 
 class DBQuery(NamedTuple):
@@ -26,13 +24,21 @@ class BaseDB:
 
     def __init__(self, table_name):
         self._table_name = table_name
-        self._conn = psycopg2.connect(
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST
-        )
-        self._conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+
+    # rows of one multi-row INSERT
+    INSERT_PAGE_SIZE = 1000
+
+    @staticmethod
+    def _cursor(*args, **kwargs):
+        """Cursor of the connection from the per-process pool, the connection is returned to the pool on exit"""
+        return get_pg_connection_pool().cursor(*args, **kwargs)
+
+    def _insert_row_list(self, cursor, column_list: List[str], row_list: Sequence[Sequence]) -> None:
+        if len(row_list) == 0:
+            return
+
+        request = f'INSERT INTO {self._table_name}({", ".join(column_list)}) VALUES %s ON CONFLICT DO NOTHING'
+        execute_values(cursor, request, row_list, page_size=self.INSERT_PAGE_SIZE)
 
     def _build_expression(self, q: DBQuery) -> DBQueryExpression:
 
@@ -54,13 +60,10 @@ class BaseDB:
              LIMIT 1
         '''
 
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(request, e.where_keys)
             return cursor.fetchone()
 
-    def __del__(self):
-        self._conn.close()
-
     def decode_list(self, v):
         return [] if not v else decode(v)
 
@@ -68,9 +71,4 @@ class BaseDB:
         return None if (not v) or (len(v) == 0) else encode(v)
 
     def is_connected(self) -> bool:
-        try:
-            cur = self._conn.cursor()
-            cur.execute('SELECT 1')
-            return True
-        except psycopg2.OperationalError:
-            return False
+        return get_pg_connection_pool().is_connected()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from ..indexer.base_db import BaseDB, DBQuery
 from ..common_neon.utils import SolanaBlockInfo
@@ -37,6 +37,19 @@ class SolanaBlocksDB(BaseDB):
         q = DBQuery(column_list=self._column_lst, key_list=[('slot', block_slot)], order_list=[])
         return self._block_from_value(block_slot, self._fetchone(q))
 
+    def get_block_dict_by_slot_list(self, block_slot_list: List[int]) -> Dict[int, SolanaBlockInfo]:
+        """Blocks, which are found in the DB"""
+        request = f'SELECT {", ".join(self._column_lst)} FROM {self._table_name} WHERE slot = ANY(%s)'
+        with self._cursor() as cursor:
+            cursor.execute(request, (block_slot_list,))
+            values_list = cursor.fetchall()
+
+        block_dict: Dict[int, SolanaBlockInfo] = {}
+        for values in values_list:
+            block = self._block_from_value(None, values)
+            block_dict[block.slot] = block
+        return block_dict
+
     def get_full_block_by_slot(self, block_slot) -> SolanaBlockInfo:
         q = DBQuery(column_list=self._full_column_lst, key_list=[('slot', block_slot)], order_list=[])
         return self._full_block_from_value(block_slot, self._fetchone(q))
@@ -48,14 +61,20 @@ class SolanaBlocksDB(BaseDB):
     def get_block_parent_hash(self, slot: int, immediate) -> str:
         q = f'slot = {slot}-1' if immediate else f'slot < {slot}'
         request = f'SELECT hash FROM {self._table_name} WHERE {q} ORDER BY slot DESC LIMIT 1'
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(request)
             result = cursor.fetchone()
         if result:
             return result[0]
 
+    def set_block_list(self, block_list: List[SolanaBlockInfo]):
+        row_list = [(block.slot, block.hash, block.parent_hash, block.time, self.encode_list(block.signs))
+                    for block in block_list]
+        with self._cursor() as cursor:
+            self._insert_row_list(cursor, list(self._full_column_lst), row_list)
+
     def set_block(self, block: SolanaBlockInfo):
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(f'''
                 INSERT INTO {self._table_name}
                 ({', '.join(self._full_column_lst)})
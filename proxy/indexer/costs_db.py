@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from ..indexer.utils import CostInfo
 from ..indexer.base_db import BaseDB
@@ -8,14 +8,11 @@ class CostsDB(BaseDB):
     def __init__(self):
         BaseDB.__init__(self, 'solana_neon_transactions_costs')
 
-    def add_costs(self, tx_costs: List[CostInfo]):
-        rows = []
-        for cost_info in tx_costs:
-            rows.append(tuple(cost_info))
+    _column_list = ['sol_sign', 'operator', 'heap_size', 'bpf_instructions', 'sol_cost', 'neon_income']
 
-        with self._conn.cursor() as cursor:
-            cursor.executemany(f'''
-                INSERT INTO solana_neon_transactions_costs
-                (sol_sign, operator, heap_size, bpf_instructions, sol_cost, neon_income)
-                VALUES(%s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING''',
-                rows)
+    @staticmethod
+    def get_row_list(tx_costs: List[CostInfo]) -> List[Tuple]:
+        return [tuple(cost_info) for cost_info in tx_costs]
+
+    def insert_row_list(self, cursor, row_list: List[Tuple]) -> None:
+        self._insert_row_list(cursor, self._column_list, row_list)
@@ -1,7 +1,7 @@
 import copy
-from typing import Iterator, List, Optional, Dict
+import itertools
+from typing import Iterator, List, Optional, Dict, Tuple
 
-import base58
 import time
 import sha3
 from enum import Enum
@@ -16,21 +16,33 @@ from ..indexer.indexer_db import IndexerDB
 from ..indexer.utils import SolanaIxSignInfo, MetricsToLogBuff, CostInfo
 from ..indexer.canceller import Canceller
 
-from ..common_neon.utils import NeonTxResultInfo, NeonTxInfo, str_fmt_object
+from ..common_neon.utils import NeonTxResultInfo, NeonTxInfo, str_fmt_object, decode_base58
 from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.solana_async_interactor import AsyncSolanaInteractor
 from ..common_neon.solana_receipt_parser import SolReceiptParser
 
-from ..common_neon.environment_data import EVM_LOADER_ID, FINALIZED, CANCEL_TIMEOUT, SKIP_CANCEL_TIMEOUT, HOLDER_TIMEOUT
+from ..common_neon.environment_data import EVM_LOADER_ID, FINALIZED, CANCEL_TIMEOUT, SKIP_CANCEL_TIMEOUT, HOLDER_TIMEOUT, \
+                                           PARALLEL_REQUESTS, INDEXER_COMMIT_RETRY_MAX_SEC
 
 
 @logged_group("neon.Indexer")
 class SolanaIxInfo:
+    """
+    Neon EVM instructions of a Solana receipt.
+
+    Instructions of other programs are filtered out by the program index before the decoding of their data,
+    inner instructions are indexed by the index of their parent instruction.
+    The data of each Neon EVM instruction is decoded once, and decoders get zero-copy memoryview slices of it.
+    """
+
     def __init__(self, sign: str, slot: int, tx: Dict):
         self.sign = SolanaIxSignInfo(sign=sign, slot=slot, idx=-1)
         self.cost_info = CostInfo(sign, tx, EVM_LOADER_ID)
         self.tx = tx
         self._is_valid = isinstance(tx, dict)
         self._msg = self.tx['transaction']['message'] if self._is_valid else None
+        self._evm_ix_list: Optional[List[Tuple[int, Dict]]] = None
+        self._ix_data_list: List[Optional[memoryview]] = []
         self._set_defaults()
 
     def __str__(self):
@@ -42,9 +54,35 @@ class SolanaIxInfo:
         self.evm_ix = 0xFF
         self.ix_data = None
 
-    def _decode_ixdata(self) -> bool:
+    def _get_evm_ix_list(self) -> List[Tuple[int, Dict]]:
+        if self._evm_ix_list is not None:
+            return self._evm_ix_list
+
+        self._evm_ix_list = []
+        evm_program_idx_set = {idx for idx, key in enumerate(self._msg['accountKeys']) if key == EVM_LOADER_ID}
+
+        inner_ix_dict: Dict[int, List[Dict]] = {}
+        for inner_tx in self.tx['meta'].get('innerInstructions') or []:
+            inner_ix_dict.setdefault(inner_tx['index'], []).extend(inner_tx['instructions'])
+
+        for ix_idx, ix in enumerate(self._msg['instructions']):
+            for ix in itertools.chain((ix,), inner_ix_dict.get(ix_idx, ())):
+                program_idx = ix.get('programIdIndex')
+                if program_idx is None:
+                    self.debug(f'{self.sign} error: fail to get program id')
+                elif program_idx in evm_program_idx_set:
+                    self._evm_ix_list.append((ix_idx, ix))
+
+        self._ix_data_list = [None] * len(self._evm_ix_list)
+        return self._evm_ix_list
+
+    def _decode_ixdata(self, evm_ix_idx: int) -> bool:
         try:
-            self.ix_data = base58.b58decode(self.ix['data'])
+            ix_data = self._ix_data_list[evm_ix_idx]
+            if ix_data is None:
+                ix_data = memoryview(decode_base58(self.ix['data']))
+                self._ix_data_list[evm_ix_idx] = ix_data
+            self.ix_data = ix_data
             self.evm_ix = int(self.ix_data[0])
             return True
         except Exception as e:
@@ -53,17 +91,6 @@ class SolanaIxInfo:
             self.ix_data = None
         return False
 
-    def _get_neon_instruction(self) -> bool:
-        accounts = self._msg['accountKeys']
-        if 'programIdIndex' not in self.ix:
-            self.debug(f'{self} error: fail to get program id')
-            return False
-        if accounts[self.ix['programIdIndex']] != EVM_LOADER_ID:
-            return False
-        if not self._decode_ixdata():
-            return False
-        return True
-
     def clear(self):
         self._set_defaults()
 
@@ -72,24 +99,19 @@ class SolanaIxInfo:
             return
 
         self._set_defaults()
-        tx_ixs = enumerate(self._msg['instructions'])
 
         evm_ix_idx = -1
-        for ix_idx, self.ix in tx_ixs:
-            # Make a new object to keep values in existing
-            self.sign = SolanaIxSignInfo(sign=self.sign.sign, slot=self.sign.slot, idx=ix_idx)
-
-            if self._get_neon_instruction():
+        last_ix_idx = -1
+        for idx, (ix_idx, self.ix) in enumerate(self._get_evm_ix_list()):
+            if last_ix_idx != ix_idx:
+                last_ix_idx = ix_idx
+                # Make a new object to keep values in existing
+                self.sign = SolanaIxSignInfo(sign=self.sign.sign, slot=self.sign.slot, idx=ix_idx)
+
+            if self._decode_ixdata(idx):
                 evm_ix_idx += 1
                 yield evm_ix_idx
 
-            for inner_tx in self.tx['meta']['innerInstructions']:
-                if inner_tx['index'] == ix_idx:
-                    for self.ix in inner_tx['instructions']:
-                        if self._get_neon_instruction():
-                            evm_ix_idx += 1
-                            yield evm_ix_idx
-
         self._set_defaults()
 
     def get_account_cnt(self):
@@ -289,6 +311,9 @@ class ReceiptsParserState:
             self.del_holder(holder)
 
     def _complete_done_txs(self):
+        self._db.prefetch_blocks([tx.neon_res.slot for tx in self._done_tx_list
+                                  if (tx.status == NeonTxIndexingStatus.DONE) and tx.neon_res.is_valid()])
+
         for tx in self._done_tx_list:
             if tx.status != NeonTxIndexingStatus.DONE:
                 continue
@@ -334,7 +359,7 @@ class ReceiptsParserState:
         self._complete_tx_costs()
 
         self._min_used_slot = self.find_min_used_slot(indexed_slot)
-        self._db.set_min_receipt_slot(self._min_used_slot)
+        self._db.commit_batch(self._min_used_slot)
 
         holders = len(self._holder_table)
         transactions = len(self._tx_table)
@@ -651,8 +676,8 @@ class CallFromRawIxDecoder(DummyIxDecoder):
         if len(self.ix.ix_data) < 92:
             return self._decoding_skip('no enough data to get the Neon tx')
 
-        rlp_sign = self.ix.ix_data[25:90]
-        rlp_data = self.ix.ix_data[90:]
+        rlp_sign = bytes(self.ix.ix_data[25:90])
+        rlp_data = bytes(self.ix.ix_data[90:])
 
         neon_tx = NeonTxInfo(rlp_sign=rlp_sign, rlp_data=rlp_data)
         if neon_tx.error:
@@ -739,8 +764,8 @@ class PartialCallIxDecoder(DummyIxDecoder):
         storage_account = self.ix.get_account(0)
         blocked_accounts = self.ix.get_account_list(blocked_accounts_start)
         step_count = int.from_bytes(self.ix.ix_data[5:13], 'little')
-        rlp_sign = self.ix.ix_data[33:98]
-        rlp_data = self.ix.ix_data[98:]
+        rlp_sign = bytes(self.ix.ix_data[33:98])
+        rlp_data = bytes(self.ix.ix_data[98:])
 
         neon_tx = NeonTxInfo(rlp_sign=rlp_sign, rlp_data=rlp_data)
         if neon_tx.error:
@@ -918,7 +943,7 @@ class Indexer(IndexerBase):
         solana = SolanaInteractor(solana_url)
         self.db = IndexerDB(solana)
         last_known_slot = self.db.get_min_receipt_slot()
-        IndexerBase.__init__(self, solana, last_known_slot)
+        IndexerBase.__init__(self, solana, last_known_slot, AsyncSolanaInteractor(solana_url, PARALLEL_REQUESTS))
         self.indexed_slot = self.last_slot
         self.min_used_slot = 0
         self.canceller = Canceller(solana)
@@ -926,6 +951,7 @@ class Indexer(IndexerBase):
         self.block_indexer = BlocksIndexer(db=self.db, solana=solana)
         self.counted_logger = MetricsToLogBuff()
         self._user = indexer_user
+        self._commit_retry_time = 0.0
 
         self.state = ReceiptsParserState(db=self.db, solana=solana, indexer_user=indexer_user)
         self.ix_decoder_map = {
@@ -964,7 +990,30 @@ class Indexer(IndexerBase):
         self.canceller.unlock_accounts(self.blocked_storages)
         self.blocked_storages = {}
 
+    def _is_batch_committed(self) -> bool:
+        """A failed commit stops the cycle, so the kept batch doesn't grow with rows of next receipts"""
+        error_cnt = self.db.get_commit_error_cnt()
+        if error_cnt == 0:
+            return True
+
+        retry_sec = min(2 ** min(error_cnt - 1, 16), INDEXER_COMMIT_RETRY_MAX_SEC)
+        self._commit_retry_time = time.time() + retry_sec
+        self.warning(f'stop the cycle on {error_cnt} failed commits of the DB batch, retry in {retry_sec} sec')
+        return False
+
+    def _commit_failed_batch(self) -> bool:
+        """Retries the failed commit after the delay, receipts aren't decoded until the retry succeeds"""
+        if self.db.get_commit_error_cnt() == 0:
+            return True
+        if time.time() < self._commit_retry_time:
+            return False
+        self.db.commit_batch(self.min_used_slot)
+        return self._is_batch_committed()
+
     def process_receipts(self):
+        if not self._commit_failed_batch():
+            return
+
         start_time = time.time()
         last_block_slot = self.db.get_latest_block_slot()
         start_indexed_slot = self.indexed_slot
@@ -988,6 +1037,8 @@ class Indexer(IndexerBase):
             if max_slot > 0:
                 self.indexed_slot = max_slot + 1
                 self.min_used_slot = self.state.complete_done_objects(self.indexed_slot)
+                if not self._is_batch_committed():
+                    return
 
             self._process_status()
 
@@ -1003,6 +1054,8 @@ class Indexer(IndexerBase):
 
         if was_skipped_tx:
             self.min_used_slot = self.state.complete_done_objects(self.indexed_slot)
+            if not self._is_batch_committed():
+                return
 
         process_receipts_ms = (time.time() - start_time) * 1000  # convert this into milliseconds
         self.counted_logger.print(
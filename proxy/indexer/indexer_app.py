@@ -4,6 +4,7 @@ from ..common_neon.environment_data import EVM_LOADER_ID, SOLANA_URL, GATHER_STA
 from ..statistics_exporter.prometheus_indexer_exporter import IndexerStatistics
 from ..common_neon.data import NeonTxStatData
 from .indexer import Indexer
+from .pg_pool import get_pg_connection_pool
 from .i_inidexer_user import IIndexerUser
 
 
@@ -12,6 +13,7 @@ class IndexerApp(IIndexerUser):
 
     def __init__(self, solana_url: str):
         self.neon_statistics = IndexerStatistics(GATHER_STATISTICS)
+        get_pg_connection_pool().set_stat_exporter(self.neon_statistics)
         indexer = Indexer(solana_url, self)
         indexer.run()
 
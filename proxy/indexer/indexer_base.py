@@ -1,33 +1,95 @@
+import asyncio
 import os
 import time
 import traceback
-from multiprocessing.dummy import Pool as ThreadPool
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from logged_groups import logged_group
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from .backfill import BackfillShard, IndexerBackfill, create_indexer_backfill
 from .solana_signatures_db import SolanaSignatures
 from .utils import MetricsToLogBuff
 from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.solana_async_interactor import AsyncSolanaInteractor, get_async_loop_thread
+from ..common_neon.solana_subscriber import get_solana_subscriber
+from ..common_neon.process_local import ProcessLocal
 from ..indexer.sql_dict import SQLDict
 
 from ..common_neon.environment_data import INDEXER_POLL_COUNT, RETRY_ON_FAIL_ON_GETTING_CONFIRMED_TRANSACTION, \
-                                           HISTORY_START, PARALLEL_REQUESTS, FINALIZED, EVM_LOADER_ID
+                                           HISTORY_START, PARALLEL_REQUESTS, FINALIZED, EVM_LOADER_ID, \
+                                           SOLANA_WS_MAX_WAIT_SEC, INDEXER_RECEIPT_CHUNK_LEN, \
+                                           INDEXER_RECEIPT_PREFETCH_COUNT
+
+
+class ReceiptPipelineStat:
+    """Backlogs and throughputs of the stages of one get_tx_receipts() call"""
+
+    def __init__(self, signature_cnt: int, gather_time: float):
+        self.signature_cnt = signature_cnt
+        self.gather_time = gather_time
+        self.fetched_cnt = 0
+        self.fetch_start_time = 0.0
+        self.fetch_end_time = 0.0
+        self.wait_time = 0.0
+        self.decoded_cnt = 0
+        self.decode_time = 0.0
+        self.fetch_backlog = 0
+        self.decode_backlog = 0
+
+    def on_backlog(self, fetch_queue: Deque[Tuple[List[str], Future]]) -> None:
+        fetch_backlog = 0
+        decode_backlog = 0
+        for sign_list, future in fetch_queue:
+            if future.done():
+                decode_backlog += len(sign_list)
+            else:
+                fetch_backlog += len(sign_list)
+        self.fetch_backlog = max(self.fetch_backlog, fetch_backlog)
+        self.decode_backlog = max(self.decode_backlog, decode_backlog)
+
+    @staticmethod
+    def _get_rate(cnt: int, duration: float) -> float:
+        return cnt / duration if duration > 0 else 0.0
+
+    def get_list_params(self) -> Dict[str, float]:
+        return {
+            'signatures per sec': self._get_rate(self.signature_cnt, self.gather_time),
+            'receipts fetch per sec': self._get_rate(self.fetched_cnt, self.fetch_end_time - self.fetch_start_time),
+            'receipts wait sec': self.wait_time,
+            'receipts decode per sec': self._get_rate(self.decoded_cnt, self.decode_time),
+        }
+
+    def get_latest_params(self) -> Dict[str, int]:
+        return {
+            'signatures': self.signature_cnt,
+            'fetch backlog': self.fetch_backlog,
+            'decode backlog': self.decode_backlog,
+        }
 
 
 @logged_group("neon.Indexer")
 class IndexerBase:
     def __init__(self,
                  solana: SolanaInteractor,
-                 last_slot: int):
+                 last_slot: int,
+                 async_solana: Optional[AsyncSolanaInteractor] = None):
         self.solana = solana
+        self.async_solana = async_solana
         self.solana_signatures = SolanaSignatures()
         self.last_slot = self._init_last_slot('receipt', last_slot)
         self.current_slot = 0
-        self.counter_ = 0
         self.count_log = MetricsToLogBuff()
         self._constants = SQLDict(tablename="constants")
         self._maximum_tx = self._get_maximum_tx()
-        self._tx_receipts = {}
+        self._backfill: Optional[IndexerBackfill] = create_indexer_backfill(solana, self._constants, self.last_slot)
+        self.receipt_pipeline_stat: Optional[ReceiptPipelineStat] = None
+        self._receipt_executor: ProcessLocal[ThreadPoolExecutor] = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=PARALLEL_REQUESTS, thread_name_prefix='indexer-receipt')
+        )
+        self._subscriber = get_solana_subscriber()
+        if self._subscriber is not None:
+            self._subscriber.subscribe_program_logs(EVM_LOADER_ID, FINALIZED)
 
     def _get_maximum_tx(self) -> str:
         if "maximum_tx" in self._constants:
@@ -86,49 +148,220 @@ class IndexerBase:
                 err_tb = "".join(traceback.format_tb(err.__traceback__))
                 self.warning('Exception on transactions processing. ' +
                              f'Type(err): {type(err)}, Error: {err}, Traceback: {err_tb}')
+            self._wait_next_cycle()
+
+    def _wait_next_cycle(self):
+        if (self._subscriber is not None) and self._subscriber.is_connected:
+            # a transaction of the EVM loader starts the cycle, the timeout keeps blocks and cancels going
+            self._subscriber.wait_program_logs(SOLANA_WS_MAX_WAIT_SEC)
+        else:
             time.sleep(1.0)
 
     def process_functions(self):
         self.gather_unknown_transactions()
 
     def get_tx_receipts(self, stop_slot=None):
-        signatures = self.gather_unknown_transactions()
-        self.debug(f'got {len(signatures)} signatures')
+        """
+        Streams receipts of unknown signatures in the order of slots.
 
-        poll_txs = []
-        tx_list = []
-        for signature, _ in reversed(signatures):
-            if signature not in self._tx_receipts:
-                tx_list.append(signature)
-                if len(tx_list) >= 20:
-                    poll_txs.append(tx_list)
-                    tx_list = []
-        if len(tx_list) > 0:
-            poll_txs.append(tx_list)
-        self._get_txs(poll_txs)
+        Signatures are listed from the newest one to the oldest one, so receipts are yielded after the walk,
+        but chunks of signatures are fetched in the worker pool as soon as their page is received.
+        Each chunk is yielded as soon as all older chunks are yielded, so decoding goes in parallel
+        with the fetching of next chunks.
+        """
+        if self._backfill is not None:
+            yield from self._get_backfill_tx_receipts(stop_slot)
+            return
 
+        start_time = time.time()
+        prefetch_dict: Dict[str, Future] = {}
+        try:
+            signatures = self._prefetch_tx_receipts(prefetch_dict)
+            self.debug(f'got {len(signatures)} signatures, prefetched {len(prefetch_dict)} chunks')
+            stat = ReceiptPipelineStat(len(signatures), time.time() - start_time)
+            if len(prefetch_dict):
+                stat.fetch_start_time = start_time
+
+            # chunks are cut from the newest signature like in the walk, so prefetched chunks are found by the key
+            sign_list = [signature for signature, _ in reversed(signatures)]
+            chunk_list = [sign_list[max(idx - INDEXER_RECEIPT_CHUNK_LEN, 0):idx]
+                          for idx in reversed(range(len(sign_list), 0, -INDEXER_RECEIPT_CHUNK_LEN))]
+            yield from self._yield_tx_receipts(chunk_list, stat, prefetch_dict, stop_slot)
+        finally:
+            for future in prefetch_dict.values():
+                future.cancel()
+
+    def _prefetch_tx_receipts(self, prefetch_dict: Dict[str, Future]) -> List[Tuple[str, int]]:
+        """
+        Gathers unknown signatures and submits full chunks of them to the worker pool during the walk.
+        Futures are keyed by the oldest signature of the chunk, one place in the fetch queue is left
+        for the oldest chunk, which is known only at the end of the walk.
+        """
+        signatures: List[Tuple[str, int]] = []
+        chunk_pos = 0
+        for page_signatures in self._iter_unknown_signature_pages():
+            if page_signatures is not signatures:
+                # the walk has checkpointed gathered signatures, they will be indexed on next calls
+                for future in prefetch_dict.values():
+                    future.cancel()
+                prefetch_dict.clear()
+                signatures, chunk_pos = page_signatures, 0
+
+            while (len(signatures) - chunk_pos >= INDEXER_RECEIPT_CHUNK_LEN) and \
+                  (len(prefetch_dict) < INDEXER_RECEIPT_PREFETCH_COUNT - 1):
+                chunk_signatures = signatures[chunk_pos:chunk_pos + INDEXER_RECEIPT_CHUNK_LEN]
+                sign_list = [signature for signature, _ in reversed(chunk_signatures)]
+                prefetch_dict[sign_list[0]] = self._submit_tx_receipts(sign_list)
+                chunk_pos += INDEXER_RECEIPT_CHUNK_LEN
+        return signatures
+
+    def _yield_tx_receipts(self, chunk_list: List[List[str]], stat: ReceiptPipelineStat,
+                           prefetch_dict: Dict[str, Future], stop_slot: Optional[int]):
         max_tx = self._maximum_tx
         remove_signatures: List[str] = []
-        for signature, _ in reversed(signatures):
-            if signature not in self._tx_receipts:
-                self.error(f'{signature} receipt not found')
-                continue
-
-            tx = self._tx_receipts[signature]
-            slot = tx['slot']
-            if stop_slot and slot > stop_slot:
-                break
-            yield (slot, signature, tx)
+        is_stopped = False
+        for chunk_sign_list, tx_list in self._iter_receipt_chunks(chunk_list, stat, prefetch_dict):
+            for signature, tx in zip(chunk_sign_list, tx_list):
+                if tx is None:
+                    self.error(f'{signature} receipt not found')
+                    continue
+
+                slot = tx['slot']
+                if stop_slot and slot > stop_slot:
+                    is_stopped = True
+                    break
 
-            remove_signatures.append(signature)
-            del self._tx_receipts[signature]
-            max_tx = signature
+                decode_start_time = time.time()
+                yield (slot, signature, tx)
+                stat.decode_time += time.time() - decode_start_time
+                stat.decoded_cnt += 1
+
+                remove_signatures.append(signature)
+                max_tx = signature
+            if is_stopped:
+                break
 
         self.solana_signatures.remove_signature(remove_signatures)
         self._set_maximum_tx(max_tx)
-        self._clear_tx_receipts()
+        self.receipt_pipeline_stat = stat
+        self.count_log.print(self.debug, list_params=stat.get_list_params(), latest_params=stat.get_latest_params())
+
+    def _get_backfill_tx_receipts(self, stop_slot: Optional[int]):
+        """
+        Receipts of gathered backfill shards in the order of slots, the next shard is waited for.
+        Shards without signatures are skipped, so the call returns after the first receipt or at the backfill end.
+        """
+        is_yielded = False
+        while (self._backfill is not None) and (not is_yielded):
+            start_time = time.time()
+            shard_list = self._backfill.get_ready_shard_list()
+            sign_cnt = sum(len(shard.sign_list) - shard.pos for shard in shard_list)
+            stat = ReceiptPipelineStat(sign_cnt, time.time() - start_time)
+            completed_shard_cnt = self._backfill.completed_shard_cnt
+
+            chunk_shard_queue: Deque[BackfillShard] = deque()
+
+            def _iter_chunks() -> Iterator[List[str]]:
+                for shard in shard_list:
+                    sign_list = [sign for sign, slot in shard.sign_list[shard.pos:]
+                                 if not (stop_slot and slot > stop_slot)]
+                    for idx in range(0, len(sign_list), INDEXER_RECEIPT_CHUNK_LEN):
+                        chunk_shard_queue.append(shard)
+                        yield sign_list[idx:idx + INDEXER_RECEIPT_CHUNK_LEN]
+                    if len(sign_list) < len(shard.sign_list) - shard.pos:
+                        break
+
+            for chunk_sign_list, tx_list in self._iter_receipt_chunks(_iter_chunks(), stat):
+                shard = chunk_shard_queue.popleft()
+                for signature, tx in zip(chunk_sign_list, tx_list):
+                    if tx is None:
+                        self.error(f'{signature} receipt not found')
+                    else:
+                        decode_start_time = time.time()
+                        yield (tx['slot'], signature, tx)
+                        is_yielded = True
+                        stat.decode_time += time.time() - decode_start_time
+                        stat.decoded_cnt += 1
+                    shard.pos += 1
+                self._backfill.complete_done_shards()
+            self._backfill.complete_done_shards()
+
+            self.receipt_pipeline_stat = stat
+            self.count_log.print(self.debug, list_params=stat.get_list_params(), latest_params=stat.get_latest_params())
+
+            if self._backfill.is_done:
+                self._finish_backfill()
+            elif self._backfill.completed_shard_cnt == completed_shard_cnt:
+                # all receipts are after the stop slot
+                break
+
+    def _finish_backfill(self) -> None:
+        backfill, self._backfill = self._backfill, None
+        # the usual walk goes back to the backfill end, checkpoints of the walk before the backfill are outdated
+        self.last_slot = backfill.stop_slot
+        self.solana_signatures.remove_signature_before_slot(backfill.stop_slot)
+        if backfill.max_tx is not None:
+            self._set_maximum_tx(backfill.max_tx)
+        backfill.finish()
+
+    def _iter_receipt_chunks(self, chunk_list: Iterable[List[str]], stat: ReceiptPipelineStat,
+                             prefetch_dict: Optional[Dict[str, Future]] = None
+                             ) -> Iterator[Tuple[List[str], List[Optional[Dict]]]]:
+        """
+        The bounded queue between the fetch stage and the decoder stage, chunks leave it in the order of slots.
+        Chunks from prefetch_dict are already submitted, they are taken by the oldest signature and counted in the bound.
+        """
+        if prefetch_dict is None:
+            prefetch_dict = {}
+        fetch_queue: Deque[Tuple[List[str], Future]] = deque()
+        chunk_iter = iter(chunk_list)
+        next_sign_list = next(chunk_iter, None)
+        if stat.fetch_start_time == 0.0:
+            stat.fetch_start_time = time.time()
+        try:
+            while True:
+                while next_sign_list is not None:
+                    future = prefetch_dict.pop(next_sign_list[0], None)
+                    if future is None:
+                        fetch_cnt = len(fetch_queue) + len(prefetch_dict)
+                        if len(fetch_queue) and (fetch_cnt >= INDEXER_RECEIPT_PREFETCH_COUNT):
+                            break
+                        future = self._submit_tx_receipts(next_sign_list)
+                    fetch_queue.append((next_sign_list, future))
+                    next_sign_list = next(chunk_iter, None)
+                if len(fetch_queue) == 0:
+                    break
+
+                stat.on_backlog(fetch_queue)
+                sign_list, future = fetch_queue.popleft()
+                wait_start_time = time.time()
+                tx_list, fetch_end_time = future.result()
+                stat.wait_time += time.time() - wait_start_time
+                stat.fetch_end_time = max(stat.fetch_end_time, fetch_end_time)
+                stat.fetched_cnt += len(sign_list)
+                yield sign_list, tx_list
+        finally:
+            for _, future in fetch_queue:
+                future.cancel()
+
+    def _submit_tx_receipts(self, sign_list: List[str]) -> Future:
+        if self.async_solana is not None:
+            # requests are sent concurrently from one thread, the concurrency is limited by the async interactor
+            return get_async_loop_thread().submit(self._async_get_tx_receipts(sign_list))
+        return self._receipt_executor.get().submit(self._get_tx_receipts, sign_list)
 
     def gather_unknown_transactions(self):
+        tx_list = []
+        for tx_list in self._iter_unknown_signature_pages():
+            pass
+        return tx_list
+
+    def _iter_unknown_signature_pages(self) -> Iterator[List[Tuple[str, int]]]:
+        """
+        Walks from the newest signature back to the last indexed one, the list of gathered signatures
+        is yielded after each page. Only the oldest INDEXER_POLL_COUNT signatures are kept,
+        newer ones are checkpointed in the DB, and the walk continues with a new list.
+        """
         minimal_tx = self.solana_signatures.get_minimal_tx()
         continue_flag = True
         counter = 0
@@ -163,8 +396,7 @@ class IndexerBase:
 
                 tx_list.append((sol_sign, slot))
 
-        return tx_list
-
+            yield tx_list
 
     def _get_signatures(self, before: Optional[str], limit: int) -> List[Dict[str, Union[int, str]]]:
         response = self.solana.get_signatures_for_address(before, limit, FINALIZED)
@@ -174,26 +406,12 @@ class IndexerBase:
             self.warning(f'Fail to get signatures: {error}')
         return result
 
-    def _get_txs(self, poll_txs: List[List[str]]) -> None:
-        if len(poll_txs) > 1:
-            pool = ThreadPool(min(PARALLEL_REQUESTS, len(poll_txs)))
-            pool.map(self._get_tx_receipts, poll_txs)
-            poll_txs.clear()
-        else:
-            if len(poll_txs) > 0:
-                self._get_tx_receipts(poll_txs[0])
-
-    def _get_tx_receipts(self, sign_list: List[str]) -> None:
-        if len(sign_list) == 0:
-            return
-
+    def _get_tx_receipts(self, sign_list: List[str]) -> Tuple[List[Optional[Dict]], float]:
         retry = RETRY_ON_FAIL_ON_GETTING_CONFIRMED_TRANSACTION
         while retry > 0:
             try:
                 tx_list = self.solana.get_multiple_receipts(sign_list)
-                for sol_sign, tx in zip(sign_list, tx_list):
-                    self._add_tx(sol_sign, tx)
-                retry = 0
+                return self._check_tx_receipts(sign_list, tx_list), time.time()
             except Exception as err:
                 retry -= 1
                 if retry == 0:
@@ -201,17 +419,27 @@ class IndexerBase:
                 else:
                     self.debug(f'Fail to get solana receipts: "{err}"')
                     time.sleep(3)
+        return [None] * len(sign_list), time.time()
 
-    def _add_tx(self, sol_sign, tx):
-        if tx is not None:
-            slot = tx['slot']
-            self.debug(f'{(slot, sol_sign)}')
-            self._tx_receipts[sol_sign] = tx
-        else:
-            self.debug(f"trx is None {sol_sign}")
+    async def _async_get_tx_receipts(self, sign_list: List[str]) -> Tuple[List[Optional[Dict]], float]:
+        retry = RETRY_ON_FAIL_ON_GETTING_CONFIRMED_TRANSACTION
+        while retry > 0:
+            try:
+                tx_list = await self.async_solana.get_multiple_receipts(sign_list)
+                return self._check_tx_receipts(sign_list, tx_list), time.time()
+            except Exception as err:
+                retry -= 1
+                if retry == 0:
+                    self.error(f'Fail to get solana receipts: "{err}"')
+                else:
+                    self.debug(f'Fail to get solana receipts: "{err}"')
+                    await asyncio.sleep(3)
+        return [None] * len(sign_list), time.time()
 
-    def _clear_tx_receipts(self):
-        self.counter_ += 1
-        if self.counter_ > 1000:
-            self._tx_receipts = {}
-            self.counter_ = 0
+    def _check_tx_receipts(self, sign_list: List[str], tx_list: List[Optional[Dict]]) -> List[Optional[Dict]]:
+        for sol_sign, tx in zip(sign_list, tx_list):
+            if tx is not None:
+                self.debug(f'{(tx["slot"], sol_sign)}')
+            else:
+                self.debug(f"trx is None {sol_sign}")
+        return tx_list
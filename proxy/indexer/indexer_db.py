@@ -1,7 +1,7 @@
 import traceback
 
 from logged_groups import logged_group
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 
 from ..common_neon.utils import NeonTxInfo, NeonTxResultInfo, NeonTxFullInfo
 
@@ -10,24 +10,46 @@ from ..indexer.utils import SolanaIxSignInfo, CostInfo
 from ..indexer.accounts_db import NeonAccountDB, NeonAccountInfo
 from ..indexer.costs_db import CostsDB
 from ..indexer.blocks_db import SolanaBlocksDB, SolanaBlockInfo
-from ..indexer.transactions_db import NeonTxsDB
-from ..indexer.logs_db import LogsDB
+from ..indexer.transactions_db import NeonTxsDB, SolanaNeonTxsDB
+from ..indexer.logs_db import LogsDB, LogKey
 from ..indexer.sql_dict import SQLDict
+from ..indexer.pg_pool import get_pg_connection_pool
 from ..common_neon.solana_interactor import SolanaInteractor
 
 
+class IndexerDBBatch:
+    """Rows of one cycle of the indexer, they are inserted in one transaction with the checkpoint"""
+
+    def __init__(self):
+        self.log_row_list: List[Tuple] = []
+        self.tx_row_list: List[Tuple] = []
+        self.sol_neon_tx_row_list: List[Tuple] = []
+        self.cost_row_list: List[Tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.log_row_list) + len(self.tx_row_list) + len(self.sol_neon_tx_row_list) + \
+               len(self.cost_row_list)
+
+
 @logged_group("neon.Indexer")
 class IndexerDB:
+    # slots of one getBlock batch, blocks are big because of signatures
+    BLOCK_PREFETCH_CHUNK_LEN = 100
+
     def __init__(self, solana: SolanaInteractor):
         self._logs_db = LogsDB()
         self._blocks_db = SolanaBlocksDB()
         self._txs_db = NeonTxsDB()
+        self._sol_neon_txs_db = SolanaNeonTxsDB()
         self._account_db = NeonAccountDB()
         self._costs_db = CostsDB()
         self._solana = solana
         self._block = SolanaBlockInfo(slot=0)
         self._tx_idx = 0
         self._starting_block = SolanaBlockInfo(slot=0)
+        self._batch = IndexerDBBatch()
+        self._block_dict: Dict[int, SolanaBlockInfo] = {}
+        self._commit_error_cnt = 0
 
         self._constants = SQLDict(tablename="constants")
         for k in ['min_receipt_slot', 'latest_slot', 'starting_slot']:
@@ -57,10 +79,14 @@ class IndexerDB:
             self._tx_idx += 1
             self.debug(f'submit transaction: {neon_tx} {neon_res} {block}')
             neon_res.fill_block_info(block)
-            self._logs_db.push_logs(neon_res.logs, block)
             tx = NeonTxFullInfo(neon_tx=neon_tx, neon_res=neon_res, used_ixs=used_ixs)
-            self._txs_db.set_tx(tx)
+            log_row_list = self._logs_db.get_row_list(neon_res.logs, block)
+            tx_row = self._txs_db.get_row(tx)
+            sol_neon_tx_row_list = self._sol_neon_txs_db.get_row_list(neon_tx.sign, used_ixs)
 
+            self._batch.log_row_list.extend(log_row_list)
+            self._batch.tx_row_list.append(tx_row)
+            self._batch.sol_neon_tx_row_list.extend(sol_neon_tx_row_list)
             self.debug(f'submitted transaction: {neon_tx.sign}')
         except Exception as err:
             err_tb = "".join(traceback.format_tb(err.__traceback__))
@@ -76,7 +102,30 @@ class IndexerDB:
         self._blocks_db.set_block(net_block)
         return net_block
 
+    def prefetch_blocks(self, slot_list: List[int]) -> None:
+        """
+        Blocks of the next submitted transactions: one DB request for all slots, one batch request to Solana
+        for blocks, which aren't in the DB, and one bulk insert of them.
+        """
+        slot_list = sorted(set(slot_list))
+        block_dict = self._blocks_db.get_block_dict_by_slot_list(slot_list) if len(slot_list) else {}
+
+        miss_slot_list = [slot for slot in slot_list if slot not in block_dict]
+        for idx in range(0, len(miss_slot_list), self.BLOCK_PREFETCH_CHUNK_LEN):
+            chunk_slot_list = miss_slot_list[idx:idx + self.BLOCK_PREFETCH_CHUNK_LEN]
+            net_block_list = [block for block in self._solana.get_block_info_list(chunk_slot_list, FINALIZED)
+                              if block.hash]
+            self._blocks_db.set_block_list(net_block_list)
+            self.debug(f'fetched {len(net_block_list)} blocks of {len(chunk_slot_list)} slots from net')
+            block_dict.update({block.slot: block for block in net_block_list})
+
+        self._block_dict = block_dict
+
     def get_block_by_slot(self, slot) -> SolanaBlockInfo:
+        block = self._block_dict.get(slot)
+        if block is not None:
+            return block
+
         block = self._blocks_db.get_block_by_slot(slot)
         if not block.hash:
             block = self._get_block_from_net(block)
@@ -117,12 +166,45 @@ class IndexerDB:
     def get_min_receipt_slot(self) -> int:
         return self._constants['min_receipt_slot']
 
-    def set_min_receipt_slot(self, slot: int):
-        self._constants['min_receipt_slot'] = slot
+    def commit_batch(self, min_receipt_slot: int) -> bool:
+        """
+        Inserts rows of submitted objects and sets min_receipt_slot in one transaction.
+        On an error the rows are kept for the retry, the caller shouldn't submit new rows until the retry succeeds.
+        """
+        batch = self._batch
+        try:
+            with get_pg_connection_pool().transaction() as cursor:
+                self._logs_db.insert_row_list(cursor, batch.log_row_list)
+                self._txs_db.insert_row_list(cursor, batch.tx_row_list)
+                self._sol_neon_txs_db.insert_row_list(cursor, batch.sol_neon_tx_row_list)
+                self._costs_db.insert_row_list(cursor, batch.cost_row_list)
+                self._constants.set_item(cursor, 'min_receipt_slot', min_receipt_slot)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Exception on committing {len(batch)} rows. ' +
+                       f'Type(err): {type(err)}, Error: {err}, Traceback: {err_tb}')
+            self._commit_error_cnt += 1
+            return False
+
+        self._batch = IndexerDBBatch()
+        self._block_dict: Dict[int, SolanaBlockInfo] = {}
+        self._commit_error_cnt = 0
+        return True
+
+    def get_commit_error_cnt(self) -> int:
+        """Count of failed commits in a row, the batch of the last one is kept"""
+        return self._commit_error_cnt
 
     def get_logs(self, from_block, to_block, addresses, topics, block_hash):
         return self._logs_db.get_logs(from_block, to_block, addresses, topics, block_hash)
 
+    def get_logs_page(self, from_block, to_block, addresses, topics, block_hash, after_key: Optional[LogKey]):
+        return self._logs_db.get_logs_page(from_block, to_block, addresses, topics, block_hash, after_key)
+
+    def iter_log_json_list(self, from_block, to_block, addresses, topics, block_hash,
+                           chunk_size: int) -> Iterator[List[str]]:
+        return self._logs_db.iter_log_json_list(from_block, to_block, addresses, topics, block_hash, chunk_size)
+
     def get_block_by_hash(self, block_hash: str) -> SolanaBlockInfo:
         return self._blocks_db.get_block_by_hash(block_hash)
 
@@ -145,7 +227,7 @@ class IndexerDB:
         self._account_db.set_acc_indexer(neon_account)
 
     def add_tx_costs(self, tx_costs: List[CostInfo]):
-        self._costs_db.add_costs(tx_costs)
+        self._batch.cost_row_list.extend(self._costs_db.get_row_list(tx_costs))
 
     def get_sol_sign_list_by_neon_sign(self, neon_sign: str) -> [str]:
         return self._txs_db.get_sol_sign_list_by_neon_sign(neon_sign)
@@ -1,37 +1,52 @@
-import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from ..common_neon.json_codec import json_codec
 from ..indexer.base_db import BaseDB
 
 
+# (blockNumber, transactionIndex, transactionLogIndex) of the last returned log
+LogKey = Tuple[int, int, int]
+
+
 class LogsDB(BaseDB):
+    TOPIC_CNT = 4
+    LOG_LIMIT = 1000
+
+    _column_list = ['address', 'blockHash', 'blockNumber', 'transactionHash', 'transactionIndex',
+                    'transactionLogIndex', 'topic0', 'topic1', 'topic2', 'topic3', 'json']
+
     def __init__(self):
-        BaseDB.__init__(self, 'neon_transaction_logs')
+        BaseDB.__init__(self, 'neon_logs')
 
-    def push_logs(self, logs, block):
+    def get_row_list(self, logs, block) -> List[Tuple]:
         rows = []
         for log in logs:
-            for topic in log['topics']:
-                rows.append(
-                    (
-                        log['address'],
-                        block.hash,
-                        block.slot,
-                        log['transactionHash'],
-                        int(log['transactionLogIndex'], 16),
-                        topic,
-                        json.dumps(log)
-                    )
+            topic_list = (log['topics'] + [None] * self.TOPIC_CNT)[:self.TOPIC_CNT]
+            rows.append(
+                (
+                    log['address'],
+                    block.hash,
+                    block.slot,
+                    log['transactionHash'],
+                    int(log['transactionIndex'], 16),
+                    int(log['transactionLogIndex'], 16),
+                    *topic_list,
+                    json_codec.dumps_str(log)
                 )
-        if len(rows):
-            # logger.debug(rows)
-            cur = self._conn.cursor()
-            cur.executemany(f'''
-                            INSERT INTO {self._table_name}(address, blockHash, blockNumber,
-                                            transactionHash, transactionLogIndex, topic, json)
-                            VALUES (%s, %s, %s,  %s, %s,  %s, %s) ON CONFLICT DO NOTHING''', rows)
-
-
-    def get_logs(self, fromBlock = None, toBlock = None, addresses = [], topics = [], blockHash = None):
+            )
+        return rows
+
+    def insert_row_list(self, cursor, row_list: List[Tuple]) -> None:
+        self._insert_row_list(cursor, self._column_list, row_list)
+
+    def _build_where_expr(self, fromBlock: Optional[int], toBlock: Optional[int], addresses: List[str],
+                          topics: List[List[str]], blockHash: Optional[str],
+                          after_key: Optional[LogKey]) -> Optional[Tuple[str, List[Any]]]:
+        """
+        topics follows Ethereum semantics: the position of the list is the position of the topic in the log,
+        the empty list matches any topic, topics in one position are joined by OR.
+        Returns None if the filter can't match any log.
+        """
         queries = []
         params = []
 
@@ -44,40 +59,81 @@ class LogsDB(BaseDB):
             params.append(toBlock)
 
         if blockHash is not None:
-            blockHash = blockHash.lower()
             queries.append("blockHash = %s")
-            params.append(blockHash)
-
-        if len(topics) > 0:
-            query_placeholder = ", ".join(["%s" for _ in range(len(topics))])
-            topics_query = f"topic IN ({query_placeholder})"
+            params.append(blockHash.lower())
 
-            queries.append(topics_query)
-            params += topics
+        for idx, topic_list in enumerate(topics):
+            if not len(topic_list):
+                continue
+            if idx >= self.TOPIC_CNT:
+                return None
+            query_placeholder = ", ".join(["%s" for _ in range(len(topic_list))])
+            queries.append(f"topic{idx} IN ({query_placeholder})")
+            params += topic_list
 
         if len(addresses) > 0:
             query_placeholder = ", ".join(["%s" for _ in range(len(addresses))])
-            address_query = f"address IN ({query_placeholder})"
-
-            queries.append(address_query)
+            queries.append(f"address IN ({query_placeholder})")
             params += addresses
 
-        query_string = f"SELECT * FROM {self._table_name}"
-        if len(queries):
-            query_string += " WHERE "
-            for idx, query in enumerate(queries):
-                query_string += query
-                if idx < len(queries) - 1:
-                    query_string += " AND "
-
-        query_string += " ORDER BY blockNumber desc LIMIT 1000"
+        if after_key is not None:
+            queries.append("(blockNumber, transactionIndex, transactionLogIndex) > (%s, %s, %s)")
+            params += list(after_key)
+
+        return ' AND '.join(['1=1'] + queries), params
+
+    def _get_log_row_list(self, fromBlock, toBlock, addresses, topics, blockHash,
+                          after_key: Optional[LogKey], limit: int,
+                          is_newest_first: bool = False) -> List[Tuple[int, int, int, str]]:
+        where = self._build_where_expr(fromBlock, toBlock, addresses, topics, blockHash, after_key)
+        if where is None:
+            return []
+        where_expr, params = where
+
+        order = 'DESC' if is_newest_first else 'ASC'
+        query_string = f'''
+            SELECT blockNumber, transactionIndex, transactionLogIndex, json
+              FROM {self._table_name}
+             WHERE {where_expr}
+             ORDER BY blockNumber {order}, transactionIndex {order}, transactionLogIndex {order}
+             LIMIT %s
+        '''
+        params.append(limit)
 
         self.debug(query_string)
         self.debug(params)
 
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(query_string, tuple(params))
-            rows = cursor.fetchall()
-
-        logs = set([row[-1] for row in rows])
-        return [json.loads(log) for log in logs]
+            return cursor.fetchall()
+
+    def get_logs_page(self, fromBlock=None, toBlock=None, addresses=[], topics=[], blockHash=None,
+                      after_key: Optional[LogKey] = None,
+                      limit: int = LOG_LIMIT) -> Tuple[List[Dict[str, Any]], Optional[LogKey]]:
+        """Returns up to limit logs in the chain order and the key to request the next page (or None)"""
+        rows = self._get_log_row_list(fromBlock, toBlock, addresses, topics, blockHash, after_key, limit)
+        logs = [json_codec.loads(row[-1]) for row in rows]
+        next_key = tuple(rows[-1][:3]) if len(rows) == limit else None
+        return logs, next_key
+
+    def get_logs(self, fromBlock=None, toBlock=None, addresses=[], topics=[], blockHash=None):
+        """Returns up to LOG_LIMIT newest logs in the chain order"""
+        rows = self._get_log_row_list(fromBlock, toBlock, addresses, topics, blockHash, None, self.LOG_LIMIT,
+                                      is_newest_first=True)
+        return [json_codec.loads(row[-1]) for row in reversed(rows)]
+
+    def iter_log_json_list(self, fromBlock=None, toBlock=None, addresses=[], topics=[], blockHash=None,
+                           chunk_size: int = LOG_LIMIT) -> Iterator[List[str]]:
+        """
+        Yields JSON bodies of logs in the chain order by chunks of chunk_size without the limit of log count.
+        Each chunk is a keyset page with its own pooled connection, so a slow client doesn't hold a connection
+        between chunks, and the DB doesn't build the whole result.
+        """
+        after_key: Optional[LogKey] = None
+        while True:
+            rows = self._get_log_row_list(fromBlock, toBlock, addresses, topics, blockHash, after_key, chunk_size)
+            if len(rows):
+                yield [row[-1] for row in rows]
+            if len(rows) < chunk_size:
+                return
+            after_key = tuple(rows[-1][:3])
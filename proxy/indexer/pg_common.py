@@ -5,6 +5,13 @@ POSTGRES_DB = os.environ.get("POSTGRES_DB", "neon-db")
 POSTGRES_USER = os.environ.get("POSTGRES_USER", "neon-proxy")
 POSTGRES_PASSWORD = os.environ.get("POSTGRES_PASSWORD", "neon-proxy-pass")
 POSTGRES_HOST = os.environ.get("POSTGRES_HOST", "localhost")
+# max count of Postgres connections in one process, connections are shared by all tables
+PG_POOL_SIZE = max(int(os.environ.get("PG_POOL_SIZE", "4")), 1)
+PG_POOL_WAIT_TIMEOUT_SEC = float(os.environ.get("PG_POOL_WAIT_TIMEOUT_SEC", "10"))
+# 0 disables the timeout
+PG_STATEMENT_TIMEOUT_MS = max(int(os.environ.get("PG_STATEMENT_TIMEOUT_MS", "60000")), 0)
+# an idle connection is checked before the use after this period
+PG_HEALTH_CHECK_SEC = float(os.environ.get("PG_HEALTH_CHECK_SEC", "30"))
 
 try:
     from cPickle import dumps, loads, HIGHEST_PROTOCOL as PICKLE_PROTOCOL
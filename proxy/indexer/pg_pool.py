@@ -0,0 +1,201 @@
+import threading
+import time
+import traceback
+
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from logged_groups import logged_group
+
+from ..common_neon.process_local import ProcessLocal
+from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
+from .pg_common import POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, \
+                       PG_POOL_SIZE, PG_POOL_WAIT_TIMEOUT_SEC, PG_STATEMENT_TIMEOUT_MS, PG_HEALTH_CHECK_SEC
+
+
+class PgPoolTimeoutError(Exception):
+    """No free connection in the pool during the wait timeout"""
+
+
+@logged_group("neon.Indexer")
+class PgConnectionPool:
+    """
+    Per-process pool of Postgres connections in the autocommit mode, shared by all DB tables.
+
+    Connections are opened on demand up to max_size, an idle connection is checked by `SELECT 1`
+    after health_check_sec, and a connection is closed after OperationalError/InterfaceError,
+    so the next request reconnects.
+    """
+
+    def __init__(self, max_size: int, wait_timeout_sec: float, statement_timeout_ms: int, health_check_sec: float):
+        self._max_size = max_size
+        self._wait_timeout_sec = wait_timeout_sec
+        self._statement_timeout_ms = statement_timeout_ms
+        self._health_check_sec = health_check_sec
+
+        self._cond = threading.Condition()
+        self._idle_list: List[Tuple[psycopg2.extensions.connection, float]] = []
+        self._conn_cnt = 0
+        self._stat_exporter: Optional[StatisticsExporter] = None
+
+    def set_stat_exporter(self, stat_exporter: StatisticsExporter) -> None:
+        self._stat_exporter = stat_exporter
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._release(conn, is_broken=True)
+            raise
+        except BaseException:
+            self._release(conn, is_broken=False)
+            raise
+        self._release(conn, is_broken=False)
+
+    @contextmanager
+    def cursor(self, *args, **kwargs) -> Iterator[psycopg2.extensions.cursor]:
+        with self.connection() as conn:
+            with conn.cursor(*args, **kwargs) as cursor:
+                yield cursor
+
+    @contextmanager
+    def transaction(self) -> Iterator[psycopg2.extensions.cursor]:
+        """Cursor of one transaction, it is committed on exit and is rolled back on an exception"""
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cursor:
+                    yield cursor
+                conn.commit()
+            except BaseException:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                if not conn.closed:
+                    conn.autocommit = True
+
+    def is_connected(self) -> bool:
+        try:
+            with self.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError, PgPoolTimeoutError):
+            return False
+
+    def close(self) -> None:
+        with self._cond:
+            idle_list, self._idle_list = self._idle_list, []
+            self._conn_cnt -= len(idle_list)
+            self._cond.notify_all()
+        for conn, _ in idle_list:
+            self._close_conn(conn)
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        options = f'-c statement_timeout={self._statement_timeout_ms}' if self._statement_timeout_ms > 0 else ''
+        conn = psycopg2.connect(
+            dbname=POSTGRES_DB,
+            user=POSTGRES_USER,
+            password=POSTGRES_PASSWORD,
+            host=POSTGRES_HOST,
+            options=options
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def _acquire(self) -> psycopg2.extensions.connection:
+        start_time = time.time()
+        deadline = start_time + self._wait_timeout_sec
+        with self._cond:
+            while (not len(self._idle_list)) and (self._conn_cnt >= self._max_size):
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    raise PgPoolTimeoutError(f'no free Postgres connection in {self._wait_timeout_sec} sec')
+                self._cond.wait(timeout)
+
+            if len(self._idle_list):
+                conn, last_used_time = self._idle_list.pop()
+            else:
+                conn, last_used_time = None, 0
+                self._conn_cnt += 1
+            self._commit_stat(time.time() - start_time)
+
+        if (conn is not None) and self._is_healthy(conn, last_used_time):
+            return conn
+
+        try:
+            if conn is not None:
+                self._close_conn(conn)
+            return self._connect()
+        except BaseException:
+            self._free_conn_slot()
+            raise
+
+    def _release(self, conn: psycopg2.extensions.connection, is_broken: bool) -> None:
+        if (not is_broken) and (not conn.closed) and (conn.status != psycopg2.extensions.STATUS_READY):
+            # the transaction wasn't finished by the user
+            try:
+                conn.rollback()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                is_broken = True
+
+        if is_broken or conn.closed:
+            self._close_conn(conn)
+            self._free_conn_slot()
+            return
+
+        with self._cond:
+            self._idle_list.append((conn, time.time()))
+            self._cond.notify()
+
+    def _free_conn_slot(self) -> None:
+        with self._cond:
+            self._conn_cnt -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn: psycopg2.extensions.connection, last_used_time: float) -> bool:
+        if conn.closed:
+            return False
+        if time.time() - last_used_time < self._health_check_sec:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as err:
+            self.warning(f'Postgres connection failed health check: {err}')
+            return False
+
+    def _close_conn(self, conn: psycopg2.extensions.connection) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _commit_stat(self, wait_time_sec: float) -> None:
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_db_pool_wait(wait_time_sec)
+            self._stat_exporter.stat_commit_db_pool_connection_count(self._conn_cnt - len(self._idle_list),
+                                                                     len(self._idle_list))
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit Postgres pool statistics: {err}: {err_tb}')
+
+
+# the pool inherited from the parent process is kept by ProcessLocal: its sockets belong to the parent,
+# so they should never be closed (even by the garbage collector) in the child process
+_pg_connection_pool: ProcessLocal[PgConnectionPool] = ProcessLocal(
+    lambda: PgConnectionPool(PG_POOL_SIZE, PG_POOL_WAIT_TIMEOUT_SEC, PG_STATEMENT_TIMEOUT_MS, PG_HEALTH_CHECK_SEC)
+)
+
+
+def get_pg_connection_pool() -> PgConnectionPool:
+    return _pg_connection_pool.get()
@@ -7,7 +7,7 @@ class SolanaSignatures(BaseDB):
         BaseDB.__init__(self, 'solana_transaction_signatures')
 
     def add_signature(self, signature, slot):
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(f'''
                 INSERT INTO solana_transaction_signatures
                 (slot, signature)
@@ -15,11 +15,15 @@ class SolanaSignatures(BaseDB):
                 (slot, signature))
 
     def remove_signature(self, signatures: List[str]):
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.executemany(f'DELETE FROM solana_transaction_signatures WHERE signature = %s', [*zip(iter(signatures))])
 
+    def remove_signature_before_slot(self, slot: int):
+        with self._cursor() as cursor:
+            cursor.execute('DELETE FROM solana_transaction_signatures WHERE slot < %s', (slot,))
+
     def get_minimal_tx(self):
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(f'SELECT slot, signature FROM solana_transaction_signatures ORDER BY slot LIMIT 1')
             row = cursor.fetchone()
             if row is not None:
@@ -14,31 +14,32 @@ class SQLDict(MutableMapping, BaseDB):
         BaseDB.__init__(self, tablename)
 
     def __len__(self):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT COUNT(*) FROM {self._table_name}')
             rows = cur.fetchone()[0]
             return rows if rows is not None else 0
 
     def iterkeys(self):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT key FROM {self._table_name}')
             rows = cur.fetchall()
-            for row in rows:
-                yield self.key_decode(row[0])
+        # the connection is returned to the pool before the caller gets items
+        for row in rows:
+            yield self.key_decode(row[0])
 
     def itervalues(self):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT value FROM {self._table_name}')
             rows = cur.fetchall()
-            for row in rows:
-                yield self.decode(row[0])
+        for row in rows:
+            yield self.decode(row[0])
 
     def iteritems(self):
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT key, value FROM {self._table_name}')
             rows = cur.fetchall()
-            for row in rows:
-                yield self.key_decode(row[0]), self.decode(row[1])
+        for row in rows:
+            yield self.key_decode(row[0]), self.decode(row[1])
 
     def keys(self):
         return list(self.iterkeys())
@@ -51,13 +52,13 @@ class SQLDict(MutableMapping, BaseDB):
 
     def __contains__(self, key):
         bin_key = self.key_encode(key)
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT 1 FROM {self._table_name} WHERE key = %s', (bin_key,))
             return cur.fetchone() is not None
 
     def __getitem__(self, key):
         bin_key = self.key_encode(key)
-        with self._conn.cursor() as cur:
+        with self._cursor() as cur:
             cur.execute(f'SELECT value FROM {self._table_name} WHERE key = %s', (bin_key,))
             item = cur.fetchone()
             if item is None:
@@ -65,24 +66,28 @@ class SQLDict(MutableMapping, BaseDB):
             return self.decode(item[0])
 
     def __setitem__(self, key, value):
+        with self._cursor() as cur:
+            self.set_item(cur, key, value)
+
+    def set_item(self, cur, key, value):
+        """Upsert by the cursor of the caller, so the value is written in the transaction of the caller"""
         bin_key = self.key_encode(key)
         bin_value = self.encode(value)
-        with self._conn.cursor() as cur:
-            cur.execute(f'''
-                    INSERT INTO {self._table_name} (key, value)
-                    VALUES (%s,%s)
-                    ON CONFLICT (key)
-                    DO UPDATE SET
-                    value = EXCLUDED.value
-                ''',
-                (bin_key, bin_value)
-            )
+        cur.execute(f'''
+                INSERT INTO {self._table_name} (key, value)
+                VALUES (%s,%s)
+                ON CONFLICT (key)
+                DO UPDATE SET
+                value = EXCLUDED.value
+            ''',
+            (bin_key, bin_value)
+        )
 
     def __delitem__(self, key):
         bin_key = self.key_encode(key)
-        with self._conn.cursor() as cur:
-            if bin_key not in self:
-                raise KeyError(key)
+        if bin_key not in self:
+            raise KeyError(key)
+        with self._cursor() as cur:
             cur.execute(f'DELETE FROM {self._table_name} WHERE key = %s', (bin_key,))
 
     def __iter__(self):
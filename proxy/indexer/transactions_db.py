@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from ..common_neon.utils import NeonTxResultInfo, NeonTxInfo, NeonTxFullInfo
 from ..indexer.base_db import BaseDB, DBQuery
@@ -9,17 +9,13 @@ class SolanaNeonTxsDB(BaseDB):
     def __init__(self):
         BaseDB.__init__(self, 'solana_neon_transactions')
 
-    def set_txs(self, neon_sign: str, used_ixs: [SolanaIxSignInfo]):
-        used_ixs = set(used_ixs)
-        rows = []
-        for ix in used_ixs:
-            rows.append((ix.sign, neon_sign, ix.slot, ix.idx, ix.steps))
+    _column_list = ['sol_sign', 'neon_sign', 'slot', 'idx', 'neon_steps']
 
-        with self._conn.cursor() as cursor:
-            cursor.executemany(f'''
-                INSERT INTO {self._table_name}(sol_sign, neon_sign, slot, idx, neon_steps)
-                VALUES(%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING''',
-                rows)
+    def get_row_list(self, neon_sign: str, used_ixs: [SolanaIxSignInfo]) -> List[Tuple]:
+        return [(ix.sign, neon_sign, ix.slot, ix.idx, ix.steps) for ix in set(used_ixs)]
+
+    def insert_row_list(self, cursor, row_list: List[Tuple]) -> None:
+        self._insert_row_list(cursor, self._column_list, row_list)
 
     def get_sol_sign_list_by_neon_sign(self, neon_sign: str) -> [str]:
         request = f'''
@@ -28,7 +24,7 @@ class SolanaNeonTxsDB(BaseDB):
              WHERE neon_sign = %s
         '''
 
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(request, [neon_sign])
             values = cursor.fetchall()
 
@@ -70,7 +66,7 @@ class NeonTxsDB(BaseDB):
 
         return NeonTxFullInfo(neon_tx=neon_tx, neon_res=neon_res)
 
-    def set_tx(self, tx: NeonTxFullInfo):
+    def get_row(self, tx: NeonTxFullInfo) -> Tuple:
         row = [tx.neon_tx.sign, tx.neon_tx.addr, tx.neon_res.sol_sign]
         for idx, column in enumerate(self._column_lst):
             if column in ['neon_sign', 'from_addr', 'sol_sign', 'logs']:
@@ -83,18 +79,10 @@ class NeonTxsDB(BaseDB):
                 assert False, f'Wrong usage {idx} -> {column}!'
 
         row.append(self.encode_list(tx.neon_res.logs))
+        return tuple(row)
 
-        cursor = self._conn.cursor()
-        cursor.execute(f'''
-                        INSERT INTO {self._table_name}
-                            ({', '.join(self._column_lst)})
-                        VALUES
-                            ({', '.join(['%s' for _ in self._column_lst])})
-                        ON CONFLICT DO NOTHING;
-                       ''',
-                       row)
-
-        self._sol_neon_txs_db.set_txs(tx.neon_tx.sign, tx.used_ixs)
+    def insert_row_list(self, cursor, row_list: List[Tuple]) -> None:
+        self._insert_row_list(cursor, self._column_lst, row_list)
 
     def get_tx_by_neon_sign(self, neon_sign) -> Optional[NeonTxFullInfo]:
         return self._tx_from_value(
@@ -107,7 +95,7 @@ class NeonTxsDB(BaseDB):
 
     def get_latest_tx_slot(self) -> int:
         request = f'SELECT MAX(slot) FROM {self._table_name} LIMIT 1'
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(request)
             result = cursor.fetchone()
 
@@ -127,7 +115,7 @@ class NeonTxsDB(BaseDB):
              LIMIT {len(sol_sign_list)}
         '''
 
-        with self._conn.cursor() as cursor:
+        with self._cursor() as cursor:
             cursor.execute(request, sol_sign_list)
             values = cursor.fetchall()
 
@@ -14,9 +14,12 @@ from proxy.indexer.utils import gen_fake_slot_hash
 
 from ..common_neon.utils import SolanaBlockInfo, NeonTxResultInfo
 from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.solana_subscriber import get_solana_subscriber
 from ..indexer.indexer_db import IndexerDB
 
-from ..common_neon.environment_data import FINALIZED
+from ..common_neon.environment_data import FINALIZED, MEMDB_STORE_SIZE_MB, MEMDB_STORE_ITEM_LIMIT
+
+from .shared_store import SharedDict, SharedList, SharedValue
 
 
 @logged_group("neon.Proxy")
@@ -51,10 +54,18 @@ class RequestSolanaBlockList:
 
     def _get_latest_db_block(self):
         self.latest_db_block_slot = self._b.db.get_latest_block_slot()
-        latest_solana_block_slot = self._b.solana.get_recent_blockslot(commitment=FINALIZED)
+        latest_solana_block_slot = self._get_latest_solana_block_slot()
         if not self.latest_db_block_slot or (latest_solana_block_slot - self.latest_db_block_slot > 300):
             self.latest_db_block_slot = latest_solana_block_slot
 
+    def _get_latest_solana_block_slot(self) -> int:
+        # the root slot from notifications is close enough to the finalized one to find the lag of the DB
+        subscriber = get_solana_subscriber()
+        root_slot = subscriber.get_root_slot() if subscriber is not None else 0
+        if root_slot:
+            return root_slot
+        return self._b.solana.get_recent_blockslot(commitment=FINALIZED)
+
     def _get_solana_block_list(self) -> bool:
         latest_db_slot = self.latest_db_block_slot
         exist_block_dict = self._b.get_block_dict(latest_db_slot)
@@ -102,17 +113,15 @@ class RequestSolanaBlockList:
 @logged_group("neon.Proxy")
 class MemBlocksDB:
     # Global blocks cache for all workers
-    _manager = mp.Manager()
-
-    _pending_block_list = _manager.list()
-    _pending_block_by_slot = _manager.dict()
+    _pending_block_list = SharedList(MEMDB_STORE_SIZE_MB * 1024 * 1024, MEMDB_STORE_ITEM_LIMIT)
+    _pending_block_by_slot = SharedDict(MEMDB_STORE_SIZE_MB * 1024 * 1024, MEMDB_STORE_ITEM_LIMIT)
 
     _last_time = mp.Value(ctypes.c_ulonglong, 0)
     _has_active_request = mp.Value(ctypes.c_bool, False)
     _pending_block_revision = mp.Value(ctypes.c_ulong, 0)
 
-    _pending_first_block = _manager.Value(ctypes.c_void_p, b'')
-    _pending_latest_block = _manager.Value(ctypes.c_void_p, b'')
+    _pending_first_block = SharedValue(64 * 1024, b'')
+    _pending_latest_block = SharedValue(64 * 1024, b'')
     _pending_db_block_slot = mp.Value(ctypes.c_ulonglong, 0)
 
     # Blocks cache for each worker
@@ -152,7 +161,7 @@ class MemBlocksDB:
         for slot in rm_block_slot_list:
             del self._pending_block_by_slot[slot]
 
-        del self._pending_block_list[:]
+        self._pending_block_list.clear()
         self._pending_block_list.extend(request.packed_block_list)
 
         self._pending_first_block.value = request.packed_first_block
@@ -0,0 +1,70 @@
+import ctypes
+import multiprocessing as mp
+
+from typing import Any, Optional
+
+from logged_groups import logged_group
+
+from ..common_neon.environment_data import ETH_CALL_CACHE_SIZE, ETH_CALL_CACHE_MEMORY_LIMIT_MB
+from .shared_store import SharedDict
+
+
+@logged_group("neon.Proxy")
+class MemCallResultDB:
+    """
+    eth_call results for the latest slot.
+
+    Results are tagged by the slot, a result of another slot is a miss.
+    The cache is cleared on the first result of a new slot, because the state is changed in the new block.
+    It is a FIFO cache, not an LRU one: when it is full, the oldest result is evicted even if it is hit often.
+    """
+
+    # a big result shouldn't evict the whole cache
+    _max_item_size = ETH_CALL_CACHE_MEMORY_LIMIT_MB * 1024 * 1024 // 16
+
+    # Global cache for all workers
+    if ETH_CALL_CACHE_SIZE > 0:
+        _result_by_key = SharedDict(ETH_CALL_CACHE_MEMORY_LIMIT_MB * 1024 * 1024, ETH_CALL_CACHE_SIZE,
+                                    is_cache=True)
+    else:
+        _result_by_key = None
+    _slot = mp.Value(ctypes.c_ulonglong, 0)
+
+    @staticmethod
+    def _get_value_key(value: Any) -> str:
+        """0x0, 0x00 and a missing value are the same value"""
+        if not value:
+            return '0'
+        try:
+            return str(int(value, 16) if isinstance(value, str) else int(value))
+        except (ValueError, TypeError):
+            return str(value).lower()
+
+    @staticmethod
+    def get_key(contract_id: str, caller_id: str, data: str, value: Any) -> str:
+        key_list = [str(v).lower() for v in (contract_id, caller_id, data)]
+        key_list.append(MemCallResultDB._get_value_key(value))
+        return ':'.join(key_list)
+
+    def is_enabled(self) -> bool:
+        return self._result_by_key is not None
+
+    def get_call_result(self, key: str, slot: int) -> Optional[str]:
+        if slot != self._slot.value:
+            return None
+        slot_result = self._result_by_key.get(key)
+        if (slot_result is None) or (slot_result[0] != slot):
+            return None
+        return slot_result[1]
+
+    def put_call_result(self, key: str, slot: int, result: str) -> None:
+        if len(key) + len(result) > self._max_item_size:
+            return
+
+        with self._slot.get_lock():
+            if slot < self._slot.value:
+                return
+            elif slot > self._slot.value:
+                self._slot.value = slot
+                self._result_by_key.clear()
+            self._result_by_key[key] = (slot, result)
@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .shared_store import SharedDict
+
+
+LogId = Tuple[str, int]  # neon tx signature, index of the log in the tx
+
+
+class LogIndex:
+    """
+    Inverted index of logs of unfinalized txs in shared memory: address -> log ids, (position, topic) -> log ids.
+
+    Posting lists are sharded by slot: each (key, slot) is a separate item, so add() rewrites only
+    the small lists of the slot of the tx, and remove() drops whole finalized slots by the list of their keys.
+    Methods add() and remove() should be called under the lock of the owner.
+    """
+
+    def __init__(self, size: int, item_limit: int):
+        self._log_id_list_by_address = SharedDict(size, item_limit)
+        self._log_id_list_by_topic = SharedDict(size, item_limit)
+        self._key_list_by_slot = SharedDict(item_limit * 256, item_limit)
+
+    @staticmethod
+    def _get_key_dict_list(neon_sign: str, log_list: List[Dict[str, Any]]) -> List[Dict[str, List[LogId]]]:
+        address_dict: Dict[str, List[LogId]] = {}
+        topic_dict: Dict[str, List[LogId]] = {}
+        for idx, log in enumerate(log_list):
+            log_id = (neon_sign, idx)
+            address_dict.setdefault(log['address'], []).append(log_id)
+            for pos, topic in enumerate(log['topics']):
+                topic_dict.setdefault(f'{pos}:{topic}', []).append(log_id)
+        return [address_dict, topic_dict]
+
+    def _get_storage_list(self) -> List[SharedDict]:
+        return [self._log_id_list_by_address, self._log_id_list_by_topic]
+
+    def add(self, slot: int, neon_sign: str, log_list: List[Dict[str, Any]]) -> None:
+        key_dict_list = self._get_key_dict_list(neon_sign, log_list)
+        new_key_list: List[Tuple[int, str]] = []
+        for storage_idx, (storage, key_dict) in enumerate(zip(self._get_storage_list(), key_dict_list)):
+            for key, log_id_list in key_dict.items():
+                old_log_id_list = storage.get((key, slot))
+                if old_log_id_list is None:
+                    old_log_id_list = []
+                    new_key_list.append((storage_idx, key))
+
+                old_log_id_set = set(old_log_id_list)
+                new_log_id_list = [log_id for log_id in log_id_list if log_id not in old_log_id_set]
+                if len(new_log_id_list):
+                    storage[(key, slot)] = old_log_id_list + new_log_id_list
+
+        if len(new_key_list):
+            self._key_list_by_slot[slot] = self._key_list_by_slot.get(slot, []) + new_key_list
+
+    def remove(self, slot_list: List[int]) -> None:
+        """Removes logs of finalized slots"""
+        storage_list = self._get_storage_list()
+        for slot in slot_list:
+            for storage_idx, key in self._key_list_by_slot.pop(slot, []):
+                storage_list[storage_idx].pop((key, slot), None)
+
+    def find(self, address_list: List[str], topic_list: List[List[str]],
+             slot_list: List[int]) -> Optional[Dict[str, Set[int]]]:
+        """
+        Returns indexes of logs of slots from slot_list grouped by neon tx signature,
+        or None if there are no filters and all logs should be returned.
+        topic_list has Ethereum semantics: a list of topics joined by OR for each position,
+        the empty list matches any topic.
+        """
+        filter_list = [(self._log_id_list_by_address, address_list)]
+        for pos, pos_topic_list in enumerate(topic_list):
+            key_list = [f'{pos}:{topic}' for topic in pos_topic_list]
+            filter_list.append((self._log_id_list_by_topic, key_list))
+
+        log_id_set: Optional[Set[LogId]] = None
+        for storage, key_list in filter_list:
+            if not len(key_list):
+                continue
+
+            key_log_id_set: Set[LogId] = set()
+            for key in key_list:
+                for slot in slot_list:
+                    key_log_id_set.update(storage.get((key, slot), []))
+            log_id_set = key_log_id_set if log_id_set is None else (log_id_set & key_log_id_set)
+
+        if log_id_set is None:
+            return None
+
+        log_idx_dict: Dict[str, Set[int]] = {}
+        for neon_sign, idx in log_id_set:
+            log_idx_dict.setdefault(neon_sign, set()).add(idx)
+        return log_idx_dict
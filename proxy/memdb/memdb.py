@@ -1,9 +1,10 @@
 from logged_groups import logged_group
-from typing import Optional
+from typing import Iterator, List, Optional
 
 from ..common_neon.environment_data import FINALIZED, ONLY_TRACK_BLOCKS_WITH_NEON_TRANSACTION
 
 from ..indexer.indexer_db import IndexerDB
+from ..indexer.logs_db import LogKey
 
 from ..common_neon.utils import NeonTxInfo, NeonTxResultInfo, NeonTxFullInfo
 from ..common_neon.solana_interactor import SolanaInteractor
@@ -11,6 +12,7 @@ from ..common_neon.solana_interactor import SolanaInteractor
 from ..memdb.blocks_db import MemBlocksDB, SolanaBlockInfo
 from ..memdb.pending_tx_db import MemPendingTxsDB, NeonPendingTxInfo
 from ..memdb.transactions_db import MemTxsDB
+from ..memdb.call_result_db import MemCallResultDB
 
 
 @logged_group("neon.Proxy")
@@ -22,6 +24,7 @@ class MemDB:
         self._blocks_db = MemBlocksDB(self._solana, self._db)
         self._txs_db = MemTxsDB(self._db)
         self._pending_tx_db = MemPendingTxsDB(self._db)
+        self._call_result_db = MemCallResultDB()
 
     def _before_slot(self) -> int:
         return self._blocks_db.get_db_block_slot() - 5
@@ -47,6 +50,19 @@ class MemDB:
     def get_block_by_hash(self, block_hash: str, update_dicts = True) -> SolanaBlockInfo:
         return self._blocks_db.get_block_by_hash(block_hash, update_dicts)
 
+    def is_call_result_cache_enabled(self) -> bool:
+        return self._call_result_db.is_enabled()
+
+    def get_call_result(self, contract_id: str, caller_id: str, data: str, value: str) -> (int, Optional[str]):
+        """Returns the latest slot and the cached result of eth_call for this slot"""
+        slot = self._blocks_db.get_latest_block_slot()
+        key = self._call_result_db.get_key(contract_id, caller_id, data, value)
+        return slot, self._call_result_db.get_call_result(key, slot)
+
+    def put_call_result(self, slot: int, contract_id: str, caller_id: str, data: str, value: str, result: str):
+        key = self._call_result_db.get_key(contract_id, caller_id, data, value)
+        self._call_result_db.put_call_result(key, slot, result)
+
     def pend_transaction(self, tx: NeonPendingTxInfo):
         self._pending_tx_db.pend_transaction(tx, self._before_slot())
 
@@ -74,6 +90,13 @@ class MemDB:
     def get_logs(self, from_block, to_block, addresses, topics, block_hash):
         return self._txs_db.get_logs(from_block, to_block, addresses, topics, block_hash)
 
+    def get_logs_page(self, from_block, to_block, addresses, topics, block_hash, after_key: Optional[LogKey]):
+        return self._db.get_logs_page(from_block, to_block, addresses, topics, block_hash, after_key)
+
+    def iter_log_json_list(self, from_block, to_block, addresses, topics, block_hash,
+                           chunk_size: int) -> Iterator[List[str]]:
+        return self._txs_db.iter_log_json_list(from_block, to_block, addresses, topics, block_hash, chunk_size)
+
     def get_contract_code(self, address: str) -> str:
         return self._db.get_contract_code(address)
 
@@ -2,10 +2,16 @@ import multiprocessing as mp
 import ctypes
 import pickle
 
+from typing import Optional
+
 from logged_groups import logged_group
 
 from ..indexer.indexer_db import IndexerDB
 from ..common_neon.errors import PendingTxError
+from ..common_neon.environment_data import MEMDB_STORE_ITEM_LIMIT
+
+from .shared_store import SharedDict
+from .slot_index import SlotIndex, BackgroundCleaner
 
 
 class NeonPendingTxInfo:
@@ -26,59 +32,75 @@ class MemPendingTxsDB:
     # These variables are global for class, they will be initialized one time
     BIG_SLOT = 1_000_000_000_000
 
-    _manager = mp.Manager()
+    RM_SLOT_BATCH = 16
 
+    # the minimal slot of pending txs
     _pending_slot = mp.Value(ctypes.c_ulonglong, BIG_SLOT)
+    # txs with slot < this value are finalized and should be removed
+    _rm_before_slot = mp.Value(ctypes.c_ulonglong, 0)
 
-    _pending_tx_by_hash = _manager.dict()
-    _pending_slot_by_hash = _manager.dict()
+    _pending_tx_by_hash = SharedDict(MEMDB_STORE_ITEM_LIMIT * 512, MEMDB_STORE_ITEM_LIMIT)
+    _pending_slot_by_hash = SharedDict(MEMDB_STORE_ITEM_LIMIT * 256, MEMDB_STORE_ITEM_LIMIT)
+    _pending_sign_list_by_slot = SlotIndex(MEMDB_STORE_ITEM_LIMIT)
 
     def __init__(self, db: IndexerDB):
         self._db = db
+        self._cleaner = BackgroundCleaner('memdb-pending-txs-cleaner', self._rm_finalized_txs)
 
     def _set_tx(self, tx: NeonPendingTxInfo):
         data = pickle.dumps(tx)
         self._pending_tx_by_hash[tx.neon_sign] = data
         self._pending_slot_by_hash[tx.neon_sign] = tx.slot
+        self._pending_sign_list_by_slot.add(tx.slot, tx.neon_sign)
 
         if self._pending_slot.value > tx.slot:
             self._pending_slot.value = tx.slot
 
-    def _rm_finalized_txs(self, before_slot: int):
-        if self._pending_slot.value > before_slot:
+    def _schedule_rm_finalized_txs(self, before_slot: int):
+        if self._pending_slot.value >= before_slot:
             return
 
-        rm_sign_list = []
-        pending_slot = self.BIG_SLOT
-
-        # Filter tx by slot
-        for sign, slot in self._pending_slot_by_hash.items():
-            if slot < before_slot:
-                rm_sign_list.append(sign)
-            elif pending_slot > slot:
-                pending_slot = slot
-
-        self._pending_slot.value = pending_slot
+        with self._rm_before_slot.get_lock():
+            if self._rm_before_slot.value < before_slot:
+                self._rm_before_slot.value = before_slot
+        self._cleaner.wakeup()
 
-        # Remove old txs
-        for sign in rm_sign_list:
-            del self._pending_tx_by_hash[sign]
-            del self._pending_slot_by_hash[sign]
+    def _rm_finalized_txs(self) -> bool:
+        before_slot = self._rm_before_slot.value
+        with self._pending_slot.get_lock():
+            if self._pending_slot.value >= before_slot:
+                return False
+
+            for slot, sign_list in self._pending_sign_list_by_slot.pop(before_slot - 1, self.RM_SLOT_BATCH):
+                for sign in sign_list:
+                    # the tx can be pended again in another slot
+                    if self._pending_slot_by_hash.get(sign) == slot:
+                        del self._pending_tx_by_hash[sign]
+                        del self._pending_slot_by_hash[sign]
+
+            pending_slot = self._pending_sign_list_by_slot.get_min_slot()
+            self._pending_slot.value = self.BIG_SLOT if pending_slot is None else pending_slot
+            return self._pending_slot.value < before_slot
+
+    def _get_pended_data(self, neon_sign: str, before_slot: int) -> Optional[bytes]:
+        """Returns the pending tx if it isn't finalized, finalized txs are removed in the background"""
+        slot = self._pending_slot_by_hash.get(neon_sign)
+        if (slot is None) or (slot < before_slot):
+            return None
+        return self._pending_tx_by_hash.get(neon_sign)
 
     def is_exist(self, neon_sign: str, before_slot) -> bool:
-        with self._pending_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-            return neon_sign in self._pending_tx_by_hash
+        self._schedule_rm_finalized_txs(before_slot)
+        return self._get_pended_data(neon_sign, before_slot) is not None
 
     def pend_transaction(self, tx: NeonPendingTxInfo, before_slot: int):
         executed_tx = self._db.get_tx_by_neon_sign(tx.neon_sign)
         if executed_tx:
             raise PendingTxError(f'Transaction {tx.neon_sign} is already executed')
 
+        self._schedule_rm_finalized_txs(before_slot)
         with self._pending_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-
-            pended_data = self._pending_tx_by_hash.get(tx.neon_sign)
+            pended_data = self._get_pended_data(tx.neon_sign, before_slot)
             if not pended_data:
                 return self._set_tx(tx)
 
@@ -0,0 +1,554 @@
+import ctypes
+import hashlib
+import multiprocessing as mp
+import os
+import pickle
+import struct
+import time
+import weakref
+
+from typing import Any, Iterator, List, Optional, Tuple
+
+from logged_groups import logged_group
+
+
+class SharedStoreFullError(Exception):
+    """The store isn't a cache, so its live records can't be evicted for the new one"""
+
+
+@logged_group("neon.Proxy")
+class SharedStore:
+    """
+    Key-value storage in shared memory, which is inherited by forked workers.
+
+    Records are appended to a ring buffer, an open-addressing hash index points to live records.
+    Writers are serialized by a lock. Readers don't take the lock, they repeat reading
+    if the sequence number was changed by a writer (seqlock).
+    When the ring is full, live records from the tail are moved to the head,
+    so the ring order isn't the insertion order and isn't the age of records.
+    A cache evicts the oldest records on overflow, other stores raise SharedStoreFullError.
+
+    Buffers are allocated on the first access in the process, which created the store,
+    so an imported but unused store takes no memory.
+    The proxy allocates all stores by allocate_shared_store_list() before the fork of workers.
+    """
+
+    _HDR = struct.Struct('<IIII')  # record length, key length, value length, record state
+    _ALIGN = _HDR.size
+
+    _LIVE, _DEAD, _PAD = 1, 2, 3
+    _EMPTY_BUCKET, _DELETED_BUCKET = 0, -1
+    _MAX_LOAD = 0.75
+
+    # Indexes in the header array
+    _SEQ, _HEAD, _TAIL, _ITEM_CNT, _DELETED_CNT, _LIVE_SIZE, _KEY_CNT, _FIRST_KEY = range(8)
+
+    _BUFFER_NAME_SET = frozenset(('_hdr', '_index', '_ring', '_view'))
+
+    def __init__(self, size: int, item_limit: int, is_cache: bool = False):
+        self._ring_size = max(self._align(size), self._ALIGN * 2)
+        bucket_cnt = 16
+        while bucket_cnt * self._MAX_LOAD < item_limit:
+            bucket_cnt *= 2
+        self._bucket_cnt = bucket_cnt
+        self._item_limit = int(bucket_cnt * self._MAX_LOAD)
+        self._is_cache = is_cache
+
+        self._lock = mp.RLock()
+        self._owner_pid = os.getpid()
+        _shared_store_set.add(self)
+
+    def __getattr__(self, name: str) -> Any:
+        """Is called only before the allocation of buffers"""
+        if name not in self._BUFFER_NAME_SET:
+            raise AttributeError(name)
+        self.allocate()
+        return self.__dict__[name]
+
+    def allocate(self) -> None:
+        if '_ring' in self.__dict__:
+            return
+        if os.getpid() != self._owner_pid:
+            raise RuntimeError('Shared storage should be allocated before the fork of the process')
+
+        with self._lock:
+            if '_ring' in self.__dict__:
+                return
+            self._hdr = mp.RawArray(ctypes.c_ulonglong, 8)
+            self._index = mp.RawArray(ctypes.c_longlong, self._bucket_cnt * 2)
+            self._view = memoryview(mp.RawArray(ctypes.c_char, self._ring_size)).cast('B')
+            # the ring is the last one, it is the flag of the allocation
+            self._ring = self._view.obj
+
+    @classmethod
+    def _align(cls, size: int) -> int:
+        return (size + cls._ALIGN - 1) // cls._ALIGN * cls._ALIGN
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        return (int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') >> 1) or 1
+
+    # Readers
+
+    def _read(self, fn, *args):
+        while True:
+            seq = self._hdr[self._SEQ]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            try:
+                result = fn(*args)
+            except (struct.error, IndexError, ValueError, pickle.UnpicklingError, EOFError):
+                # torn read
+                result = None
+            if self._hdr[self._SEQ] == seq:
+                return result
+
+    def _read_hdr(self, offset: int) -> Tuple[int, int, int, int]:
+        return self._HDR.unpack_from(self._view, offset % self._ring_size)
+
+    def _read_key(self, offset: int) -> bytes:
+        pos = offset % self._ring_size + self._ALIGN
+        _, key_len, _, _ = self._read_hdr(offset)
+        return bytes(self._view[pos:pos + key_len])
+
+    def _read_value(self, offset: int) -> bytes:
+        pos = offset % self._ring_size + self._ALIGN
+        _, key_len, value_len, _ = self._read_hdr(offset)
+        return bytes(self._view[pos + key_len:pos + key_len + value_len])
+
+    def _find(self, key: bytes, key_hash: int) -> Tuple[int, int]:
+        """Returns the bucket of the key (or -1) and the first bucket available for the key"""
+        mask = self._bucket_cnt - 1
+        idx = key_hash & mask
+        free_idx = -1
+        for _ in range(self._bucket_cnt):
+            bucket_hash = self._index[idx * 2]
+            if bucket_hash == self._EMPTY_BUCKET:
+                return -1, (idx if free_idx < 0 else free_idx)
+            elif bucket_hash == self._DELETED_BUCKET:
+                if free_idx < 0:
+                    free_idx = idx
+            elif (bucket_hash == key_hash) and (self._read_key(self._index[idx * 2 + 1]) == key):
+                return idx, free_idx
+            idx = (idx + 1) & mask
+        return -1, free_idx
+
+    def _get_value(self, key: bytes, key_hash: int) -> Optional[bytes]:
+        idx, _ = self._find(key, key_hash)
+        if idx < 0:
+            return None
+        return self._read_value(self._index[idx * 2 + 1])
+
+    def _get_record_list(self) -> List[Tuple[bytes, bytes]]:
+        record_list = []
+        offset, head = self._hdr[self._TAIL], self._hdr[self._HEAD]
+        while offset < head:
+            rec_len, key_len, value_len, state = self._read_hdr(offset)
+            if rec_len == 0:
+                raise ValueError('bad record')
+            if state == self._LIVE:
+                pos = offset % self._ring_size + self._ALIGN
+                record_list.append((
+                    bytes(self._view[pos:pos + key_len]),
+                    bytes(self._view[pos + key_len:pos + key_len + value_len])
+                ))
+            offset += rec_len
+        return record_list
+
+    def get_bytes(self, key: bytes) -> Optional[bytes]:
+        return self._read(self._get_value, key, self._hash(key))
+
+    def get_record_list(self) -> List[Tuple[bytes, bytes]]:
+        """Returns live records in the ring order"""
+        return self._read(self._get_record_list) or []
+
+    def get_item_cnt(self) -> int:
+        return self._hdr[self._ITEM_CNT]
+
+    # Writers, they should be called under the lock
+
+    def _begin_write(self) -> None:
+        self._hdr[self._SEQ] += 1
+
+    def _end_write(self) -> None:
+        self._hdr[self._SEQ] += 1
+
+    def _write_hdr(self, offset: int, rec_len: int, key_len: int, value_len: int, state: int) -> None:
+        self._HDR.pack_into(self._view, offset % self._ring_size, rec_len, key_len, value_len, state)
+
+    def _set_state(self, offset: int, state: int) -> None:
+        rec_len, key_len, value_len, _ = self._read_hdr(offset)
+        self._write_hdr(offset, rec_len, key_len, value_len, state)
+
+    def _drop_bucket(self, idx: int) -> None:
+        offset = self._index[idx * 2 + 1]
+        rec_len, _, _, _ = self._read_hdr(offset)
+        self._set_state(offset, self._DEAD)
+        self._index[idx * 2] = self._DELETED_BUCKET
+        self._hdr[self._ITEM_CNT] -= 1
+        self._hdr[self._DELETED_CNT] += 1
+        self._hdr[self._LIVE_SIZE] -= rec_len
+
+    def _find_bucket_by_offset(self, offset: int) -> int:
+        key = self._read_key(offset)
+        idx, _ = self._find(key, self._hash(key))
+        return idx
+
+    def _get_free_space(self, rec_len: int) -> Tuple[int, int]:
+        """Returns the padding before the record and the free space after placing of the record"""
+        head = self._hdr[self._HEAD]
+        pos = head % self._ring_size
+        pad = (self._ring_size - pos) if (pos + rec_len > self._ring_size) else 0
+        used = head - self._hdr[self._TAIL]
+        return pad, self._ring_size - used - pad - rec_len
+
+    def _place(self, rec_len: int, pad: int) -> int:
+        head = self._hdr[self._HEAD]
+        if pad:
+            self._write_hdr(head, pad, 0, 0, self._PAD)
+            head += pad
+        self._hdr[self._HEAD] = head + rec_len
+        return head
+
+    def _release_tail(self, need_len: int, allow_move: bool) -> int:
+        tail = self._hdr[self._TAIL]
+        rec_len, _, _, state = self._read_hdr(tail)
+        self._hdr[self._TAIL] = tail + rec_len
+        if state != self._LIVE:
+            return rec_len
+
+        idx = self._find_bucket_by_offset(tail)
+        pad, free_space = self._get_free_space(rec_len)
+        if allow_move and (free_space >= 0) and (self._hdr[self._LIVE_SIZE] + need_len <= self._ring_size):
+            # the record is still used, move it to the head
+            data = bytes(self._view[tail % self._ring_size:tail % self._ring_size + rec_len])
+            offset = self._place(rec_len, pad)
+            pos = offset % self._ring_size
+            self._view[pos:pos + rec_len] = data
+            self._index[idx * 2 + 1] = offset
+        elif self._is_cache:
+            self.warning(f'Evict record from shared storage: ring size {self._ring_size}, item count {self.get_item_cnt()}')
+            self._drop_bucket(idx)
+        else:
+            # the padding at the end of the buffer doesn't leave space for the move
+            self._hdr[self._TAIL] = tail
+            self._compact()
+        return rec_len
+
+    def _compact(self) -> None:
+        """Places live records one by one from the beginning of the buffer, so the free space has no padding"""
+        record_list = []
+        offset, head = self._hdr[self._TAIL], self._hdr[self._HEAD]
+        while offset < head:
+            rec_len, _, _, state = self._read_hdr(offset)
+            if state == self._LIVE:
+                pos = offset % self._ring_size
+                record_list.append((self._find_bucket_by_offset(offset), bytes(self._view[pos:pos + rec_len])))
+            offset += rec_len
+
+        offset = (head + self._ring_size - 1) // self._ring_size * self._ring_size
+        self._hdr[self._HEAD] = self._hdr[self._TAIL] = offset
+        for idx, data in record_list:
+            offset = self._place(len(data), 0)
+            pos = offset % self._ring_size
+            self._view[pos:pos + len(data)] = data
+            self._index[idx * 2 + 1] = offset
+
+    def _alloc(self, rec_len: int) -> int:
+        # don't move the same records around the ring forever
+        released_size = 0
+        while True:
+            if self._hdr[self._HEAD] == self._hdr[self._TAIL]:
+                # the ring is empty, start from the beginning of the buffer
+                offset = (self._hdr[self._HEAD] + self._ring_size - 1) // self._ring_size * self._ring_size
+                self._hdr[self._HEAD] = self._hdr[self._TAIL] = offset
+
+            pad, free_space = self._get_free_space(rec_len)
+            if free_space >= 0:
+                return self._place(rec_len, pad)
+            elif (not self._is_cache) and (released_size >= self._ring_size):
+                self._compact()
+                continue
+            released_size += self._release_tail(rec_len, released_size < self._ring_size)
+
+    def _rebuild_index(self) -> None:
+        ctypes.memset(self._index, 0, ctypes.sizeof(self._index))
+        self._hdr[self._DELETED_CNT] = 0
+        offset, head = self._hdr[self._TAIL], self._hdr[self._HEAD]
+        while offset < head:
+            rec_len, _, _, state = self._read_hdr(offset)
+            if state == self._LIVE:
+                key = self._read_key(offset)
+                _, free_idx = self._find(key, self._hash(key))
+                self._index[free_idx * 2] = self._hash(key)
+                self._index[free_idx * 2 + 1] = offset
+            offset += rec_len
+
+    def _evict_tail(self) -> None:
+        """Is called only for caches"""
+        offset, head = self._hdr[self._TAIL], self._hdr[self._HEAD]
+        while offset < head:
+            rec_len, _, _, state = self._read_hdr(offset)
+            if state == self._LIVE:
+                self.warning(f'Evict record from shared storage: item limit {self._item_limit}')
+                self._drop_bucket(self._find_bucket_by_offset(offset))
+                return
+            offset += rec_len
+
+    def _delete(self, key: bytes) -> bool:
+        idx, _ = self._find(key, self._hash(key))
+        if idx < 0:
+            return False
+        self._drop_bucket(idx)
+        return True
+
+    def _check_space(self, key: bytes, rec_len: int) -> None:
+        """Checks the space for the record before any change, so the old value of the key is kept on the error"""
+        idx, _ = self._find(key, self._hash(key))
+        if idx < 0:
+            item_cnt, live_size = self.get_item_cnt() + 1, self._hdr[self._LIVE_SIZE] + rec_len
+        else:
+            old_rec_len, _, _, _ = self._read_hdr(self._index[idx * 2 + 1])
+            item_cnt, live_size = self.get_item_cnt(), self._hdr[self._LIVE_SIZE] - old_rec_len + rec_len
+
+        if item_cnt > self._item_limit:
+            raise SharedStoreFullError(f'Shared storage is full: item limit {self._item_limit}')
+        elif live_size > self._ring_size:
+            raise SharedStoreFullError(f'Shared storage is full: ring size {self._ring_size}, '
+                                       f'item count {self.get_item_cnt()}')
+
+    def _insert(self, key: bytes, value: bytes) -> None:
+        rec_len = self._align(self._ALIGN + len(key) + len(value))
+        if rec_len > self._ring_size:
+            raise ValueError(f'Too big record for shared storage: {rec_len} > {self._ring_size}')
+        if not self._is_cache:
+            self._check_space(key, rec_len)
+
+        self._delete(key)
+        while self.get_item_cnt() >= self._item_limit:
+            self._evict_tail()
+        if self.get_item_cnt() + self._hdr[self._DELETED_CNT] >= self._item_limit:
+            self._rebuild_index()
+
+        offset = self._alloc(rec_len)
+        self._write_hdr(offset, rec_len, len(key), len(value), self._LIVE)
+        pos = offset % self._ring_size + self._ALIGN
+        self._view[pos:pos + len(key)] = key
+        self._view[pos + len(key):pos + len(key) + len(value)] = value
+
+        key_hash = self._hash(key)
+        _, free_idx = self._find(key, key_hash)
+        if self._index[free_idx * 2] == self._DELETED_BUCKET:
+            self._hdr[self._DELETED_CNT] -= 1
+        self._index[free_idx * 2] = key_hash
+        self._index[free_idx * 2 + 1] = offset
+        self._hdr[self._ITEM_CNT] += 1
+        self._hdr[self._LIVE_SIZE] += rec_len
+
+    def _clear(self) -> None:
+        ctypes.memset(self._index, 0, ctypes.sizeof(self._index))
+        for i in (self._ITEM_CNT, self._DELETED_CNT, self._LIVE_SIZE):
+            self._hdr[i] = 0
+        self._hdr[self._TAIL] = self._hdr[self._HEAD]
+
+    def set_bytes(self, key: bytes, value: bytes) -> None:
+        with self._lock:
+            self._begin_write()
+            try:
+                self._insert(key, value)
+            finally:
+                self._end_write()
+
+    def del_bytes(self, key: bytes) -> bool:
+        with self._lock:
+            self._begin_write()
+            try:
+                return self._delete(key)
+            finally:
+                self._end_write()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._begin_write()
+            try:
+                self._clear()
+            finally:
+                self._end_write()
+
+
+class SharedDict(SharedStore):
+    """Drop-in replacement of multiprocessing.Manager().dict() for picklable keys and values"""
+
+    _NONE = object()
+
+    @staticmethod
+    def _dumps(obj: Any) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        data = self.get_bytes(self._dumps(key))
+        return default if data is None else pickle.loads(data)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, self._NONE)
+        if value is self._NONE:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.set_bytes(self._dumps(key), self._dumps(value))
+
+    def __delitem__(self, key: Any) -> None:
+        if not self.del_bytes(self._dumps(key)):
+            raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get_bytes(self._dumps(key)) is not None
+
+    def __len__(self) -> int:
+        return self.get_item_cnt()
+
+    def pop(self, key: Any, default: Any = _NONE) -> Any:
+        with self._lock:
+            value = self.get(key, self._NONE)
+            if value is not self._NONE:
+                del self[key]
+            elif default is self._NONE:
+                raise KeyError(key)
+            else:
+                value = default
+        return value
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        return [(pickle.loads(key), pickle.loads(value)) for key, value in self.get_record_list()]
+
+    def keys(self) -> List[Any]:
+        return [pickle.loads(key) for key, _ in self.get_record_list()]
+
+    def values(self) -> List[Any]:
+        return [pickle.loads(value) for _, value in self.get_record_list()]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.keys())
+
+
+class SharedList(SharedDict):
+    """
+    Drop-in replacement of multiprocessing.Manager().list() for the FIFO usage.
+
+    Items are stored by integer keys between the shared first and next keys, so the order of items
+    doesn't depend on the ring order, and pop() reads only the popped item.
+    """
+
+    def _get_key_range(self) -> range:
+        return range(self._hdr[self._FIRST_KEY], self._hdr[self._KEY_CNT])
+
+    def _has_key(self, key: int) -> bool:
+        key_data = self._dumps(key)
+        return self._get_value(key_data, self._hash(key_data)) is not None
+
+    def _get_item_list(self) -> List[Tuple[int, bytes]]:
+        item_list = []
+        for key in self._get_key_range():
+            key_data = self._dumps(key)
+            value = self._get_value(key_data, self._hash(key_data))
+            if value is not None:
+                item_list.append((key, value))
+        return item_list
+
+    def _get_key_list(self) -> List[int]:
+        return [key for key in self._get_key_range() if self._has_key(key)]
+
+    def items(self) -> List[Tuple[int, Any]]:
+        """Returns keys and items in the order of appending"""
+        return [(key, pickle.loads(value)) for key, value in self._read(self._get_item_list) or []]
+
+    def keys(self) -> List[int]:
+        return self._read(self._get_key_list) or []
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def append(self, value: Any) -> None:
+        with self._lock:
+            key = self._hdr[self._KEY_CNT]
+            SharedDict.__setitem__(self, key, value)
+            self._hdr[self._KEY_CNT] = key + 1
+
+    def extend(self, value_list: List[Any]) -> None:
+        with self._lock:
+            for value in value_list:
+                self.append(value)
+
+    def pop(self, index: int = -1) -> Any:
+        with self._lock:
+            if index in (0, -1):
+                key_range = self._get_key_range()
+                # the first and the last keys can be evicted on the ring overflow
+                key_iter = iter(key_range) if index == 0 else reversed(key_range)
+                key = next((key for key in key_iter if self._has_key(key)), None)
+                if key is None:
+                    raise IndexError('pop from empty list')
+            else:
+                key = self.keys()[index]
+            return self.pop_key(key)
+
+    def pop_key(self, key: int) -> Any:
+        """Removes the item by the key from items()"""
+        with self._lock:
+            key_data = self._dumps(key)
+            data = self.get_bytes(key_data)
+            if data is None:
+                raise KeyError(key)
+            self.del_bytes(key_data)
+
+            first_key, next_key = self._hdr[self._FIRST_KEY], self._hdr[self._KEY_CNT]
+            while (first_key < next_key) and (not self._has_key(first_key)):
+                first_key += 1
+            while (next_key > first_key) and (not self._has_key(next_key - 1)):
+                next_key -= 1
+
+            self._begin_write()
+            self._hdr[self._FIRST_KEY], self._hdr[self._KEY_CNT] = first_key, next_key
+            self._end_write()
+            return pickle.loads(data)
+
+    def _clear(self) -> None:
+        SharedDict._clear(self)
+        self._hdr[self._FIRST_KEY] = self._hdr[self._KEY_CNT]
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values()[index]
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.values()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values())
+
+
+class SharedValue(SharedDict):
+    """Drop-in replacement of multiprocessing.Manager().Value() for picklable values"""
+
+    def __init__(self, size: int, value: Any):
+        SharedDict.__init__(self, size, 1)
+        # the initial value isn't written, so the store isn't allocated on the import
+        self._init_value = value
+
+    @property
+    def value(self) -> Any:
+        return self.get(0, self._init_value)
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        SharedDict.__setitem__(self, 0, value)
+
+
+_shared_store_set: 'weakref.WeakSet[SharedStore]' = weakref.WeakSet()
+
+
+def allocate_shared_store_list() -> None:
+    """Allocates all created stores, workers share only stores allocated before their fork"""
+    for store in list(_shared_store_set):
+        store.allocate()
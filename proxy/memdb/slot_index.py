@@ -0,0 +1,112 @@
+import ctypes
+import multiprocessing as mp
+import threading
+import traceback
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from logged_groups import logged_group
+
+from .shared_store import SharedDict
+
+
+class SlotIndex:
+    """
+    Keys grouped by slot in shared memory.
+
+    Each slot is a separate item, the shared range [first slot, last slot] bounds the search.
+    Finalized slots are popped from the beginning of the range,
+    so the eviction reads only the evicted slots and the empty slots between them.
+    """
+
+    def __init__(self, item_limit: int):
+        self._key_list_by_slot = SharedDict(item_limit * 256, item_limit)
+        # the index is empty, if the first slot is greater than the last slot
+        self._first_slot = mp.Value(ctypes.c_longlong, 0)
+        self._last_slot = mp.Value(ctypes.c_longlong, -1)
+
+    def _is_empty(self) -> bool:
+        return self._first_slot.value > self._last_slot.value
+
+    def add(self, slot: int, key: Any) -> None:
+        with self._first_slot.get_lock():
+            key_list = self._key_list_by_slot.get(slot)
+            if key_list is None:
+                key_list = []
+                if self._is_empty():
+                    self._first_slot.value = self._last_slot.value = slot
+                elif slot < self._first_slot.value:
+                    self._first_slot.value = slot
+                elif slot > self._last_slot.value:
+                    self._last_slot.value = slot
+
+            key_list.append(key)
+            self._key_list_by_slot[slot] = key_list
+
+    def get_min_slot(self) -> Optional[int]:
+        return None if self._is_empty() else self._first_slot.value
+
+    def get_key_list(self, from_slot: Optional[int], to_slot: Optional[int]) -> List[Tuple[int, List[Any]]]:
+        """Returns keys of slots in the range [from_slot, to_slot] in slot order, None means no limit"""
+        first_slot, last_slot = self._first_slot.value, self._last_slot.value
+        begin = max(first_slot, from_slot) if from_slot else first_slot
+        end = min(last_slot, to_slot) if to_slot else last_slot
+
+        result_list = []
+        for slot in range(begin, end + 1):
+            key_list = self._key_list_by_slot.get(slot)
+            if key_list is not None:
+                result_list.append((slot, key_list))
+        return result_list
+
+    def pop(self, before_slot: int, slot_limit: int) -> List[Tuple[int, List[Any]]]:
+        """Removes up to slot_limit slots, which are less or equal to before_slot"""
+        with self._first_slot.get_lock():
+            result_list = []
+            slot, last_slot = self._first_slot.value, self._last_slot.value
+            while (slot <= min(before_slot, last_slot)) and (len(result_list) < slot_limit):
+                key_list = self._key_list_by_slot.pop(slot, None)
+                if key_list is not None:
+                    result_list.append((slot, key_list))
+                slot += 1
+
+            # the first slot should be the minimal slot in the index
+            while (slot <= last_slot) and (self._key_list_by_slot.get(slot) is None):
+                slot += 1
+            self._first_slot.value = slot
+            return result_list
+
+
+@logged_group("neon.Proxy")
+class BackgroundCleaner:
+    """
+    Calls clean_fn in a daemon thread after wakeup() or each period_sec.
+    clean_fn returns True if it has more work, so the work is done in small steps.
+    """
+
+    def __init__(self, name: str, clean_fn: Callable[[], bool], period_sec: float = 1):
+        self._name = name
+        self._clean_fn = clean_fn
+        self._period_sec = period_sec
+        self._event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def wakeup(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                    self._thread.start()
+        self._event.set()
+
+    def _run(self) -> None:
+        while True:
+            self._event.wait(self._period_sec)
+            self._event.clear()
+            try:
+                while self._clean_fn():
+                    pass
+            except Exception as err:
+                err_tb = "".join(traceback.format_tb(err.__traceback__))
+                self.error(f'Exception on cleaning in {self._name}: {err}: {err_tb}')
@@ -1,129 +1,190 @@
+import itertools
 import multiprocessing as mp
 import pickle
 import ctypes
 
-from typing import Optional
+from typing import Iterator, List, Optional
 from logged_groups import logged_group
 
 from ..common_neon.utils import NeonTxInfo, NeonTxResultInfo, NeonTxFullInfo
+from ..common_neon.json_codec import json_codec
 
 from ..indexer.indexer_db import IndexerDB
+from ..common_neon.environment_data import MEMDB_STORE_SIZE_MB, MEMDB_STORE_ITEM_LIMIT
+
+from .shared_store import SharedDict
+from .slot_index import SlotIndex, BackgroundCleaner
+from .log_index import LogIndex
 
 
 @logged_group("neon.Proxy")
 class MemTxsDB:
     BIG_SLOT = 1_000_000_000_000
+    RM_SLOT_BATCH = 16
 
-    _manager = mp.Manager()
-
+    # the minimal slot of stored txs
     _tx_slot = mp.Value(ctypes.c_ulonglong, BIG_SLOT)
+    # txs with slot <= this value are finalized and should be removed
+    _rm_before_slot = mp.Value(ctypes.c_ulonglong, 0)
 
-    _tx_by_neon_sign = _manager.dict()
-    _slot_by_neon_sign = _manager.dict()
-    _tx_by_sol_sign = _manager.dict()
-    _slot_by_sol_sign = _manager.dict()
+    _tx_by_neon_sign = SharedDict(MEMDB_STORE_SIZE_MB * 1024 * 1024, MEMDB_STORE_ITEM_LIMIT)
+    _slot_by_neon_sign = SharedDict(MEMDB_STORE_ITEM_LIMIT * 256, MEMDB_STORE_ITEM_LIMIT)
+    _tx_by_sol_sign = SharedDict(MEMDB_STORE_SIZE_MB * 1024 * 1024, MEMDB_STORE_ITEM_LIMIT)
+    _slot_by_sol_sign = SharedDict(MEMDB_STORE_ITEM_LIMIT * 256, MEMDB_STORE_ITEM_LIMIT)
+    _sign_list_by_slot = SlotIndex(MEMDB_STORE_ITEM_LIMIT)
+    _log_index = LogIndex(MEMDB_STORE_SIZE_MB * 1024 * 1024, MEMDB_STORE_ITEM_LIMIT)
 
     def __init__(self, db: IndexerDB):
         self._db = db
+        self._cleaner = BackgroundCleaner('memdb-txs-cleaner', self._rm_finalized_txs)
 
-    def _rm_finalized_txs(self, before_slot: int):
+    def _schedule_rm_finalized_txs(self, before_slot: int):
         if self._tx_slot.value > before_slot:
             return
 
-        rm_neon_sign_list = []
-        tx_slot = self.BIG_SLOT
-        for sign, slot in self._slot_by_neon_sign.items():
-            if slot <= before_slot:
-                rm_neon_sign_list.append(sign)
-            elif tx_slot > slot:
-                tx_slot = slot
-        self._tx_slot.value = tx_slot
-
-        rm_sol_sign_list = [sign for sign, slot in self._slot_by_sol_sign.items() if slot <= before_slot]
+        with self._rm_before_slot.get_lock():
+            if self._rm_before_slot.value < before_slot:
+                self._rm_before_slot.value = before_slot
+        self._cleaner.wakeup()
 
-        for neon_sign, sol_sign in zip(rm_neon_sign_list, rm_sol_sign_list):
-            del self._tx_by_neon_sign[neon_sign]
-            del self._slot_by_neon_sign[neon_sign]
-
-            del self._tx_by_sol_sign[sol_sign]
-            del self._slot_by_sol_sign[sol_sign]
+    def _rm_finalized_txs(self) -> bool:
+        before_slot = self._rm_before_slot.value
+        with self._tx_slot.get_lock():
+            if self._tx_slot.value > before_slot:
+                return False
+
+            rm_slot_list = []
+            for slot, sign_list in self._sign_list_by_slot.pop(before_slot, self.RM_SLOT_BATCH):
+                rm_slot_list.append(slot)
+                for neon_sign, sol_sign in sign_list:
+                    # the tx can be resubmitted in another slot
+                    if self._slot_by_neon_sign.get(neon_sign) == slot:
+                        self._tx_by_neon_sign.pop(neon_sign, None)
+                        del self._slot_by_neon_sign[neon_sign]
+                    if self._slot_by_sol_sign.get(sol_sign) == slot:
+                        self._tx_by_sol_sign.pop(sol_sign, None)
+                        del self._slot_by_sol_sign[sol_sign]
+            self._log_index.remove(rm_slot_list)
+
+            tx_slot = self._sign_list_by_slot.get_min_slot()
+            self._tx_slot.value = self.BIG_SLOT if tx_slot is None else tx_slot
+            return self._tx_slot.value <= before_slot
+
+    @staticmethod
+    def _is_finalized(tx: NeonTxFullInfo, before_slot: int) -> bool:
+        """Finalized txs are removed in the background, so they can be still in the memory"""
+        return tx.neon_res.slot <= before_slot
 
     def get_tx_list_by_sol_sign(self, is_finalized, sol_sign_list: [str], before_slot: int) -> [NeonTxFullInfo]:
         if is_finalized:
             return self._db.get_tx_list_by_sol_sign(sol_sign_list)
 
+        # readers don't need the lock, finalized txs are removed in the background
+        self._schedule_rm_finalized_txs(before_slot)
         tx_list = []
-        with self._tx_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-            for sol_sign in sol_sign_list:
-                data = self._tx_by_sol_sign.get(sol_sign)
-                if data:
-                    tx_list.append(pickle.loads(data))
+        finalized_sol_sign_list = []
+        for sol_sign in sol_sign_list:
+            data = self._tx_by_sol_sign.get(sol_sign)
+            if not data:
+                continue
+            tx = pickle.loads(data)
+            if self._is_finalized(tx, before_slot):
+                finalized_sol_sign_list.append(sol_sign)
+            else:
+                tx_list.append(tx)
+
+        if len(finalized_sol_sign_list):
+            tx_list = self._db.get_tx_list_by_sol_sign(finalized_sol_sign_list) + tx_list
         return tx_list
 
-    def get_tx_by_neon_sign(self, neon_sign: str, is_pended_tx: bool, before_slot: int) -> Optional[NeonTxFullInfo]:
-        if not is_pended_tx:
-            return self._db.get_tx_by_neon_sign(neon_sign)
-
-        with self._tx_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-            data = self._tx_by_neon_sign.get(neon_sign)
-            if data:
-                return pickle.loads(data)
-        return None
+    def _get_tx_by_neon_sign(self, neon_sign: str, before_slot: int) -> Optional[NeonTxFullInfo]:
+        self._schedule_rm_finalized_txs(before_slot)
+        data = self._tx_by_neon_sign.get(neon_sign)
+        if not data:
+            return None
+        tx = pickle.loads(data)
+        if self._is_finalized(tx, before_slot):
+            return None
+        return tx
 
-    def get_logs(self, from_block, to_block, addresses, topics, block_hash):
-        def _has_address(src_addresses, dst_address):
-            return dst_address in src_addresses
-
-        def _has_topics(src_topics, dst_topics):
-            for topic in src_topics:
-                if topic in dst_topics:
-                    return True
-            return False
+    def get_tx_by_neon_sign(self, neon_sign: str, is_pended_tx: bool, before_slot: int) -> Optional[NeonTxFullInfo]:
+        if is_pended_tx:
+            tx = self._get_tx_by_neon_sign(neon_sign, before_slot)
+            if tx is not None:
+                return tx
+        return self._db.get_tx_by_neon_sign(neon_sign)
 
+    def _get_mem_log_list(self, from_block, to_block, addresses, topics, block_hash):
         result_list = []
-        with self._tx_slot.get_lock():
-            for data in self._tx_by_neon_sign.values():
-                tx = pickle.loads(data)
-                if from_block and tx.neon_res.slot < from_block:
-                    continue
-                if to_block and tx.neon_res.slot > to_block:
-                    continue
-                if block_hash and tx.neon_res.block_hash != block_hash:
-                    continue
-                for log in tx.neon_res.logs:
-                    if len(addresses) and (not _has_address(addresses, log['address'])):
+        done_sign_set = set()
+        slot_sign_list = self._sign_list_by_slot.get_key_list(from_block, to_block)
+        log_idx_dict = self._log_index.find(addresses, topics, [slot for slot, _ in slot_sign_list])
+        if (log_idx_dict is None) or len(log_idx_dict):
+            for slot, sign_list in slot_sign_list:
+                for neon_sign, _ in sign_list:
+                    if neon_sign in done_sign_set:
+                        continue
+                    elif log_idx_dict is None:
+                        log_idx_set = None
+                    else:
+                        log_idx_set = log_idx_dict.get(neon_sign)
+                        if not log_idx_set:
+                            continue
+
+                    data = self._tx_by_neon_sign.get(neon_sign)
+                    if not data:
+                        continue
+                    tx = pickle.loads(data)
+                    # skip the old slot of the resubmitted tx
+                    if tx.neon_res.slot != slot:
                         continue
-                    if len(topics) and (not _has_topics(topics, log['topics'])):
+                    if block_hash and tx.neon_res.block_hash != block_hash:
                         continue
-                    result_list.append(log)
+                    done_sign_set.add(neon_sign)
+                    for idx, log in enumerate(tx.neon_res.logs):
+                        if (log_idx_set is None) or (idx in log_idx_set):
+                            result_list.append(log)
 
+        return result_list
+
+    def get_logs(self, from_block, to_block, addresses, topics, block_hash):
+        result_list = self._get_mem_log_list(from_block, to_block, addresses, topics, block_hash)
         return result_list + self._db.get_logs(from_block, to_block, addresses, topics, block_hash)
 
-    def get_sol_sign_list_by_neon_sign(self, neon_sign: str, is_pended_tx: bool, before_slot: int) -> [str]:
-        if not is_pended_tx:
-            return self._db.get_sol_sign_list_by_neon_sign(neon_sign)
+    def iter_log_json_list(self, from_block, to_block, addresses, topics, block_hash,
+                           chunk_size: int) -> Iterator[List[str]]:
+        """The first chunk of indexed logs is read before the return, so DB errors are raised by the call"""
+        result_list = self._get_mem_log_list(from_block, to_block, addresses, topics, block_hash)
+        db_log_json_iter = self._db.iter_log_json_list(from_block, to_block, addresses, topics, block_hash, chunk_size)
+        first_db_log_json_list = next(db_log_json_iter, [])
 
-        with self._tx_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-            data = self._tx_by_neon_sign.get(neon_sign)
-            if data:
-                return pickle.loads(data).used_ixs
-        return None
+        mem_log_json_list = [
+            [json_codec.dumps_str(log) for log in result_list[idx:idx + chunk_size]]
+            for idx in range(0, len(result_list), chunk_size)
+        ]
+        return itertools.chain(mem_log_json_list, [first_db_log_json_list], db_log_json_iter)
+
+    def get_sol_sign_list_by_neon_sign(self, neon_sign: str, is_pended_tx: bool, before_slot: int) -> [str]:
+        if is_pended_tx:
+            tx = self._get_tx_by_neon_sign(neon_sign, before_slot)
+            if tx is not None:
+                return tx.used_ixs
+        return self._db.get_sol_sign_list_by_neon_sign(neon_sign)
 
     def submit_transaction(self, neon_tx: NeonTxInfo, neon_res: NeonTxResultInfo, sign_list: [str], before_slot: int):
         tx = NeonTxFullInfo(neon_tx=neon_tx, neon_res=neon_res, used_ixs=sign_list)
         data = pickle.dumps(tx)
 
+        self._schedule_rm_finalized_txs(before_slot)
         with self._tx_slot.get_lock():
-            self._rm_finalized_txs(before_slot)
-
             self._tx_by_neon_sign[tx.neon_tx.sign] = data
             self._slot_by_neon_sign[tx.neon_tx.sign] = tx.neon_res.slot
 
             self._tx_by_sol_sign[tx.neon_res.sol_sign] = data
             self._slot_by_sol_sign[tx.neon_res.sol_sign] = tx.neon_res.slot
 
+            self._sign_list_by_slot.add(tx.neon_res.slot, (tx.neon_tx.sign, tx.neon_res.sol_sign))
+            self._log_index.add(tx.neon_res.slot, tx.neon_tx.sign, tx.neon_res.logs)
+
             if self._tx_slot.value > tx.neon_res.slot:
                 self._tx_slot.value = tx.neon_res.slot
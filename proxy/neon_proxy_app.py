@@ -1,10 +1,14 @@
 from .proxy import entry_point
 
+from .memdb.shared_store import allocate_shared_store_list
+from .plugin.neon_rpc_api_plugin import NeonRpcApiPlugin  # noqa: F401, creates shared stores of workers
 from .statistics_exporter.prometheus_proxy_server import PrometheusProxyServer
 
 
 class NeonProxyApp:
 
     def start(self):
+        # workers are forked from this process, so they get the same shared memory
+        allocate_shared_store_list()
         PrometheusProxyServer()
         entry_point()
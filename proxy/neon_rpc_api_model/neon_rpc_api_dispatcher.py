@@ -0,0 +1,83 @@
+import threading
+import traceback
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from logged_groups import logged_group
+
+
+def parse_method_limit_dict(value: str) -> Dict[str, int]:
+    """Parses 'method:limit,method:limit' into a dictionary"""
+    limit_dict: Dict[str, int] = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        method, limit = item.split(':')
+        limit_dict[method.strip()] = max(int(limit), 1)
+    return limit_dict
+
+
+@logged_group("neon.Proxy")
+class NeonRpcApiDispatcher:
+    """
+    Executes JSON-RPC requests in a bounded thread pool.
+
+    A method can have a concurrency limit. Requests over the limit wait in a FIFO queue
+    without occupying a worker thread, so slow methods (eth_sendRawTransaction, eth_call)
+    can't starve fast ones (eth_blockNumber, eth_chainId).
+    """
+
+    def __init__(self, pool_size: int, method_limit_dict: Dict[str, int]):
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='neon-rpc')
+        self._method_limit_dict = method_limit_dict
+        self._lock = threading.Lock()
+        self._active_cnt_dict: Dict[str, int] = {}
+        self._pending_dict: Dict[str, Deque[Tuple[Future, Callable[[], Any]]]] = {}
+
+    def submit(self, method: Optional[str], fn: Callable[[], Any]) -> Future:
+        future = Future()
+        if method not in self._method_limit_dict:
+            self._executor.submit(self._execute, None, future, fn)
+            return future
+
+        with self._lock:
+            active_cnt = self._active_cnt_dict.get(method, 0)
+            if active_cnt >= self._method_limit_dict[method]:
+                self._pending_dict.setdefault(method, deque()).append((future, fn))
+                return future
+            self._active_cnt_dict[method] = active_cnt + 1
+
+        self._executor.submit(self._execute, method, future, fn)
+        return future
+
+    def get_pending_cnt(self, method: str) -> int:
+        with self._lock:
+            return len(self._pending_dict.get(method, []))
+
+    def _execute(self, method: Optional[str], future: Future, fn: Callable[[], Any]) -> None:
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as err:
+                    err_tb = "".join(traceback.format_tb(err.__traceback__))
+                    self.error(f'Exception on execution of {method}. ' +
+                               f'Type(err): {type(err)}, Error: {err}, Traceback: {err_tb}')
+                    future.set_exception(err)
+        finally:
+            if method is not None:
+                self._on_method_done(method)
+
+    def _on_method_done(self, method: str) -> None:
+        with self._lock:
+            pending_list = self._pending_dict.get(method)
+            if not pending_list:
+                self._active_cnt_dict[method] -= 1
+                return
+            future, fn = pending_list.popleft()
+
+        # The slot of the finished request is passed to the next one in the queue
+        self._executor.submit(self._execute, method, future, fn)
@@ -3,7 +3,7 @@ import multiprocessing
 import traceback
 
 import eth_utils
-from typing import Optional, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
 import sha3
 from logged_groups import logged_group
@@ -23,8 +23,10 @@ from ..common_neon.utils import SolanaBlockInfo
 from ..common_neon.types import NeonTxPrecheckResult, NeonEmulatingResult
 from ..common_neon.elf_params import ElfParams
 from ..common_neon.environment_utils import neon_cli
-from ..common_neon.environment_data import SOLANA_URL, PP_SOLANA_URL, EVM_STEP_COUNT, USE_EARLIEST_BLOCK_IF_0_PASSED, \
-                                           PYTH_MAPPING_ACCOUNT, ONLY_TRACK_BLOCKS_WITH_NEON_TRANSACTION, GEN_FAKE_BLOCK_FOR_GET_BY_BLOCK_NUMBER
+from ..common_neon.environment_data import SOLANA_URL, SOLANA_URL_LIST, PP_SOLANA_URL, EVM_STEP_COUNT, \
+                                           USE_EARLIEST_BLOCK_IF_0_PASSED, PYTH_MAPPING_ACCOUNT, \
+                                           ONLY_TRACK_BLOCKS_WITH_NEON_TRANSACTION, GEN_FAKE_BLOCK_FOR_GET_BY_BLOCK_NUMBER
+from ..indexer.pg_pool import get_pg_connection_pool
 from ..memdb.memdb import MemDB
 from ..common_neon.gas_price_calculator import GasPriceCalculator
 from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
@@ -50,8 +52,11 @@ class JsonEncoder(json.JSONEncoder):
 class NeonRpcApiModel:
     proxy_id_glob = multiprocessing.Value('i', 0)
 
+    # Methods which can be executed in one request to Solana, see get_account_state_list()
+    ACCOUNT_STATE_METHOD_LIST = ('eth_getBalance', 'eth_getTransactionCount')
+
     def __init__(self):
-        self._solana = SolanaInteractor(SOLANA_URL)
+        self._solana = SolanaInteractor(SOLANA_URL_LIST)
         self._db = MemDB(self._solana)
         self._stat_exporter: Optional[StatisticsExporter] = None
 
@@ -72,6 +77,9 @@ class NeonRpcApiModel:
 
     def set_stat_exporter(self, stat_exporter: StatisticsExporter):
         self._stat_exporter = stat_exporter
+        get_pg_connection_pool().set_stat_exporter(stat_exporter)
+        self._solana.set_stat_exporter(stat_exporter)
+        OperatorResourceList.set_stat_exporter(stat_exporter)
 
     @staticmethod
     def neon_proxy_version():
@@ -229,7 +237,43 @@ class NeonRpcApiModel:
             # self.debug(f"eth_getBalance: Can't get account info: {err}")
             return hex(0)
 
-    def eth_getLogs(self, obj):
+    def get_account_state_list(self, request_list: List[Tuple[str, list]]) -> List[Union[str, EthereumError]]:
+        """Executes eth_getBalance/eth_getTransactionCount requests from a batch with one request to Solana.
+           request_list - list of (method, params) pairs
+           Returns the result or the error for each request.
+        """
+        result_list: List[Union[str, EthereumError]] = []
+        account_list: List[EthereumAddress] = []
+        for _, (account, tag) in request_list:
+            try:
+                self._validate_block_tag(tag)
+                account_list.append(EthereumAddress(self._normalize_account(account)))
+                result_list.append(hex(0))
+            except EthereumError as err:
+                result_list.append(err)
+
+        if not len(account_list):
+            return result_list
+
+        try:
+            neon_account_info_list = self._solana.get_neon_account_info_list(account_list)
+        except (Exception,):
+            # the same behavior as in eth_getBalance and eth_getTransactionCount
+            return result_list
+
+        valid_idx_list = [idx for idx, result in enumerate(result_list) if not isinstance(result, EthereumError)]
+        for idx, neon_account_info in zip(valid_idx_list, neon_account_info_list):
+            if neon_account_info is None:
+                continue
+            method = request_list[idx][0]
+            if method == 'eth_getBalance':
+                result_list[idx] = hex(neon_account_info.balance)
+            else:
+                result_list[idx] = hex(neon_account_info.trx_count)
+        return result_list
+
+    def _get_log_filter(self, obj) -> tuple:
+        """Returns (from_block, to_block, addresses, topics, block_hash) of the eth_getLogs filter object"""
         def to_list(items):
             if isinstance(items, str):
                 return [items.lower()]
@@ -237,6 +281,12 @@ class NeonRpcApiModel:
                 return list(set([item.lower() for item in items if isinstance(item, str)]))
             return []
 
+        def to_topic_list(items):
+            """Each position is a list of topics joined by OR, the empty list matches any topic"""
+            if not isinstance(items, list):
+                raise InvalidParamError(message=f'invalid topics {items}')
+            return [to_list(item) for item in items]
+
         from_block = None
         to_block = None
         addresses = []
@@ -250,11 +300,41 @@ class NeonRpcApiModel:
         if 'address' in obj:
             addresses = to_list(obj['address'])
         if 'topics' in obj:
-            topics = to_list(obj['topics'])
+            topics = to_topic_list(obj['topics'])
         if 'blockHash' in obj:
             block_hash = obj['blockHash']
 
-        return self._db.get_logs(from_block, to_block, addresses, topics, block_hash)
+        return from_block, to_block, addresses, topics, block_hash
+
+    def eth_getLogs(self, obj):
+        return self._db.get_logs(*self._get_log_filter(obj))
+
+    def get_log_json_iter(self, obj, chunk_size: int) -> Iterator[List[str]]:
+        """
+        The streaming version of eth_getLogs: yields JSON bodies of logs by chunks without the limit of log count.
+        The filter is validated and the first chunk of indexed logs is read before the return,
+        so errors are raised before the response starts.
+        """
+        return self._db.iter_log_json_list(*self._get_log_filter(obj), chunk_size)
+
+    def neon_getLogsPage(self, obj, cursor: Optional[str] = None) -> dict:
+        """
+        Returns the page of indexed logs in the chain order and the cursor of the next page (null after the last page).
+        The cursor from the previous response continues the search with the same filter.
+        """
+        log_filter = self._get_log_filter(obj)
+        after_key = None
+        if cursor is not None:
+            try:
+                assert isinstance(cursor, str) and cursor.startswith('0x') and (len(cursor) == 2 + 16 * 3)
+                after_key = tuple(int(cursor[pos:pos + 16], 16) for pos in range(2, len(cursor), 16))
+            except (AssertionError, ValueError):
+                raise InvalidParamError(message=f'invalid cursor {cursor}')
+
+        logs, next_key = self._db.get_logs_page(*log_filter, after_key)
+        if next_key is not None:
+            next_key = '0x' + ''.join(f'{value:016x}' for value in next_key)
+        return {'logs': logs, 'cursor': next_key}
 
     def _get_block_by_slot(self, block: SolanaBlockInfo, full: bool, skip_transaction: bool) -> Optional[dict]:
         if block.is_empty():
@@ -404,7 +484,15 @@ class NeonRpcApiModel:
             contract_id = obj.get('to', 'deploy')
             data = obj.get('data', "None")
             value = obj.get('value', '')
-            return "0x"+call_emulated(contract_id, caller_id, data, value)['result']
+            if not self._db.is_call_result_cache_enabled():
+                return "0x"+call_emulated(contract_id, caller_id, data, value)['result']
+
+            slot, result = self._db.get_call_result(contract_id, caller_id, data, value)
+            self._stat_exporter.stat_commit_eth_call_cache(result is not None)
+            if result is None:
+                result = "0x"+call_emulated(contract_id, caller_id, data, value)['result']
+                self._db.put_call_result(slot, contract_id, caller_id, data, value, result)
+            return result
         except EthereumError:
             raise
         except Exception as err:
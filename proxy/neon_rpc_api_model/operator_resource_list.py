@@ -5,6 +5,7 @@ import abc
 import ctypes
 import math
 import multiprocessing as mp
+import os
 import time
 import traceback
 from datetime import datetime
@@ -21,7 +22,10 @@ from ..common_neon.constants import STORAGE_SIZE, ACTIVE_STORAGE_TAG, FINALIZED_
 from ..common_neon.solana_tx_list_sender import SolTxListSender
 from ..common_neon.environment_utils import get_solana_accounts
 from ..common_neon.environment_data import EVM_LOADER_ID, PERM_ACCOUNT_LIMIT, RECHECK_RESOURCE_LIST_INTERVAL, \
-                                           MIN_OPERATOR_BALANCE_TO_WARN, MIN_OPERATOR_BALANCE_TO_ERR
+                                           MIN_OPERATOR_BALANCE_TO_WARN, MIN_OPERATOR_BALANCE_TO_ERR, \
+                                           OPERATOR_RESOURCE_WAIT_SEC, OPERATOR_RESOURCE_LIMIT, \
+                                           OPERATOR_RESOURCE_QUEUE_LIMIT
+from ..statistics_exporter.proxy_metrics_interface import StatisticsExporter
 
 ## TODO: DIP corruption, get rid of back dependency
 # from .transaction_sender import NeonTxSender
@@ -46,15 +50,43 @@ class OperatorResourceInfo:
 
 @logged_group("neon.Proxy")
 class OperatorResourceList:
+    """
+    Free resources are given to requests of all workers in the FIFO order.
+
+    Each request takes a ticket and sleeps on the condition, which is shared by workers. A release of a resource
+    wakes up requests, and the request with the first ticket takes the resource. Tickets of killed workers
+    are skipped, the request fails after OPERATOR_RESOURCE_WAIT_SEC.
+
+    The list of resources is the same in all workers, so states of resources are kept in fixed shared arrays
+    indexed by the resource idx. Free resources are given in the order of their release.
+    """
+
+    # a waiting request wakes up in this period to find killed workers in the queue
+    WAIT_CHECK_SEC = 1
+
+    RESOURCE_BUSY = 0
+    RESOURCE_FREE = 1
+    RESOURCE_BAD = 2
+
     # These variables are global for class, they will be initialized one time
-    _manager = mp.Manager()
-    _free_resource_list = _manager.list()
-    _bad_resource_list = _manager.list()
-    _check_time_resource_list = _manager.list()
+    # resource idx -> state, check time of accounts and the number of the release for free resources
+    _resource_state_array = mp.Array(ctypes.c_ubyte, OPERATOR_RESOURCE_LIMIT, lock=False)
+    _check_time_array = mp.Array(ctypes.c_ulonglong, OPERATOR_RESOURCE_LIMIT, lock=False)
+    _free_order_array = mp.Array(ctypes.c_ulonglong, OPERATOR_RESOURCE_LIMIT, lock=False)
+    _next_free_order = mp.Value(ctypes.c_ulonglong, 0, lock=False)
     _resource_list_len = mp.Value(ctypes.c_uint, 0)
     _last_checked_time = mp.Value(ctypes.c_ulonglong, 0)
+    # guards the arrays above and wakes up waiting requests
+    _resource_cond = mp.Condition()
+    # the ring of pids of waiting requests indexed by the ticket, 0 - the request doesn't wait anymore
+    _waiting_pid_array = mp.Array(ctypes.c_int, OPERATOR_RESOURCE_QUEUE_LIMIT, lock=False)
+    _first_ticket = mp.Value(ctypes.c_ulonglong, 0, lock=False)
+    _next_ticket = mp.Value(ctypes.c_ulonglong, 0, lock=False)
+    _waiting_ticket_cnt = mp.Value(ctypes.c_uint, 0, lock=False)
     _resource_list = []
 
+    _stat_exporter: Optional[StatisticsExporter] = None
+
     def __init__(self, sender):
         self._s = sender
         self._solana = sender.solana
@@ -67,6 +99,10 @@ class OperatorResourceList:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.free_resource_info()
 
+    @classmethod
+    def set_stat_exporter(cls, stat_exporter: StatisticsExporter) -> None:
+        cls._stat_exporter = stat_exporter
+
     @staticmethod
     def _get_current_time() -> int:
         return math.ceil(datetime.now().timestamp())
@@ -77,19 +113,24 @@ class OperatorResourceList:
 
         idx = 0
         signer_list: List[SolanaAccount] = get_solana_accounts()
+        resource_cnt = len(signer_list) * PERM_ACCOUNT_LIMIT
+        if resource_cnt > len(self._resource_state_array):
+            raise RuntimeError(f'Operator has {resource_cnt} resources, ' +
+                               f'OPERATOR_RESOURCE_LIMIT is {len(self._resource_state_array)}!')
+
         for rid in range(PERM_ACCOUNT_LIMIT):
             for signer in signer_list:
                 info = OperatorResourceInfo(signer=signer, rid=rid, idx=idx)
                 self._resource_list.append(info)
                 idx += 1
 
-        with self._resource_list_len.get_lock():
+        with self._resource_cond:
             if self._resource_list_len.value != 0:
                 return True
 
             for idx in range(len(self._resource_list)):
-                self._free_resource_list.append(idx)
-                self._check_time_resource_list.append(0)
+                self._release_resource(idx)
+                self._check_time_array[idx] = 0
 
             self._resource_list_len.value = len(self._resource_list)
             if self._resource_list_len.value == 0:
@@ -111,41 +152,40 @@ class OperatorResourceList:
                 return prev_time
             self._last_checked_time.value = now
 
-        with self._resource_list_len.get_lock():
-            if not len(self._bad_resource_list):
+        with self._resource_cond:
+            bad_idx_list = [idx for idx in range(len(self._resource_list))
+                            if self._resource_state_array[idx] == self.RESOURCE_BAD]
+            if not len(bad_idx_list):
                 return now
 
-            self._resource_list_len.value += len(self._bad_resource_list)
-            for idx in self._bad_resource_list:
-                self._free_resource_list.append(idx)
+            self._resource_list_len.value += len(bad_idx_list)
+            for idx in bad_idx_list:
+                self._release_resource(idx)
 
-            del self._bad_resource_list[:]
+            self._resource_cond.notify_all()
         return now
 
+    def _release_resource(self, idx: int) -> None:
+        """Should be called under the condition lock"""
+        self._resource_state_array[idx] = self.RESOURCE_FREE
+        self._free_order_array[idx] = self._next_free_order.value
+        self._next_free_order.value += 1
+
     def get_active_resource(self) -> OperatorResourceInfo:
         if self._resource:
             return self._resource
 
         self._init_resource_list()
         check_time = self._recheck_bad_resource_list()
+        deadline = time.monotonic() + OPERATOR_RESOURCE_WAIT_SEC
 
-        timeout = 0.01
-        for i in range(400_000):  # 10'000 blocks!
-            if i > 0:
-                if i % 40 == 0:  # one block time
-                    self.debug(f'Waiting for a free operator resource ({i * timeout})...')
-                time.sleep(timeout)
-
-            with self._resource_list_len.get_lock():
-                if self._resource_list_len.value == 0:
-                    raise RuntimeError('Operator has NO resources!')
-                elif len(self._free_resource_list) == 0:
-                    continue
-                idx = self._free_resource_list.pop(0)
+        while True:
+            idx = self._wait_free_resource(check_time, deadline)
 
             self._resource = self._resource_list[idx]
             self._s.set_resource(self._resource)
             if not self._init_perm_accounts(check_time, self._resource):
+                self._resource = None
                 self._s.clear_resource()
                 continue
 
@@ -155,16 +195,133 @@ class OperatorResourceList:
                        f'ether: {str(self._resource.ether)}')
             return self._resource
 
-        raise RuntimeError('Timeout on waiting a free operator resource!')
+    def _wait_free_resource(self, check_time: int, deadline: float) -> int:
+        start_time = time.monotonic()
+        with self._resource_cond:
+            ticket = self._take_ticket()
+            self._commit_queue_len(self._waiting_ticket_cnt.value)
+
+            try:
+                while True:
+                    if self._resource_list_len.value == 0:
+                        raise RuntimeError('Operator has NO resources!')
+                    elif self._get_first_ticket() == ticket:
+                        idx = self._pop_free_resource(check_time)
+                        if idx is not None:
+                            return idx
+
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        raise RuntimeError('Timeout on waiting a free operator resource!')
+                    if not self._resource_cond.wait(min(timeout, self.WAIT_CHECK_SEC)):
+                        self.debug(f'Waiting for a free operator resource ({time.monotonic() - start_time:.1f})...')
+            finally:
+                self._remove_ticket(ticket)
+                # the next request in the queue can take a resource
+                self._resource_cond.notify_all()
+                self._commit_queue_len(self._waiting_ticket_cnt.value)
+                self._commit_wait_time(time.monotonic() - start_time)
+
+    def _get_ticket_pos(self, ticket: int) -> int:
+        return ticket % len(self._waiting_pid_array)
+
+    def _take_ticket(self) -> int:
+        """Should be called under the condition lock"""
+        ticket = self._next_ticket.value
+        if ticket - self._first_ticket.value >= len(self._waiting_pid_array):
+            self._get_first_ticket()
+            if ticket - self._first_ticket.value >= len(self._waiting_pid_array):
+                raise RuntimeError('Too many requests are waiting for a free operator resource!')
+
+        self._waiting_pid_array[self._get_ticket_pos(ticket)] = os.getpid()
+        self._next_ticket.value = ticket + 1
+        self._waiting_ticket_cnt.value += 1
+        return ticket
+
+    def _remove_ticket(self, ticket: int) -> None:
+        """Should be called under the condition lock"""
+        self._waiting_pid_array[self._get_ticket_pos(ticket)] = 0
+        self._waiting_ticket_cnt.value -= 1
+        self._get_first_ticket()
+
+    def _get_first_ticket(self) -> Optional[int]:
+        """Moves the head of the ring over tickets of finished requests and killed processes"""
+        pid = os.getpid()
+        while self._first_ticket.value < self._next_ticket.value:
+            ticket = self._first_ticket.value
+            pos = self._get_ticket_pos(ticket)
+            ticket_pid = self._waiting_pid_array[pos]
+            if ticket_pid != 0:
+                if (ticket_pid == pid) or self._is_process_alive(ticket_pid):
+                    return ticket
+                self.debug(f'Skip the request of the killed process {ticket_pid}')
+                self._waiting_pid_array[pos] = 0
+                self._waiting_ticket_cnt.value -= 1
+            self._first_ticket.value = ticket + 1
+        return None
+
+    @staticmethod
+    def _is_process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _pop_free_resource(self, check_time: int) -> Optional[int]:
+        """
+        Prefers resources with checked accounts, because the check requires requests to Solana.
+        Resources with the same rank are taken in the order of their release.
+        """
+        best_idx, best_key = None, None
+        for idx in range(len(self._resource_list)):
+            if self._resource_state_array[idx] != self.RESOURCE_FREE:
+                continue
+            key = (self._get_resource_rank(idx, check_time), self._free_order_array[idx])
+            if (best_key is None) or (key < best_key):
+                best_idx, best_key = idx, key
+
+        if best_idx is not None:
+            self._resource_state_array[best_idx] = self.RESOURCE_BUSY
+        return best_idx
+
+    def _get_resource_rank(self, idx: int, check_time: int) -> int:
+        """0 - accounts are checked by this worker, 1 - by another worker, 2 - accounts should be checked"""
+        if self._check_time_array[idx] != check_time:
+            return 2
+        resource = self._resource_list[idx]
+        if resource.storage and resource.holder and resource.ether:
+            return 0
+        return 1
+
+    def _commit_queue_len(self, queue_len: int) -> None:
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_operator_resource_queue_len(queue_len)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit operator resource queue length: {err}: {err_tb}')
+
+    def _commit_wait_time(self, wait_time_sec: float) -> None:
+        if self._stat_exporter is None:
+            return
+        try:
+            self._stat_exporter.stat_commit_operator_resource_wait(wait_time_sec)
+        except Exception as err:
+            err_tb = "".join(traceback.format_tb(err.__traceback__))
+            self.error(f'Fail to commit operator resource wait time: {err}: {err_tb}')
 
     def _init_perm_accounts(self, check_time, resource: OperatorResourceInfo) -> bool:
         opkey = str(resource.public_key())
         rid = resource.rid
 
-        resource_check_time = self._check_time_resource_list[resource.idx]
+        resource_check_time = self._check_time_array[resource.idx]
 
         if check_time != resource_check_time:
-            self._check_time_resource_list[resource.idx] = check_time
+            self._check_time_array[resource.idx] = check_time
             self.debug(f'Rechecking of accounts for resource {opkey}:{rid} {resource_check_time} != {check_time}')
         elif resource.storage and resource.holder and resource.ether:
             return True
@@ -182,8 +339,11 @@ class OperatorResourceList:
             resource.holder = holder
             return True
         except Exception as err:
-            self._resource_list_len.value -= 1
-            self._bad_resource_list.append(resource.idx)
+            with self._resource_cond:
+                self._resource_list_len.value -= 1
+                self._resource_state_array[resource.idx] = self.RESOURCE_BAD
+                # requests should know about the lack of resources
+                self._resource_cond.notify_all()
             err_tb = "".join(traceback.format_tb(err.__traceback__))
             self.error(f"Fail to init accounts for resource {opkey}:{rid}, err({err}): {err_tb}")
             return False
@@ -281,7 +441,9 @@ class OperatorResourceList:
         resource = self._resource
         self._resource = None
         self._s.clear_resource()
-        self._free_resource_list.append(resource.idx)
+        with self._resource_cond:
+            self._release_resource(resource.idx)
+            self._resource_cond.notify_all()
 
 
 @logged_group("neon.Proxy")
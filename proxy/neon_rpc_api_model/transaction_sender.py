@@ -5,7 +5,7 @@ import math
 import time
 
 from logged_groups import logged_group
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 from solana.transaction import AccountMeta, Transaction, PublicKey
 from solana.blockhash import Blockhash
@@ -62,9 +62,26 @@ class NeonTxSender:
         self._eth_meta_dict: Dict[str, AccountMeta] = dict()
 
     def execute(self, precheck_result: NeonTxPrecheckResult) -> NeonTxResultInfo:
-        self._validate_pend_tx()
-        self._prepare_execution(precheck_result.emulating_result)
-        return self._execute(precheck_result)
+        try:
+            self._validate_pend_tx()
+            self._prepare_execution(precheck_result.emulating_result)
+            return self._execute(precheck_result)
+        finally:
+            # cached states of accounts are outdated even after the failed execution
+            self.solana.invalidate_neon_account_list(self._get_written_address_list(precheck_result.emulating_result))
+
+    def _get_written_address_list(self, emulating_result: NeonEmulatingResult) -> List[str]:
+        address_list = [self.eth_sender]
+        if self.to_address:
+            address_list.append(self.to_address)
+        if self.deployed_contract:
+            address_list.append(self.deployed_contract)
+        if (self.resource is not None) and (self.resource.ether is not None):
+            address_list.append(str(self.resource.ether))
+        for account_desc in emulating_result.get('accounts', []):
+            if account_desc.get('writable') and account_desc.get('address'):
+                address_list.append(account_desc['address'])
+        return address_list
 
     def set_resource(self, resource: Optional[OperatorResourceInfo]):
         self.resource = resource
@@ -270,6 +287,10 @@ class SimpleNeonTxSender(SolTxListSender):
             self.neon_res.decode(self._s.neon_sign, receipt).is_valid()
         super()._on_success_send(tx, receipt)
 
+    def _is_window_open(self) -> bool:
+        # next iterations are useless after the result
+        return (not self.neon_res.is_valid()) and super()._is_window_open()
+
     def _on_post_send(self):
         if self.neon_res.is_valid():
             self.debug(f'Got Neon tx result: {self.neon_res}')
@@ -8,28 +8,39 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
-import json
+import socket
 import threading
 import traceback
 import time
 import hashlib
-from typing import List, Tuple
 
-from logged_groups import logged_group, logging_context
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple, Union
 
+from logged_groups import logged_group, logging_context, LogMng
+
+from ..common.types import HasFileno
 from ..common.utils import build_http_response
+from ..http.chunk_parser import ChunkParser
 from ..http.codes import httpStatusCodes
 from ..http.parser import HttpParser
 from ..http.websocket import WebsocketFrame
 from ..http.server import HttpWebServerBasePlugin, httpProtocolTypes
 from ..common_neon.solana_receipt_parser import SolTxError
 from ..common_neon.errors import EthereumError
-from ..common_neon.environment_data import ENABLE_PRIVATE_API
+from ..common_neon.json_codec import json_codec
+from ..common_neon.environment_data import ENABLE_PRIVATE_API, ASYNC_RPC_DISPATCH, RPC_WORKER_POOL_SIZE, \
+                                           RPC_METHOD_CONCURRENCY_LIMITS, RPC_BATCH_FAN_OUT, ETH_GET_LOGS_STREAM, \
+                                           LOG_STREAM_CHUNK_SIZE
 from ..neon_rpc_api_model import NeonRpcApiModel
+from ..neon_rpc_api_model.neon_rpc_api_dispatcher import NeonRpcApiDispatcher, parse_method_limit_dict
 from ..statistics_exporter.prometheus_proxy_exporter import PrometheusExporter
 
 modelInstanceLock = threading.Lock()
 modelInstance = None
+dispatcherInstance = None
+batchExecutorInstance = None
 
 
 @logged_group("neon.Proxy")
@@ -48,15 +59,39 @@ class NeonRpcApiPlugin(HttpWebServerBasePlugin):
         self.model = NeonRpcApiPlugin.getModel()
         self.model.set_stat_exporter(self._stat_exporter)
 
+        self._dispatcher = NeonRpcApiPlugin.getDispatcher() if ASYNC_RPC_DISPATCH else None
+        self._response_queue: Deque[Future] = deque()
+        self._stream: Optional[Iterator[bytes]] = None
+        self._stream_future: Optional[Future] = None
+        self._wakeup_reader: Optional[socket.socket] = None
+        self._wakeup_writer: Optional[socket.socket] = None
+
     @classmethod
     def getModel(cls):
-        global modelInstanceLock
         global modelInstance
         with modelInstanceLock:
             if modelInstance is None:
                 modelInstance = NeonRpcApiModel()
             return modelInstance
 
+    @classmethod
+    def getDispatcher(cls):
+        global dispatcherInstance
+        with modelInstanceLock:
+            if dispatcherInstance is None:
+                method_limit_dict = parse_method_limit_dict(RPC_METHOD_CONCURRENCY_LIMITS)
+                dispatcherInstance = NeonRpcApiDispatcher(RPC_WORKER_POOL_SIZE, method_limit_dict)
+            return dispatcherInstance
+
+    @classmethod
+    def getBatchExecutor(cls):
+        global batchExecutorInstance
+        with modelInstanceLock:
+            if batchExecutorInstance is None:
+                batchExecutorInstance = ThreadPoolExecutor(max_workers=RPC_WORKER_POOL_SIZE,
+                                                           thread_name_prefix='neon-rpc-batch')
+            return batchExecutorInstance
+
     def routes(self) -> List[Tuple[int, str]]:
         return [
             (httpProtocolTypes.HTTP, NeonRpcApiPlugin.SOLANA_PROXY_LOCATION),
@@ -94,82 +129,455 @@ class NeonRpcApiPlugin(HttpWebServerBasePlugin):
                 method = getattr(self.model, request['method'])
                 params = request.get('params', [])
                 response['result'] = method(*params)
-        except SolTxError as err:
-            # traceback.print_exc()
-            response['error'] = {'code': -32000, 'message': err.error}
-        except EthereumError as err:
-            # traceback.print_exc()
-            response['error'] = err.getError()
         except Exception as err:
-            err_tb = "".join(traceback.format_tb(err.__traceback__))
-            self.error('Exception on process request. ' +
-                       f'Type(err): {type(err)}, Error: {err}, Traceback: {err_tb}')
-            response['error'] = {'code': -32000, 'message': str(err)}
+            response['error'] = self._get_method_error(err)
 
         return response
 
+    def _get_method_error(self, err: Exception) -> dict:
+        if isinstance(err, SolTxError):
+            # traceback.print_exc()
+            return {'code': -32000, 'message': err.error}
+        elif isinstance(err, EthereumError):
+            # traceback.print_exc()
+            return err.getError()
+
+        err_tb = "".join(traceback.format_tb(err.__traceback__))
+        self.error('Exception on process request. ' +
+                   f'Type(err): {type(err)}, Error: {err}, Traceback: {err_tb}')
+        return {'code': -32000, 'message': str(err)}
+
     def handle_request(self, request: HttpParser) -> None:
         unique_req_id = self.get_unique_id()
         with logging_context(req_id=unique_req_id):
-            self.handle_request_impl(request)
-            self.info("Request processed")
+            if request.method == b'OPTIONS':
+                self.client.queue(memoryview(build_http_response(
+                    httpStatusCodes.OK, body=None,
+                    headers={
+                        b'Access-Control-Allow-Origin': b'*',
+                        b'Access-Control-Allow-Methods': b'POST, GET, OPTIONS',
+                        b'Access-Control-Allow-Headers': b'Content-Type',
+                        b'Access-Control-Max-Age': b'86400'
+                    })))
+                return
+
+            if self._dispatcher is None:
+                response = self.handle_request_impl(request.body)
+                if (self._stream is None) and isinstance(response, memoryview):
+                    self.client.queue(response)
+                    self.info("Request processed")
+                else:
+                    # the pipelined request waits for the end of the streamed response
+                    future = Future()
+                    future.set_result(response)
+                    self._response_queue.append(future)
+                    self._write_responses()
+            else:
+                self._dispatch_request(request.body, unique_req_id)
 
     @staticmethod
     def get_unique_id():
         return hashlib.md5((time.time_ns()).to_bytes(16, 'big')).hexdigest()[:7]
 
-    def handle_request_impl(self, request: HttpParser) -> None:
-        if request.method == b'OPTIONS':
-            self.client.queue(memoryview(build_http_response(
-                httpStatusCodes.OK, body=None,
-                headers={
-                    b'Access-Control-Allow-Origin': b'*',
-                    b'Access-Control-Allow-Methods': b'POST, GET, OPTIONS',
-                    b'Access-Control-Allow-Headers': b'Content-Type',
-                    b'Access-Control-Max-Age': b'86400'
-                })))
-            return
+    def handle_request_impl(self, body: bytes) -> Union[memoryview, Iterator[bytes]]:
         start_time = time.time()
+        try:
+            request = self._parse_request(body)
+        except Exception as err:
+            return self._build_response(None, self._get_error_response(err), start_time)
+
+        stream = self._get_log_stream(request, start_time)
+        if stream is not None:
+            return stream
+        return self._build_response(request, self._process_json_request(request), start_time)
+
+    def _get_log_stream(self, request: Union[dict, list],
+                        start_time: float) -> Optional[Union[memoryview, Iterator[bytes]]]:
+        """
+        Returns the streamed response for the single eth_getLogs request.
+        The first chunk of logs is read before the return, so an error gets the regular JSON-RPC error response.
+        """
+        if (not ETH_GET_LOGS_STREAM) or (not isinstance(request, dict)) or (request.get('method') != 'eth_getLogs'):
+            return None
+        params = request.get('params')
+        if (not isinstance(params, list)) or (len(params) != 1) or (not isinstance(params[0], dict)):
+            return None
 
         try:
-            self.info('handle_request <<< %s 0x%x %s', threading.get_ident(), id(self.model),
-                      request.body.decode('utf8'))
-            request = json.loads(request.body)
+            log_json_iter = self.model.get_log_json_iter(params[0], LOG_STREAM_CHUNK_SIZE)
+        except Exception as err:
+            response = {'jsonrpc': '2.0', 'id': request.get('id', None), 'error': self._get_method_error(err)}
+            return self._build_response(request, response, start_time)
+        return self._stream_log_response(request, log_json_iter, LogMng.get_logging_context(), start_time)
+
+    def _stream_log_response(self, request: dict, log_json_iter: Iterator[List[str]], ctx: dict,
+                             start_time: float) -> Iterator[bytes]:
+        """
+        Yields parts of the HTTP response with the chunked encoding.
+        The next part is produced when the client has read the previous one, so only one chunk of logs is in memory.
+        Parts are produced in the worker pool, because the next chunk of logs is read from the DB.
+        """
+        yield build_http_response(
+            httpStatusCodes.OK, body=None,
+            headers={
+                b'Content-Type': b'application/json',
+                b'Access-Control-Allow-Origin': b'*',
+                b'Transfer-Encoding': b'chunked',
+            })
+
+        head = '{"jsonrpc": "2.0", "id": ' + json_codec.dumps_str(request.get('id', None)) + ', "result": ['
+        yield ChunkParser.to_chunks(head.encode('utf8'), is_last=False)
+
+        log_cnt = 0
+        for log_json_list in log_json_iter:
+            if not len(log_json_list):
+                continue
+            body = ','.join(log_json_list)
+            if log_cnt > 0:
+                body = ',' + body
+            log_cnt += len(log_json_list)
+            yield ChunkParser.to_chunks(body.encode('utf8'), is_last=False)
+
+        yield ChunkParser.to_chunks(b']}')
+
+        resp_time_ms = (time.time() - start_time)*1000  # convert this into milliseconds
+        with logging_context(**ctx):
+            self.info('handle_request >>> %s 0x%0x eth_getLogs streamed %s logs resp_time_ms= %s',
+                      threading.get_ident(),
+                      id(self.model),
+                      log_cnt,
+                      resp_time_ms)
+        self._stat_exporter.stat_commit_request_and_timeout('eth_getLogs', resp_time_ms)
+
+    def _parse_request(self, body: bytes) -> Union[dict, list]:
+        self.info('handle_request <<< %s 0x%x %s', threading.get_ident(), id(self.model), body.decode('utf8'))
+        return json_codec.loads_strict(body)
+
+    @staticmethod
+    def _get_error_response(err: Exception) -> dict:
+        return {'jsonrpc': '2.0', 'error': {'code': -32000, 'message': str(err)}}
+
+    def _process_json_request(self, request: Union[dict, list]) -> Union[dict, list]:
+        try:
             if isinstance(request, list):
-                response = []
                 if len(request) == 0:
                     raise Exception("Empty batch request")
-                for r in request:
-                    response.append(self.process_request(r))
+                response = self._process_batch_request(request)
             elif isinstance(request, dict):
                 response = self.process_request(request)
             else:
                 raise Exception("Invalid request")
         except Exception as err:
             # traceback.print_exc()
-            response = {'jsonrpc': '2.0', 'error': {'code': -32000, 'message': str(err)}}
+            response = self._get_error_response(err)
+        return response
+
+    def _process_batch_request(self, request_list: list) -> list:
+        """
+        Entries of the batch are executed concurrently by RPC_BATCH_FAN_OUT lanes,
+        the current thread is one of the lanes, so the batch is processed even if the executor is busy.
+        """
+        response_list: List[Optional[dict]] = [None] * len(request_list)
+        self._process_account_state_list(request_list, response_list)
+
+        idx_list = [idx for idx, response in enumerate(response_list) if response is None]
+        lane_cnt = min(RPC_BATCH_FAN_OUT, len(idx_list))
+        if lane_cnt < 2:
+            for idx in idx_list:
+                response_list[idx] = self.process_request(request_list[idx])
+            return response_list
+
+        idx_iter = iter(idx_list)
+        idx_lock = threading.Lock()
+        ctx = LogMng.get_logging_context()
+
+        def _run_lane():
+            with logging_context(**ctx):
+                while True:
+                    with idx_lock:
+                        idx = next(idx_iter, None)
+                    if idx is None:
+                        return
+                    response_list[idx] = self.process_request(request_list[idx])
+
+        executor = NeonRpcApiPlugin.getBatchExecutor()
+        future_list = [executor.submit(_run_lane) for _ in range(lane_cnt - 1)]
+        _run_lane()
+        for future in future_list:
+            future.result()
+        return response_list
+
+    def _process_account_state_list(self, request_list: list, response_list: List[Optional[dict]]) -> None:
+        """Coalesces eth_getBalance/eth_getTransactionCount entries of the batch into one request to Solana"""
+        def is_account_state_request(request) -> bool:
+            return isinstance(request, dict) and \
+                   (request.get('method') in self.model.ACCOUNT_STATE_METHOD_LIST) and \
+                   isinstance(request.get('params'), list) and \
+                   (len(request['params']) == 2)
+
+        idx_list = [idx for idx, request in enumerate(request_list) if is_account_state_request(request)]
+        if len(idx_list) < 2:
+            return
 
+        param_list = [(request_list[idx]['method'], request_list[idx]['params']) for idx in idx_list]
+        result_list = self.model.get_account_state_list(param_list)
+        for idx, result in zip(idx_list, result_list):
+            response = {
+                'jsonrpc': '2.0',
+                'id': request_list[idx].get('id', None),
+            }
+            if isinstance(result, EthereumError):
+                response['error'] = result.getError()
+            else:
+                response['result'] = result
+            response_list[idx] = response
+
+    def _build_response(self, request: Optional[Union[dict, list]], response: Union[dict, list],
+                        start_time: float) -> memoryview:
         resp_time_ms = (time.time() - start_time)*1000  # convert this into milliseconds
 
         method = '---'
         if isinstance(request, dict):
             method = request.get('method', '---')
 
+        # the body is encoded once, the log line reuses it
+        body = json_codec.dumps(response)
         self.info('handle_request >>> %s 0x%0x %s %s resp_time_ms= %s',
                   threading.get_ident(),
                   id(self.model),
-                  json.dumps(response),
+                  body.decode('utf8'),
                   method,
                   resp_time_ms)
 
-        self.client.queue(memoryview(build_http_response(
-            httpStatusCodes.OK, body=json.dumps(response).encode('utf8'),
+        result = memoryview(build_http_response(
+            httpStatusCodes.OK, body=body,
             headers={
                 b'Content-Type': b'application/json',
                 b'Access-Control-Allow-Origin': b'*',
-            })))
+            }))
 
         self._stat_exporter.stat_commit_request_and_timeout(method, resp_time_ms)
+        return result
+
+    def _init_wakeup_socket(self) -> None:
+        if self._wakeup_reader is None:
+            self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+            self._wakeup_reader.setblocking(False)
+            self._wakeup_writer.setblocking(False)
+
+    def _dispatch_request(self, body: bytes, req_id: str) -> None:
+        """
+        Execute the request in the worker pool, the response is written back to the client from read_from_descriptors.
+        The responses are sent in the order of requests, because a client can pipeline them on the keep-alive connection.
+        """
+        self._init_wakeup_socket()
+
+        start_time = time.time()
+        try:
+            request = self._parse_request(body)
+        except Exception as err:
+            future = Future()
+            future.set_result(self._build_response(None, self._get_error_response(err), start_time))
+            self._response_queue.append(future)
+            self._on_response_ready()
+            return
+
+        if isinstance(request, list) and len(request) > 0:
+            future = self._dispatch_batch_request(request, req_id, start_time)
+            self._response_queue.append(future)
+            future.add_done_callback(self._on_response_ready)
+            return
+
+        def _execute() -> Union[memoryview, Iterator[bytes]]:
+            with logging_context(req_id=req_id):
+                stream = self._get_log_stream(request, start_time)
+                if stream is not None:
+                    return stream
+                result = self._build_response(request, self._process_json_request(request), start_time)
+                self.info("Request processed")
+                return result
+
+        method = request.get('method') if isinstance(request, dict) else None
+        future = self._dispatcher.submit(method, _execute)
+        self._response_queue.append(future)
+        future.add_done_callback(self._on_response_ready)
+
+    def _dispatch_batch_request(self, request_list: list, req_id: str, start_time: float) -> Future:
+        """
+        Each entry of the batch is submitted to the dispatcher under its own method,
+        so the batch doesn't bypass concurrency limits of methods.
+        Entries are submitted by RPC_BATCH_FAN_OUT lanes: the next entry is submitted when the previous one is done.
+        """
+        batch_future = Future()
+        response_list: List[Optional[dict]] = [None] * len(request_list)
+        lock = threading.Lock()
+        idx_list: List[int] = []
+        done_cnt = [0]
+
+        def _finish() -> None:
+            with logging_context(req_id=req_id):
+                response = self._build_response(request_list, response_list, start_time)
+                self.info("Request processed")
+            batch_future.set_result(response)
+
+        def _on_done() -> None:
+            with lock:
+                done_cnt[0] += 1
+                if done_cnt[0] < len(idx_list):
+                    return
+            _finish()
+
+        def _submit_next(idx_iter: Iterator[int]) -> None:
+            with lock:
+                idx = next(idx_iter, None)
+            if idx is None:
+                return
+
+            request = request_list[idx]
+            method = request.get('method') if isinstance(request, dict) else None
+
+            def _execute() -> dict:
+                with logging_context(req_id=req_id):
+                    return self.process_request(request)
+
+            def _on_entry_done(future: Future) -> None:
+                try:
+                    if future.exception() is not None:
+                        response_list[idx] = self._get_error_response(future.exception())
+                    else:
+                        response_list[idx] = future.result()
+                    _submit_next(idx_iter)
+                    _on_done()
+                except BaseException as err:
+                    if not batch_future.done():
+                        batch_future.set_exception(err)
+
+            self._dispatcher.submit(method, _execute).add_done_callback(_on_entry_done)
+
+        def _start() -> None:
+            with logging_context(req_id=req_id):
+                self._process_account_state_list(request_list, response_list)
+            idx_list.extend(idx for idx, response in enumerate(response_list) if response is None)
+            if len(idx_list) == 0:
+                _finish()
+                return
+
+            idx_iter = iter(idx_list)
+            for _ in range(min(RPC_BATCH_FAN_OUT, len(idx_list))):
+                _submit_next(idx_iter)
+
+        def _on_start_done(future: Future) -> None:
+            if future.exception() is not None:
+                batch_future.set_exception(future.exception())
+
+        # account states of the batch are requested from Solana in the worker pool
+        self._dispatcher.submit(None, _start).add_done_callback(_on_start_done)
+        return batch_future
+
+    def _on_response_ready(self, _future: Optional[Future] = None) -> None:
+        """Wakes up the event loop of the connection, can be called from any thread"""
+        try:
+            self._wakeup_writer.send(b'\x00')
+        except OSError:
+            # the event loop is already woken up or the connection is closed
+            pass
+
+    def _submit_stream_part(self) -> None:
+        """Produces the next part of the streamed response in the worker pool, None is the end of the stream"""
+        self._init_wakeup_socket()
+        stream = self._stream
+
+        def _next_part() -> Optional[bytes]:
+            return next(stream, None)
+
+        if self._dispatcher is not None:
+            self._stream_future = self._dispatcher.submit('eth_getLogs', _next_part)
+        else:
+            self._stream_future = NeonRpcApiPlugin.getBatchExecutor().submit(_next_part)
+        self._stream_future.add_done_callback(self._on_response_ready)
+
+    def get_descriptors(self) -> Tuple[List[socket.socket], List[socket.socket]]:
+        read_list, write_list = [], []
+        is_waiting = len(self._response_queue) or (self._stream_future is not None)
+        if is_waiting and (self._wakeup_reader is not None):
+            read_list.append(self._wakeup_reader)
+        if (self._stream is not None) and (self._stream_future is None) and (not self.client.has_buffer()):
+            # wait for the client connection to write the next part of the streamed response
+            write_list.append(self.client.connection)
+        return read_list, write_list
+
+    def write_to_descriptors(self, w: List[Union[int, HasFileno]]) -> bool:
+        if self._stream is None:
+            return False
+        return self._write_responses()
+
+    def read_from_descriptors(self, r: List[Union[int, HasFileno]]) -> bool:
+        if (self._wakeup_reader is None) or (self._wakeup_reader not in r):
+            return False
+
+        try:
+            while self._wakeup_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        return self._write_responses()
+
+    def _write_responses(self) -> bool:
+        """
+        Queues completed responses in the order of requests to the client,
+        the streamed response blocks next responses until its last part.
+        Returns True to teardown the connection on the error in the middle of the streamed response.
+        """
+        while True:
+            if self._stream is not None:
+                if self._stream_future is None:
+                    if not self.client.has_buffer():
+                        self._submit_stream_part()
+                    return False
+                elif not self._stream_future.done():
+                    return False
+
+                future, self._stream_future = self._stream_future, None
+                if future.exception() is not None:
+                    err = future.exception()
+                    err_tb = "".join(traceback.format_tb(err.__traceback__))
+                    self.error(f'Exception on streaming response: {err}: {err_tb}')
+                    self._stream = None
+                    return True
+                elif future.result() is None:
+                    self._stream = None
+                else:
+                    self.client.queue(memoryview(future.result()))
+                continue
+
+            if not (len(self._response_queue) and self._response_queue[0].done()):
+                return False
+
+            future = self._response_queue.popleft()
+            if future.exception() is not None:
+                response = self._get_error_response(future.exception())
+                self.client.queue(self._build_response(None, response, time.time()))
+            elif isinstance(future.result(), memoryview):
+                self.client.queue(future.result())
+            else:
+                self._stream = future.result()
+
+    def has_pending_work(self) -> bool:
+        return (len(self._response_queue) > 0) or (self._stream is not None)
+
+    def on_client_connection_close(self) -> None:
+        self._response_queue.clear()
+        if self._stream_future is not None:
+            # the running generator can't be closed, it is closed after the current part
+            stream = self._stream
+            self._stream_future.add_done_callback(lambda _: stream.close())
+        elif self._stream is not None:
+            self._stream.close()
+        self._stream, self._stream_future = None, None
+        if self._wakeup_reader is not None:
+            self._wakeup_reader.close()
+            self._wakeup_writer.close()
 
     def on_websocket_open(self) -> None:
         pass
@@ -36,6 +36,12 @@ class IndexerStatistics(StatisticsExporter):
     )
     POSTGRES_AVAILABILITY = Gauge('postgres_availability', 'Postgres availability', registry=registry)
     SOLANA_RPC_HEALTH = Gauge('solana_rpc_health', 'Solana Node status', registry=registry)
+    DB_POOL_WAIT = Histogram('db_pool_wait_seconds', 'Time of waiting for Postgres connection', registry=registry)
+    DB_POOL_CONNECTION_COUNT = Gauge(
+        'db_pool_connection_count', 'Count of Postgres connections in pool',
+        ['state'],
+        registry=registry
+    )
 
     def __init__(self, do_work: bool = True):
         self.do_work = do_work
@@ -85,6 +91,15 @@ class IndexerStatistics(StatisticsExporter):
         if self.do_work:
             self.SOLANA_RPC_HEALTH.set(1 if status else 0)
 
+    def stat_commit_db_pool_wait(self, wait_time_sec: float):
+        if self.do_work:
+            self.DB_POOL_WAIT.observe(wait_time_sec)
+
+    def stat_commit_db_pool_connection_count(self, used_cnt: int, idle_cnt: int):
+        if self.do_work:
+            self.DB_POOL_CONNECTION_COUNT.labels('used').set(used_cnt)
+            self.DB_POOL_CONNECTION_COUNT.labels('idle').set(idle_cnt)
+
     def stat_commit_request_and_timeout(self, *args):
         pass
 
@@ -111,3 +126,27 @@ class IndexerStatistics(StatisticsExporter):
 
     def stat_commit_gas_parameters(self, *args):
         pass
+
+    def stat_commit_eth_call_cache(self, *args):
+        pass
+
+    def stat_commit_solana_endpoint_request(self, *args):
+        pass
+
+    def stat_commit_solana_endpoint_health(self, *args):
+        pass
+
+    def stat_commit_solana_request_merge(self, *args):
+        pass
+
+    def stat_commit_sol_tx_send_window(self, *args):
+        pass
+
+    def stat_commit_sol_tx_send_time(self, *args):
+        pass
+
+    def stat_commit_operator_resource_queue_len(self, *args):
+        pass
+
+    def stat_commit_operator_resource_wait(self, *args):
+        pass
@@ -53,6 +53,76 @@ class PrometheusExporter(StatisticsExporter):
         OPERATOR_FEE.set(operator_fee)
         GAS_PRICE.set(gas_price)
 
+    def stat_commit_eth_call_cache(self, is_hit: bool):
+        from .prometheus_proxy_metrics import (
+            ETH_CALL_CACHE_HIT, ETH_CALL_CACHE_MISS
+        )
+        if is_hit:
+            ETH_CALL_CACHE_HIT.inc()
+        else:
+            ETH_CALL_CACHE_MISS.inc()
+
+    def stat_commit_db_pool_wait(self, wait_time_sec: float):
+        from .prometheus_proxy_metrics import (
+            DB_POOL_WAIT
+        )
+        DB_POOL_WAIT.observe(wait_time_sec)
+
+    def stat_commit_db_pool_connection_count(self, used_cnt: int, idle_cnt: int):
+        from .prometheus_proxy_metrics import (
+            DB_POOL_CONNECTION_COUNT
+        )
+        DB_POOL_CONNECTION_COUNT.labels('used').set(used_cnt)
+        DB_POOL_CONNECTION_COUNT.labels('idle').set(idle_cnt)
+
+    def stat_commit_solana_endpoint_request(self, endpoint: str, latency_sec: float, is_error: bool):
+        from .prometheus_proxy_metrics import (
+            SOLANA_ENDPOINT_LATENCY, SOLANA_ENDPOINT_ERROR
+        )
+        if is_error:
+            SOLANA_ENDPOINT_ERROR.labels(endpoint).inc()
+        else:
+            SOLANA_ENDPOINT_LATENCY.labels(endpoint).observe(latency_sec)
+
+    def stat_commit_solana_endpoint_health(self, endpoint: str, is_healthy: bool, slots_behind: Optional[int]):
+        from .prometheus_proxy_metrics import (
+            SOLANA_ENDPOINT_HEALTH, SOLANA_ENDPOINT_SLOTS_BEHIND
+        )
+        SOLANA_ENDPOINT_HEALTH.labels(endpoint).set(1 if is_healthy else 0)
+        if slots_behind is not None:
+            SOLANA_ENDPOINT_SLOTS_BEHIND.labels(endpoint).set(slots_behind)
+
+    def stat_commit_solana_request_merge(self, method: str, request_cnt: int, sent_cnt: int):
+        from .prometheus_proxy_metrics import (
+            SOLANA_READ_REQUEST_COUNT, SOLANA_SENT_REQUEST_COUNT
+        )
+        SOLANA_READ_REQUEST_COUNT.labels(method).inc(request_cnt)
+        SOLANA_SENT_REQUEST_COUNT.labels(method).inc(sent_cnt)
+
+    def stat_commit_sol_tx_send_window(self, in_flight_cnt: int):
+        from .prometheus_proxy_metrics import (
+            SOL_TX_SEND_WINDOW
+        )
+        SOL_TX_SEND_WINDOW.observe(in_flight_cnt)
+
+    def stat_commit_sol_tx_send_time(self, send_time_sec: float):
+        from .prometheus_proxy_metrics import (
+            SOL_TX_SEND_TIME
+        )
+        SOL_TX_SEND_TIME.observe(send_time_sec)
+
+    def stat_commit_operator_resource_queue_len(self, queue_len: int):
+        from .prometheus_proxy_metrics import (
+            OPERATOR_RESOURCE_QUEUE_LEN
+        )
+        OPERATOR_RESOURCE_QUEUE_LEN.set(queue_len)
+
+    def stat_commit_operator_resource_wait(self, wait_time_sec: float):
+        from .prometheus_proxy_metrics import (
+            OPERATOR_RESOURCE_WAIT
+        )
+        OPERATOR_RESOURCE_WAIT.observe(wait_time_sec)
+
     def stat_commit_tx_sol_spent(self, *args):
         pass
 
@@ -43,3 +43,55 @@ OPERATOR_FEE = Gauge(
     'operator_fee', 'Operator Fee',
     registry=registry,
 )
+ETH_CALL_CACHE_HIT = Counter('eth_call_cache_hit', 'Count Of eth_call Results From Cache', registry=registry)
+ETH_CALL_CACHE_MISS = Counter('eth_call_cache_miss', 'Count Of Emulated eth_call', registry=registry)
+DB_POOL_WAIT = Histogram('db_pool_wait_seconds', 'Time Of Waiting For Postgres Connection', registry=registry)
+DB_POOL_CONNECTION_COUNT = Gauge(
+    'db_pool_connection_count', 'Count Of Postgres Connections In Pool',
+    ['state'],
+    registry=registry,
+)
+SOLANA_ENDPOINT_LATENCY = Histogram(
+    'solana_endpoint_latency_seconds', 'Latency Of Requests To Solana Node',
+    ['endpoint'],
+    registry=registry,
+)
+SOLANA_ENDPOINT_ERROR = Counter(
+    'solana_endpoint_error_count', 'Count Of Failed Requests To Solana Node',
+    ['endpoint'],
+    registry=registry,
+)
+SOLANA_ENDPOINT_HEALTH = Gauge(
+    'solana_endpoint_health', 'Solana Node Status',
+    ['endpoint'],
+    registry=registry,
+)
+SOLANA_ENDPOINT_SLOTS_BEHIND = Gauge(
+    'solana_endpoint_slots_behind', 'Count Of Slots The Solana Node Is Behind',
+    ['endpoint'],
+    registry=registry,
+)
+SOLANA_READ_REQUEST_COUNT = Counter(
+    'solana_read_request_count', 'Count Of Solana Reads Requested By Callers',
+    ['method'],
+    registry=registry,
+)
+SOLANA_SENT_REQUEST_COUNT = Counter(
+    'solana_sent_request_count', 'Count Of Solana Reads Sent After Merging',
+    ['method'],
+    registry=registry,
+)
+SOL_TX_SEND_WINDOW = Histogram(
+    'sol_tx_send_window', 'Count Of Sent And Not Confirmed Solana Txs Of Sender',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    registry=registry,
+)
+SOL_TX_SEND_TIME = Histogram('sol_tx_send_time_seconds', 'Time Of Sending Solana Tx List', registry=registry)
+OPERATOR_RESOURCE_QUEUE_LEN = Gauge(
+    'operator_resource_queue_len', 'Count Of Requests Waiting For Operator Resource',
+    registry=registry,
+)
+OPERATOR_RESOURCE_WAIT = Histogram(
+    'operator_resource_wait_seconds', 'Time Of Waiting For Operator Resource',
+    registry=registry,
+)
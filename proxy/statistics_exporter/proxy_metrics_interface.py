@@ -56,3 +56,43 @@ class StatisticsExporter(ABC):
     @abstractmethod
     def stat_commit_solana_rpc_health(self, status: bool):
         """Solana Node status"""
+
+    @abstractmethod
+    def stat_commit_eth_call_cache(self, is_hit: bool):
+        """Hit or miss of the eth_call result cache"""
+
+    @abstractmethod
+    def stat_commit_db_pool_wait(self, wait_time_sec: float):
+        """Time of waiting for a free Postgres connection"""
+
+    @abstractmethod
+    def stat_commit_db_pool_connection_count(self, used_cnt: int, idle_cnt: int):
+        """Count of Postgres connections in the pool of the process"""
+
+    @abstractmethod
+    def stat_commit_solana_endpoint_request(self, endpoint: str, latency_sec: float, is_error: bool):
+        """Latency or error of a request to the Solana node"""
+
+    @abstractmethod
+    def stat_commit_solana_endpoint_health(self, endpoint: str, is_healthy: bool, slots_behind: Optional[int]):
+        """Health and the slot lag of the Solana node"""
+
+    @abstractmethod
+    def stat_commit_solana_request_merge(self, method: str, request_cnt: int, sent_cnt: int):
+        """Count of Solana reads requested by callers and count of requests sent after merging"""
+
+    @abstractmethod
+    def stat_commit_sol_tx_send_window(self, in_flight_cnt: int):
+        """Count of sent and not confirmed Solana transactions of the sender"""
+
+    @abstractmethod
+    def stat_commit_sol_tx_send_time(self, send_time_sec: float):
+        """Time of sending a Solana transaction list from the first send to the last confirmation"""
+
+    @abstractmethod
+    def stat_commit_operator_resource_queue_len(self, queue_len: int):
+        """Count of requests waiting for a free operator resource"""
+
+    @abstractmethod
+    def stat_commit_operator_resource_wait(self, wait_time_sec: float):
+        """Time of waiting for a free operator resource"""
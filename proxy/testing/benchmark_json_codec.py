@@ -0,0 +1,124 @@
+"""
+Compares the decoding and encoding time of json and orjson on Solana receipts, blocks and RPC responses.
+
+    python -m proxy.testing.benchmark_json_codec
+"""
+import json
+import os
+import random
+import time
+
+from base58 import b58encode
+
+from ..common_neon.json_codec import StdJsonCodec, OrJsonCodec, get_json_codec
+
+
+REPEAT_CNT = 50
+
+
+def _sign() -> str:
+    return b58encode(os.urandom(64)).decode('utf-8')
+
+
+def _pubkey() -> str:
+    return b58encode(os.urandom(32)).decode('utf-8')
+
+
+def _receipt() -> dict:
+    account_list = [_pubkey() for _ in range(16)]
+    return {
+        'blockTime': 1650000000,
+        'slot': random.randint(100_000_000, 200_000_000),
+        'meta': {
+            'err': None,
+            'fee': 5000,
+            'innerInstructions': [{
+                'index': 0,
+                'instructions': [{'accounts': list(range(8)), 'data': _sign(), 'programIdIndex': 3}] * 4,
+            }],
+            'logMessages': [f'Program {account_list[3]} invoke [1]'] +
+                           ['Program log: ' + os.urandom(64).hex()] * 12 +
+                           [f'Program {account_list[3]} success'],
+            'postBalances': [random.randint(0, 10 ** 12) for _ in account_list],
+            'preBalances': [random.randint(0, 10 ** 12) for _ in account_list],
+        },
+        'transaction': {
+            'message': {
+                'accountKeys': account_list,
+                'header': {'numReadonlySignedAccounts': 0, 'numReadonlyUnsignedAccounts': 3, 'numRequiredSignatures': 1},
+                'instructions': [{'accounts': list(range(16)), 'data': b58encode(os.urandom(512)).decode('utf-8'),
+                                  'programIdIndex': 3}],
+                'recentBlockhash': _pubkey(),
+            },
+            'signatures': [_sign()],
+        },
+    }
+
+
+def _receipt_response() -> dict:
+    return {'jsonrpc': '2.0', 'id': 1, 'result': _receipt()}
+
+
+def _block_response() -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': 1,
+        'result': {
+            'blockHeight': 150_000_000,
+            'blockTime': 1650000000,
+            'blockhash': _pubkey(),
+            'parentSlot': 160_000_000,
+            'previousBlockhash': _pubkey(),
+            'signatures': [_sign() for _ in range(2000)],
+        }
+    }
+
+
+def _logs_response() -> dict:
+    log = {
+        'address': '0x' + os.urandom(20).hex(),
+        'topics': ['0x' + os.urandom(32).hex() for _ in range(3)],
+        'data': '0x' + os.urandom(64).hex(),
+        'blockNumber': hex(150_000_000),
+        'blockHash': '0x' + os.urandom(32).hex(),
+        'transactionHash': '0x' + os.urandom(32).hex(),
+        'transactionIndex': '0x1',
+        'transactionLogIndex': '0x0',
+        'logIndex': '0x0',
+    }
+    return {'jsonrpc': '2.0', 'id': 1, 'result': [log] * 1000}
+
+
+def _measure(func, data) -> float:
+    start_time = time.perf_counter()
+    for _ in range(REPEAT_CNT):
+        func(data)
+    return (time.perf_counter() - start_time) / REPEAT_CNT
+
+
+def main():
+    if get_json_codec(OrJsonCodec.name).name != OrJsonCodec.name:
+        print('orjson is not installed, only json is measured')
+    codec_list = [StdJsonCodec(), get_json_codec(OrJsonCodec.name)]
+
+    payload_list = [
+        ('getTransaction', _receipt_response()),
+        ('getTransaction x100', [_receipt_response() for _ in range(100)]),
+        ('getBlock', _block_response()),
+        ('eth_getLogs', _logs_response()),
+    ]
+
+    print(f'{"payload":>20} {"KiB":>6} {"text+json, ms":>14}' +
+          ''.join(f' {c.name + " loads, ms":>16} {c.name + " dumps, ms":>16}' for c in codec_list))
+    for name, obj in payload_list:
+        data = json.dumps(obj).encode('utf-8')
+        # requests.Response.json() decodes the body into str before the parsing
+        text_time = _measure(lambda d: json.loads(d.decode('utf-8')), data)
+        line = f'{name:>20} {len(data) // 1024:>6} {text_time * 1e3:>14.2f}'
+        for codec in codec_list:
+            line += f' {_measure(codec.loads, data) * 1e3:>16.2f} {_measure(codec.dumps, obj) * 1e3:>16.2f}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
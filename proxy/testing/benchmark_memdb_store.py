@@ -0,0 +1,60 @@
+"""
+Compares the lookup latency of multiprocessing.Manager().dict() and SharedDict.
+
+    python -m proxy.testing.benchmark_memdb_store
+"""
+import multiprocessing as mp
+import os
+import pickle
+import random
+import time
+
+from ..memdb.shared_store import SharedDict
+
+
+ITEM_CNT = 10_000
+LOOKUP_CNT = 20_000
+WORKER_CNT_LIST = [1, 4, 16, 32]
+
+
+def _lookup(storage, key_list, result_queue):
+    rnd = random.Random(os.getpid())
+    start_time = time.perf_counter()
+    for _ in range(LOOKUP_CNT):
+        data = storage.get(rnd.choice(key_list))
+        pickle.loads(data)
+    result_queue.put((time.perf_counter() - start_time) / LOOKUP_CNT)
+
+
+def _run(storage, key_list, worker_cnt: int) -> float:
+    ctx = mp.get_context('fork')
+    result_queue = ctx.Queue()
+    proc_list = [ctx.Process(target=_lookup, args=(storage, key_list, result_queue)) for _ in range(worker_cnt)]
+    for proc in proc_list:
+        proc.start()
+    latency_list = [result_queue.get() for _ in proc_list]
+    for proc in proc_list:
+        proc.join()
+    return sum(latency_list) / len(latency_list)
+
+
+def main():
+    payload = pickle.dumps({'logs': [{'data': '0x' + '00' * 64, 'topics': ['0x' + '11' * 32] * 3}] * 4})
+    key_list = ['0x%064x' % i for i in range(ITEM_CNT)]
+
+    manager = mp.Manager()
+    manager_dict = manager.dict()
+    shared_dict = SharedDict(64 * 1024 * 1024, ITEM_CNT)
+    for key in key_list:
+        manager_dict[key] = payload
+        shared_dict[key] = payload
+
+    print(f'{"workers":>8} {"manager, us":>12} {"shared, us":>12}')
+    for worker_cnt in WORKER_CNT_LIST:
+        manager_latency = _run(manager_dict, key_list, worker_cnt)
+        shared_latency = _run(shared_dict, key_list, worker_cnt)
+        print(f'{worker_cnt:>8} {manager_latency * 1e6:>12.1f} {shared_latency * 1e6:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures the throughput of the Neon EVM instruction parsing of Solana receipts on mainnet-like receipts:
+iterative transactions with compute budget instructions, token transfers and events in inner instructions.
+
+    python -m proxy.testing.benchmark_receipt_parser
+"""
+import os
+import random
+import time
+
+from base58 import b58decode, b58encode
+from unittest.mock import patch
+
+from ..indexer.indexer import SolanaIxInfo
+
+
+REPEAT_CNT = 10
+RECEIPT_CNT = 1000
+
+EVM_LOADER_ID = '53DfF883gyixYNXnM7s5xhdeyV8mVk9T4i2hGV9vG9io'
+SYSTEM_PROGRAM = '11111111111111111111111111111111'
+TOKEN_PROGRAM = 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'
+COMPUTE_BUDGET_PROGRAM = 'ComputeBudget111111111111111111111111111111'
+
+
+def _pubkey() -> str:
+    return b58encode(os.urandom(32)).decode('utf-8')
+
+
+def _ix(program_idx: int, data: bytes, account_cnt: int) -> dict:
+    return {
+        'programIdIndex': program_idx,
+        'accounts': [random.randint(0, 19) for _ in range(account_cnt)],
+        'data': b58encode(data).decode('utf-8')
+    }
+
+
+def _receipt(slot: int) -> dict:
+    account_list = [_pubkey(), EVM_LOADER_ID, SYSTEM_PROGRAM, TOKEN_PROGRAM, COMPUTE_BUDGET_PROGRAM]
+    account_list += [_pubkey() for _ in range(15)]
+
+    # a step of the iterative transaction with the rlp of the Neon tx, like PartialCallOrContinueFromRawEthereumTX
+    ix_list = [_ix(4, os.urandom(9), 0), _ix(4, os.urandom(5), 0), _ix(1, b'\x0d' + os.urandom(400), 16)]
+
+    inner_ix_list = [_ix(2, os.urandom(52), 2) for _ in range(3)]
+    inner_ix_list += [_ix(3, os.urandom(9), 3) for _ in range(3)]
+    inner_ix_list += [_ix(1, b'\x07' + os.urandom(20) + (2).to_bytes(8, 'little') + os.urandom(128), 1) for _ in range(4)]
+    inner_ix_list.append(_ix(1, b'\x06\x11' + os.urandom(40), 1))
+
+    return {
+        'slot': slot,
+        'meta': {
+            'err': None,
+            'fee': 10000,
+            'innerInstructions': [{'index': 2, 'instructions': inner_ix_list}],
+            'logMessages': [f'Program {EVM_LOADER_ID} invoke [1]'] +
+                           ['Program log: ' + os.urandom(32).hex() for _ in range(20)] +
+                           [f'Program {EVM_LOADER_ID} consumed 199563 of 200000 compute units',
+                            f'Program {EVM_LOADER_ID} success'],
+            'preBalances': [random.randint(0, 10 ** 12) for _ in account_list],
+            'postBalances': [random.randint(0, 10 ** 12) for _ in account_list],
+            'preTokenBalances': [],
+            'postTokenBalances': [],
+        },
+        'transaction': {
+            'message': {'accountKeys': account_list, 'instructions': ix_list, 'recentBlockhash': _pubkey()},
+            'signatures': [b58encode(os.urandom(64)).decode('utf-8')],
+        },
+    }
+
+
+def _scan_full_receipt(tx: dict) -> int:
+    """The parsing without the receipt index: full rescan of inner instructions and decoding of each checked ix."""
+    msg = tx['transaction']['message']
+    account_list = msg['accountKeys']
+    evm_ix_cnt = 0
+    for ix_idx, ix in enumerate(msg['instructions']):
+        ix_list = [ix]
+        for inner_tx in tx['meta']['innerInstructions']:
+            if inner_tx['index'] == ix_idx:
+                ix_list.extend(inner_tx['instructions'])
+        for ix in ix_list:
+            ix_data = b58decode(ix['data'])
+            if account_list[ix['programIdIndex']] == EVM_LOADER_ID:
+                evm_ix_cnt += (ix_data[0] != 0xFF)
+    return evm_ix_cnt
+
+
+def _parse_receipt(tx: dict) -> int:
+    ix_info = SolanaIxInfo(sign=tx['transaction']['signatures'][0], slot=tx['slot'], tx=tx)
+    evm_ix_cnt = 0
+    for _ in ix_info.iter_ixs():
+        evm_ix_cnt += 1
+        ix_info.ix_data[1:].hex()
+    return evm_ix_cnt
+
+
+def _measure(func, receipt_list) -> float:
+    start_time = time.perf_counter()
+    for _ in range(REPEAT_CNT):
+        for tx in receipt_list:
+            func(tx)
+    return (time.perf_counter() - start_time) / REPEAT_CNT
+
+
+def main():
+    receipt_list = [_receipt(slot) for slot in range(100_000_000, 100_000_000 + RECEIPT_CNT)]
+    ix_cnt = sum(len(tx['meta']['innerInstructions'][0]['instructions']) + 3 for tx in receipt_list)
+    print(f'{RECEIPT_CNT} receipts, {ix_cnt} instructions')
+
+    for name, func in (('full scan', _scan_full_receipt), ('SolanaIxInfo', _parse_receipt)):
+        duration = _measure(func, receipt_list)
+        print(f'{name:>14}: {duration * 1e3:8.2f} ms, {RECEIPT_CNT / duration:10.0f} receipts/sec')
+
+
+if __name__ == '__main__':
+    with patch('proxy.indexer.indexer.EVM_LOADER_ID', EVM_LOADER_ID):
+        main()
@@ -0,0 +1,20 @@
+import os
+
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+from ..indexer.indexer_base import IndexerBase
+
+
+class FakeIndexer(IndexerBase):
+    """
+    IndexerBase, which is built by its own __init__, over the fake Solana and the dict of constants.
+    The DB of signatures is a MagicMock, and there is no websocket subscription.
+    """
+
+    def __init__(self, solana: Any, constants: Dict[str, Any], last_slot: int):
+        with patch('proxy.indexer.indexer_base.SolanaSignatures', MagicMock), \
+             patch('proxy.indexer.indexer_base.SQLDict', return_value=constants), \
+             patch('proxy.indexer.indexer_base.get_solana_subscriber', return_value=None), \
+             patch.dict(os.environ, {'START_SLOT': '0'}):
+            IndexerBase.__init__(self, solana, last_slot)
@@ -0,0 +1,86 @@
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+from ..common_neon.blockhash_service import BlockhashService
+from ..common_neon.environment_data import BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT
+
+
+def _blockhash_info(slot: int, blockhash: str, last_valid_height: int) -> dict:
+    return {
+        'result': {
+            'context': {'slot': slot},
+            'value': {'blockhash': blockhash, 'lastValidBlockHeight': last_valid_height}
+        }
+    }
+
+
+class TestBlockhashService(unittest.TestCase):
+    def setUp(self) -> None:
+        BlockhashService._state.value = None
+        BlockhashService._last_time.value = 0
+        BlockhashService._has_active_request.value = False
+
+        # Blockhash is NewType of str
+        for patcher in (patch('proxy.common_neon.blockhash_service.threading.Thread'),
+                        patch('proxy.common_neon.blockhash_service.Blockhash', str)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.solana = MagicMock()
+        self.service = BlockhashService(self.solana)
+
+    def _refresh(self, slot: int, blockhash: str, last_valid_height: int) -> bool:
+        self.solana.get_latest_blockhash_info.return_value = _blockhash_info(slot, blockhash, last_valid_height)
+        if not self.service._start_request():
+            return False
+        try:
+            self.service._refresh()
+        finally:
+            self.service._stop_request()
+        return True
+
+    def test_shared_blockhash(self):
+        self.assertIsNone(self.service.get_blockhash())
+        self.assertTrue(self._refresh(100, 'hash-100', 250))
+        self.assertEqual(self.service.get_blockhash(), 'hash-100')
+
+        # other workers see the fresh blockhash and don't request it
+        other_service = BlockhashService(MagicMock())
+        self.assertFalse(other_service._start_request())
+        self.assertEqual(other_service.get_blockhash(), 'hash-100')
+
+    def test_stale_blockhash(self):
+        self._refresh(100, 'hash-100', 250)
+        state = BlockhashService._state.value
+        state['time'] -= BlockhashService.MAX_REFRESH_SEC * BlockhashService.STALE_REFRESH_CNT
+        BlockhashService._state.value = state
+        self.assertIsNone(self.service.get_blockhash())
+        self.assertFalse(self.service.is_near_expiry('hash-100'))
+
+    def test_near_expiry(self):
+        self._refresh(100, 'hash-100', 250)
+        last_valid_height = 250 + BlockhashService.MAX_BLOCKHASH_AGE - BLOCKHASH_EXPIRY_MARGIN_BLOCK_CNT + 1
+        BlockhashService._last_time.value = 0
+        self._refresh(200, 'hash-200', last_valid_height)
+
+        self.assertEqual(self.service.get_blockhash(), 'hash-200')
+        self.assertFalse(self.service.is_near_expiry('hash-200'))
+        self.assertTrue(self.service.is_near_expiry('hash-100'))
+        self.assertFalse(self.service.is_near_expiry('unknown-hash'))
+
+    def test_new_state(self):
+        state = BlockhashService._get_new_state(None, 100, 'hash-100', 250, 1000.0)
+        self.assertEqual(state['slot_time'], BlockhashService.DEFAULT_SLOT_TIME_SEC)
+
+        state = BlockhashService._get_new_state(state, 110, 'hash-110', 260, 1005.0)
+        self.assertAlmostEqual(state['slot_time'], 0.4 * 0.8 + 0.5 * 0.2)
+        self.assertEqual(state['blockhash_list'], [('hash-100', 250), ('hash-110', 260)])
+
+        # expired blockhashes are removed from the history
+        state = BlockhashService._get_new_state(state, 400, 'hash-400', 405, 1120.0)
+        self.assertEqual(state['blockhash_list'], [('hash-110', 260), ('hash-400', 405)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from unittest.mock import patch
+
+from ..memdb.call_result_db import MemCallResultDB
+from ..memdb.shared_store import SharedDict
+
+
+class TestMemCallResultDB(unittest.TestCase):
+    def setUp(self) -> None:
+        for patcher in (patch.object(MemCallResultDB, '_result_by_key', SharedDict(4096, 8, is_cache=True)),
+                        patch.object(MemCallResultDB, '_max_item_size', 1024)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        MemCallResultDB._slot.value = 0
+        self.db = MemCallResultDB()
+
+    def test_slot_invalidation(self):
+        self.db.put_call_result('a', 10, '0x01')
+        self.assertEqual(self.db.get_call_result('a', 10), '0x01')
+        self.assertIsNone(self.db.get_call_result('a', 11))
+
+        # results from an old slot are ignored
+        self.db.put_call_result('b', 9, '0x02')
+        self.assertIsNone(self.db.get_call_result('b', 9))
+
+        self.db.put_call_result('b', 11, '0x03')
+        self.assertIsNone(self.db.get_call_result('a', 10))
+        self.assertIsNone(self.db.get_call_result('a', 11))
+        self.assertEqual(self.db.get_call_result('b', 11), '0x03')
+        self.assertEqual(len(MemCallResultDB._result_by_key), 1)
+
+    def test_eviction(self):
+        for i in range(20):
+            self.db.put_call_result(f'key-{i}', 1, '0x01')
+        self.assertEqual(len(MemCallResultDB._result_by_key), 12)
+        self.assertIsNone(self.db.get_call_result('key-0', 1))
+        self.assertEqual(self.db.get_call_result('key-19', 1), '0x01')
+
+    def test_memory_limit(self):
+        self.db.put_call_result('a', 1, '0x' + '00' * 1024)
+        self.assertIsNone(self.db.get_call_result('a', 1))
+
+    def test_key(self):
+        self.assertEqual(MemCallResultDB.get_key('0xAB', '0xCD', '0x70A08231', ''), '0xab:0xcd:0x70a08231:0')
+        key = MemCallResultDB.get_key('0xab', '0xcd', '0x', None)
+        for value in ('0x0', '0x00', 0):
+            self.assertEqual(MemCallResultDB.get_key('0xab', '0xcd', '0x', value), key)
+        self.assertNotEqual(MemCallResultDB.get_key('0xab', '0xcd', '0x', '0x10'), key)
+        self.assertEqual(MemCallResultDB.get_key('0xab', '0xcd', '0x', '0x10'),
+                         MemCallResultDB.get_key('0xab', '0xcd', '0x', 16))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -171,7 +171,8 @@ class Test_eth_getLogs(unittest.TestCase):
             'fromBlock': 0,
             'toBlock': 'latest',
             'address': self.storage_contract.address,
-            'topics': self.topics,
+            # the first topic of each log is in the OR-list of the first position
+            'topics': [self.topics],
         })
         print('receipts: ', receipts)
         self.assertEqual(len(receipts), 6)
@@ -0,0 +1,185 @@
+import contextlib
+import json
+import threading
+import unittest
+
+from typing import List, Tuple
+from unittest.mock import MagicMock, patch
+
+from ..common_neon.errors import InvalidParamError
+from ..http.chunk_parser import ChunkParser, chunkParserStates
+from ..indexer.logs_db import LogsDB
+from ..memdb.transactions_db import MemTxsDB
+from ..neon_rpc_api_model.neon_rpc_api_model import NeonRpcApiModel
+from ..plugin.neon_rpc_api_plugin import NeonRpcApiPlugin
+
+
+class FakeClient:
+    def __init__(self):
+        self.part_list = []
+
+    def has_buffer(self) -> bool:
+        return False
+
+    def queue(self, part: memoryview) -> None:
+        self.part_list.append(part.tobytes())
+
+
+class TestLogStream(unittest.TestCase):
+    def setUp(self):
+        for patcher in (patch.object(NeonRpcApiPlugin, 'getModel', return_value=MagicMock()),
+                        patch('proxy.plugin.neon_rpc_api_plugin.PrometheusExporter'),
+                        patch('proxy.plugin.neon_rpc_api_plugin.ASYNC_RPC_DISPATCH', False)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.plugin = NeonRpcApiPlugin(MagicMock(), MagicMock(), FakeClient(), MagicMock())
+        self.addCleanup(self.plugin.on_client_connection_close)
+
+    def _write_all(self) -> bytes:
+        while self.plugin._stream is not None:
+            self.assertFalse(self.plugin._write_responses())
+            if self.plugin._stream_future is not None:
+                self.plugin._stream_future.exception(timeout=5)
+        head, body = b''.join(self.plugin.client.part_list).split(b'\r\n\r\n', 1)
+        self.assertIn(b'Transfer-Encoding: chunked', head)
+        parser = ChunkParser()
+        parser.parse(body)
+        self.assertEqual(parser.state, chunkParserStates.COMPLETE)
+        return parser.body
+
+    def test_stream_by_chunks(self):
+        log_list = [{'logIndex': hex(idx)} for idx in range(5)]
+        thread_id_set = set()
+
+        def _iter_log_json_list():
+            for log_json_list in ([json.dumps(log) for log in log_list[:2]], [],
+                                  [json.dumps(log) for log in log_list[2:]]):
+                thread_id_set.add(threading.get_ident())
+                yield log_json_list
+
+        self.plugin.model.get_log_json_iter.return_value = _iter_log_json_list()
+        request = {'jsonrpc': '2.0', 'id': 7, 'method': 'eth_getLogs', 'params': [{'address': '0x' + '11' * 20}]}
+        self.plugin._stream = self.plugin._get_log_stream(request, 0)
+        self.assertIsNotNone(self.plugin._stream)
+
+        response = json.loads(self._write_all())
+        self.assertEqual(response, {'jsonrpc': '2.0', 'id': 7, 'result': log_list})
+        self.assertEqual(len(self.plugin.client.part_list), 5)
+        # chunks are read in the worker pool, not in the event loop of the connection
+        self.assertNotIn(threading.get_ident(), thread_id_set)
+
+    def test_empty_stream(self):
+        self.plugin.model.get_log_json_iter.return_value = iter([])
+        request = {'jsonrpc': '2.0', 'id': 'a', 'method': 'eth_getLogs', 'params': [{}]}
+        self.plugin._stream = self.plugin._get_log_stream(request, 0)
+        self.assertEqual(json.loads(self._write_all()), {'jsonrpc': '2.0', 'id': 'a', 'result': []})
+
+    def test_invalid_filter_is_not_streamed(self):
+        self.plugin.model.get_log_json_iter.side_effect = InvalidParamError(message='invalid topics')
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_getLogs', 'params': [{'topics': '0x1'}]}
+        response = self.plugin._get_log_stream(request, 0)
+        self.assertIsInstance(response, memoryview)
+        head, body = response.tobytes().split(b'\r\n\r\n', 1)
+        self.assertNotIn(b'Transfer-Encoding: chunked', head)
+        self.assertEqual(json.loads(body)['error']['message'], 'invalid topics')
+
+        batch_request = [{'jsonrpc': '2.0', 'id': 1, 'method': 'eth_getLogs', 'params': [{}]}]
+        self.assertIsNone(self.plugin._get_log_stream(batch_request, 0))
+
+    def test_error_in_stream(self):
+        def _iter_log_json_list():
+            yield ['{}']
+            raise RuntimeError('statement timeout')
+
+        self.plugin.model.get_log_json_iter.return_value = _iter_log_json_list()
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_getLogs', 'params': [{}]}
+        self.plugin._stream = self.plugin._get_log_stream(request, 0)
+        while not self.plugin._write_responses():
+            self.plugin._stream_future.exception(timeout=5)
+        self.assertIsNone(self.plugin._stream)
+
+
+class FakeLogsCursor:
+    def __init__(self, key_list: List[Tuple[int, int, int]]):
+        self._key_list = key_list
+        self._row_list = []
+
+    def execute(self, query: str, params: tuple) -> None:
+        limit = params[-1]
+        after_key = tuple(params[-4:-1]) if len(params) > 1 else None
+        key_list = sorted(self._key_list, reverse=('DESC' in query))
+        self._row_list = [key + (json.dumps({'key': list(key)}),)
+                          for key in key_list if (after_key is None) or (key > after_key)][:limit]
+
+    def fetchall(self) -> list:
+        return self._row_list
+
+
+class TestLogsDBChunks(unittest.TestCase):
+    def test_keyset_chunks(self):
+        key_list = [(10, 0, 0), (10, 0, 1), (10, 1, 0), (11, 0, 0), (12, 3, 1)]
+        cursor = FakeLogsCursor(key_list)
+        with patch.object(LogsDB, '_cursor', return_value=contextlib.nullcontext(cursor)) as cursor_mock:
+            chunk_list = list(LogsDB().iter_log_json_list(chunk_size=2))
+
+        self.assertEqual([[tuple(json.loads(log)['key']) for log in chunk] for chunk in chunk_list],
+                         [key_list[:2], key_list[2:4], key_list[4:]])
+        # each chunk takes the pooled connection only for its query
+        self.assertEqual(cursor_mock.call_count, 3)
+        for call in cursor_mock.call_args_list:
+            self.assertEqual(call, ((), {}))
+
+    def test_newest_logs(self):
+        key_list = [(10, 0, 0), (10, 0, 1), (10, 1, 0), (11, 0, 0), (12, 3, 1)]
+        cursor = FakeLogsCursor(key_list)
+        with patch.object(LogsDB, '_cursor', return_value=contextlib.nullcontext(cursor)), \
+             patch.object(LogsDB, 'LOG_LIMIT', 3):
+            log_list = LogsDB().get_logs()
+
+        # the limit keeps the newest logs, they are returned in the chain order
+        self.assertEqual([tuple(log['key']) for log in log_list], key_list[2:])
+
+
+class TestMemLogChunks(unittest.TestCase):
+    def test_first_db_chunk(self):
+        def _iter_db_log_json_list(*_args):
+            raise RuntimeError('statement timeout')
+            yield
+
+        db = MagicMock()
+        db.iter_log_json_list.side_effect = _iter_db_log_json_list
+        # the DB error is raised by the call, before the response starts
+        with self.assertRaises(RuntimeError):
+            MemTxsDB(db).iter_log_json_list(None, None, [], [], None, 2)
+
+        db.iter_log_json_list.side_effect = None
+        db.iter_log_json_list.return_value = iter([['{"a": 1}', '{"a": 2}'], ['{"a": 3}']])
+        log_json_iter = MemTxsDB(db).iter_log_json_list(None, None, [], [], None, 2)
+        self.assertEqual([chunk for chunk in log_json_iter if len(chunk)], [['{"a": 1}', '{"a": 2}'], ['{"a": 3}']])
+
+
+class TestLogsPage(unittest.TestCase):
+    def setUp(self):
+        self.model = NeonRpcApiModel.__new__(NeonRpcApiModel)
+        self.model._db = MagicMock()
+
+    def test_cursor(self):
+        self.model._db.get_logs_page.return_value = ([{'logIndex': '0x0'}], (10, 2, 300))
+        result = self.model.neon_getLogsPage({'fromBlock': '0'})
+        self.assertEqual(result['logs'], [{'logIndex': '0x0'}])
+        self.assertIsNone(self.model._db.get_logs_page.call_args[0][-1])
+
+        self.model._db.get_logs_page.return_value = ([], None)
+        result = self.model.neon_getLogsPage({'fromBlock': '0'}, result['cursor'])
+        self.assertEqual(self.model._db.get_logs_page.call_args[0][-1], (10, 2, 300))
+        self.assertIsNone(result['cursor'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('0x12', 12, '0x' + 'zz' * 24):
+            with self.assertRaises(InvalidParamError):
+                self.model.neon_getLogsPage({}, cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from ..common_neon.utils import SolanaBlockInfo
+from ..indexer.backfill import IndexerBackfill, create_indexer_backfill
+from .indexer_utils import FakeIndexer
+
+
+class FakeSolana:
+    """Each slot has a block with a vote signature and Neon signatures in every third slot"""
+
+    def __init__(self, latest_slot: int):
+        self.latest_slot = latest_slot
+        self.sign_list = []
+        for slot in range(latest_slot + 1):
+            self.sign_list.append((f'vote-{slot}', slot))
+            if slot % 3 == 0:
+                self.sign_list += [(f'neon-{slot}-{idx}', slot) for idx in range(2)]
+        self.sign_pos_dict = {sign: pos for pos, (sign, _) in enumerate(self.sign_list)}
+        self.error_cnt = 0
+
+    def get_slot(self, commitment):
+        return {'result': self.latest_slot}
+
+    def get_block_slot_list(self, slot, limit, commitment):
+        return list(range(slot, min(slot + limit, self.latest_slot + 1)))
+
+    def get_block_info(self, slot, commitment):
+        return SolanaBlockInfo(slot=slot, signs=[sign for sign, sign_slot in self.sign_list if sign_slot == slot])
+
+    def get_signatures_for_address(self, before, limit, commitment):
+        if self.error_cnt > 0:
+            self.error_cnt -= 1
+            return {'error': 'node is behind'}
+        pos = self.sign_pos_dict[before] if before is not None else len(self.sign_list)
+        neon_list = [{'signature': sign, 'slot': slot} for sign, slot in reversed(self.sign_list[:pos])
+                     if sign.startswith('neon')]
+        return {'result': neon_list[:limit]}
+
+    def get_multiple_receipts(self, sign_list):
+        return [{'slot': int(sign.split('-')[1]), 'sign': sign} for sign in sign_list]
+
+
+class TestIndexerBackfill(unittest.TestCase):
+    def _neon_sign_list(self, solana: FakeSolana, start_slot: int, stop_slot: int):
+        return [sign for sign, slot in solana.sign_list if sign.startswith('neon') and start_slot <= slot < stop_slot]
+
+    def _create_indexer(self, solana: FakeSolana, constants: dict, last_slot: int) -> FakeIndexer:
+        plan = {'start_slot': last_slot, 'stop_slot': solana.latest_slot, 'shard_slot_cnt': 100}
+        constants.setdefault(IndexerBackfill.PLAN_KEY, plan)
+        return FakeIndexer(solana, constants, last_slot)
+
+    def test_backfill(self):
+        solana = FakeSolana(latest_slot=2000)
+        constants = {}
+        indexer = self._create_indexer(solana, constants, 150)
+
+        sign_list = []
+        while indexer._backfill is not None:
+            sign_list += [tx['sign'] for _, _, tx in indexer.get_tx_receipts()]
+
+        self.assertEqual(sign_list, self._neon_sign_list(solana, 150, 2000))
+        self.assertEqual(indexer.last_slot, 2000)
+        self.assertEqual(indexer._maximum_tx, sign_list[-1])
+        indexer.solana_signatures.remove_signature_before_slot.assert_called_once_with(2000)
+        self.assertEqual(constants, {'maximum_tx': sign_list[-1]})
+
+    def test_resume(self):
+        solana = FakeSolana(latest_slot=1000)
+        constants = {}
+        indexer = self._create_indexer(solana, constants, 0)
+
+        # the restart after the processing of slots less than 300
+        sign_list = []
+        for slot, _, tx in indexer.get_tx_receipts(stop_slot=300):
+            sign_list.append(tx['sign'])
+        self.assertEqual(sign_list, self._neon_sign_list(solana, 0, 301))
+        self.assertIn('backfill_shard:200', constants)
+        self.assertNotIn('backfill_shard:300', constants)
+
+        indexer = FakeIndexer(solana, constants, 300)
+        self.assertEqual(indexer._backfill.max_tx, 'neon-297-1')
+        sign_list = []
+        while indexer._backfill is not None:
+            sign_list += [tx['sign'] for _, _, tx in indexer.get_tx_receipts()]
+        self.assertEqual(sign_list, self._neon_sign_list(solana, 300, 1000))
+
+    def test_signature_error(self):
+        solana = FakeSolana(latest_slot=500)
+        indexer = self._create_indexer(solana, {}, 0)
+        solana.error_cnt = 100
+        with self.assertRaises(RuntimeError):
+            list(indexer.get_tx_receipts())
+
+        # shards, which failed in parallel, are gathered again on next cycles
+        solana.error_cnt = 0
+        sign_list = []
+        for _ in range(10):
+            if indexer._backfill is None:
+                break
+            try:
+                for _, _, tx in indexer.get_tx_receipts():
+                    sign_list.append(tx['sign'])
+            except RuntimeError:
+                pass
+        self.assertEqual(sign_list, self._neon_sign_list(solana, 0, 500))
+
+    def test_no_backfill(self):
+        solana = FakeSolana(latest_slot=1000)
+        self.assertIsNone(create_indexer_backfill(solana, {}, 990))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import time
+import unittest
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+from ..common_neon.utils import NeonTxInfo, NeonTxResultInfo, SolanaBlockInfo
+from ..indexer.indexer import Indexer
+from ..indexer.indexer_db import IndexerDB
+from ..indexer.utils import CostInfo, SolanaIxSignInfo
+
+
+class FakePgPool:
+    def __init__(self):
+        self.cursor_mock = MagicMock()
+        self.transaction_list = []
+
+    @contextmanager
+    def cursor(self):
+        yield self.cursor_mock
+
+    @contextmanager
+    def transaction(self):
+        self.transaction_list.append('begin')
+        yield self.cursor_mock
+        self.transaction_list.append('commit')
+
+
+class TestIndexerDBBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = FakePgPool()
+        self.insert_list = []
+        self.failed_table = None
+
+        def _execute_values(cursor, request, row_list, page_size):
+            table = request.split()[2].split('(')[0]
+            if table == self.failed_table:
+                raise RuntimeError(f'{table} is locked')
+            self.insert_list.append((table, list(row_list)))
+
+        patch_list = [
+            patch('proxy.indexer.base_db.get_pg_connection_pool', return_value=self.pool),
+            patch('proxy.indexer.indexer_db.get_pg_connection_pool', return_value=self.pool),
+            patch('proxy.indexer.base_db.execute_values', side_effect=_execute_values),
+        ]
+        for p in patch_list:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.db = IndexerDB(MagicMock())
+        self.db._block = SolanaBlockInfo(slot=10, hash='0x01')
+        self.db._starting_block = self.db._block
+
+    def _submit_tx(self, idx: int):
+        neon_tx = NeonTxInfo()
+        neon_tx.sign = f'0x{idx:064x}'
+        neon_res = NeonTxResultInfo()
+        neon_res.slot = 10
+        neon_res.logs = [{'address': '0x00', 'topics': [], 'data': '0x', 'transactionHash': neon_tx.sign,
+                          'transactionIndex': '0x1', 'transactionLogIndex': '0x0', 'logIndex': '0x0'}]
+        used_ixs = [SolanaIxSignInfo(sign=f'sol-{idx}', slot=10, idx=idx)]
+        self.db.submit_transaction(neon_tx, neon_res, used_ixs)
+
+    def test_commit_rows_with_checkpoint(self):
+        self._submit_tx(1)
+        self._submit_tx(2)
+        self.db.add_tx_costs([CostInfo(sign='sol-1', tx=None, program=None)])
+        self.assertEqual(self.insert_list, [])
+
+        self.pool.cursor_mock.reset_mock()
+        self.assertTrue(self.db.commit_batch(9))
+        self.assertEqual(self.pool.transaction_list, ['begin', 'commit'])
+        self.assertEqual([(table, len(row_list)) for table, row_list in self.insert_list], [
+            ('neon_logs', 2), ('neon_transactions', 2), ('solana_neon_transactions', 2),
+            ('solana_neon_transactions_costs', 1)
+        ])
+        self.assertIn('min_receipt_slot', str(self.pool.cursor_mock.execute.call_args))
+        self.assertEqual(len(self.db._batch), 0)
+
+    def test_keep_rows_on_error(self):
+        self._submit_tx(1)
+        self.failed_table = 'solana_neon_transactions'
+        self.assertFalse(self.db.commit_batch(9))
+        self.assertEqual(self.pool.transaction_list, ['begin'])
+
+        self._submit_tx(2)
+        self.failed_table = None
+        self.insert_list.clear()
+        self.assertEqual(self.db.get_commit_error_cnt(), 1)
+        self.assertTrue(self.db.commit_batch(10))
+        self.assertEqual(self.db.get_commit_error_cnt(), 0)
+        self.assertEqual([(table, len(row_list)) for table, row_list in self.insert_list], [
+            ('neon_logs', 2), ('neon_transactions', 2), ('solana_neon_transactions', 2)
+        ])
+
+
+class TestIndexerCommitRetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db = MagicMock()
+        self.db.get_min_receipt_slot.return_value = 0
+        self.db.get_latest_block_slot.return_value = 100
+        self.is_failed = True
+        self.error_cnt = 0
+
+        def _commit_batch(_min_receipt_slot):
+            self.error_cnt = self.error_cnt + 1 if self.is_failed else 0
+            return not self.is_failed
+
+        self.db.commit_batch.side_effect = _commit_batch
+        self.db.get_commit_error_cnt.side_effect = lambda: self.error_cnt
+
+        solana = MagicMock()
+        solana.get_slot.return_value = {'result': 0}
+        patch_list = [
+            patch('proxy.indexer.indexer.SolanaInteractor', return_value=solana),
+            patch('proxy.indexer.indexer.AsyncSolanaInteractor'),
+            patch('proxy.indexer.indexer.IndexerDB', return_value=self.db),
+            patch('proxy.indexer.indexer.Canceller'),
+            patch('proxy.indexer.indexer_base.SolanaSignatures'),
+            patch('proxy.indexer.indexer_base.SQLDict', return_value={}),
+            patch('proxy.indexer.indexer_base.get_solana_subscriber', return_value=None),
+        ]
+        for p in patch_list:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.indexer = Indexer('http://solana', MagicMock())
+        self.receipt_cnt = 0
+
+        def _get_tx_receipts(_stop_slot):
+            for slot in range(self.indexer.indexed_slot, min(self.indexer.indexed_slot + 2, 10)):
+                self.receipt_cnt += 1
+                yield slot, f'sign-{slot}', None
+
+        self.indexer.get_tx_receipts = _get_tx_receipts
+
+    def test_stop_on_error(self):
+        self.indexer.process_receipts()
+        self.assertEqual(self.receipt_cnt, 2)
+        self.assertEqual(self.db.commit_batch.call_count, 1)
+
+        # no new rows before the retry delay
+        self.indexer.process_receipts()
+        self.assertEqual(self.receipt_cnt, 2)
+        self.assertEqual(self.db.commit_batch.call_count, 1)
+
+        # the failed retry doubles the delay
+        self.indexer._commit_retry_time = 0.0
+        retry_time = time.time()
+        self.indexer.process_receipts()
+        self.assertEqual(self.receipt_cnt, 2)
+        self.assertEqual(self.db.commit_batch.call_count, 2)
+        self.assertGreaterEqual(self.indexer._commit_retry_time, retry_time + 2)
+
+        self.is_failed = False
+        self.indexer._commit_retry_time = 0.0
+        self.indexer.process_receipts()
+        self.assertEqual(self.receipt_cnt, 10)
+        self.assertEqual(self.indexer.indexed_slot, 10)
+        self.assertEqual(self.db.commit_batch.call_args_list[2], self.db.commit_batch.call_args_list[1])
+
+
+class TestIndexerDBBlockPrefetch(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch('proxy.indexer.base_db.get_pg_connection_pool', return_value=FakePgPool())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.solana = MagicMock()
+        self.solana.get_block_info_list.side_effect = lambda slot_list, commitment: [
+            SolanaBlockInfo(slot=slot, hash=(f'0x{slot:064x}' if slot != 13 else None)) for slot in slot_list
+        ]
+        self.db = IndexerDB(self.solana)
+        self.db._blocks_db = MagicMock()
+        self.db._blocks_db.get_block_dict_by_slot_list.return_value = {11: SolanaBlockInfo(slot=11, hash='0x11')}
+
+    def test_prefetch(self):
+        self.db.prefetch_blocks([12, 11, 13, 12])
+
+        self.db._blocks_db.get_block_dict_by_slot_list.assert_called_once_with([11, 12, 13])
+        self.solana.get_block_info_list.assert_called_once()
+        self.assertEqual(self.solana.get_block_info_list.call_args[0][0], [12, 13])
+        self.assertEqual([b.slot for b in self.db._blocks_db.set_block_list.call_args[0][0]], [12])
+
+        self.assertEqual(self.db.get_block_by_slot(11).hash, '0x11')
+        self.assertEqual(self.db.get_block_by_slot(12).hash, f'0x{12:064x}')
+        self.db._blocks_db.get_block_by_slot.assert_not_called()
+
+    def test_chunks(self):
+        self.db._blocks_db.get_block_dict_by_slot_list.return_value = {}
+        self.db.prefetch_blocks(list(range(IndexerDB.BLOCK_PREFETCH_CHUNK_LEN + 1)))
+        self.assertEqual([len(c[0][0]) for c in self.solana.get_block_info_list.call_args_list],
+                         [IndexerDB.BLOCK_PREFETCH_CHUNK_LEN, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+import unittest
+
+from unittest.mock import MagicMock
+
+from ..common_neon.environment_data import INDEXER_RECEIPT_CHUNK_LEN, INDEXER_RECEIPT_PREFETCH_COUNT
+from .indexer_utils import FakeIndexer
+
+
+class FakePipelineIndexer(FakeIndexer):
+    def __init__(self, signature_cnt: int):
+        solana = MagicMock()
+        solana.get_slot.return_value = {'result': 0}
+        solana.get_multiple_receipts = self._get_multiple_receipts
+        FakeIndexer.__init__(self, solana, {}, 0)
+
+        # signatures are listed from the newest one
+        self.signature_list = [(f'sign-{slot}', slot) for slot in reversed(range(signature_cnt))]
+        self.page_len = 7
+        self.lock = threading.Lock()
+        self.in_flight_cnt = 0
+        self.max_in_flight_cnt = 0
+        self.fetched_sign_list = []
+        self.fetch_event = threading.Event()
+
+    def _iter_unknown_signature_pages(self):
+        tx_list = []
+        for idx in range(0, len(self.signature_list), self.page_len):
+            tx_list.extend(self.signature_list[idx:idx + self.page_len])
+            yield tx_list
+
+    def _get_multiple_receipts(self, sign_list):
+        self.fetch_event.set()
+        with self.lock:
+            self.fetched_sign_list.extend(sign_list)
+            self.in_flight_cnt += 1
+            self.max_in_flight_cnt = max(self.max_in_flight_cnt, self.in_flight_cnt)
+        time.sleep(random.random() / 100)
+        with self.lock:
+            self.in_flight_cnt -= 1
+        return [{'slot': int(sign.split('-')[1])} if sign != 'sign-5' else None for sign in sign_list]
+
+
+class TestReceiptPipeline(unittest.TestCase):
+    def test_slot_order(self):
+        indexer = FakePipelineIndexer(INDEXER_RECEIPT_CHUNK_LEN * INDEXER_RECEIPT_PREFETCH_COUNT * 2 + 3)
+        slot_list = [slot for slot, _, _ in indexer.get_tx_receipts()]
+
+        self.assertEqual(slot_list, [slot for slot in range(len(indexer.signature_list)) if slot != 5])
+        self.assertLessEqual(indexer.max_in_flight_cnt, INDEXER_RECEIPT_PREFETCH_COUNT)
+        self.assertEqual(indexer._maximum_tx, f'sign-{slot_list[-1]}')
+        indexer.solana_signatures.remove_signature.assert_called_once()
+
+        stat = indexer.receipt_pipeline_stat
+        self.assertEqual(stat.signature_cnt, len(indexer.signature_list))
+        self.assertEqual(stat.fetched_cnt, len(indexer.signature_list))
+        self.assertEqual(stat.decoded_cnt, len(slot_list))
+        self.assertLessEqual(stat.fetch_backlog, INDEXER_RECEIPT_CHUNK_LEN * INDEXER_RECEIPT_PREFETCH_COUNT)
+        self.assertLessEqual(stat.decode_backlog, INDEXER_RECEIPT_CHUNK_LEN * INDEXER_RECEIPT_PREFETCH_COUNT)
+
+    def test_stop_slot(self):
+        indexer = FakePipelineIndexer(INDEXER_RECEIPT_CHUNK_LEN * 3)
+        slot_list = [slot for slot, _, _ in indexer.get_tx_receipts(stop_slot=30)]
+
+        self.assertEqual(slot_list, [slot for slot in range(31) if slot != 5])
+        self.assertEqual(indexer._maximum_tx, 'sign-30')
+
+    def test_prefetch_on_walk(self):
+        indexer = FakePipelineIndexer(INDEXER_RECEIPT_CHUNK_LEN * 3 + 2)
+        iter_pages = indexer._iter_unknown_signature_pages
+
+        def _iter_slow_pages():
+            for tx_list in iter_pages():
+                yield tx_list
+                if len(tx_list) >= INDEXER_RECEIPT_CHUNK_LEN:
+                    # the walk goes on while the first full chunk is fetched
+                    self.assertTrue(indexer.fetch_event.wait(5))
+
+        indexer._iter_unknown_signature_pages = _iter_slow_pages
+        slot_list = [slot for slot, _, _ in indexer.get_tx_receipts()]
+        self.assertEqual(slot_list, [slot for slot in range(len(indexer.signature_list)) if slot != 5])
+        self.assertEqual(sorted(indexer.fetched_sign_list), sorted(sign for sign, _ in indexer.signature_list))
+
+    def test_checkpoint_on_walk(self):
+        indexer = FakePipelineIndexer(INDEXER_RECEIPT_CHUNK_LEN * 2)
+        newer_list = [(f'sign-{slot}', slot) for slot in reversed(range(100, 100 + INDEXER_RECEIPT_CHUNK_LEN * 2))]
+
+        def _iter_checkpointed_pages():
+            yield list(newer_list)
+            yield indexer.signature_list
+
+        indexer._iter_unknown_signature_pages = _iter_checkpointed_pages
+        slot_list = [slot for slot, _, _ in indexer.get_tx_receipts()]
+        self.assertEqual(slot_list, [slot for slot in range(len(indexer.signature_list)) if slot != 5])
+        self.assertEqual(indexer._maximum_tx, f'sign-{slot_list[-1]}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from ..common_neon.json_codec import StdJsonCodec, OrJsonCodec, get_json_codec
+
+
+class TestJsonCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.codec_list = [StdJsonCodec(), get_json_codec(OrJsonCodec.name)]
+
+    def test_round_trip(self):
+        obj = {'jsonrpc': '2.0', 'id': 1, 'result': {'lamports': 2 ** 64 - 1, 'data': ['0x' + '00' * 32, 'base64']}}
+        for codec in self.codec_list:
+            data = codec.dumps(obj)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(json.loads(data), obj)
+            self.assertEqual(codec.loads(data), obj)
+            self.assertEqual(codec.loads(memoryview(data)), obj)
+            self.assertEqual(codec.loads(codec.dumps_str(obj)), obj)
+
+    def test_long_int(self):
+        for codec in self.codec_list:
+            self.assertEqual(codec.loads_strict(b'{"id": 123456789012345678901234567890}'),
+                             {'id': 123456789012345678901234567890})
+            self.assertEqual(codec.loads_strict('[-123456789012345678901234567890]'), [-123456789012345678901234567890])
+            self.assertEqual(json.loads(codec.dumps({'value': 2 ** 70})), {'value': 2 ** 70})
+
+    def test_non_str_key(self):
+        for codec in self.codec_list:
+            self.assertEqual(json.loads(codec.dumps({1: 'a'})), {'1': 'a'})
+
+    def test_invalid_document(self):
+        for codec in self.codec_list:
+            with self.assertRaises(ValueError):
+                codec.loads(b'{"id": 1')
+            with self.assertRaises(ValueError):
+                codec.loads_strict(b'{"id": 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from ..memdb.log_index import LogIndex
+
+
+def _log(address: str, *topic_list: str) -> dict:
+    return {'address': address, 'topics': list(topic_list), 'data': '0x'}
+
+
+class TestLogIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LogIndex(64 * 1024, 256)
+        self.index.add(10, 'tx1', [_log('0xa', '0x1', '0x2'), _log('0xb', '0x1')])
+        self.index.add(11, 'tx2', [_log('0xa', '0x3')])
+        self.slot_list = [10, 11]
+
+    def _find(self, address_list, topic_list):
+        return self.index.find(address_list, topic_list, self.slot_list)
+
+    def test_find(self):
+        self.assertIsNone(self._find([], []))
+        self.assertEqual(self._find(['0xa'], []), {'tx1': {0}, 'tx2': {0}})
+        self.assertEqual(self._find(['0xa', '0xb'], []), {'tx1': {0, 1}, 'tx2': {0}})
+        self.assertEqual(self._find([], [['0x1']]), {'tx1': {0, 1}})
+        self.assertEqual(self._find(['0xa'], [['0x1', '0x3']]), {'tx1': {0}, 'tx2': {0}})
+        self.assertEqual(self._find(['0xb'], [['0x3']]), {})
+
+    def test_topic_position(self):
+        self.assertEqual(self._find([], [['0x2']]), {})
+        self.assertEqual(self._find([], [[], ['0x2']]), {'tx1': {0}})
+        self.assertEqual(self._find([], [['0x1'], ['0x2']]), {'tx1': {0}})
+        self.assertEqual(self._find([], [[], [], ['0x2']]), {})
+        self.assertIsNone(self._find([], [[], []]))
+        self.assertEqual(self._find(['0xc'], []), {})
+
+    def test_slot_range(self):
+        self.assertEqual(self.index.find(['0xa'], [], [11]), {'tx2': {0}})
+        self.assertEqual(self.index.find(['0xa'], [], []), {})
+
+    def test_add_twice(self):
+        self.index.add(11, 'tx2', [_log('0xa', '0x3')])
+        self.assertEqual(self._find(['0xa'], [['0x3']]), {'tx2': {0}})
+
+    def test_remove(self):
+        self.index.remove([10])
+        self.assertEqual(self._find(['0xa', '0xb'], []), {'tx2': {0}})
+        self.assertEqual(self._find([], [['0x1'], ['0x2']]), {})
+        self.assertEqual(len(self.index._log_id_list_by_address), 1)
+        self.assertEqual(len(self.index._log_id_list_by_topic), 1)
+
+    def test_many_logs_of_one_key(self):
+        # each slot is a separate small item, so the item doesn't grow with the count of logs of the key
+        index = LogIndex(64 * 1024, 1024)
+        for slot in range(300):
+            index.add(slot, f'tx{slot}', [_log('0xa', '0x1')] * 4)
+        result = index.find(['0xa'], [['0x1']], list(range(300)))
+        self.assertEqual(len(result), 300)
+        self.assertEqual(result['tx299'], {0, 1, 2, 3})
+        self.assertLess(max(len(value) for _, value in index._log_id_list_by_address.get_record_list()), 128)
+
+
+if __name__ == '__main__':
+    unittest.main()
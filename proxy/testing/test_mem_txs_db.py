@@ -0,0 +1,52 @@
+import pickle
+import unittest
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from ..memdb.shared_store import SharedDict
+from ..memdb.transactions_db import MemTxsDB
+
+
+def _make_tx(slot: int, sol_sign: str) -> SimpleNamespace:
+    return SimpleNamespace(neon_res=SimpleNamespace(slot=slot, sol_sign=sol_sign), used_ixs=[sol_sign])
+
+
+class TestMemTxsDBFinalized(unittest.TestCase):
+    def setUp(self):
+        for patcher in (patch.object(MemTxsDB, '_tx_by_neon_sign', SharedDict(64 * 1024, 16)),
+                        patch.object(MemTxsDB, '_tx_by_sol_sign', SharedDict(64 * 1024, 16)),
+                        patch.object(MemTxsDB, '_schedule_rm_finalized_txs')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.db = MagicMock()
+        self.txs_db = MemTxsDB(self.db)
+        for neon_sign, tx in (('0x01', _make_tx(10, 'sol-1')), ('0x02', _make_tx(20, 'sol-2'))):
+            data = pickle.dumps(tx)
+            self.txs_db._tx_by_neon_sign[neon_sign] = data
+            self.txs_db._tx_by_sol_sign[tx.neon_res.sol_sign] = data
+
+    def test_tx_by_neon_sign(self):
+        self.assertEqual(self.txs_db.get_tx_by_neon_sign('0x02', True, 15).neon_res.slot, 20)
+        self.db.get_tx_by_neon_sign.assert_not_called()
+
+        # the finalized tx isn't removed yet by the cleaner, it is read from the indexer DB
+        self.db.get_tx_by_neon_sign.return_value = 'indexed-tx'
+        self.assertEqual(self.txs_db.get_tx_by_neon_sign('0x01', True, 15), 'indexed-tx')
+        self.db.get_tx_by_neon_sign.assert_called_once_with('0x01')
+
+        self.db.get_sol_sign_list_by_neon_sign.return_value = ['indexed-sol-1']
+        self.assertEqual(self.txs_db.get_sol_sign_list_by_neon_sign('0x01', True, 15), ['indexed-sol-1'])
+        self.assertEqual(self.txs_db.get_sol_sign_list_by_neon_sign('0x02', True, 15), ['sol-2'])
+
+    def test_tx_list_by_sol_sign(self):
+        self.db.get_tx_list_by_sol_sign.return_value = ['indexed-tx']
+        tx_list = self.txs_db.get_tx_list_by_sol_sign(False, ['sol-1', 'sol-2', 'sol-3'], 15)
+        self.assertEqual(tx_list[0], 'indexed-tx')
+        self.assertEqual([tx.neon_res.slot for tx in tx_list[1:]], [20])
+        self.db.get_tx_list_by_sol_sign.assert_called_once_with(['sol-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
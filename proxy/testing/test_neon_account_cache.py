@@ -0,0 +1,86 @@
+import time
+import unittest
+
+from typing import NamedTuple
+
+from ..common_neon.neon_account_cache import NeonAccountCache
+
+
+class _CodeInfo(NamedTuple):
+    code_size: int
+    code: str
+
+
+class TestNeonAccountCache(unittest.TestCase):
+    address = '0x' + 'ab' * 20
+
+    def test_valid_in_slot(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=16, max_code_size_mb=1)
+        cache.observe_slot('confirmed', 100)
+        cache.put_account(self.address.upper(), 'confirmed', 100, time.monotonic(), 'info')
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (True, 'info'))
+        self.assertEqual(cache.get_account(self.address, 'finalized'), (False, None))
+
+        cache.observe_slot('finalized', 200)
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (True, 'info'))
+
+        cache.observe_slot('confirmed', 101)
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (False, None))
+
+    def test_nonexistent_account(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=16, max_code_size_mb=1)
+        cache.put_account(self.address, 'confirmed', 100, time.monotonic(), None)
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (True, None))
+
+    def test_ttl(self):
+        cache = NeonAccountCache(ttl_sec=0.05, max_account_cnt=16, max_code_size_mb=1)
+        cache.put_account(self.address, 'confirmed', 100, time.monotonic(), 'info')
+        time.sleep(0.1)
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (False, None))
+
+    def test_invalidate_own_write(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=16, max_code_size_mb=1)
+        cache.put_account(self.address, 'confirmed', 100, time.monotonic(), 'info')
+        fetch_time = time.monotonic()
+
+        cache.invalidate_account_list([self.address])
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (False, None))
+
+        # the fetch, which is started before the write, returns the old state
+        cache.put_account(self.address, 'confirmed', 100, fetch_time, 'old-info')
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (False, None))
+
+        cache.put_account(self.address, 'confirmed', 100, time.monotonic(), 'new-info')
+        self.assertEqual(cache.get_account(self.address, 'confirmed'), (True, 'new-info'))
+
+    def test_account_limit(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=2, max_code_size_mb=1)
+        for idx in range(3):
+            cache.put_account(f'0x{idx}', 'confirmed', 100, time.monotonic(), idx)
+        self.assertEqual(cache.get_account('0x0', 'confirmed'), (False, None))
+        self.assertEqual(cache.get_account('0x2', 'confirmed'), (True, 2))
+
+    def test_shared_code(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=16, max_code_size_mb=1)
+        code = '0x' + '60806040' * 16
+        cache.put_code('code-1', _CodeInfo(64, code))
+        cache.put_code('code-2', _CodeInfo(64, '0x' + '60806040' * 16))
+        self.assertIs(cache.get_code('code-1').code, cache.get_code('code-2').code)
+        self.assertEqual(cache._code_size, len(code))
+
+        # the code of uncompleted deployment
+        cache.put_code('code-3', _CodeInfo(64, '0x' + '00' * 64))
+        self.assertIsNone(cache.get_code('code-3'))
+
+    def test_code_memory_limit(self):
+        cache = NeonAccountCache(ttl_sec=10, max_account_cnt=16, max_code_size_mb=1)
+        code_size = 400 * 1024
+        for idx in range(4):
+            cache.put_code(f'code-{idx}', _CodeInfo(code_size, '0x' + f'{idx + 1:02x}' * code_size))
+        self.assertIsNone(cache.get_code('code-0'))
+        self.assertIsNotNone(cache.get_code('code-3'))
+        self.assertLessEqual(cache._code_size, 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import threading
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+from ..common_neon.errors import EthereumError
+from ..neon_rpc_api_model.neon_rpc_api_model import NeonRpcApiModel
+from ..neon_rpc_api_model.neon_rpc_api_dispatcher import NeonRpcApiDispatcher
+from ..plugin.neon_rpc_api_plugin import NeonRpcApiPlugin
+
+
+class TestAccountStateList(unittest.TestCase):
+    def setUp(self):
+        self.model = NeonRpcApiModel.__new__(NeonRpcApiModel)
+        self.model._solana = MagicMock()
+
+    def test_one_solana_request(self):
+        account = '0x' + '11' * 20
+        self.model._solana.get_neon_account_info_list.return_value = [
+            MagicMock(balance=10, trx_count=3), None, MagicMock(balance=7, trx_count=1)
+        ]
+        result_list = self.model.get_account_state_list([
+            ('eth_getBalance', [account, 'latest']),
+            ('eth_getTransactionCount', ['0x' + '22' * 20, 'latest']),
+            ('eth_getBalance', ['bad-account', 'latest']),
+            ('eth_getTransactionCount', [account, 'pending']),
+        ])
+
+        self.model._solana.get_neon_account_info_list.assert_called_once()
+        self.assertEqual(len(self.model._solana.get_neon_account_info_list.call_args[0][0]), 3)
+        self.assertEqual(result_list[0], hex(10))
+        self.assertEqual(result_list[1], hex(0))
+        self.assertIsInstance(result_list[2], EthereumError)
+        self.assertEqual(result_list[3], hex(1))
+
+    def test_solana_error(self):
+        self.model._solana.get_neon_account_info_list.side_effect = RuntimeError('solana failed')
+        result_list = self.model.get_account_state_list([('eth_getBalance', ['0x' + '11' * 20, 'latest'])])
+        self.assertEqual(result_list, [hex(0)])
+
+
+class TestBatchDispatch(unittest.TestCase):
+    def setUp(self):
+        dispatcher = NeonRpcApiDispatcher(pool_size=4, method_limit_dict={'eth_call': 1})
+        model = MagicMock(ACCOUNT_STATE_METHOD_LIST=['eth_getBalance', 'eth_getTransactionCount'])
+        for patcher in (patch.object(NeonRpcApiPlugin, 'getModel', return_value=model),
+                        patch.object(NeonRpcApiPlugin, 'getDispatcher', return_value=dispatcher),
+                        patch('proxy.plugin.neon_rpc_api_plugin.PrometheusExporter'),
+                        patch('proxy.plugin.neon_rpc_api_plugin.ASYNC_RPC_DISPATCH', True),
+                        patch('proxy.plugin.neon_rpc_api_plugin.ENABLE_PRIVATE_API', True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.plugin = NeonRpcApiPlugin(MagicMock(), MagicMock(), MagicMock(), MagicMock())
+        self.addCleanup(self.plugin.on_client_connection_close)
+
+    def _dispatch(self, request_list: list) -> list:
+        self.plugin._dispatch_request(json.dumps(request_list).encode('utf8'), 'test')
+        response = self.plugin._response_queue[0].result(timeout=5)
+        return json.loads(response.tobytes().split(b'\r\n\r\n', 1)[1])
+
+    def test_method_limit_of_entries(self):
+        lock = threading.Lock()
+        active_cnt = [0, 0]
+
+        def _eth_call(idx):
+            with lock:
+                active_cnt[0] += 1
+                active_cnt[1] = max(active_cnt)
+            threading.Event().wait(0.05)
+            with lock:
+                active_cnt[0] -= 1
+            return hex(idx)
+
+        self.plugin.model.eth_call.side_effect = _eth_call
+        self.plugin.model.eth_chainId.return_value = '0x6f'
+        request_list = [{'jsonrpc': '2.0', 'id': idx, 'method': 'eth_call', 'params': [idx]} for idx in range(4)]
+        request_list.append({'jsonrpc': '2.0', 'id': 4, 'method': 'eth_chainId'})
+
+        response_list = self._dispatch(request_list)
+        self.assertEqual([r['id'] for r in response_list], list(range(5)))
+        self.assertEqual([r['result'] for r in response_list], ['0x0', '0x1', '0x2', '0x3', '0x6f'])
+        # entries of the batch don't bypass the concurrency limit of eth_call
+        self.assertEqual(active_cnt[1], 1)
+
+    def test_account_state_entries(self):
+        self.plugin.model.get_account_state_list.return_value = ['0x1', '0x2']
+        request_list = [{'jsonrpc': '2.0', 'id': idx, 'method': 'eth_getBalance', 'params': ['0x1', 'latest']}
+                        for idx in range(2)]
+        response_list = self._dispatch(request_list)
+        self.assertEqual([r['result'] for r in response_list], ['0x1', '0x2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+from ..neon_rpc_api_model.neon_rpc_api_dispatcher import NeonRpcApiDispatcher, parse_method_limit_dict
+
+
+class TestNeonRpcApiDispatcher(unittest.TestCase):
+    def test_parse_method_limit_dict(self):
+        self.assertEqual(parse_method_limit_dict(''), {})
+        self.assertEqual(parse_method_limit_dict('eth_call:8, eth_sendRawTransaction:0,'),
+                         {'eth_call': 8, 'eth_sendRawTransaction': 1})
+
+    def test_method_limit(self):
+        dispatcher = NeonRpcApiDispatcher(pool_size=4, method_limit_dict={'eth_call': 1})
+        lock = threading.Lock()
+        event = threading.Event()
+        active_cnt = [0, 0]
+        order = []
+
+        def slow_call(idx: int):
+            def _call():
+                with lock:
+                    active_cnt[0] += 1
+                    active_cnt[1] = max(active_cnt)
+                event.wait(5)
+                with lock:
+                    active_cnt[0] -= 1
+                    order.append(idx)
+                return idx
+            return _call
+
+        future_list = [dispatcher.submit('eth_call', slow_call(idx)) for idx in range(3)]
+        self.assertEqual(dispatcher.get_pending_cnt('eth_call'), 2)
+
+        # a method without the limit isn't blocked by the queue of eth_call
+        self.assertEqual(dispatcher.submit('eth_chainId', lambda: '0x6f').result(timeout=5), '0x6f')
+
+        event.set()
+        self.assertEqual([f.result(timeout=5) for f in future_list], [0, 1, 2])
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(active_cnt[1], 1)
+        self.assertEqual(dispatcher.get_pending_cnt('eth_call'), 0)
+
+    def test_exception(self):
+        dispatcher = NeonRpcApiDispatcher(pool_size=1, method_limit_dict={'eth_call': 1})
+
+        def _fail():
+            raise RuntimeError('emulator failed')
+
+        with self.assertRaises(RuntimeError):
+            dispatcher.submit('eth_call', _fail).result(timeout=5)
+        self.assertEqual(dispatcher.submit('eth_call', lambda: 1).result(timeout=5), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
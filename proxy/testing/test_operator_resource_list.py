@@ -0,0 +1,170 @@
+import ctypes
+import multiprocessing as mp
+import os
+import threading
+import time
+import unittest
+
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from ..neon_rpc_api_model.operator_resource_list import OperatorResourceList
+
+
+class TestOperatorResourceList(unittest.TestCase):
+    SIGNER_CNT = 2
+
+    SLOT_CNT = 64
+    QUEUE_LEN = 8
+
+    def setUp(self) -> None:
+        resource_list = OperatorResourceList
+        resource_list._resource_list_len.value = 0
+        resource_list._resource_list = []
+        self.addCleanup(setattr, resource_list, '_resource_list', [])
+
+        signer_list = [MagicMock(name=f'signer-{i}') for i in range(self.SIGNER_CNT)]
+        patcher_list = [
+            patch('proxy.neon_rpc_api_model.operator_resource_list.get_solana_accounts', return_value=signer_list),
+            patch.object(resource_list, '_resource_state_array', mp.Array(ctypes.c_ubyte, self.SLOT_CNT, lock=False)),
+            patch.object(resource_list, '_check_time_array', mp.Array(ctypes.c_ulonglong, self.SLOT_CNT, lock=False)),
+            patch.object(resource_list, '_free_order_array', mp.Array(ctypes.c_ulonglong, self.SLOT_CNT, lock=False)),
+            patch.object(resource_list, '_waiting_pid_array', mp.Array(ctypes.c_int, self.QUEUE_LEN, lock=False)),
+        ]
+        for value in (resource_list._first_ticket, resource_list._next_ticket, resource_list._waiting_ticket_cnt):
+            value.value = 0
+        for patcher in patcher_list:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.stat_exporter = MagicMock()
+        OperatorResourceList.set_stat_exporter(self.stat_exporter)
+        self.addCleanup(OperatorResourceList.set_stat_exporter, None)
+        self.bad_idx_set = set()
+
+    def _new_resource_list(self) -> OperatorResourceList:
+        resource_list = OperatorResourceList(MagicMock())
+        resource_list._recheck_bad_resource_list = MagicMock(return_value=1)
+
+        def _init_perm_accounts(check_time, resource):
+            if resource.idx in self.bad_idx_set:
+                with resource_list._resource_cond:
+                    resource_list._resource_list_len.value -= 1
+                    resource_list._resource_state_array[resource.idx] = OperatorResourceList.RESOURCE_BAD
+                return False
+            resource_list._check_time_array[resource.idx] = check_time
+            resource.storage = resource.holder = resource.ether = f'account-{resource.idx}'
+            return True
+
+        resource_list._init_perm_accounts = _init_perm_accounts
+        return resource_list
+
+    @staticmethod
+    def _get_free_idx_list() -> List[int]:
+        resource_list = OperatorResourceList
+        idx_list = [idx for idx in range(len(resource_list._resource_list))
+                    if resource_list._resource_state_array[idx] == OperatorResourceList.RESOURCE_FREE]
+        return sorted(idx_list, key=lambda idx: resource_list._free_order_array[idx])
+
+    def _take_all(self) -> List[OperatorResourceList]:
+        taken_list = []
+        while True:
+            resource_list = self._new_resource_list()
+            taken_list.append(resource_list)
+            resource_list.get_active_resource()
+            if not len(self._get_free_idx_list()):
+                return taken_list
+
+    def test_fifo_order(self):
+        taken_list = self._take_all()
+        self.assertEqual(len(taken_list), len(OperatorResourceList._resource_list))
+
+        order_list = []
+        thread_list = []
+        for i in range(3):
+            def _wait(name=i):
+                with self._new_resource_list():
+                    order_list.append(name)
+
+            thread = threading.Thread(target=_wait)
+            thread.start()
+            thread_list.append(thread)
+            while OperatorResourceList._waiting_ticket_cnt.value < i + 1:
+                time.sleep(0.01)
+
+        for resource_list in taken_list[:1]:
+            resource_list.free_resource_info()
+        for thread in thread_list:
+            thread.join(timeout=10)
+
+        self.assertEqual(order_list, [0, 1, 2])
+        self.assertEqual(OperatorResourceList._waiting_ticket_cnt.value, 0)
+        self.stat_exporter.stat_commit_operator_resource_queue_len.assert_any_call(3)
+        self.assertGreater(max(c[0][0] for c in self.stat_exporter.stat_commit_operator_resource_wait.call_args_list), 0)
+
+    @patch('proxy.neon_rpc_api_model.operator_resource_list.OPERATOR_RESOURCE_WAIT_SEC', 0.1)
+    def test_deadline(self):
+        self._take_all()
+        with self.assertRaises(RuntimeError, msg='Timeout on waiting a free operator resource!'):
+            self._new_resource_list().get_active_resource()
+        self.assertEqual(OperatorResourceList._waiting_ticket_cnt.value, 0)
+
+    def test_prefer_checked_resource(self):
+        with self._new_resource_list() as resource:
+            checked_idx = resource.idx
+        self.assertNotEqual(self._get_free_idx_list()[0], checked_idx)
+
+        with self._new_resource_list() as resource:
+            self.assertEqual(resource.idx, checked_idx)
+
+    def test_no_resources(self):
+        self.bad_idx_set = set(range(self.SIGNER_CNT * 10))
+        with self.assertRaises(RuntimeError, msg='Operator has NO resources!'):
+            self._new_resource_list().get_active_resource()
+
+    @patch.object(OperatorResourceList, 'WAIT_CHECK_SEC', 0.01)
+    def test_skip_killed_process(self):
+        taken_list = self._take_all()
+        OperatorResourceList._waiting_pid_array[OperatorResourceList._next_ticket.value % self.QUEUE_LEN] = 2 ** 22 + 1
+        OperatorResourceList._next_ticket.value += 1
+        OperatorResourceList._waiting_ticket_cnt.value += 1
+        free_idx = taken_list[0].get_active_resource().idx
+        taken_list[0].free_resource_info()
+
+        with patch.object(OperatorResourceList, '_is_process_alive', return_value=False):
+            with self._new_resource_list() as resource:
+                self.assertEqual(resource.idx, free_idx)
+        self.assertEqual(OperatorResourceList._waiting_ticket_cnt.value, 0)
+
+    def test_queue_limit(self):
+        self._take_all()
+        resource_list = OperatorResourceList
+        first_ticket = resource_list._first_ticket.value
+        for ticket in range(first_ticket, first_ticket + self.QUEUE_LEN):
+            resource_list._waiting_pid_array[ticket % self.QUEUE_LEN] = os.getpid()
+        resource_list._next_ticket.value = first_ticket + self.QUEUE_LEN
+        resource_list._waiting_ticket_cnt.value = self.QUEUE_LEN
+
+        with self.assertRaises(RuntimeError, msg='Too many requests are waiting for a free operator resource!'):
+            self._new_resource_list().get_active_resource()
+        self.assertEqual(resource_list._waiting_ticket_cnt.value, self.QUEUE_LEN)
+
+        # tickets of finished requests are reused
+        resource_list._waiting_pid_array[first_ticket % self.QUEUE_LEN] = 0
+        resource_list._waiting_ticket_cnt.value -= 1
+        with patch.object(OperatorResourceList, 'WAIT_CHECK_SEC', 0.01), \
+             patch('proxy.neon_rpc_api_model.operator_resource_list.OPERATOR_RESOURCE_WAIT_SEC', 0.05):
+            with self.assertRaises(RuntimeError, msg='Timeout on waiting a free operator resource!'):
+                self._new_resource_list().get_active_resource()
+        self.assertEqual(resource_list._first_ticket.value, first_ticket + 1)
+        self.assertEqual(resource_list._next_ticket.value, first_ticket + self.QUEUE_LEN + 1)
+
+    def test_resource_limit(self):
+        with patch.object(OperatorResourceList, '_resource_state_array', mp.Array(ctypes.c_ubyte, 1, lock=False)):
+            with self.assertRaises(RuntimeError):
+                self._new_resource_list().get_active_resource()
+        self.assertEqual(len(OperatorResourceList._resource_list), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import psycopg2.extensions
+
+from ..indexer.pg_pool import PgConnectionPool, PgPoolTimeoutError
+
+
+def _new_connection(*args, **kwargs):
+    conn = MagicMock()
+    conn.closed = 0
+    conn.status = psycopg2.extensions.STATUS_READY
+    conn.options = kwargs.get('options')
+
+    def _close():
+        conn.closed = 1
+    conn.close.side_effect = _close
+    return conn
+
+
+@patch('proxy.indexer.pg_pool.psycopg2.connect', side_effect=_new_connection)
+class TestPgConnectionPool(unittest.TestCase):
+    def _new_pool(self, max_size=2, wait_timeout_sec=0.2, health_check_sec=30) -> PgConnectionPool:
+        pool = PgConnectionPool(max_size, wait_timeout_sec, 1000, health_check_sec)
+        pool.set_stat_exporter(MagicMock())
+        return pool
+
+    def test_reuse_connection(self, connect):
+        pool = self._new_pool()
+        with pool.connection() as conn1:
+            self.assertEqual(conn1.options, '-c statement_timeout=1000')
+        with pool.cursor():
+            pass
+        with pool.connection() as conn2:
+            self.assertIs(conn1, conn2)
+        self.assertEqual(connect.call_count, 1)
+        pool._stat_exporter.stat_commit_db_pool_connection_count.assert_called_with(1, 0)
+
+    def test_wait_for_free_connection(self, connect):
+        pool = self._new_pool(max_size=1, wait_timeout_sec=2)
+        conn_list = []
+
+        def _use():
+            with pool.connection() as conn:
+                conn_list.append(conn)
+
+        with pool.connection() as conn:
+            thread = threading.Thread(target=_use)
+            thread.start()
+            time.sleep(0.1)
+            self.assertEqual(len(conn_list), 0)
+        thread.join()
+        self.assertEqual(conn_list, [conn])
+        self.assertEqual(connect.call_count, 1)
+
+    def test_wait_timeout(self, connect):
+        pool = self._new_pool(max_size=1)
+        with pool.connection():
+            with self.assertRaises(PgPoolTimeoutError):
+                with pool.connection():
+                    pass
+        self.assertEqual(pool._stat_exporter.stat_commit_db_pool_wait.call_count, 1)
+
+    def test_reconnect_after_error(self, connect):
+        pool = self._new_pool()
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection() as conn1:
+                raise psycopg2.OperationalError('server closed the connection')
+        self.assertTrue(conn1.closed)
+
+        with pool.connection() as conn2:
+            self.assertIsNot(conn1, conn2)
+        self.assertEqual(connect.call_count, 2)
+
+    def test_health_check(self, connect):
+        pool = self._new_pool(health_check_sec=0)
+        with pool.connection() as conn1:
+            pass
+        conn1.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError('timeout')
+
+        with pool.connection() as conn2:
+            self.assertIsNot(conn1, conn2)
+        self.assertTrue(conn1.closed)
+
+    def test_rollback_unfinished_transaction(self, connect):
+        pool = self._new_pool()
+        with pool.connection() as conn:
+            conn.status = psycopg2.extensions.STATUS_READY + 1
+        conn.rollback.assert_called_once()
+
+    def test_is_connected(self, connect):
+        pool = self._new_pool()
+        self.assertTrue(pool.is_connected())
+        connect.side_effect = psycopg2.OperationalError('connection refused')
+        pool.close()
+        self.assertFalse(pool.is_connected())
+        self.assertEqual(pool._conn_cnt, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
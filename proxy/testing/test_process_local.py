@@ -0,0 +1,41 @@
+import itertools
+import multiprocessing as mp
+import unittest
+
+from ..common_neon.process_local import ProcessLocal
+
+
+class TestProcessLocal(unittest.TestCase):
+    def test_value_per_process(self):
+        counter = itertools.count(1)
+        value = ProcessLocal(lambda base: base + next(counter))
+
+        self.assertEqual(value.get(10), 11)
+        # arguments are used only on the creation
+        self.assertEqual(value.get(20), 11)
+
+        ctx = mp.get_context('fork')
+        queue = ctx.Queue()
+        process = ctx.Process(target=lambda: queue.put((value.get(30), value.get(40), len(value._inherited_list))))
+        process.start()
+        self.assertEqual(queue.get(timeout=5), (32, 32, 1))
+        process.join()
+
+        self.assertEqual(value.get(50), 11)
+        self.assertEqual(value._inherited_list, [])
+
+    def test_lock_after_fork(self):
+        value = ProcessLocal(lambda: 1)
+
+        ctx = mp.get_context('fork')
+        queue = ctx.Queue()
+        process = ctx.Process(target=lambda: queue.put(value.get()))
+        # the lock is taken by the thread of the parent process at the moment of fork
+        with value._lock:
+            process.start()
+        self.assertEqual(queue.get(timeout=5), 1)
+        process.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
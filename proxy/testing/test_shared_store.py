@@ -0,0 +1,168 @@
+import multiprocessing as mp
+import pickle
+import random
+import unittest
+
+from ..memdb.shared_store import SharedDict, SharedList, SharedValue, SharedStoreFullError
+
+
+def _write_items(shared_dict: SharedDict, start: int, cnt: int):
+    for i in range(start, start + cnt):
+        shared_dict[f'key-{i}'] = i
+
+
+class TestSharedStore(unittest.TestCase):
+    def test_dict(self):
+        shared_dict = SharedDict(4096, 64)
+        shared_dict['a'] = b'123'
+        shared_dict[10] = 20
+        self.assertEqual(shared_dict['a'], b'123')
+        self.assertEqual(shared_dict.get(10), 20)
+        self.assertIsNone(shared_dict.get('b'))
+        self.assertIn('a', shared_dict)
+        self.assertEqual(shared_dict.items(), [('a', b'123'), (10, 20)])
+
+        shared_dict['a'] = b'456'
+        self.assertEqual(shared_dict.items(), [(10, 20), ('a', b'456')])
+        del shared_dict[10]
+        self.assertNotIn(10, shared_dict)
+        with self.assertRaises(KeyError):
+            del shared_dict[10]
+        self.assertEqual(shared_dict.pop('a'), b'456')
+        self.assertEqual(len(shared_dict), 0)
+
+    def test_ring_wrap(self):
+        # the ring is much smaller than the written data, old deleted records should be reused
+        shared_dict = SharedDict(1024, 256)
+        expected_dict = {}
+        rnd = random.Random(1)
+        for i in range(5000):
+            key = rnd.randrange(8)
+            if rnd.random() < 0.3:
+                shared_dict.pop(key, None)
+                expected_dict.pop(key, None)
+            else:
+                value = bytes(rnd.randrange(40))
+                shared_dict[key] = value
+                expected_dict[key] = value
+        self.assertEqual(dict(shared_dict.items()), expected_dict)
+
+    def test_eviction(self):
+        shared_dict = SharedDict(4096, 8, is_cache=True)
+        for i in range(100):
+            shared_dict[i] = i
+        self.assertEqual(len(shared_dict), 12)
+        self.assertEqual(shared_dict.keys(), list(range(88, 100)))
+
+    def test_full_error(self):
+        shared_dict = SharedDict(4096, 8)
+        for i in range(12):
+            shared_dict[i] = i
+        with self.assertRaises(SharedStoreFullError):
+            shared_dict[12] = 12
+        shared_dict[0] = 100
+        self.assertEqual(shared_dict.keys(), list(range(1, 12)) + [0])
+
+        shared_dict = SharedDict(1024, 64)
+        shared_dict['a'] = bytes(500)
+        with self.assertRaises(SharedStoreFullError):
+            shared_dict['b'] = bytes(500)
+        self.assertEqual(shared_dict['a'], bytes(500))
+        self.assertEqual(len(shared_dict), 1)
+
+        # the space of the old value is reused by the new value of the key
+        shared_dict['a'] = bytes(900)
+        self.assertEqual(shared_dict['a'], bytes(900))
+
+    def test_compaction(self):
+        # live records fill the ring almost completely, they are compacted instead of eviction
+        shared_dict = SharedDict(1024, 64)
+        rnd = random.Random(2)
+        expected_dict = {}
+        for i in range(2000):
+            key = rnd.randrange(5)
+            value = bytes(rnd.randrange(130, 160))
+            shared_dict[key] = value
+            expected_dict[key] = value
+            self.assertEqual(dict(shared_dict.items()), expected_dict)
+
+    def test_lazy_allocation(self):
+        shared_dict = SharedDict(1024 * 1024, 64)
+        self.assertNotIn('_ring', shared_dict.__dict__)
+
+        ctx = mp.get_context('fork')
+        proc = ctx.Process(target=_write_items, args=(shared_dict, 0, 1))
+        proc.start()
+        proc.join()
+        # the forked process can't allocate the store of the parent
+        self.assertNotEqual(proc.exitcode, 0)
+
+        self.assertIsNone(shared_dict.get('key-0'))
+        self.assertIn('_ring', shared_dict.__dict__)
+
+    def test_list(self):
+        shared_list = SharedList(4096, 64)
+        shared_list.extend([1, 2, 3])
+        shared_list.append(4)
+        self.assertEqual(shared_list.pop(0), 1)
+        self.assertEqual(shared_list.pop(), 4)
+        self.assertEqual([v for v in shared_list], [2, 3])
+        self.assertEqual(len(shared_list), 2)
+        shared_list.clear()
+        self.assertEqual(len(shared_list), 0)
+
+    def test_list_order(self):
+        # records are moved around the small ring, but the list keeps the order of appending
+        shared_list = SharedList(512, 64)
+        expected_list = []
+        is_moved = False
+        rnd = random.Random(1)
+        for i in range(2000):
+            if (len(expected_list) < 8) and (rnd.random() < 0.6):
+                shared_list.append(i)
+                expected_list.append(i)
+            elif len(expected_list):
+                index = rnd.choice([0, -1, rnd.randrange(len(expected_list))])
+                self.assertEqual(shared_list.pop(index), expected_list.pop(index))
+            self.assertEqual(list(shared_list), expected_list)
+            ring_key_list = [pickle.loads(key) for key, _ in shared_list.get_record_list()]
+            is_moved |= (ring_key_list != sorted(ring_key_list))
+        self.assertTrue(is_moved)
+
+        shared_list.clear()
+        shared_list.extend([1, 2, 3])
+        key_list = shared_list.keys()
+        self.assertEqual(shared_list.pop_key(key_list[1]), 2)
+        self.assertEqual(shared_list.items(), [(key_list[0], 1), (key_list[2], 3)])
+
+        shared_list.clear()
+        with self.assertRaises(IndexError):
+            shared_list.pop()
+
+    def test_value(self):
+        shared_value = SharedValue(256, b'')
+        self.assertEqual(shared_value.value, b'')
+        for i in range(100):
+            shared_value.value = bytes(i % 30)
+        self.assertEqual(shared_value.value, bytes(99 % 30))
+
+        # the value is almost as big as the buffer
+        for i in range(100):
+            shared_value.value = bytes(200 + i % 3)
+        self.assertEqual(shared_value.value, bytes(200))
+
+    def test_processes(self):
+        shared_dict = SharedDict(1024 * 1024, 4096)
+        shared_dict.allocate()
+        ctx = mp.get_context('fork')
+        proc_list = [ctx.Process(target=_write_items, args=(shared_dict, i * 100, 100)) for i in range(4)]
+        for proc in proc_list:
+            proc.start()
+        for proc in proc_list:
+            proc.join()
+        self.assertEqual(len(shared_dict), 400)
+        self.assertEqual(shared_dict['key-399'], 399)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from unittest.mock import MagicMock
+
+from ..memdb.slot_index import SlotIndex, BackgroundCleaner
+
+
+class TestSlotIndex(unittest.TestCase):
+    def test_pop_in_slot_order(self):
+        index = SlotIndex(item_limit=64)
+        for slot, key in [(12, 'c'), (10, 'a'), (11, 'b'), (10, 'd'), (15, 'e')]:
+            index.add(slot, key)
+        self.assertEqual(index.get_min_slot(), 10)
+        self.assertEqual(index.get_key_list(11, 12), [(11, ['b']), (12, ['c'])])
+        self.assertEqual(index.get_key_list(None, 10), [(10, ['a', 'd'])])
+        self.assertEqual([slot for slot, _ in index.get_key_list(12, None)], [12, 15])
+
+        self.assertEqual(index.pop(11, slot_limit=16), [(10, ['a', 'd']), (11, ['b'])])
+        self.assertEqual(index.get_min_slot(), 12)
+
+        # the batch limit
+        self.assertEqual(index.pop(100, slot_limit=1), [(12, ['c'])])
+        self.assertEqual(index.pop(9, slot_limit=16), [])
+        self.assertEqual(index.pop(100, slot_limit=16), [(15, ['e'])])
+        self.assertIsNone(index.get_min_slot())
+
+        index.add(5, 'f')
+        self.assertEqual(index.get_key_list(None, None), [(5, ['f'])])
+
+    def test_pop_reads_evicted_slots(self):
+        index = SlotIndex(item_limit=4096)
+        for slot in range(1000, 3000, 2):
+            index.add(slot, str(slot))
+
+        index._key_list_by_slot = MagicMock(wraps=index._key_list_by_slot)
+        self.assertEqual(index.pop(1005, slot_limit=16), [(1000, ['1000']), (1002, ['1002']), (1004, ['1004'])])
+        self.assertEqual(index.get_min_slot(), 1006)
+        read_cnt = index._key_list_by_slot.get.call_count + index._key_list_by_slot.pop.call_count
+        self.assertLessEqual(read_cnt, 7)
+
+
+class TestBackgroundCleaner(unittest.TestCase):
+    def test_incremental_clean(self):
+        done_event = threading.Event()
+        step_list = []
+
+        def _clean() -> bool:
+            step_list.append(len(step_list))
+            if len(step_list) == 3:
+                done_event.set()
+                return False
+            return True
+
+        cleaner = BackgroundCleaner('test-cleaner', _clean, period_sec=60)
+        cleaner.wakeup()
+        self.assertTrue(done_event.wait(5))
+        self.assertEqual(step_list, [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
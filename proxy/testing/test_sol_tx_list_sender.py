@@ -0,0 +1,191 @@
+import contextlib
+import itertools
+import unittest
+
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+from ..common_neon.errors import EthereumError
+from ..common_neon.solana_interactor import SendResult
+from ..common_neon.solana_receipt_parser import SolTxError
+from ..common_neon.solana_tx_list_sender import SolTxListSender
+
+
+class FakeTx:
+    def __init__(self, idx: int):
+        self.idx = idx
+        self.recent_blockhash: Optional[str] = None
+        self.signatures: List[bytes] = []
+
+    def signature(self) -> bytes:
+        return self.signatures[0]
+
+
+class FakeSolana:
+    """Confirms CONFIRM_CNT transactions per status request in the order of sending"""
+
+    CONFIRM_CNT = 2
+
+    def __init__(self):
+        self.blockhash_counter = itertools.count(1)
+        self.invalid_blockhash_set = set()
+        self.send_list: List[List[int]] = []
+        self.in_flight_dict: Dict[str, FakeTx] = {}
+        self.confirmed_dict: Dict[str, FakeTx] = {}
+        self.max_in_flight_cnt = 0
+        self.lost_idx_set = set()
+        self.bad_blockhash_idx_set = set()
+        self.error_idx_set = set()
+        # count of receipt requests, which return None for the transaction
+        self.no_receipt_cnt_dict: Dict[int, int] = {}
+        self.status_sign_list: List[str] = []
+        self.near_expiry_blockhash_set = set()
+        self.wait_any_list: List[bool] = []
+        self.stat_exporter = MagicMock()
+
+    def pin_endpoint(self):
+        return contextlib.nullcontext()
+
+    def send_transaction_list(self, _signer, tx_list, _skip_preflight, _commitment) -> List[SendResult]:
+        self.send_list.append([tx.idx for tx in tx_list])
+        blockhash = f'hash-{next(self.blockhash_counter)}'
+        result_list = []
+        for tx in tx_list:
+            if not tx.recent_blockhash:
+                tx.recent_blockhash = blockhash
+                tx.signatures.clear()
+            if not tx.signatures:
+                tx.signatures.append(f'{tx.idx}:{tx.recent_blockhash}'.encode('utf-8'))
+
+            if tx.idx in self.bad_blockhash_idx_set:
+                self.bad_blockhash_idx_set.remove(tx.idx)
+                result_list.append(SendResult(error={'data': {'err': 'BlockhashNotFound'}}, result=None))
+                continue
+
+            sign = tx.signature().decode('utf-8')
+            if tx.idx in self.lost_idx_set:
+                self.lost_idx_set.remove(tx.idx)
+                self.invalid_blockhash_set.add(tx.recent_blockhash)
+            else:
+                self.in_flight_dict[sign] = tx
+            result_list.append(SendResult(error=None, result=sign))
+        self.max_in_flight_cnt = max(self.max_in_flight_cnt, len(self.in_flight_dict))
+        return result_list
+
+    def wait_confirmation(self, _watch, _timeout, is_any=False) -> float:
+        self.wait_any_list.append(is_any)
+        return 0
+
+    def get_confirmed_sign_list(self, sign_list: List[str]):
+        self.status_sign_list += sign_list
+        for sign in list(self.in_flight_dict.keys())[:self.CONFIRM_CNT]:
+            self.confirmed_dict[sign] = self.in_flight_dict.pop(sign)
+        return 1, [sign for sign in sign_list if sign in self.confirmed_dict]
+
+    def get_multiple_receipts(self, sign_list: List[str]):
+        receipt_list = []
+        for sign in sign_list:
+            idx = self.confirmed_dict[sign].idx
+            if self.no_receipt_cnt_dict.get(idx, 0) > 0:
+                self.no_receipt_cnt_dict[idx] -= 1
+                receipt_list.append(None)
+            elif idx in self.error_idx_set:
+                receipt_list.append({'meta': {'err': {'InstructionError': [0, 'Custom']}, 'logMessages': []}})
+            else:
+                receipt_list.append({'meta': {'err': None, 'logMessages': []}, 'transaction': {'signatures': [sign]}})
+        return receipt_list
+
+    def is_blockhash_valid(self, blockhash: str) -> bool:
+        return blockhash not in self.invalid_blockhash_set
+
+    def is_blockhash_near_expiry(self, blockhash: Optional[str]) -> bool:
+        return blockhash in self.near_expiry_blockhash_set
+
+    def get_recent_blockhash(self) -> str:
+        return f'hash-{next(self.blockhash_counter)}'
+
+
+class TestSolTxListSender(unittest.TestCase):
+    def setUp(self) -> None:
+        self.solana = FakeSolana()
+        self.s = MagicMock()
+        self.s.solana = self.solana
+        self.s.waiter = None
+
+    def _send(self, tx_cnt: int, window_size: int) -> SolTxListSender:
+        tx_list = [FakeTx(idx) for idx in range(tx_cnt)]
+        return SolTxListSender(self.s, tx_list, 'Test', window_size=window_size).send(MagicMock())
+
+    def test_sliding_window(self):
+        sender = self._send(tx_cnt=20, window_size=6)
+
+        self.assertEqual(len(sender.success_sign_list), 20)
+        self.assertLessEqual(self.solana.max_in_flight_cnt, 6)
+        # the next transactions are sent after each confirmation, not after the whole wave
+        self.assertEqual(self.solana.send_list[0], list(range(6)))
+        self.assertEqual(self.solana.send_list[1], [6, 7])
+        self.assertEqual(sorted(itertools.chain(*self.solana.send_list)), list(range(20)))
+        # the wait ends on the confirmation of any transaction in the window
+        self.assertTrue(all(self.solana.wait_any_list))
+
+        stat_exporter = self.solana.stat_exporter
+        self.assertEqual(stat_exporter.stat_commit_sol_tx_send_window.call_count, len(self.solana.send_list))
+        stat_exporter.stat_commit_sol_tx_send_time.assert_called_once()
+
+    def test_resend_bad_blockhash(self):
+        self.solana.bad_blockhash_idx_set = {1, 3}
+        sender = self._send(tx_cnt=5, window_size=5)
+
+        self.assertEqual(len(sender.success_sign_list), 5)
+        self.assertEqual(self.solana.send_list, [[0, 1, 2, 3, 4], [1, 3]])
+        self.assertEqual(sender._retry_idx, 0)
+        # the blockhash for resending is requested from the node
+        self.assertEqual({sign for sign in self.solana.confirmed_dict if sign.startswith(('1:', '3:'))},
+                         {'1:hash-2', '3:hash-2'})
+
+    def test_resign_near_expiry(self):
+        tx_list = [FakeTx(idx) for idx in range(3)]
+        for tx in tx_list:
+            tx.recent_blockhash = 'old-hash' if tx.idx != 1 else 'good-hash'
+            tx.signatures.append(f'{tx.idx}:{tx.recent_blockhash}'.encode('utf-8'))
+        self.solana.near_expiry_blockhash_set = {'old-hash'}
+
+        SolTxListSender(self.s, tx_list, 'Test').send(MagicMock())
+        self.assertEqual(set(self.solana.confirmed_dict.keys()), {'0:hash-1', '1:good-hash', '2:hash-1'})
+
+    @patch('proxy.common_neon.solana_tx_list_sender.CONFIRM_TIMEOUT', 0)
+    def test_resend_expired(self):
+        self.solana.lost_idx_set = {2}
+        self.solana.CONFIRM_CNT = 3
+        sender = self._send(tx_cnt=4, window_size=4)
+
+        self.assertEqual(len(sender.success_sign_list), 4)
+        self.assertEqual(self.solana.send_list, [[0, 1, 2, 3], [2]])
+        self.assertEqual([sign for sign in self.solana.confirmed_dict if sign.startswith('2:')], ['2:hash-2'])
+
+    def test_stop_on_error(self):
+        self.solana.error_idx_set = {0}
+        with self.assertRaises(SolTxError):
+            self._send(tx_cnt=20, window_size=4)
+        self.assertEqual(self.solana.send_list, [[0, 1, 2, 3]])
+
+    @patch('proxy.common_neon.solana_tx_list_sender.CONFIRMATION_CHECK_DELAY', 0)
+    def test_wait_receipt(self):
+        self.solana.no_receipt_cnt_dict = {1: 3}
+        sender = self._send(tx_cnt=4, window_size=2)
+
+        self.assertEqual(len(sender.success_sign_list), 4)
+        # the confirmed transaction isn't sent again and its status isn't requested again
+        self.assertEqual(sorted(itertools.chain(*self.solana.send_list)), list(range(4)))
+        self.assertEqual(self.solana.status_sign_list.count('1:hash-1'), 1)
+
+    @patch('proxy.common_neon.solana_tx_list_sender.CONFIRM_TIMEOUT', 0)
+    def test_no_receipt(self):
+        self.solana.no_receipt_cnt_dict = {1: 100}
+        with self.assertRaises(EthereumError):
+            self._send(tx_cnt=2, window_size=2)
+        self.assertEqual(self.solana.send_list, [[0, 1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
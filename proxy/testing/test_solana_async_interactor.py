@@ -0,0 +1,133 @@
+import asyncio
+import json
+import unittest
+
+from unittest.mock import patch
+
+from ..common_neon.solana_async_interactor import AsyncSolanaInteractor, get_async_loop_thread
+
+
+class _SolanaStub:
+    """Minimal HTTP/1.1 JSON-RPC server, it answers each request by the list of its ids"""
+
+    def __init__(self):
+        self.connection_cnt = 0
+        self.post_cnt = 0
+        self.fail_cnt = 0
+        self.delay_sec = 0.0
+        self._server = None
+        self._task_list = []
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}/'
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for task in self._task_list:
+            task.cancel()
+        await asyncio.gather(*self._task_list, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connection_cnt += 1
+        self._task_list.append(asyncio.current_task())
+        try:
+            while True:
+                if not await reader.readline():
+                    break
+                content_len = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, _, value = line.decode().partition(':')
+                    if name.lower() == 'content-length':
+                        content_len = int(value)
+                request = json.loads(await reader.readexactly(content_len))
+                self.post_cnt += 1
+                await asyncio.sleep(self.delay_sec)
+
+                if self.fail_cnt > 0:
+                    self.fail_cnt -= 1
+                    status, body = 503, b'busy'
+                elif isinstance(request, list):
+                    status, body = 200, json.dumps([{'id': r['id'], 'result': r['params']} for r in request]).encode()
+                else:
+                    status, body = 200, json.dumps({'id': request['id'], 'result': request['method']}).encode()
+
+                writer.write(f'HTTP/1.1 {status} OK\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+class TestAsyncSolanaInteractor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.stub = _SolanaStub()
+        url = self.loop.run_until_complete(self.stub.start())
+        self.solana = AsyncSolanaInteractor(url, max_request_cnt=2)
+
+    def tearDown(self) -> None:
+        self.solana.close()
+        self.loop.run_until_complete(self.stub.stop())
+        self.loop.close()
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            response = self.loop.run_until_complete(self.solana._send_rpc_request('getSlot'))
+            self.assertEqual(response['result'], 'getSlot')
+        self.assertEqual(self.stub.post_cnt, 5)
+        self.assertEqual(self.stub.connection_cnt, 1)
+
+    def test_concurrency_limit(self):
+        async def _run():
+            return await asyncio.gather(*[self.solana._send_rpc_request('getSlot') for _ in range(6)])
+
+        self.stub.delay_sec = 0.05
+        response_list = self.loop.run_until_complete(_run())
+        self.assertEqual(len(response_list), 6)
+        self.assertEqual(self.stub.connection_cnt, 2)
+
+    def test_batch_split(self):
+        params_list = [['x' * 1024, idx] for idx in range(200)]
+        response_list = self.loop.run_until_complete(self.solana._send_rpc_batch_request('getTransaction', params_list))
+        self.assertEqual([r['result'] for r in response_list], params_list)
+        self.assertGreater(self.stub.post_cnt, 1)
+
+    @patch('proxy.common_neon.solana_interactor.SOLANA_RETRY_BASE_DELAY_SEC', 0.001)
+    def test_retry_on_http_error(self):
+        self.stub.fail_cnt = 2
+        response = self.loop.run_until_complete(self.solana._send_rpc_request('getSlot'))
+        self.assertEqual(response['result'], 'getSlot')
+        self.assertEqual(self.stub.post_cnt, 3)
+
+    def test_cancel_closes_connection(self):
+        self.stub.delay_sec = 10
+
+        async def _run():
+            task = asyncio.ensure_future(self.solana._send_rpc_request('getSlot'))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.loop.run_until_complete(_run())
+        self.assertEqual(len(self.solana._pool._idle_list), 0)
+
+    def test_loop_thread(self):
+        async def _sum(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertEqual(get_async_loop_thread().run(_sum(1, 2)), 3)
+        with self.assertRaises(asyncio.TimeoutError):
+            get_async_loop_thread().run(asyncio.sleep(10), timeout=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+import base58
+
+from unittest.mock import patch
+
+from ..common_neon.utils import decode_base58
+from ..indexer.indexer import SolanaIxInfo
+
+
+EVM_LOADER_ID = '53DfF883gyixYNXnM7s5xhdeyV8mVk9T4i2hGV9vG9io'
+SYSTEM_PROGRAM = '11111111111111111111111111111111'
+
+
+def _ix(program_idx: int, data: bytes, account_list=None) -> dict:
+    return {'programIdIndex': program_idx, 'accounts': account_list or [0], 'data': base58.b58encode(data).decode('utf-8')}
+
+
+def _receipt(ix_list, inner_ix_list) -> dict:
+    return {
+        'slot': 100,
+        'meta': {
+            'err': None,
+            'innerInstructions': inner_ix_list,
+            'logMessages': [],
+            'preBalances': [10], 'postBalances': [5],
+            'preTokenBalances': [], 'postTokenBalances': [],
+        },
+        'transaction': {
+            'message': {'accountKeys': ['operator', EVM_LOADER_ID, SYSTEM_PROGRAM], 'instructions': ix_list},
+            'signatures': ['sign'],
+        },
+    }
+
+
+class TestSolanaIxInfo(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('proxy.indexer.indexer.EVM_LOADER_ID', EVM_LOADER_ID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_iter_evm_ixs(self):
+        tx = _receipt(
+            ix_list=[_ix(2, b'\x02'), _ix(1, b'\x13outer-0', [0, 2]), _ix(2, b'\x02')],
+            inner_ix_list=[
+                {'index': 2, 'instructions': [_ix(1, b'\x07event-2'), _ix(2, b'\x02')]},
+                {'index': 1, 'instructions': [_ix(2, b'\x02'), _ix(1, b'\x06result-1')]},
+            ]
+        )
+        ix_info = SolanaIxInfo(sign='sign', slot=100, tx=tx)
+
+        result_list = []
+        for evm_ix_idx in ix_info.iter_ixs():
+            self.assertIsInstance(ix_info.ix_data, memoryview)
+            result_list.append((evm_ix_idx, ix_info.sign.idx, ix_info.evm_ix, bytes(ix_info.ix_data[1:])))
+        self.assertEqual(result_list, [(0, 1, 0x13, b'outer-0'), (1, 1, 0x06, b'result-1'), (2, 2, 0x07, b'event-2')])
+        self.assertIsNone(ix_info.ix_data)
+
+        # the data is decoded once
+        first_data_list = [ix_info.ix_data for _ in ix_info.iter_ixs()]
+        self.assertTrue(all(a is b for a, b in zip(first_data_list, [ix_info.ix_data for _ in ix_info.iter_ixs()])))
+
+    def test_accounts(self):
+        tx = _receipt(ix_list=[_ix(1, b'\x13', [2, 0, 1])], inner_ix_list=[])
+        ix_info = SolanaIxInfo(sign='sign', slot=100, tx=tx)
+        for _ in ix_info.iter_ixs():
+            self.assertEqual(ix_info.get_account_cnt(), 3)
+            self.assertEqual(ix_info.get_account(0), SYSTEM_PROGRAM)
+            self.assertEqual(ix_info.get_account(3), '')
+            self.assertEqual(ix_info.get_account_list(1), ['operator', EVM_LOADER_ID])
+
+    def test_skip_bad_ixs(self):
+        tx = _receipt(ix_list=[_ix(1, b''), {'accounts': [], 'data': ''}, _ix(1, b'\x13')], inner_ix_list=[])
+        ix_info = SolanaIxInfo(sign='sign', slot=100, tx=tx)
+        self.assertEqual([(idx, ix_info.sign.idx) for idx in ix_info.iter_ixs()], [(0, 2)])
+
+    def test_invalid_receipt(self):
+        ix_info = SolanaIxInfo(sign='sign', slot=100, tx=None)
+        self.assertEqual(list(ix_info.iter_ixs()), [])
+
+
+class TestDecodeBase58(unittest.TestCase):
+    def test_decode(self):
+        for data in (b'', b'\0', b'\0\0\x01', bytes(range(256)), b'\xff' * 1000):
+            self.assertEqual(decode_base58(base58.b58encode(data).decode('utf-8')), data)
+            self.assertEqual(decode_base58(base58.b58encode(data)), data)
+
+    def test_invalid_char(self):
+        with self.assertRaises(ValueError):
+            decode_base58('3Bxs4h0')
+
+
+if __name__ == '__main__':
+    unittest.main()
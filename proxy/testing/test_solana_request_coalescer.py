@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from ..common_neon.solana_request_coalescer import SingleFlight, AccountInfoBatcher
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_merge_concurrent_calls(self):
+        flight = SingleFlight('getLatestBlockhash')
+        flight.set_stat_exporter(MagicMock())
+        call_cnt = 0
+        release_event = threading.Event()
+
+        def _fetch():
+            nonlocal call_cnt
+            call_cnt += 1
+            release_event.wait()
+            return {'slot': 10}
+
+        with ThreadPoolExecutor(4) as executor:
+            future_list = [executor.submit(flight.do, 'confirmed', _fetch) for _ in range(4)]
+            time.sleep(0.1)
+            release_event.set()
+            result_list = [future.result() for future in future_list]
+
+        self.assertEqual(call_cnt, 1)
+        self.assertEqual(result_list, [{'slot': 10}] * 4)
+        sent_cnt = sum(c.args[2] for c in flight._stat_exporter.stat_commit_solana_request_merge.call_args_list)
+        self.assertEqual(sent_cnt, 1)
+
+        # the next call after the completion is sent again
+        flight.do('confirmed', _fetch)
+        self.assertEqual(call_cnt, 2)
+
+    def test_error_and_copy(self):
+        flight = SingleFlight('getBlock', is_copy_result=True)
+        release_event = threading.Event()
+
+        def _fail():
+            release_event.wait()
+            raise RuntimeError('node is down')
+
+        with ThreadPoolExecutor(2) as executor:
+            future_list = [executor.submit(flight.do, 1, _fail) for _ in range(2)]
+            time.sleep(0.1)
+            release_event.set()
+            for future in future_list:
+                self.assertRaises(RuntimeError, future.result)
+
+        result = {'slot': 1}
+        self.assertIsNot(flight.do(1, lambda: result), result)
+
+
+class TestAccountInfoBatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.request_list = []
+        self.release_event = threading.Event()
+
+        def _fetch(pubkey_list, length, commitment):
+            self.request_list.append([str(pubkey) for pubkey in pubkey_list])
+            self.release_event.wait()
+            return [f'info-{pubkey}' for pubkey in pubkey_list]
+
+        self.batcher = AccountInfoBatcher(_fetch, max_batch_size=3)
+
+    def test_idle_lookup_is_sent_at_once(self):
+        self.release_event.set()
+        self.assertEqual(self.batcher.get('a', 256, 'confirmed'), 'info-a')
+        self.assertEqual(self.request_list, [['a']])
+
+    def test_fold_lookups_while_in_flight(self):
+        with ThreadPoolExecutor(8) as executor:
+            future_list = [executor.submit(self.batcher.get, key, 256, 'confirmed') for key in ('a', 'b')]
+            time.sleep(0.1)
+            # both slots for batches are busy, the next lookups are collected
+            future_list += [executor.submit(self.batcher.get, key, 256, 'confirmed') for key in ('c', 'd', 'c', 'e')]
+            time.sleep(0.1)
+            self.release_event.set()
+            result_list = [future.result() for future in future_list]
+
+        self.assertEqual(result_list, ['info-a', 'info-b', 'info-c', 'info-d', 'info-c', 'info-e'])
+        self.assertEqual(len(self.request_list), 3)
+        self.assertEqual(sorted(self.request_list[2]), ['c', 'd', 'e'])
+
+    def test_error(self):
+        self.batcher._fetch_func = MagicMock(return_value=[])
+        with self.assertRaises(RuntimeError):
+            self.batcher.get('a', 256, 'confirmed')
+
+
+if __name__ == '__main__':
+    unittest.main()
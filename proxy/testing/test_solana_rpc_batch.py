@@ -0,0 +1,122 @@
+import itertools
+import json
+import threading
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from ..common_neon.solana_interactor import SolanaInteractor
+from ..common_neon.solana_rpc_batch import RpcBatch, RpcBatchSizer
+
+
+class TestRpcBatch(unittest.TestCase):
+    def test_split_and_order(self):
+        batch = RpcBatch('getBalance', [[f'account-{idx}'] for idx in range(5)], itertools.count())
+        chunk_list = batch.split(item_limit=2)
+        self.assertEqual([len(chunk) for chunk in chunk_list], [2, 2, 1])
+
+        request_list = [r for chunk in chunk_list for r in json.loads(chunk.body)]
+        self.assertEqual([r['params'] for r in request_list], [[f'account-{idx}'] for idx in range(5)])
+
+        for chunk in reversed(chunk_list):
+            response_list = [{'id': r['id'], 'result': r['params'][0]} for r in json.loads(chunk.body)]
+            batch.add_response_list(chunk, list(reversed(response_list)))
+        self.assertEqual([r['result'] for r in batch.get_response_list()], [f'account-{idx}' for idx in range(5)])
+
+    def test_split_by_size(self):
+        batch = RpcBatch('getBalance', [['a' * 100] for _ in range(4)], itertools.count())
+        chunk_list = batch.split(item_limit=100, max_size=400)
+        self.assertEqual([len(chunk) for chunk in chunk_list], [2, 2])
+
+    def test_invalid_response(self):
+        batch = RpcBatch('getBalance', [['a'], ['b']], itertools.count())
+        chunk = batch.split(item_limit=100)[0]
+        with self.assertRaises(RuntimeError):
+            batch.add_response_list(chunk, {'error': 'rate limit'})
+        with self.assertRaises(RuntimeError):
+            batch.add_response_list(chunk, [{'id': 100}, {'id': 1}])
+
+
+class TestRpcBatchSizer(unittest.TestCase):
+    def test_adapt_limit(self):
+        sizer = RpcBatchSizer(target_latency_sec=1)
+        limit = sizer.get_limit('getTransaction')
+        sizer.on_response('getTransaction', limit, 0.1)
+        self.assertGreater(sizer.get_limit('getTransaction'), limit)
+
+        # the partial chunk doesn't prove anything
+        limit = sizer.get_limit('getTransaction')
+        sizer.on_response('getTransaction', 1, 0.1)
+        self.assertEqual(sizer.get_limit('getTransaction'), limit)
+
+        sizer.on_response('getTransaction', 40, 2)
+        self.assertEqual(sizer.get_limit('getTransaction'), 20)
+        sizer.on_limit_error('getTransaction', 10)
+        self.assertEqual(sizer.get_limit('getTransaction'), 5)
+        self.assertEqual(sizer.get_limit('getBlock'), RpcBatchSizer.START_ITEM_LIMIT)
+
+
+def _http_error(status: int) -> requests.exceptions.HTTPError:
+    response = MagicMock(status_code=status, headers={'Retry-After': '0'})
+    return requests.exceptions.HTTPError(f'{status} error for url: http://solana:8899', response=response)
+
+
+class TestSolanaBatchRequest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.solana = SolanaInteractor('http://solana:8899')
+        self.chunk_size_list = []
+        self.error_list = []
+        self.lock = threading.Lock()
+
+        def _post(body, method=None):
+            request_list = json.loads(body)
+            with self.lock:
+                self.chunk_size_list.append(len(request_list))
+                error = self.error_list.pop(0) if len(self.error_list) else None
+            if error is not None:
+                raise _http_error(error)
+            response_list = [{'jsonrpc': '2.0', 'id': r['id'], 'result': r['params'][0]} for r in request_list]
+            return MagicMock(content=json.dumps(list(reversed(response_list))).encode('utf-8'))
+
+        self.solana._endpoint_pool.post = _post
+
+    def test_concurrent_chunks(self):
+        self.solana._batch_sizer._limit_dict['getBalance'] = 10
+        response_list = self.solana._send_rpc_batch_request('getBalance', [[idx] for idx in range(95)])
+        self.assertEqual([r['result'] for r in response_list], list(range(95)))
+        self.assertEqual(sorted(self.chunk_size_list), [5] + [10] * 9)
+
+    def test_split_too_large_chunk(self):
+        self.error_list = [413]
+        response_list = self.solana._send_rpc_batch_request('getBalance', [[idx] for idx in range(8)])
+        self.assertEqual([r['result'] for r in response_list], list(range(8)))
+        self.assertEqual(self.chunk_size_list, [8, 4, 4])
+        self.assertLess(self.solana._batch_sizer.get_limit('getBalance'), 8)
+
+    def test_retry_rate_limit(self):
+        self.error_list = [429]
+        response_list = self.solana._send_rpc_batch_request('getBalance', [[idx] for idx in range(8)])
+        self.assertEqual([r['result'] for r in response_list], list(range(8)))
+        self.assertEqual(self.chunk_size_list, [8, 8])
+
+    def test_too_large_request(self):
+        self.error_list = [413]
+        with self.assertRaises(Exception) as ctx:
+            self.solana._send_rpc_batch_request('getBalance', [[0]])
+        self.assertNotIn('http://solana:8899', str(ctx.exception))
+
+    @patch('proxy.common_neon.solana_interactor.time.sleep')
+    def test_retry_backoff(self, sleep_mock):
+        self.error_list = [503, 503]
+        response_list = self.solana._send_rpc_batch_request('getBalance', [[7]])
+        self.assertEqual([r['result'] for r in response_list], [7])
+        self.assertEqual(sleep_mock.call_count, 2)
+        # the backoff with the full jitter instead of the fixed second between attempts
+        for (delay,), _ in sleep_mock.call_args_list:
+            self.assertLessEqual(delay, 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import socket
+import threading
+import time
+import unittest
+
+from ..common.utils import build_websocket_handshake_response
+from ..http.parser import HttpParser, httpParserTypes
+from ..http.websocket import WebsocketFrame, websocketOpcodes
+from ..common_neon.solana_subscriber import SolanaSubscriber
+
+
+class _WebsocketServerStub:
+    """Solana websocket with the immediate confirmation of signatures from confirmed_set"""
+
+    def __init__(self):
+        self.confirmed_set = set()
+        self.method_list = []
+        self._conn = None
+        self._is_connected = threading.Event()
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(1)
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            raw = b''
+            while b'\r\n\r\n' not in raw:
+                raw += conn.recv(4096)
+            request = HttpParser(httpParserTypes.REQUEST_PARSER)
+            request.parse(raw)
+            conn.sendall(build_websocket_handshake_response(
+                WebsocketFrame.key_to_accept(request.header(b'Sec-WebSocket-Key'))))
+            self._conn = conn
+            self._is_connected.set()
+            self._read(conn)
+
+    def _read(self, conn: socket.socket):
+        raw = b''
+        while True:
+            try:
+                data = conn.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            raw += data
+            while WebsocketFrame.frame_size(raw) is not None:
+                frame = WebsocketFrame()
+                raw = frame.parse(raw)
+                assert frame.masked
+                if frame.opcode == websocketOpcodes.TEXT_FRAME:
+                    self._on_request(json.loads(frame.data))
+
+    def _on_request(self, request):
+        method = request['method']
+        self.method_list.append(method)
+        subscription_id = len(self.method_list)
+        self.send({'jsonrpc': '2.0', 'id': request['id'], 'result': subscription_id})
+        if (method == 'signatureSubscribe') and (request['params'][0] in self.confirmed_set):
+            self.notify('signatureNotification', subscription_id, {'context': {'slot': 77}, 'value': {'err': None}})
+
+    def wait_connect(self):
+        assert self._is_connected.wait(5)
+        self._is_connected.clear()
+        time.sleep(0.1)
+
+    def send(self, msg):
+        self._conn.sendall(WebsocketFrame.text(json.dumps(msg).encode('utf-8')))
+
+    def notify(self, method: str, subscription_id: int, result):
+        self.send({'jsonrpc': '2.0', 'method': method, 'params': {'result': result, 'subscription': subscription_id}})
+
+    def disconnect(self):
+        self._conn.shutdown(socket.SHUT_RDWR)
+        self._conn.close()
+
+
+class TestSolanaSubscriber(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = _WebsocketServerStub()
+        self.subscriber = SolanaSubscriber(f'ws://127.0.0.1:{self.server.port}/')
+        self.server.wait_connect()
+
+    def test_frame_size(self):
+        frame = WebsocketFrame.text(b'a' * 200)
+        self.assertIsNone(WebsocketFrame.frame_size(frame[:100]))
+        self.assertEqual(WebsocketFrame.frame_size(frame + frame), len(frame))
+
+    def test_root_slot(self):
+        self.assertTrue(self.subscriber.is_connected)
+        self.assertEqual(self.server.method_list, ['slotSubscribe'])
+        self.server.notify('slotNotification', 1, {'parent': 99, 'root': 68, 'slot': 100})
+        time.sleep(0.1)
+        self.assertEqual(self.subscriber.get_root_slot(), 68)
+
+    def test_program_logs(self):
+        self.subscriber.subscribe_program_logs('evm-loader', 'finalized')
+        self.assertFalse(self.subscriber.wait_program_logs(0.1))
+        self.assertEqual(self.server.method_list, ['slotSubscribe', 'logsSubscribe'])
+
+        self.server.notify('logsNotification', 2, {'context': {'slot': 1}, 'value': {'signature': 'sig'}})
+        self.assertTrue(self.subscriber.wait_program_logs(1))
+
+    def test_signature_confirmation(self):
+        self.server.confirmed_set.add('sig-1')
+        with self.subscriber.watch_signature_list(['sig-1', 'sig-2'], 'confirmed') as watch:
+            self.assertFalse(watch.wait(0.2))
+            self.server.notify('signatureNotification', 3, {'context': {'slot': 78}, 'value': {'err': None}})
+            self.assertTrue(watch.wait(1))
+            self.assertEqual(watch.slot, 78)
+        self.assertEqual(self.subscriber._signature_dict, {})
+
+    def test_shared_notify_event(self):
+        notify_event = threading.Event()
+        with self.subscriber.watch_signature_list(['sig-1', 'sig-2'], 'confirmed', notify_event) as watch, \
+             self.subscriber.watch_signature_list(['sig-3'], 'confirmed', notify_event):
+            self.assertFalse(watch.wait_any(0.2))
+            # the notification about the signature of the other watch wakes up the waiter
+            self.server.notify('signatureNotification', 4, {'context': {'slot': 79}, 'value': {'err': None}})
+            self.assertTrue(watch.wait_any(1))
+            self.assertFalse(watch.wait_any(0))
+            self.assertFalse(watch.wait(0.1))
+        self.assertEqual(self.subscriber._signature_dict, {})
+
+    def test_disconnect(self):
+        self.subscriber.subscribe_program_logs('evm-loader', 'finalized')
+        with self.subscriber.watch_signature_list(['sig-1'], 'confirmed') as watch:
+            time.sleep(0.1)
+            self.server.disconnect()
+            start_time = time.monotonic()
+            self.assertFalse(watch.wait(5))
+            self.assertLess(time.monotonic() - start_time, 1)
+            self.assertFalse(watch.is_active)
+        self.assertTrue(self.subscriber.wait_program_logs(0))
+
+        # the logs subscription is restored after the reconnect
+        self.server.method_list.clear()
+        self.server.wait_connect()
+        self.assertTrue(self.subscriber.is_connected)
+        self.assertEqual(self.server.method_list, ['slotSubscribe', 'logsSubscribe'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -88,3 +88,13 @@ class TestChunkParser(unittest.TestCase):
         self.assertEqual(
             b'f\r\n{"key":"value"}\r\n0\r\n\r\n',
             ChunkParser.to_chunks(b'{"key":"value"}'))
+
+    def test_to_chunks_by_parts(self) -> None:
+        raw = ChunkParser.to_chunks(b'{"key":', is_last=False) + \
+            ChunkParser.to_chunks(b'', is_last=False) + \
+            ChunkParser.to_chunks(b'"value"}')
+        self.assertEqual(
+            b'7\r\n{"key":\r\n8\r\n"value"}\r\n0\r\n\r\n', raw)
+        self.parser.parse(raw)
+        self.assertEqual(self.parser.body, b'{"key":"value"}')
+        self.assertEqual(self.parser.state, chunkParserStates.COMPLETE)